@@ -0,0 +1,75 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Measures how long `az aks get-credentials` takes to merge a kubeconfig into a large existing one, against the
+previous implementation (a nested loop over the existing entries for every added entry).
+
+    python scripts/benchmarks/aks_kubeconfig_merge.py --existing 5000 --added 500
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'aks-preview'))
+
+from azext_aks_preview._helpers import _handle_merge  # pylint: disable=wrong-import-position
+
+KEYS = ('clusters', 'users', 'contexts')
+
+
+def _kubeconfig(names):
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'clusters': [{'name': n, 'cluster': {'server': 'https://{}.hcp.azmk8s.io:443'.format(n)}} for n in names],
+        'users': [{'name': 'clusterUser_rg_' + n, 'user': {'token': n}} for n in names],
+        'contexts': [{'name': n, 'context': {'cluster': n, 'user': 'clusterUser_rg_' + n}} for n in names],
+        'current-context': names[-1] if names else '',
+    }
+
+
+def _legacy_handle_merge(existing, addition, key):
+    for i in addition[key]:
+        for j in existing[key]:
+            if i['name'] == j['name']:
+                existing[key].remove(j)
+        existing[key].append(i)
+
+
+def _time(merge, existing, addition):
+    start = time.perf_counter()
+    for key in KEYS:
+        merge(existing, copy.deepcopy(addition), key)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--existing', type=int, default=2000, help='Number of clusters in the existing kubeconfig.')
+    parser.add_argument('--added', type=int, default=400, help='Number of clusters in the merged kubeconfig.')
+    args = parser.parse_args()
+
+    names = ['cluster{}'.format(n) for n in range(args.existing)]
+    # half of the added clusters replace existing ones, the rest are new
+    replaced = names[::max(args.existing * 2 // max(args.added, 1), 1)][:args.added // 2]
+    addition = _kubeconfig(replaced + ['new{}'.format(n) for n in range(args.added - len(replaced))])
+
+    existing = _kubeconfig(names)
+    elapsed = _time(lambda e, a, k: _handle_merge(e, a, k, True), existing, addition)
+    legacy = _kubeconfig(names)
+    legacy_elapsed = _time(_legacy_handle_merge, legacy, addition)
+
+    if existing != legacy:
+        raise SystemExit('the merged kubeconfigs differ')
+    print('merged {} entries into {}: {:.4f}s (nested loop: {:.4f}s)'.format(
+        len(addition['contexts']), args.existing, elapsed, legacy_elapsed))
+
+
+if __name__ == '__main__':
+    main()
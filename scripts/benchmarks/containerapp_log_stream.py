@@ -0,0 +1,61 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Measures how many lines per second `az containerapp logs show` writes for a recorded JSON log stream, against the
+previous implementation (one decode, four replaces and one print per line).
+
+    python scripts/benchmarks/containerapp_log_stream.py --lines 200000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'containerapp'))
+
+from azext_containerapp._log_stream_utils import write_log_stream  # pylint: disable=wrong-import-position
+
+# Shape of the lines returned by the logstream API with --format json
+RECORDED_LINE = (b'{"TimeStamp":"2022-10-05T20:54:01.6424211+00:00",'
+                 b'"Log":"Listening on \\u0022http://0.0.0.0:80\\u0022 \\u001B[32minfo\\u001B[0m"}')
+
+
+def _legacy_write(chunks, out):
+    for line in b"".join(chunks).splitlines():
+        if line:
+            print(line.decode("utf-8").replace("\\u0022", "\u0022").replace("\\u001B", "\u001B")
+                  .replace("\\u002B", "\u002B").replace("\\u0027", "\u0027"), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=50000, help='Number of log lines in the recorded stream.')
+    parser.add_argument('--chunk-size', type=int, default=16 * 1024, help='Size of the chunks the stream arrives in.')
+    args = parser.parse_args()
+
+    body = b"\n".join([RECORDED_LINE] * args.lines) + b"\n"
+    chunks = [body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size)]
+
+    out = io.StringIO()
+    start = time.perf_counter()
+    write_log_stream(chunks, out=out)
+    elapsed = time.perf_counter() - start
+
+    legacy_out = io.StringIO()
+    legacy_start = time.perf_counter()
+    _legacy_write(chunks, legacy_out)
+    legacy_elapsed = time.perf_counter() - legacy_start
+
+    if out.getvalue() != legacy_out.getvalue():
+        sys.exit('The outputs of the two implementations differ.')
+    print('logstream decode: {:,.0f} lines/sec (per-line replace/print: {:,.0f} lines/sec)'.format(
+        args.lines / elapsed, args.lines / legacy_elapsed))
+
+
+if __name__ == '__main__':
+    main()
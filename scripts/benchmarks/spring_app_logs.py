@@ -0,0 +1,81 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Measures how many lines per second `az spring app logs --format-json` writes for a recorded structured log stream,
+against the previous implementation (a defaultdict and a regex based logger shortening per line).
+
+    python scripts/benchmarks/spring_app_logs.py --lines 200000
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'spring'))
+
+from azext_spring._app_log_utils import build_log_formatter, write_app_log  # pylint: disable=wrong-import-position
+
+DEFAULT_FORMAT = '{timestamp} {level:>5} [{thread:>15.15}] {logger{39}:<40.40}: {message}\n{stackTrace}'
+
+# Shape of the lines returned by the logstream API when structured logging is enabled
+RECORDED_LINE = json.dumps({
+    'timestamp': '2022-10-05T20:54:01.642Z',
+    'level': 'INFO',
+    'thread': 'main',
+    'logger': 'org.springframework.cloud.netflix.eureka.config.DiscoveryClientOptionalArgsConfiguration',
+    'message': 'Eureka HTTP Client uses RestTemplate.',
+    'stackTrace': ''
+}).encode('utf-8')
+
+
+def _legacy_format_line(format_json, line):
+    logger_regex = re.compile(r'\blogger\{(\d+)\}')
+    length = int(logger_regex.search(format_json)[1])
+    format_json = logger_regex.sub('logger', format_json, 1)
+    record = defaultdict(str, n='\n', **json.loads(line))
+    logger_name = record['logger']
+    while len(logger_name) > length:
+        logger_name, count = re.subn(r'([^\.])[^\.]+\.', r'\1.', logger_name, 1)
+        if count < 1:
+            break
+    record['logger'] = logger_name[-length:]
+    return format_json.format_map(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=50000, help='Number of log lines in the recorded stream.')
+    parser.add_argument('--chunk-size', type=int, default=16 * 1024, help='Size of the chunks the stream arrives in.')
+    parser.add_argument('--format-json', default=DEFAULT_FORMAT, help='Format of the log lines, like --format-json.')
+    args = parser.parse_args()
+
+    body = b'\n'.join([RECORDED_LINE] * args.lines) + b'\n'
+    chunks = [body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size)]
+
+    out = io.StringIO()
+    start = time.perf_counter()
+    write_app_log(chunks, build_log_formatter(args.format_json), out=out)
+    elapsed = time.perf_counter() - start
+
+    legacy_out = io.StringIO()
+    legacy_start = time.perf_counter()
+    for line in body.splitlines(keepends=True):
+        print(_legacy_format_line(args.format_json, line.decode('utf-8')), end='', file=legacy_out)
+    legacy_elapsed = time.perf_counter() - legacy_start
+
+    if out.getvalue() != legacy_out.getvalue():
+        sys.exit('The outputs of the two implementations differ.')
+    print('format-json: {:,.0f} lines/sec (per-line formatter: {:,.0f} lines/sec)'.format(
+        args.lines / elapsed, args.lines / legacy_elapsed))
+
+
+if __name__ == '__main__':
+    main()
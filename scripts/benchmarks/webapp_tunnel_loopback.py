@@ -0,0 +1,112 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Measures the throughput and the connection setup latency of the `az webapp create-remote-connection` tunnel server,
+with an in-process echo standing in for the remote websocket.
+
+    python scripts/benchmarks/webapp_tunnel_loopback.py --payload-mb 64
+"""
+
+import argparse
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'webapp'))
+
+from azext_webapp.tunnel import TunnelServer  # pylint: disable=wrong-import-position
+
+
+class EchoWebSocket(object):
+    """Stands in for the remote tunnel: everything sent to it is received back."""
+    def __init__(self):
+        self.frames = queue.Queue()
+        self.closed = False
+
+    def send_binary(self, data):
+        self.frames.put(data)
+
+    def recv(self):
+        return self.frames.get()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.frames.put(b'')
+
+
+class LoopbackTunnelServer(TunnelServer):
+    def __init__(self):
+        super(LoopbackTunnelServer, self).__init__('127.0.0.1', 0, 'app', 'user', 'password')
+
+    def _create_websocket(self):
+        return EchoWebSocket()
+
+    def _enable_trace(self):
+        pass
+
+
+def _connect(server):
+    for attempt in range(100):
+        try:
+            return socket.create_connection(('127.0.0.1', server.local_port))
+        except ConnectionRefusedError:  # the server thread is not listening yet
+            if attempt == 99:
+                raise
+            time.sleep(0.01)
+
+
+def _recv_exactly(sock, size):
+    received = bytearray()
+    while len(received) < size:
+        chunk = sock.recv(min(1024 * 1024, size - len(received)))
+        if not chunk:
+            break
+        received += chunk
+    return bytes(received)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payload-mb', type=int, default=32, help='Size of the payload sent through the tunnel.')
+    parser.add_argument('--connections', type=int, default=20, help='Number of connections to time the setup of.')
+    args = parser.parse_args()
+
+    server = LoopbackTunnelServer()
+    threading.Thread(target=server.start_server, daemon=True).start()
+    try:
+        setup_times = []
+        for _ in range(args.connections):
+            start = time.perf_counter()
+            client = _connect(server)
+            client.sendall(b'x')
+            _recv_exactly(client, 1)
+            setup_times.append(time.perf_counter() - start)
+            client.close()
+
+        payload = b'\x00' * (args.payload_mb * 1024 * 1024)
+        client = _connect(server)
+        start = time.perf_counter()
+        sender = threading.Thread(target=client.sendall, args=(payload,))
+        sender.start()
+        received = _recv_exactly(client, len(payload))
+        sender.join()
+        elapsed = time.perf_counter() - start
+        client.close()
+    finally:
+        server.stop_server()
+
+    if len(received) != len(payload):
+        sys.exit('Received {} bytes out of {}.'.format(len(received), len(payload)))
+    print('tunnel loopback: {:.1f} MB/s, connection setup {:.2f} ms (median of {})'.format(
+        len(payload) / elapsed / 1024 / 1024, sorted(setup_times)[len(setup_times) // 2] * 1000, len(setup_times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -614,9 +614,18 @@ helps['aks upgrade'] = """
         - name: --aks-custom-headers
           type: string
           short-summary: Send custom headers. When specified, format should be Key1=Value1,Key2=Value2
+        - name: --max-concurrent-pools
+          type: int
+          short-summary: Maximum number of node pools whose node image is upgraded at the same time. Only valid with --node-image-only. Default is all node pools at once.
+        - name: --max-surge-nodes
+          type: int
+          short-summary: Maximum number of surge nodes, summed over the max surge settings of the node pools being upgraded, that may exist at the same time. Only valid with --node-image-only.
+          long-summary: Use this to keep a node image upgrade within your VM quota. A node pool whose surge alone exceeds the limit is upgraded on its own.
     examples:
       - name: Upgrade a existing managed cluster to a managed cluster snapshot.
         text: az aks upgrade -g MyResourceGroup -n MyManagedCluster --cluster-snapshot-id "/subscriptions/00000/resourceGroups/AnotherResourceGroup/providers/Microsoft.ContainerService/managedclustersnapshots/mysnapshot1"
+      - name: Upgrade the node image of all node pools, at most 5 pools and 20 surge nodes at a time.
+        text: az aks upgrade -g MyResourceGroup -n MyManagedCluster --node-image-only --max-concurrent-pools 5 --max-surge-nodes 20
 """
 
 helps['aks update'] = """
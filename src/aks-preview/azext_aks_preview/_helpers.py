@@ -6,8 +6,12 @@ import errno
 import os
 import platform
 import re
+import shutil
 import stat
 import tempfile
+import time
+from contextlib import contextmanager
+
 import yaml
 from typing import Any, List, TypeVar
 from azure.cli.command_modules.acs._helpers import map_azure_error_to_cli_error
@@ -68,8 +72,9 @@ def print_or_merge_credentials(path, kubeconfig, overwrite_existing, context_nam
     try:
         additional_file.write(kubeconfig)
         additional_file.flush()
-        _merge_kubernetes_configurations(
-            path, temp_path, overwrite_existing, context_name)
+        with _kubeconfig_lock(path):
+            _merge_kubernetes_configurations(
+                path, temp_path, overwrite_existing, context_name)
     except yaml.YAMLError as ex:
         logger.warning(
             'Failed to merge credentials to kube config file: %s', ex)
@@ -120,8 +125,7 @@ def _merge_kubernetes_configurations(existing_file, addition_file, replace, cont
                 existing_file_perms,
             )
 
-    with open(existing_file, 'w+') as stream:
-        yaml.safe_dump(existing, stream, default_flow_style=False)
+    _write_kubernetes_configuration(existing_file, existing)
 
     current_context = addition.get('current-context', 'UNKNOWN')
     msg = 'Merged "{}" as current context in {}'.format(
@@ -129,10 +133,65 @@ def _merge_kubernetes_configurations(existing_file, addition_file, replace, cont
     print(msg)
 
 
+# the libyaml based loader and dumper are several times faster on large kubeconfigs when available
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+KUBECONFIG_LOCK_TIMEOUT = 30
+
+
+@contextmanager
+def _kubeconfig_lock(path, timeout=KUBECONFIG_LOCK_TIMEOUT):
+    """Hold <path>.lock while the kubeconfig at path is read, merged and written.
+
+    This is the lock file kubectl uses for the same purpose, so concurrent merges (from the CLI or
+    kubectl) into the same kubeconfig wait for each other instead of losing updates.
+    """
+    lock_path = path + '.lock'
+    deadline = time.time() + timeout
+    delay = 0.05
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            break
+        except FileExistsError:
+            if time.time() > deadline:
+                raise CLIError('Timed out waiting for the kubeconfig lock {}. If no other process is updating '
+                               'the kubeconfig, delete the lock file and try again.'.format(lock_path))
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def _write_kubernetes_configuration(filename, config):
+    """Replace the kubeconfig at filename atomically, so readers never see a partially written file."""
+    # write through symlinks instead of replacing them
+    filename = os.path.realpath(filename)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.' + os.path.basename(filename) + '.')
+    try:
+        with os.fdopen(fd, 'w') as stream:
+            yaml.dump(config, stream, Dumper=_YAML_DUMPER, default_flow_style=False)
+            stream.flush()
+            os.fsync(stream.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp_path)
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def _load_kubernetes_configuration(filename):
     try:
         with open(filename) as stream:
-            return yaml.safe_load(stream)
+            return yaml.load(stream, Loader=_YAML_LOADER)
     except (IOError, OSError) as ex:
         if getattr(ex, 'errno', 0) == errno.ENOENT:
             raise CLIError('{} does not exist'.format(filename))
@@ -147,24 +206,29 @@ def _handle_merge(existing, addition, key, replace):
         existing[key] = addition[key]
         return
 
+    # index every position of each name, so merging is linear in the size of the kubeconfig
+    entries = existing[key]
+    index = {}
+    for position, entry in enumerate(entries):
+        index.setdefault(entry.get('name'), []).append(position)
+    replaced = set()
     for i in addition[key]:
-        for j in existing[key]:
-            if i['name'] == j['name']:
-                if replace or i == j:
-                    existing[key].remove(j)
-                else:
-                    msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
-                    overwrite = False
-                    try:
-                        overwrite = prompt_y_n(msg.format(i['name']))
-                    except NoTTYException:
-                        pass
-                    if overwrite:
-                        existing[key].remove(j)
-                    else:
-                        msg = 'A different object named {} already exists in {} in your kubeconfig file.'
-                        raise CLIError(msg.format(i['name'], key))
-        existing[key].append(i)
+        for position in index.get(i['name'], []):
+            j = entries[position]
+            if not replace and i != j:
+                msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
+                overwrite = False
+                try:
+                    overwrite = prompt_y_n(msg.format(i['name']))
+                except NoTTYException:
+                    pass
+                if not overwrite:
+                    msg = 'A different object named {} already exists in {} in your kubeconfig file.'
+                    raise CLIError(msg.format(i['name'], key))
+            replaced.add(position)
+        index[i['name']] = [len(entries)]
+        entries.append(i)
+    existing[key] = [entry for position, entry in enumerate(entries) if position not in replaced]
 
 
 def _fuzzy_match(query, arr):
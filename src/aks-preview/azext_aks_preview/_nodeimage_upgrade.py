@@ -0,0 +1,135 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import math
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+# how often the pollers of the running node pool upgrades are checked; the pollers themselves
+# poll the service on their own threads, so checking them is local and cheap
+NODE_IMAGE_UPGRADE_CHECK_INTERVAL = 5
+
+
+class NodePoolImageUpgrade:  # pylint: disable=too-few-public-methods
+    def __init__(self, name, surge_nodes):
+        self.name = name
+        self.surge_nodes = surge_nodes
+        self.poller = None
+        self.status = "Pending"
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self):
+        duration = self.duration
+        return {
+            "name": self.name,
+            "status": self.status,
+            "surgeNodes": self.surge_nodes,
+            "durationSeconds": round(duration, 1) if duration is not None else None,
+            "error": self.error,
+        }
+
+
+def get_surge_node_count(agent_pool_profile):
+    """Number of extra nodes a node image upgrade of the pool adds while it runs.
+
+    max_surge is either a node count ("3") or a percentage of the pool size ("33%"); AKS surges one node
+    when it is not set.
+    """
+    count = agent_pool_profile.count or 0
+    if not count:
+        return 0
+    upgrade_settings = getattr(agent_pool_profile, "upgrade_settings", None)
+    max_surge = getattr(upgrade_settings, "max_surge", None) if upgrade_settings else None
+    if not max_surge:
+        return 1
+    max_surge = str(max_surge).strip()
+    if max_surge.endswith("%"):
+        return max(1, math.ceil(count * float(max_surge[:-1]) / 100))
+    return int(max_surge)
+
+
+def _format_upgrade_table(upgrades):
+    header = ("NodePool", "Status", "SurgeNodes", "Duration")
+    rows = [header]
+    for upgrade in upgrades:
+        duration = upgrade.duration
+        rows.append((upgrade.name, upgrade.status, str(upgrade.surge_nodes),
+                     "{:.0f}s".format(duration) if duration is not None else ""))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def _can_start(upgrade, running, max_concurrent_pools, max_surge_nodes):
+    if max_concurrent_pools and len(running) >= max_concurrent_pools:
+        return False
+    if not running or not max_surge_nodes:
+        return True
+    return sum(r.surge_nodes for r in running) + upgrade.surge_nodes <= max_surge_nodes
+
+
+def upgrade_node_images(begin_upgrade, agent_pool_profiles, max_concurrent_pools=None, max_surge_nodes=None,
+                        check_interval=NODE_IMAGE_UPGRADE_CHECK_INTERVAL):
+    """Upgrade the node image of several node pools, running as many upgrades at once as the limits allow.
+
+    begin_upgrade(nodepool_name) starts the upgrade of one node pool and returns its poller. At most
+    max_concurrent_pools upgrades run at the same time and, when max_surge_nodes is set, the surge nodes of
+    the running upgrades stay within that budget (a pool that exceeds the budget on its own still runs, but
+    alone). A progress table is logged whenever the status of a pool changes. Returns the list of
+    NodePoolImageUpgrade in the order of agent_pool_profiles.
+    """
+    upgrades = [NodePoolImageUpgrade(p.name, get_surge_node_count(p)) for p in agent_pool_profiles]
+    pending = list(upgrades)
+    running = []
+    changed = False
+
+    while pending or running:
+        for upgrade in list(pending):
+            if not _can_start(upgrade, running, max_concurrent_pools, max_surge_nodes):
+                continue
+            pending.remove(upgrade)
+            upgrade.started = time.time()
+            try:
+                upgrade.poller = begin_upgrade(upgrade.name)
+                upgrade.status = "Upgrading"
+                running.append(upgrade)
+            except Exception as ex:  # pylint: disable=broad-except
+                upgrade.finished = time.time()
+                upgrade.status = "Failed"
+                upgrade.error = str(ex)
+            changed = True
+
+        if changed:
+            logger.warning("Node image upgrade progress:\n%s", _format_upgrade_table(upgrades))
+            changed = False
+        if not running:
+            continue
+
+        time.sleep(check_interval)
+        for upgrade in list(running):
+            if not upgrade.poller.done():
+                continue
+            running.remove(upgrade)
+            upgrade.finished = time.time()
+            try:
+                upgrade.poller.result()
+                upgrade.status = "Succeeded"
+            except Exception as ex:  # pylint: disable=broad-except
+                upgrade.status = "Failed"
+                upgrade.error = str(ex)
+            changed = True
+
+    if changed:
+        logger.warning("Node image upgrade progress:\n%s", _format_upgrade_table(upgrades))
+    return upgrades
@@ -101,6 +101,7 @@ from azext_aks_preview._validators import (
     validate_image_cleaner_enable_disable_mutually_exclusive,
     validate_cluster_id,
     validate_cluster_snapshot_id,
+    validate_node_image_upgrade_limits,
     validate_create_parameters,
     validate_crg_id,
     validate_eviction_policy,
@@ -516,6 +517,8 @@ def load_arguments(self, _):
     with self.argument_context('aks upgrade') as c:
         c.argument('kubernetes_version', completer=get_k8s_upgrades_completion_list)
         c.argument('cluster_snapshot_id', validator=validate_cluster_snapshot_id, is_preview=True)
+        c.argument('max_concurrent_pools', type=int, validator=validate_node_image_upgrade_limits, is_preview=True)
+        c.argument('max_surge_nodes', type=int, is_preview=True)
         c.argument('yes', options_list=['--yes', '-y'], help='Do not prompt for confirmation.', action='store_true')
 
     with self.argument_context('aks scale') as c:
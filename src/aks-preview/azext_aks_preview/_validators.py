@@ -609,6 +609,18 @@ def validate_cluster_snapshot_id(namespace):
                 "--cluster-snapshot-id is not a valid Azure resource ID.")
 
 
+def validate_node_image_upgrade_limits(namespace):
+    for option, value in (("--max-concurrent-pools", namespace.max_concurrent_pools),
+                          ("--max-surge-nodes", namespace.max_surge_nodes)):
+        if value is None:
+            continue
+        if not namespace.node_image_only:
+            raise RequiredArgumentMissingError(
+                "{} can only be used together with --node-image-only.".format(option))
+        if value < 1:
+            raise InvalidArgumentValueError("{} must be at least 1.".format(option))
+
+
 def validate_host_group_id(namespace):
     if namespace.host_group_id:
         from msrestazure.tools import is_valid_resource_id
@@ -9,8 +9,10 @@ import json
 import os
 import subprocess
 import tempfile
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from azure.cli.core.commands.client_factory import get_mgmt_service_client, get_subscription_id
 from azure.cli.command_modules.acs.custom import k8s_install_kubelogin
 from azure.cli.command_modules.acs._params import _get_default_install_location
@@ -377,6 +379,103 @@ def _is_windows_hpc_supported(agent_pools):
     return all([version.parse(v) >= version.parse("1.23.0") for v in windows_k8s_versions])
 
 
+DIAGNOSTICS_WAIT_TIMEOUT = 120  # seconds to wait for the periscope pods to write the results of every ready node
+DIAGNOSTICS_FETCH_WORKERS = 16
+_DIAGNOSTIC_NAME_PREFIX = "aks-periscope-diagnostic-"
+
+
+def _parse_node_diagnostic(apd):
+    """Return (network config rows, network status rows) of a periscope diagnostic resource,
+    or None if its results are not written yet."""
+    spec = apd.get("spec") or {}
+    network_config = spec.get("networkconfig")
+    network_status = spec.get("networkoutbound")
+    if not network_config or not network_status:
+        return None
+    return json.loads('[' + network_config + ']'), json.loads(network_status)
+
+
+def _collect_node_diagnostics(apds, ready_nodes, results):
+    for apd in apds:
+        apd_name = (apd.get("metadata") or {}).get("name", "")
+        node_name = apd_name[len(_DIAGNOSTIC_NAME_PREFIX):]
+        if not apd_name.startswith(_DIAGNOSTIC_NAME_PREFIX) or node_name not in ready_nodes or node_name in results:
+            continue
+        diagnostic = _parse_node_diagnostic(apd)
+        if diagnostic:
+            logger.debug('Diagnostics of node %s: %s', node_name, diagnostic)
+            results[node_name] = diagnostic
+
+
+def _print_diagnostics_progress(results, ready_nodes):
+    print("Got {} diagnostic results for {} ready nodes\r".format(len(results), len(ready_nodes)), end='')
+
+
+def _list_node_diagnostics(temp_kubeconfig_path, ready_nodes, results):
+    try:
+        apds = subprocess.check_output(
+            ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get", "apd", "-n", CONST_PERISCOPE_NAMESPACE, "-o", "json"],
+            universal_newlines=True)
+    except subprocess.CalledProcessError as err:
+        raise CLIError(err.output)
+    _collect_node_diagnostics(json.loads(apds).get("items", []), ready_nodes, results)
+
+
+def _watch_node_diagnostics(temp_kubeconfig_path, ready_nodes, results, timeout):
+    """Update results from a watch on the periscope diagnostic resources until every ready node
+    has results, the watch ends or the timeout expires."""
+    process = subprocess.Popen(
+        ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get", "apd", "-n", CONST_PERISCOPE_NAMESPACE,
+         "-o", "json", "--watch"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        # every event is one indented json object whose closing brace is the only unindented line
+        lines = []
+        for line in process.stdout:
+            lines.append(line)
+            if line.rstrip() != "}":
+                continue
+            _collect_node_diagnostics([json.loads("".join(lines))], ready_nodes, results)
+            lines = []
+            _print_diagnostics_progress(results, ready_nodes)
+            if len(results) >= len(ready_nodes):
+                break
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+
+
+def _fetch_node_diagnostic(temp_kubeconfig_path, node_name):
+    try:
+        apd = subprocess.check_output(
+            ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get", "apd", _DIAGNOSTIC_NAME_PREFIX + node_name,
+             "-n", CONST_PERISCOPE_NAMESPACE, "-o", "json"],
+            universal_newlines=True, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        # not created yet
+        return None
+    return json.loads(apd)
+
+
+def _fetch_node_diagnostics(temp_kubeconfig_path, ready_nodes, results, deadline):
+    """Fetch the diagnostic resource of every node still missing results, several nodes at a time,
+    until all of them have results or the deadline passes."""
+    delay = 2
+    with ThreadPoolExecutor(max_workers=DIAGNOSTICS_FETCH_WORKERS) as executor:
+        while True:
+            missing = [node_name for node_name in ready_nodes if node_name not in results]
+            apds = executor.map(lambda node_name: _fetch_node_diagnostic(temp_kubeconfig_path, node_name), missing)
+            _collect_node_diagnostics([apd for apd in apds if apd], ready_nodes, results)
+            _print_diagnostics_progress(results, ready_nodes)
+            if len(results) >= len(ready_nodes) or time.time() + delay > deadline:
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, 10)
+
+
 def _display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-many-statements
     if not which('kubectl'):
         raise CLIError('Can not find kubectl executable in PATH')
@@ -387,7 +486,7 @@ def _display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-m
         universal_newlines=True)
     logger.debug(nodes)
     node_lines = nodes.splitlines()
-    ready_nodes = {}
+    ready_nodes = []
     for node_line in node_lines:
         columns = node_line.split()
         logger.debug(node_line)
@@ -395,7 +494,7 @@ def _display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-m
             logger.warning(
                 "Node %s is not Ready. Current state is: %s.", columns[0], columns[1])
         else:
-            ready_nodes[columns[0]] = False
+            ready_nodes.append(columns[0])
 
     logger.debug('There are %s ready nodes in the cluster',
                  str(len(ready_nodes)))
@@ -404,65 +503,29 @@ def _display_diagnostics_report(temp_kubeconfig_path):   # pylint: disable=too-m
         logger.warning(
             'No nodes are ready in the current cluster. Diagnostics info might not be available.')
 
+    # one list call picks up every result that is already written, the rest is waited for with a watch
+    deadline = time.time() + DIAGNOSTICS_WAIT_TIMEOUT
+    results = {}
+    _list_node_diagnostics(temp_kubeconfig_path, ready_nodes, results)
+    _print_diagnostics_progress(results, ready_nodes)
+    if len(results) < len(ready_nodes):
+        try:
+            _watch_node_diagnostics(temp_kubeconfig_path, ready_nodes, results, max(deadline - time.time(), 0))
+        except (OSError, ValueError) as ex:
+            logger.debug('Watching the diagnostic results failed: %s', ex)
+    if len(results) < len(ready_nodes) and time.time() < deadline:
+        _fetch_node_diagnostics(temp_kubeconfig_path, ready_nodes, results, deadline)
+    print()
+
     network_config_array = []
     network_status_array = []
-    apds_created = False
-
-    max_retry = 10
-    for retry in range(0, max_retry):
-        if not apds_created:
-            apd = subprocess.check_output(
-                ["kubectl", "--kubeconfig", temp_kubeconfig_path, "get",
-                    "apd", "-n", CONST_PERISCOPE_NAMESPACE, "--no-headers"],
-                universal_newlines=True
-            )
-            apd_lines = apd.splitlines()
-            if apd_lines and 'No resources found' in apd_lines[0]:
-                apd_lines.pop(0)
-
-            print("Got {} diagnostic results for {} ready nodes{}\r".format(len(apd_lines),
-                                                                            len(ready_nodes),
-                                                                            '.' * retry), end='')
-            if len(apd_lines) < len(ready_nodes):
-                time.sleep(3)
-            else:
-                apds_created = True
-                print()
-        else:
-            for node_name in ready_nodes:
-                if ready_nodes[node_name]:
-                    continue
-                apdName = "aks-periscope-diagnostic-" + node_name
-                try:
-                    network_config = subprocess.check_output(
-                        ["kubectl", "--kubeconfig", temp_kubeconfig_path,
-                         "get", "apd", apdName, "-n",
-                         CONST_PERISCOPE_NAMESPACE, "-o=jsonpath={.spec.networkconfig}"],
-                        universal_newlines=True)
-                    logger.debug('Dns status for node %s is %s',
-                                 node_name, network_config)
-                    network_status = subprocess.check_output(
-                        ["kubectl", "--kubeconfig", temp_kubeconfig_path,
-                         "get", "apd", apdName, "-n",
-                         CONST_PERISCOPE_NAMESPACE, "-o=jsonpath={.spec.networkoutbound}"],
-                        universal_newlines=True)
-                    logger.debug('Network status for node %s is %s',
-                                 node_name, network_status)
-
-                    if not network_config or not network_status:
-                        print("The diagnostics information for node {} is not ready yet. "
-                              "Will try again in 10 seconds.".format(node_name))
-                        time.sleep(10)
-                        break
-
-                    network_config_array += json.loads(
-                        '[' + network_config + ']')
-                    network_status_object = json.loads(network_status)
-                    network_status_array += _format_diag_status(
-                        network_status_object)
-                    ready_nodes[node_name] = True
-                except subprocess.CalledProcessError as err:
-                    raise CLIError(err.output)
+    for node_name in ready_nodes:
+        if node_name not in results:
+            logger.warning("The diagnostics information for node %s is not ready yet.", node_name)
+            continue
+        network_config, network_status = results[node_name]
+        network_config_array += network_config
+        network_status_array += _format_diag_status(network_status)
 
     print()
     if network_config_array:
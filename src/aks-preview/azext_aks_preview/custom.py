@@ -90,6 +90,7 @@ from azext_aks_preview._consts import (
     CONST_VIRTUAL_NODE_SUBNET_NAME,
 )
 from azext_aks_preview._helpers import print_or_merge_credentials, get_nodepool_snapshot_by_snapshot_id, get_cluster_snapshot_by_snapshot_id
+from azext_aks_preview._nodeimage_upgrade import upgrade_node_images
 from azext_aks_preview._podidentity import (
     _ensure_managed_identity_operator_permission,
     _ensure_pod_identity_addon_is_enabled,
@@ -997,6 +998,8 @@ def aks_upgrade(cmd,    # pylint: disable=unused-argument, too-many-return-state
                 node_image_only=False,
                 cluster_snapshot_id=None,
                 aks_custom_headers=None,
+                max_concurrent_pools=None,
+                max_surge_nodes=None,
                 yes=False):
     msg = 'Kubernetes may be unavailable during cluster upgrades.\n Are you sure you want to perform this operation?'
     if not yes and not prompt_y_n(msg, default="n"):
@@ -1021,15 +1024,30 @@ def aks_upgrade(cmd,    # pylint: disable=unused-argument, too-many-return-state
         if not yes and not prompt_y_n(msg, default="n"):
             return None
 
+        if vmas_cluster:
+            raise CLIError('This cluster is not using VirtualMachineScaleSets. Node image upgrade only operation '
+                           'can only be applied on VirtualMachineScaleSets cluster.')
+
         # This only provide convenience for customer at client side so they can run az aks upgrade to upgrade all
         # nodepools of a cluster. The SDK only support upgrade single nodepool at a time.
-        for agent_pool_profile in instance.agent_pool_profiles:
-            if vmas_cluster:
-                raise CLIError('This cluster is not using VirtualMachineScaleSets. Node image upgrade only operation '
-                               'can only be applied on VirtualMachineScaleSets cluster.')
-            agent_pool_client = cf_agent_pools(cmd.cli_ctx)
-            _upgrade_single_nodepool_image_version(
-                True, agent_pool_client, resource_group_name, name, agent_pool_profile.name, None)
+        agent_pool_client = cf_agent_pools(cmd.cli_ctx)
+        if no_wait:
+            for agent_pool_profile in instance.agent_pool_profiles:
+                _upgrade_single_nodepool_image_version(
+                    True, agent_pool_client, resource_group_name, name, agent_pool_profile.name, None)
+            mc = client.get(resource_group_name, name)
+            return _remove_nulls([mc])[0]
+
+        upgrades = upgrade_node_images(
+            lambda nodepool_name: _upgrade_single_nodepool_image_version(
+                False, agent_pool_client, resource_group_name, name, nodepool_name, None),
+            instance.agent_pool_profiles,
+            max_concurrent_pools=max_concurrent_pools,
+            max_surge_nodes=max_surge_nodes)
+        failed = [u for u in upgrades if u.status == "Failed"]
+        if failed:
+            raise CLIError("Node image upgrade failed for node pool(s): {}".format(
+                "; ".join("{}: {}".format(u.name, u.error) for u in failed)))
         mc = client.get(resource_group_name, name)
         return _remove_nulls([mc])[0]
 
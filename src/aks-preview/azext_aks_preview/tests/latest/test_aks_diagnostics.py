@@ -3,7 +3,11 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
+import subprocess
 import unittest
+from unittest import mock
+
 import azext_aks_preview.aks_diagnostics as commands
 
 
@@ -27,5 +31,58 @@ class TestGenerateContainerName(unittest.TestCase):
         self.assertEqual(expected_container_name, trim_container_name)
 
 
+def _apd(node_name, ready=True):
+    spec = {}
+    if ready:
+        spec = {"networkconfig": json.dumps({"HostName": node_name}),
+                "networkoutbound": json.dumps([{"Type": "DNS", "Status": "Connected"}])}
+    return {"metadata": {"name": "aks-periscope-diagnostic-" + node_name}, "spec": spec}
+
+
+class TestCollectNodeDiagnostics(unittest.TestCase):
+    def test_collect_skips_unready_and_unknown_nodes(self):
+        results = {}
+        commands._collect_node_diagnostics([_apd("node1"), _apd("node2", ready=False), _apd("node3")],
+                                           ["node1", "node2"], results)
+        self.assertEqual(list(results), ["node1"])
+        self.assertEqual(results["node1"][0], [{"HostName": "node1"}])
+
+    def test_fetch_node_diagnostics_in_parallel_until_ready(self):
+        attempts = {}
+
+        def check_output(args, **kwargs):
+            node_name = args[5][len("aks-periscope-diagnostic-"):]
+            attempts[node_name] = attempts.get(node_name, 0) + 1
+            if node_name == "node2" and attempts[node_name] == 1:
+                raise subprocess.CalledProcessError(1, args)
+            return json.dumps(_apd(node_name))
+
+        results = {"node1": ([], [])}
+        with mock.patch("azext_aks_preview.aks_diagnostics.subprocess.check_output", side_effect=check_output), \
+                mock.patch("azext_aks_preview.aks_diagnostics.time.sleep"):
+            commands._fetch_node_diagnostics("kubeconfig", ["node1", "node2", "node3"], results, float("inf"))
+
+        self.assertEqual(sorted(results), ["node1", "node2", "node3"])
+        self.assertEqual(attempts, {"node2": 2, "node3": 1})
+
+    def test_watch_only_waits_for_the_time_left(self):
+        class Stop(Exception):
+            pass
+
+        def list_node_diagnostics(*_):
+            clock[0] += 50  # the list call took 50 seconds
+
+        clock = [1000.0]
+        with mock.patch("azext_aks_preview.aks_diagnostics.which", return_value="kubectl"), \
+                mock.patch("azext_aks_preview.aks_diagnostics.subprocess.check_output", return_value="node1 Ready\n"), \
+                mock.patch("azext_aks_preview.aks_diagnostics.time.time", side_effect=lambda: clock[0]), \
+                mock.patch("azext_aks_preview.aks_diagnostics._list_node_diagnostics", side_effect=list_node_diagnostics), \
+                mock.patch("azext_aks_preview.aks_diagnostics._watch_node_diagnostics", side_effect=Stop) as watch:
+            with self.assertRaises(Stop):
+                commands._display_diagnostics_report("kubeconfig")
+
+        watch.assert_called_once_with("kubeconfig", ["node1"], {}, commands.DIAGNOSTICS_WAIT_TIMEOUT - 50)
+
+
 if __name__ == "__main__":
     unittest.main()
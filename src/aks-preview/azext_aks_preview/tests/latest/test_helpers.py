@@ -3,16 +3,25 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 from unittest.mock import Mock, patch
 
+import yaml
 from azext_aks_preview._helpers import (
     _fuzzy_match,
+    _handle_merge,
+    _kubeconfig_lock,
+    _merge_kubernetes_configurations,
     get_cluster_snapshot,
     get_cluster_snapshot_by_snapshot_id,
     get_nodepool_snapshot,
     get_nodepool_snapshot_by_snapshot_id,
 )
+from knack.util import CLIError
 from azure.cli.core.azclierror import (
     BadRequestError,
     InvalidArgumentValueError,
@@ -111,5 +120,103 @@ class GetManagedClusterSnapShotTestCase(unittest.TestCase):
             get_cluster_snapshot("mock_cli_ctx", "test_sub", "mock_rg", "mock_snapshot_name")
 
 
+
+def _kubeconfig(names):
+    return {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"name": n, "cluster": {"server": "https://{}.hcp.azmk8s.io:443".format(n)}} for n in names],
+        "users": [{"name": "clusterUser_rg_" + n, "user": {"token": n}} for n in names],
+        "contexts": [{"name": n, "context": {"cluster": n, "user": "clusterUser_rg_" + n}} for n in names],
+        "current-context": names[-1] if names else "",
+    }
+
+
+class HandleMergeTestCase(unittest.TestCase):
+    def test_merge_replaces_by_name_and_appends_new_entries(self):
+        existing = _kubeconfig(["a", "b", "c"])
+        addition = _kubeconfig(["b", "d"])
+        addition["clusters"][0]["cluster"]["server"] = "https://new"
+
+        _handle_merge(existing, addition, "clusters", True)
+
+        self.assertEqual([c["name"] for c in existing["clusters"]], ["a", "c", "b", "d"])
+        self.assertEqual(existing["clusters"][2]["cluster"]["server"], "https://new")
+
+    def test_merge_conflict_without_replace(self):
+        existing = _kubeconfig(["a"])
+        addition = _kubeconfig(["a"])
+        addition["users"][0]["user"]["token"] = "other"
+
+        with patch("azext_aks_preview._helpers.prompt_y_n", return_value=False):
+            with self.assertRaises(CLIError):
+                _handle_merge(existing, addition, "users", False)
+        # identical entries are merged without prompting
+        _handle_merge(existing, _kubeconfig(["a"]), "contexts", False)
+        self.assertEqual(len(existing["contexts"]), 1)
+
+    def test_merge_replaces_every_duplicate_of_a_name(self):
+        existing = _kubeconfig(["a", "b", "a", "c", "a"])
+        addition = _kubeconfig(["a"])
+        addition["clusters"][0]["cluster"]["server"] = "https://new"
+
+        _handle_merge(existing, addition, "clusters", True)
+
+        self.assertEqual([c["name"] for c in existing["clusters"]], ["b", "c", "a"])
+        self.assertEqual(existing["clusters"][2]["cluster"]["server"], "https://new")
+
+    def test_merge_prompts_for_a_different_duplicate(self):
+        existing = _kubeconfig(["a", "a"])
+        existing["users"][1]["user"]["token"] = "other"
+
+        with patch("azext_aks_preview._helpers.prompt_y_n", return_value=False):
+            with self.assertRaises(CLIError):
+                _handle_merge(existing, _kubeconfig(["a"]), "users", False)
+
+
+class MergeKubernetesConfigurationsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "config")
+        with open(self.path, "w") as stream:
+            yaml.safe_dump(_kubeconfig(["existing"]), stream)
+        os.chmod(self.path, 0o600)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _merge(self, names):
+        addition_path = os.path.join(self.directory, "-".join(names) + ".yaml")
+        with open(addition_path, "w") as stream:
+            yaml.safe_dump(_kubeconfig(names), stream)
+        with _kubeconfig_lock(self.path):
+            _merge_kubernetes_configurations(self.path, addition_path, True)
+
+    def test_concurrent_merges_keep_every_context(self):
+        threads = [threading.Thread(target=self._merge, args=(["cluster{}".format(n)],)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(self.path) as stream:
+            merged = yaml.safe_load(stream)
+        self.assertEqual(len(merged["contexts"]), 9)
+        self.assertFalse(os.path.exists(self.path + ".lock"))
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(["config"] + ["cluster{}.yaml".format(n) for n in range(8)]))
+
+    @unittest.skipIf(os.name == "nt", "symlinks need extra privileges on Windows")
+    def test_merge_writes_through_symlink(self):
+        link = os.path.join(self.directory, "link")
+        os.symlink(self.path, link)
+        self.path, target = link, self.path
+
+        self._merge(["linked"])
+
+        self.assertTrue(os.path.islink(link))
+        with open(target) as stream:
+            self.assertEqual(yaml.safe_load(stream)["current-context"], "linked")
+
+
 if __name__ == "__main__":
     unittest.main()
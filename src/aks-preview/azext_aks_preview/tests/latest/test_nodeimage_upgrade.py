@@ -0,0 +1,82 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from azext_aks_preview._nodeimage_upgrade import get_surge_node_count, upgrade_node_images
+
+
+def _pool(name, count, max_surge=None):
+    return SimpleNamespace(name=name, count=count, upgrade_settings=SimpleNamespace(max_surge=max_surge))
+
+
+class FakePoller:
+    def __init__(self, name, polls, error=None):
+        self.name = name
+        self.polls = polls
+        self.error = error
+
+    def done(self):
+        self.polls -= 1
+        return self.polls <= 0
+
+    def result(self):
+        if self.error:
+            raise self.error
+
+
+@mock.patch("azext_aks_preview._nodeimage_upgrade.time.sleep")
+class TestNodeImageUpgrade(unittest.TestCase):
+    def test_surge_node_count(self, _):
+        self.assertEqual(get_surge_node_count(_pool("a", 10)), 1)
+        self.assertEqual(get_surge_node_count(_pool("a", 10, "33%")), 4)
+        self.assertEqual(get_surge_node_count(_pool("a", 10, "3")), 3)
+        self.assertEqual(get_surge_node_count(_pool("a", 0, "3")), 0)
+        self.assertEqual(get_surge_node_count(SimpleNamespace(name="a", count=5, upgrade_settings=None)), 1)
+
+    def test_respects_concurrency_and_surge_limits(self, _):
+        pools = [_pool("big", 10, "50%"), _pool("small1", 3), _pool("small2", 3), _pool("small3", 3)]
+        running = set()
+        peak = {"pools": 0, "surge": 0}
+        surge = {p.name: get_surge_node_count(p) for p in pools}
+
+        class TrackingPoller(FakePoller):
+            def done(self):
+                finished = super().done()
+                if finished:
+                    running.discard(self.name)
+                return finished
+
+        def begin_upgrade(name):
+            running.add(name)
+            peak["pools"] = max(peak["pools"], len(running))
+            peak["surge"] = max(peak["surge"], sum(surge[n] for n in running))
+            return TrackingPoller(name, 2)
+
+        upgrades = upgrade_node_images(begin_upgrade, pools, max_concurrent_pools=2, max_surge_nodes=5)
+
+        self.assertEqual([u.status for u in upgrades], ["Succeeded"] * 4)
+        self.assertLessEqual(peak["pools"], 2)
+        self.assertLessEqual(peak["surge"], 5)
+
+    def test_failures_do_not_stop_other_pools(self, _):
+        pools = [_pool("nodepool1", 3), _pool("nodepool2", 3), _pool("nodepool3", 3)]
+
+        def begin_upgrade(name):
+            if name == "nodepool1":
+                raise ValueError("quota exceeded")
+            return FakePoller(name, 1, RuntimeError("upgrade failed") if name == "nodepool2" else None)
+
+        upgrades = upgrade_node_images(begin_upgrade, pools)
+
+        self.assertEqual([u.to_dict()["status"] for u in upgrades], ["Failed", "Failed", "Succeeded"])
+        self.assertEqual(upgrades[0].error, "quota exceeded")
+        self.assertEqual(upgrades[1].error, "upgrade failed")
+        self.assertIsNotNone(upgrades[2].to_dict()["durationSeconds"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,6 @@
 # --------------------------------------------------------------------------------------------
 
 import os
-import re
 import json
 import shlex
 import hashlib
@@ -18,6 +17,7 @@ from azext_alias._const import (
     GLOBAL_CONFIG_DIR,
     ALIAS_FILE_NAME,
     ALIAS_HASH_FILE_NAME,
+    ALIAS_INDEX_FILE_NAME,
     COLLIDED_ALIAS_FILE_NAME,
     CONFIG_PARSING_ERROR,
     DEBUG_MSG,
@@ -29,12 +29,16 @@ from azext_alias.util import (
     is_alias_command,
     cache_reserved_commands,
     get_config_parser,
-    build_tab_completion_table
+    build_tab_completion_table,
+    build_alias_index,
+    build_reserved_command_trie,
+    get_reserved_words_by_level
 )
 
 
 GLOBAL_ALIAS_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_FILE_NAME)
 GLOBAL_ALIAS_HASH_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_HASH_FILE_NAME)
+GLOBAL_ALIAS_INDEX_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_INDEX_FILE_NAME)
 GLOBAL_COLLIDED_ALIAS_PATH = os.path.join(GLOBAL_CONFIG_DIR, COLLIDED_ALIAS_FILE_NAME)
 
 logger = get_logger(__name__)
@@ -48,8 +52,40 @@ class AliasManager(object):
         self.collided_alias = defaultdict(list)
         self.alias_config_str = ''
         self.alias_config_hash = ''
-        self.load_alias_table()
-        self.load_alias_hash()
+        self.alias_config_stat = None
+        self.alias_index = {}
+        # The alias config file is only parsed if the alias index is out of date
+        if not self.load_alias_index():
+            self.load_alias_table()
+            self.load_alias_hash()
+
+    def load_alias_index(self):
+        """
+        Load the alias index if it is up to date with the alias config file.
+
+        Returns:
+            True if the alias index has been loaded. False if the alias config file has been changed
+            since the alias index was written, in which case the alias index has to be rebuilt.
+        """
+        try:
+            alias_config_stat = os.stat(GLOBAL_ALIAS_PATH)
+        except OSError:
+            return False
+        # The alias index is invalidated by the modification time and the size of the alias config file
+        self.alias_config_stat = [alias_config_stat.st_mtime, alias_config_stat.st_size]
+
+        try:
+            with open(GLOBAL_ALIAS_INDEX_PATH, 'r') as alias_index_file:
+                alias_index = json.loads(alias_index_file.read())
+        except Exception:  # pylint: disable=broad-except
+            return False
+        if alias_index.get('stat') != self.alias_config_stat:
+            return False
+
+        self.alias_index = alias_index
+        self.collided_alias = alias_index['collided_alias']
+        telemetry.set_number_of_aliases_registered(alias_index['count'])
+        return True
 
     def load_alias_table(self):
         """
@@ -118,18 +154,13 @@ class AliasManager(object):
         Returns:
             A list of transformed commands according to the alias configuration file.
         """
-        if self.parse_error():
-            # Write an empty hash so next run will check the config file against the entire command table again
-            AliasManager.write_alias_config_hash(empty_hash=True)
-            return args
-
-        # Only load the entire command table if it detects changes in the alias config
-        if self.detect_alias_config_change():
-            self.load_full_command_table()
-            self.collided_alias = AliasManager.build_collision_table(self.alias_table.sections())
-            build_tab_completion_table(self.alias_table)
-        else:
-            self.load_collided_alias()
+        if not self.alias_index:
+            if self.parse_error():
+                # Write an empty hash so next run will check the config file against the entire command table again
+                if self.alias_config_hash:
+                    AliasManager.write_alias_config_hash(empty_hash=True)
+                return args
+            self.build_alias_index()
 
         transformed_commands = []
         alias_iter = enumerate(args, 1)
@@ -145,15 +176,16 @@ class AliasManager(object):
                 continue
 
             full_alias = self.get_full_alias(alias)
+            alias_command = self.alias_index['commands'].get(full_alias)
 
-            if self.alias_table.has_option(full_alias, 'command'):
-                cmd_derived_from_alias = self.alias_table.get(full_alias, 'command')
+            if alias_command:
+                cmd_derived_from_alias = alias_command['command']
                 telemetry.set_alias_hit(full_alias)
             else:
                 transformed_commands.append(alias)
                 continue
 
-            pos_args_table = build_pos_args_table(full_alias, args, alias_index)
+            pos_args_table = build_pos_args_table(full_alias, args, alias_index) if alias_command['pos_args'] else {}
             if pos_args_table:
                 logger.debug(POS_ARG_DEBUG_MSG, full_alias, cmd_derived_from_alias, pos_args_table)
                 transformed_commands += render_template(cmd_derived_from_alias, pos_args_table)
@@ -177,22 +209,43 @@ class AliasManager(object):
         Returns:
             The full alias (with the placeholders, if any).
         """
-        if query in self.alias_table.sections():
-            return query
+        return self.alias_index['aliases'].get(query, '')
 
-        return next((section for section in self.alias_table.sections() if section.split()[0] == query), '')
+    def build_alias_index(self):
+        """
+        Build the alias index from the alias table and save it next to the alias config file.
+
+        The collision table and the tab completion table are only rebuilt if the content of the alias config file
+        has changed, in which case the new alias config hash and collided aliases are written as well.
+        """
+        # Only load the reserved commands if it detects changes in the alias config
+        if self.detect_alias_config_change():
+            self.load_full_command_table()
+            self.collided_alias = AliasManager.build_collision_table(self.alias_table.sections())
+            build_tab_completion_table(self.alias_table)
+            AliasManager.write_alias_config_hash(self.alias_config_hash)
+            AliasManager.write_collided_alias(self.collided_alias)
+        else:
+            self.load_collided_alias()
+
+        self.alias_index = build_alias_index(self.alias_table)
+        self.alias_index['collided_alias'] = self.collided_alias
+        if self.alias_config_stat:
+            self.alias_index['stat'] = self.alias_config_stat
+            AliasManager.write_alias_index(self.alias_index)
 
     def load_full_command_table(self):
         """
-        Perform a full load of the command table to get all the reserved command words.
+        Get all the reserved command words, from the reserved commands file if Azure CLI and its extensions
+        have not changed since it was written. Otherwise, perform a full load of the command table.
         """
         load_cmd_tbl_func = self.kwargs.get('load_cmd_tbl_func', lambda _: {})
-        cache_reserved_commands(load_cmd_tbl_func)
-        telemetry.set_full_command_table_loaded()
+        if cache_reserved_commands(load_cmd_tbl_func):
+            telemetry.set_full_command_table_loaded()
 
     def post_transform(self, args):
         """
-        Inject environment variables, and write hash to alias hash file after transforming alias to commands.
+        Inject environment variables after transforming alias to commands.
 
         Args:
             args: A list of args to post-transform.
@@ -208,9 +261,6 @@ class AliasManager(object):
             else:
                 post_transform_commands.append(os.path.expandvars(arg))
 
-        AliasManager.write_alias_config_hash(self.alias_config_hash)
-        AliasManager.write_collided_alias(self.collided_alias)
-
         return post_transform_commands
 
     def parse_error(self):
@@ -246,14 +296,14 @@ class AliasManager(object):
             levels: the amount of levels we tranverse through the command table tree.
         """
         collided_alias = defaultdict(list)
+        reserved_command_trie = build_reserved_command_trie(azext_alias.cached_reserved_commands)
+        reserved_words_by_level = get_reserved_words_by_level(reserved_command_trie, levels)
         for alias in aliases:
             # Only care about the first word in the alias because alias
             # cannot have spaces (unless they have positional arguments)
             word = alias.split()[0]
-            for level in range(1, levels + 1):
-                collision_regex = r'^{}{}($|\s)'.format(r'([a-z\-]*\s)' * (level - 1), word.lower())
-                if list(filter(re.compile(collision_regex).match, azext_alias.cached_reserved_commands)) \
-                        and level not in collided_alias[word]:
+            for level, reserved_words in enumerate(reserved_words_by_level, 1):
+                if word.lower() in reserved_words and level not in collided_alias[word]:
                     collided_alias[word].append(level)
 
         telemetry.set_collided_aliases(list(collided_alias.keys()))
@@ -282,6 +332,14 @@ class AliasManager(object):
             collided_alias_file.truncate()
             collided_alias_file.write(json.dumps(collided_alias_dict))
 
+    @staticmethod
+    def write_alias_index(alias_index):
+        """
+        Write the alias index into the alias index file.
+        """
+        with open(GLOBAL_ALIAS_INDEX_PATH, 'w') as alias_index_file:
+            alias_index_file.write(json.dumps(alias_index))
+
     @staticmethod
     def process_exception_message(exception):
         """
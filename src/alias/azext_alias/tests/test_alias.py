@@ -8,6 +8,8 @@
 import os
 import sys
 import shlex
+import shutil
+import tempfile
 import unittest
 from unittest.mock import Mock, patch
 from six.moves import configparser
@@ -148,13 +150,16 @@ TEST_FN = {
 class TestAlias(unittest.TestCase):
 
     def setUp(self):
-        azext_alias.alias.AliasManager.write_alias_config_hash = Mock()
-        azext_alias.alias.AliasManager.write_collided_alias = Mock()
-        self.patcher = patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS)
-        self.patcher.start()
+        self.patchers = []
+        self.patchers.append(patch.multiple(azext_alias.alias.AliasManager, write_alias_config_hash=Mock(),
+                                            write_collided_alias=Mock(), write_alias_index=Mock()))
+        self.patchers.append(patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS))
+        for patcher in self.patchers:
+            patcher.start()
 
     def tearDown(self):
-        self.patcher.stop()
+        for patcher in self.patchers:
+            patcher.stop()
 
     def test_build_empty_collision_table(self):
         alias_manager = self.get_alias_manager(DEFAULT_MOCK_ALIAS_STRING)
@@ -197,8 +202,87 @@ class TestAlias(unittest.TestCase):
         self.assertEqual(shlex.split(value[1]), alias_manager.post_transform(shlex.split(value[0])))
 
 
+class TestAliasIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config_dir = tempfile.mkdtemp()
+        self.patchers = []
+        for path_name, file_name in [('GLOBAL_ALIAS_PATH', 'alias'),
+                                     ('GLOBAL_ALIAS_HASH_PATH', 'alias.sha1'),
+                                     ('GLOBAL_ALIAS_INDEX_PATH', 'alias_index'),
+                                     ('GLOBAL_COLLIDED_ALIAS_PATH', 'collided_alias')]:
+            self.patchers.append(patch('azext_alias.alias.{}'.format(path_name), os.path.join(self.mock_config_dir, file_name)))
+        self.patchers.append(patch('azext_alias.util.GLOBAL_ALIAS_TAB_COMP_TABLE_PATH', os.path.join(self.mock_config_dir, 'alias_tab_completion')))
+        self.patchers.append(patch('azext_alias.util.GLOBAL_RESERVED_COMMANDS_PATH', os.path.join(self.mock_config_dir, 'alias_reserved_commands')))
+        self.patchers.append(patch.multiple(azext_alias.alias.AliasManager,
+                                            write_alias_config_hash=Mock(wraps=azext_alias.alias.AliasManager.write_alias_config_hash),
+                                            write_collided_alias=Mock(wraps=azext_alias.alias.AliasManager.write_collided_alias),
+                                            write_alias_index=Mock(wraps=azext_alias.alias.AliasManager.write_alias_index)))
+        for patcher in self.patchers:
+            patcher.start()
+        self.load_cmd_tbl_func = Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        self.write_alias_config(COLLISION_MOCK_ALIAS_STRING + DEFAULT_MOCK_ALIAS_STRING)
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.mock_config_dir)
+
+    def test_alias_index_is_reused_until_alias_config_changes(self):
+        self.assertEqual(shlex.split('account list-locations'), self.transform('account list-locations'))
+        self.assertEqual(1, self.load_cmd_tbl_func.call_count)
+        self.assertWrites(alias_config_hash=1, collided_alias=1, alias_index=1)
+
+        # Nothing changed: the alias config file is neither parsed nor checked for collisions, and nothing is written
+        with patch('azext_alias.alias.get_config_parser') as get_config_parser:
+            self.assertEqual(shlex.split('network dns list'), self.transform('dns list'))
+            self.assertEqual(shlex.split('iot test1test test2test'), self.transform('pos-arg-1 test1 test2'))
+        self.assertFalse(get_config_parser.return_value.read.called)
+        self.assertWrites()
+
+        # A new alias is picked up without loading the entire command table again
+        self.write_alias_config(COLLISION_MOCK_ALIAS_STRING + DEFAULT_MOCK_ALIAS_STRING + '[new]\ncommand = group delete\n')
+        self.assertEqual(shlex.split('group delete -n test'), self.transform('new -n test'))
+        self.assertEqual(shlex.split('account list-locations'), self.transform('account list-locations'))
+        self.assertEqual(1, self.load_cmd_tbl_func.call_count)
+        self.assertWrites(alias_config_hash=1, collided_alias=1, alias_index=1)
+
+    def test_alias_index_survives_unchanged_alias_config(self):
+        self.transform('ac')
+        self.assertWrites(alias_config_hash=1, collided_alias=1, alias_index=1)
+
+        # Rewriting the same aliases only refreshes the alias index
+        self.write_alias_config(COLLISION_MOCK_ALIAS_STRING + DEFAULT_MOCK_ALIAS_STRING, mtime=1)
+        self.assertEqual(['monitor'], self.transform('mn'))
+        self.assertWrites(alias_index=1)
+
+    def transform(self, command):
+        with patch('azext_alias.cached_reserved_commands', []):
+            alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=self.load_cmd_tbl_func)
+            return alias_manager.transform(shlex.split(command))
+
+    def write_alias_config(self, alias_config_str, mtime=None):
+        with open(azext_alias.alias.GLOBAL_ALIAS_PATH, 'w') as alias_config_file:
+            alias_config_file.write(alias_config_str)
+        if mtime:
+            os.utime(azext_alias.alias.GLOBAL_ALIAS_PATH, (mtime, mtime))
+
+    def assertWrites(self, alias_config_hash=0, collided_alias=0, alias_index=0):
+        alias_manager_cls = azext_alias.alias.AliasManager
+        self.assertEqual(alias_config_hash, alias_manager_cls.write_alias_config_hash.call_count)
+        self.assertEqual(collided_alias, alias_manager_cls.write_collided_alias.call_count)
+        self.assertEqual(alias_index, alias_manager_cls.write_alias_index.call_count)
+        for write_func in [alias_manager_cls.write_alias_config_hash,
+                           alias_manager_cls.write_collided_alias,
+                           alias_manager_cls.write_alias_index]:
+            write_func.reset_mock()
+
+
 class MockAliasManager(azext_alias.alias.AliasManager):
 
+    def load_alias_index(self):
+        return False
+
     def load_alias_table(self):
 
         self.alias_config_str = self.kwargs.get('mock_alias_str', '')
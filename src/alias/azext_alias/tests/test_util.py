@@ -11,8 +11,16 @@ import tempfile
 import unittest
 from unittest import mock
 
-from azext_alias.util import remove_pos_arg_placeholders, build_tab_completion_table, get_config_parser
-from azext_alias._const import ALIAS_TAB_COMP_TABLE_FILE_NAME
+import azext_alias
+from azext_alias.util import (
+    remove_pos_arg_placeholders,
+    build_tab_completion_table,
+    get_config_parser,
+    cache_reserved_commands,
+    build_reserved_command_trie,
+    get_reserved_words_by_level
+)
+from azext_alias._const import ALIAS_TAB_COMP_TABLE_FILE_NAME, RESERVED_COMMANDS_FILE_NAME
 from azext_alias.tests._const import TEST_RESERVED_COMMANDS
 
 
@@ -22,6 +30,7 @@ class TestUtil(unittest.TestCase):
         self.mock_config_dir = tempfile.mkdtemp()
         self.patchers = []
         self.patchers.append(mock.patch('azext_alias.util.GLOBAL_ALIAS_TAB_COMP_TABLE_PATH', os.path.join(self.mock_config_dir, ALIAS_TAB_COMP_TABLE_FILE_NAME)))
+        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_RESERVED_COMMANDS_PATH', os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME)))
         self.patchers.append(mock.patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS))
         for patcher in self.patchers:
             patcher.start()
@@ -61,6 +70,30 @@ class TestUtil(unittest.TestCase):
             'account list-locations': ['']
         }, tab_completion_table)
 
+    def test_cache_reserved_commands(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+
+        with mock.patch('azext_alias.cached_reserved_commands', []):
+            self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        # A new invocation reads the reserved commands file instead of loading the entire command table
+        with mock.patch('azext_alias.cached_reserved_commands', []):
+            self.assertFalse(cache_reserved_commands(load_cmd_tbl_func))
+            self.assertEqual(TEST_RESERVED_COMMANDS, azext_alias.cached_reserved_commands)
+        self.assertEqual(1, load_cmd_tbl_func.call_count)
+
+        # Installing, updating or removing an extension invalidates the reserved commands file
+        with mock.patch('azext_alias.cached_reserved_commands', []), \
+                mock.patch('azext_alias.util.get_reserved_commands_key', return_value='new key'):
+            self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        self.assertEqual(2, load_cmd_tbl_func.call_count)
+
+    def test_get_reserved_words_by_level(self):
+        reserved_command_trie = build_reserved_command_trie(TEST_RESERVED_COMMANDS)
+        self.assertEqual([
+            {'account', 'network', 'storage', 'group'},
+            {'list-locations', 'dns', 'account', 'delete'}
+        ], get_reserved_words_by_level(reserved_command_trie, levels=2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,7 @@
 
 # pylint: disable=wrong-import-order,import-error,relative-import
 
+import os
 import re
 import sys
 import json
@@ -17,7 +18,12 @@ from six.moves.urllib.request import urlretrieve
 from knack.util import CLIError
 
 import azext_alias
-from azext_alias._const import COLLISION_CHECK_LEVEL_DEPTH, GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, ALIAS_FILE_URL_ERROR
+from azext_alias._const import (
+    COLLISION_CHECK_LEVEL_DEPTH,
+    GLOBAL_ALIAS_TAB_COMP_TABLE_PATH,
+    GLOBAL_RESERVED_COMMANDS_PATH,
+    ALIAS_FILE_URL_ERROR
+)
 
 
 def get_config_parser():
@@ -72,11 +78,93 @@ def cache_reserved_commands(load_cmd_tbl_func):
     This cache saves the entire command table globally so custom.py can have access to it.
     Alter this cache through cache_reserved_commands(load_cmd_tbl_func) in util.py.
 
+    The reserved commands are also saved to the reserved commands file, so the entire command table
+    is only loaded again after Azure CLI or one of its extensions is installed, updated or removed.
+
     Args:
         load_cmd_tbl_func: The function to load the entire command table.
+
+    Returns:
+        True if the entire command table had to be loaded.
+    """
+    if azext_alias.cached_reserved_commands:
+        return False
+
+    reserved_commands_key = get_reserved_commands_key()
+    try:
+        with open(GLOBAL_RESERVED_COMMANDS_PATH, 'r') as reserved_commands_file:
+            reserved_commands = json.loads(reserved_commands_file.read())
+        if reserved_commands['key'] == reserved_commands_key:
+            azext_alias.cached_reserved_commands = reserved_commands['commands']
+            return False
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+    azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+    with open(GLOBAL_RESERVED_COMMANDS_PATH, 'w') as reserved_commands_file:
+        reserved_commands_file.write(json.dumps({
+            'key': reserved_commands_key,
+            'commands': azext_alias.cached_reserved_commands
+        }))
+    return True
+
+
+def get_reserved_commands_key():
+    """
+    Get the key that identifies the set of reserved commands: the version of Azure CLI and the last time
+    the extensions directory was modified.
+
+    Returns:
+        A string that changes whenever the reserved commands may have changed.
+    """
+    from azure.cli.core import __version__ as core_version
+    from azure.cli.core.extension import EXTENSIONS_DIR
+
+    extensions_mtime = os.path.getmtime(EXTENSIONS_DIR) if os.path.isdir(EXTENSIONS_DIR) else 0
+    return '{} {}'.format(core_version, extensions_mtime)
+
+
+def build_reserved_command_trie(reserved_commands):
+    """
+    Build a trie of the reserved commands, where each level of the trie is a level of the command tree.
+
+    For example:
+    {
+        "account": {"list-locations": {}},
+        "storage": {"account": {"create": {}}}
+    }
+
+    Args:
+        reserved_commands: The list of reserved commands.
+
+    Returns:
+        The reserved command trie.
     """
-    if not azext_alias.cached_reserved_commands:
-        azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+    reserved_command_trie = {}
+    for reserved_command in reserved_commands:
+        node = reserved_command_trie
+        for word in reserved_command.split():
+            node = node.setdefault(word, {})
+    return reserved_command_trie
+
+
+def get_reserved_words_by_level(reserved_command_trie, levels=COLLISION_CHECK_LEVEL_DEPTH):
+    """
+    Get the words used at each level of the reserved command trie.
+
+    Args:
+        reserved_command_trie: The reserved command trie.
+        levels: the amount of levels we tranverse through the reserved command trie.
+
+    Returns:
+        A list with the set of reserved words of level 1 at index 0, level 2 at index 1 and so on.
+    """
+    reserved_words_by_level = []
+    nodes = [reserved_command_trie]
+    for _ in range(levels):
+        reserved_words_by_level.append(set(word for node in nodes for word in node))
+        nodes = [child for node in nodes for child in node.values()]
+    return reserved_words_by_level
 
 
 def remove_pos_arg_placeholders(alias_command):
@@ -180,6 +268,40 @@ def reduce_alias_table(alias_table):
             yield (alias, alias_table.get(alias, 'command'))
 
 
+def build_alias_index(alias_table):
+    """
+    Compile the alias table into an index that resolves an alias in constant time.
+
+    "aliases" maps every alias and the first word of every alias to the full alias, an exact match taking
+    precedence over the first word of another alias. "commands" maps every full alias to the command that
+    it points to, and whether the alias takes positional arguments.
+
+    For example:
+    {
+        "aliases": {"ls": "ls", "cp": "cp {{ arg_1 }}", "cp {{ arg_1 }}": "cp {{ arg_1 }}"},
+        "commands": {
+            "ls": {"command": "list -otable", "pos_args": false},
+            "cp {{ arg_1 }}": {"command": "storage blob copy start-batch --source-uri {{ arg_1 }}", "pos_args": true}
+        }
+    }
+
+    Args:
+        alias_table: The alias table.
+
+    Returns:
+        The alias index.
+    """
+    aliases = {alias: alias for alias in alias_table.sections()}
+    for alias in alias_table.sections():
+        aliases.setdefault(alias.split()[0], alias)
+
+    commands = {}
+    for alias, command in reduce_alias_table(alias_table):
+        commands[alias] = {'command': command, 'pos_args': bool(re.search(r'{{|}}', alias))}
+
+    return {'count': len(alias_table.sections()), 'aliases': aliases, 'commands': commands}
+
+
 def retrieve_file_from_url(url):
     """
     Retrieve a file from an URL
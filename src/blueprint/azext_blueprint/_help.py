@@ -80,6 +80,7 @@ helps['blueprint list'] = """
 helps['blueprint import'] = """
     type: command
     short-summary: Import a blueprint definition and artifacts from a directoy of json files.
+    long-summary: Only the artifacts whose content changed are uploaded, and only the artifacts missing from the directory are deleted.
     examples:
       - name: Import a blueprint definition and artifacts
         text: |-
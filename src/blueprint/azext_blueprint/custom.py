@@ -5,14 +5,23 @@
 
 # pylint: disable=unused-argument
 
+import hashlib
 import json
 import os
 import stat
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from knack.log import get_logger
 from knack.util import CLIError
 from azure.cli.core.util import user_confirmation
 from azure.core.exceptions import HttpResponseError
 from ._client_factory import cf_artifacts
 
+logger = get_logger(__name__)
+
+# upper bound of the artifact requests sent at the same time by import and export
+MAX_CONCURRENT_ARTIFACT_REQUESTS = 8
+
 
 def import_blueprint_with_artifacts(cmd,
                                     client,
@@ -49,6 +58,9 @@ def import_blueprint_with_artifacts(cmd,
         for filename in os.listdir(os.path.join(input_path, 'artifacts')):
             artifact_name = filename.split('.')[0]
             filepath = os.path.join(input_path, 'artifacts', filename)
+            # skip the temporary files an interrupted export may have left behind
+            if filename.endswith('.tmp'):
+                continue
             # skip hidden files
             if ((os.name != 'nt' and not filename.startswith('.')) or
                     (os.name == 'nt' and not bool(os.stat(filepath).st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN))):
@@ -65,20 +77,73 @@ def import_blueprint_with_artifacts(cmd,
     blueprint_response = client.create_or_update(resource_scope=resource_scope,
                                                  blueprint_name=blueprint_name,
                                                  blueprint=body)
-    # delete old artifacts
-    artifacts = artifact_client.list(resource_scope=resource_scope, blueprint_name=blueprint_name)
-    for artifact in artifacts:
+    # only upload the changed artifacts and delete the removed ones
+    existing_artifacts = {artifact.name: artifact.serialize() for artifact in
+                          artifact_client.list(resource_scope=resource_scope, blueprint_name=blueprint_name)}
+    _sync_artifacts(artifact_client, resource_scope, blueprint_name, art_dict, existing_artifacts)
+
+    return blueprint_response
+
+
+def _artifact_content_hash(artifact):
+    # the name, id and type of an artifact are not part of its content
+    content = {key: value for key, value in artifact.items() if key not in ('id', 'name', 'type')}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _artifact_dependency_waves(artifacts, names):
+    # artifacts are created after the artifacts they depend on, when those are also being created
+    remaining = set(names)
+    while remaining:
+        wave = [name for name in remaining
+                if not remaining.intersection(artifacts[name].get('properties', {}).get('dependsOn') or []) - {name}]
+        # let the service reject circular dependencies
+        wave = wave or list(remaining)
+        remaining.difference_update(wave)
+        yield sorted(wave)
+
+
+def _sync_artifacts(artifact_client, resource_scope, blueprint_name, artifacts, existing_artifacts):
+    changed = [name for name, artifact in artifacts.items()
+               if name not in existing_artifacts or
+               _artifact_content_hash(artifact) != _artifact_content_hash(existing_artifacts[name])]
+    removed = [name for name in existing_artifacts if name not in artifacts]
+    logger.warning('Importing %d changed artifacts and deleting %d removed artifacts, %d artifacts are unchanged.',
+                   len(changed), len(removed), len(artifacts) - len(changed))
+
+    def delete_artifact(artifact_name):
         artifact_client.delete(resource_scope=resource_scope,
                                blueprint_name=blueprint_name,
-                               artifact_name=artifact.name)
-    # create new artifacts
-    for artifact_name, artifact in art_dict.items():
+                               artifact_name=artifact_name)
+
+    def create_artifact(artifact_name):
+        existing_artifact = existing_artifacts.get(artifact_name)
+        if existing_artifact is not None and existing_artifact.get('kind') != artifacts[artifact_name].get('kind'):
+            # the kind of an artifact cannot be updated
+            delete_artifact(artifact_name)
         artifact_client.create_or_update(resource_scope=resource_scope,
                                          blueprint_name=blueprint_name,
                                          artifact_name=artifact_name,
-                                         artifact=artifact)
+                                         artifact=artifacts[artifact_name])
 
-    return blueprint_response
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ARTIFACT_REQUESTS) as executor:
+        # removed artifacts are deleted last, once no new artifact depends on them
+        for wave in _artifact_dependency_waves(artifacts, changed):
+            _run_artifact_requests(executor, create_artifact, wave, 'import')
+        _run_artifact_requests(executor, delete_artifact, removed, 'delete')
+
+
+def _run_artifact_requests(executor, func, artifact_names, action):
+    futures = {executor.submit(func, artifact_name): artifact_name for artifact_name in artifact_names}
+    errors = {}
+    for future in as_completed(futures):
+        try:
+            future.result()
+        except HttpResponseError as ex:
+            errors[futures[future]] = ex.message
+    if errors:
+        raise CLIError('Unable to {} artifacts: {}'.format(
+            action, '; '.join('{}: {}'.format(name, errors[name]) for name in sorted(errors))))
 
 
 def create_blueprint(client,
@@ -174,29 +239,47 @@ def export_blueprint_with_artifacts(cmd, client, blueprint_name, output_path,
                       f" with the name {blueprint_name}. Would you like to continue?"
         user_confirmation(user_prompt)
 
-    try:
-        blueprint = client.get(resource_scope=resource_scope, blueprint_name=blueprint_name)
-        serialized_blueprint = blueprint.serialize()
-    except HttpResponseError as error:
-        raise CLIError('Unable to export blueprint: {}'.format(str(error.message))) from error
-
-    os.makedirs(artifacts_location, exist_ok=True)
-
-    with open(blueprint_file_location, 'w') as f:
-        json.dump(serialized_blueprint, f, indent=4)
-
     artifact_client = cf_artifacts(cmd.cli_ctx)
-    available_artifacts = artifact_client.list(resource_scope=resource_scope, blueprint_name=blueprint_name)
-
-    for artifact in available_artifacts:
-        artifact_file_location = os.path.join(artifacts_location, artifact.name + '.json')
-        serialized_artifact = artifact.serialize()
-        with open(artifact_file_location, 'w') as f:
-            json.dump(serialized_artifact, f, indent=4)
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ARTIFACT_REQUESTS) as executor:
+        # the artifacts are listed while the blueprint is fetched
+        available_artifacts = executor.submit(
+            lambda: list(artifact_client.list(resource_scope=resource_scope, blueprint_name=blueprint_name)))
+        try:
+            blueprint = client.get(resource_scope=resource_scope, blueprint_name=blueprint_name)
+            serialized_blueprint = blueprint.serialize()
+        except HttpResponseError as error:
+            raise CLIError('Unable to export blueprint: {}'.format(str(error.message))) from error
+
+        os.makedirs(artifacts_location, exist_ok=True)
+        _write_json_file(blueprint_file_location, serialized_blueprint)
+
+        list(executor.map(lambda artifact: _write_json_file(
+            os.path.join(artifacts_location, artifact.name + '.json'), artifact.serialize()),
+            available_artifacts.result()))
 
     return blueprint
 
 
+def _write_json_file(file_path, content):
+    # files are replaced atomically, and left untouched when their content did not change
+    data = json.dumps(content, indent=4)
+    if os.path.isfile(file_path):
+        with open(file_path) as f:
+            if f.read() == data:
+                return
+    # import skips '.tmp' files, so a temporary file left behind is never read as an artifact
+    temp_path = os.path.join(os.path.dirname(file_path),
+                             '.{}.{}.tmp'.format(os.path.basename(file_path), uuid.uuid4().hex))
+    try:
+        with open(temp_path, 'x') as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def delete_blueprint_artifact(client, blueprint_name, artifact_name,
                               management_group=None, subscription=None, resource_scope=None):
     return client.delete(resource_scope=resource_scope,
@@ -0,0 +1,141 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from knack.util import CLIError
+from azure.core.exceptions import HttpResponseError
+
+from azext_blueprint.custom import export_blueprint_with_artifacts, import_blueprint_with_artifacts
+
+
+def _artifact(kind='template', depends_on=None, value='1'):
+    properties = {'template': {'value': value}}
+    if depends_on:
+        properties['dependsOn'] = depends_on
+    return {'kind': kind, 'properties': properties}
+
+
+class FakeArtifact(object):
+    def __init__(self, name, content):
+        self.name = name
+        self.content = content
+
+    def serialize(self):
+        return dict(self.content, name=self.name, id='/providers/Microsoft.Blueprint/artifacts/' + self.name,
+                    type='Microsoft.Blueprint/blueprints/artifacts')
+
+
+class FakeArtifactClient(object):
+    def __init__(self, artifacts, fail=()):
+        self.artifacts = {name: FakeArtifact(name, content) for name, content in artifacts.items()}
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def list(self, resource_scope, blueprint_name):
+        return list(self.artifacts.values())
+
+    def create_or_update(self, resource_scope, blueprint_name, artifact_name, artifact):
+        if artifact_name in self.fail:
+            raise HttpResponseError(message='InvalidArtifact')
+        with self.lock:
+            self.calls.append(('create', artifact_name))
+            self.artifacts[artifact_name] = FakeArtifact(artifact_name, artifact)
+
+    def delete(self, resource_scope, blueprint_name, artifact_name):
+        with self.lock:
+            self.calls.append(('delete', artifact_name))
+            del self.artifacts[artifact_name]
+
+
+class BlueprintArtifactsTest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def _write_input(self, artifacts):
+        os.makedirs(os.path.join(self.test_dir, 'input', 'artifacts'))
+        with open(os.path.join(self.test_dir, 'input', 'blueprint.json'), 'w') as f:
+            json.dump({'properties': {'targetScope': 'subscription'}}, f)
+        for name, artifact in artifacts.items():
+            with open(os.path.join(self.test_dir, 'input', 'artifacts', name + '.json'), 'w') as f:
+                json.dump(artifact, f)
+
+    def _import(self, artifact_client):
+        with mock.patch('azext_blueprint.custom.cf_artifacts', return_value=artifact_client):
+            import_blueprint_with_artifacts(mock.MagicMock(), mock.MagicMock(), 'bp',
+                                            os.path.join(self.test_dir, 'input'), resource_scope='scope')
+
+    def test_import_only_sends_changed_and_removed_artifacts(self):
+        self._write_input({'unchanged': _artifact(), 'changed': _artifact(value='2'),
+                           'kindChanged': _artifact(kind='policyAssignment'),
+                           'added': _artifact(depends_on=['addedBase']), 'addedBase': _artifact()})
+        artifact_client = FakeArtifactClient({'unchanged': _artifact(), 'changed': _artifact(),
+                                              'kindChanged': _artifact(), 'removed': _artifact()})
+
+        self._import(artifact_client)
+
+        calls = artifact_client.calls
+        self.assertEqual(sorted(calls), [('create', 'added'), ('create', 'addedBase'), ('create', 'changed'),
+                                         ('create', 'kindChanged'), ('delete', 'kindChanged'), ('delete', 'removed')])
+        self.assertLess(calls.index(('create', 'addedBase')), calls.index(('create', 'added')))
+        self.assertLess(calls.index(('delete', 'kindChanged')), calls.index(('create', 'kindChanged')))
+        self.assertEqual(calls[-1], ('delete', 'removed'))
+
+        # importing the same files again is a no-op
+        artifact_client.calls = []
+        self._import(artifact_client)
+        self.assertEqual(artifact_client.calls, [])
+
+    def test_import_reports_the_failed_artifacts(self):
+        self._write_input({'good': _artifact(), 'bad': _artifact()})
+        artifact_client = FakeArtifactClient({}, fail=['bad'])
+        with self.assertRaisesRegex(CLIError, 'Unable to import artifacts: bad: InvalidArtifact'):
+            self._import(artifact_client)
+        self.assertEqual(artifact_client.calls, [('create', 'good')])
+
+    def test_import_skips_temporary_files(self):
+        self._write_input({'art': _artifact()})
+        with open(os.path.join(self.test_dir, 'input', 'artifacts', '.art.json.0123abcd.tmp'), 'w') as f:
+            f.write('{"partial": ')
+        artifact_client = FakeArtifactClient({})
+
+        with mock.patch('os.name', 'nt'), mock.patch('os.stat', return_value=mock.MagicMock(st_file_attributes=0)):
+            self._import(artifact_client)
+
+        self.assertEqual(artifact_client.calls, [('create', 'art')])
+
+    def test_export_writes_files_atomically(self):
+        artifact_client = FakeArtifactClient({'art{}'.format(i): _artifact(value=str(i)) for i in range(20)})
+        client = mock.MagicMock()
+        client.get.return_value.serialize.return_value = {'properties': {'targetScope': 'subscription'}}
+        artifacts_dir = os.path.join(self.test_dir, 'bp', 'artifacts')
+
+        with mock.patch('azext_blueprint.custom.cf_artifacts', return_value=artifact_client):
+            export_blueprint_with_artifacts(mock.MagicMock(), client, 'bp', self.test_dir, skip_confirmation=True)
+            self.assertEqual(sorted(os.listdir(artifacts_dir)), sorted('art{}.json'.format(i) for i in range(20)))
+            with open(os.path.join(artifacts_dir, 'art3.json')) as f:
+                self.assertEqual(json.load(f), artifact_client.artifacts['art3'].serialize())
+
+            # unchanged files are not rewritten
+            mtime = os.stat(os.path.join(artifacts_dir, 'art3.json')).st_mtime_ns
+            artifact_client.artifacts['art4'].content = _artifact(value='new')
+            with mock.patch('os.replace', wraps=os.replace) as replace:
+                export_blueprint_with_artifacts(mock.MagicMock(), client, 'bp', self.test_dir,
+                                                skip_confirmation=True)
+            replace.assert_called_once_with(mock.ANY, os.path.join(artifacts_dir, 'art4.json'))
+            self.assertEqual(os.stat(os.path.join(artifacts_dir, 'art3.json')).st_mtime_ns, mtime)
+            self.assertFalse([name for name in os.listdir(artifacts_dir) if name.startswith('.')])
+
+
+if __name__ == '__main__':
+    unittest.main()
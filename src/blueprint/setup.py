@@ -16,7 +16,7 @@ except ImportError:
 
 # TODO: Confirm this is the right version number you want and it matches your
 # HISTORY.rst entry.
-VERSION = '0.3.1'
+VERSION = '0.3.2'
 
 
 # The full list of classifiers is available at
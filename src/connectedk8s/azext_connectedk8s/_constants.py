@@ -73,6 +73,7 @@ Failed_To_Merge_Credentials_Fault_Type = "failed-to-merge-credentials"
 Kubeconfig_Failed_To_Load_Fault_Type = "failed-to-load-kubeconfig-file"
 Failed_To_Load_K8s_Configuration_Fault_Type = "failed-to-load-kubernetes-configuration"
 Failed_To_Merge_Kubeconfig_File = "failed-to-merge-kubeconfig-file"
+Kubeconfig_Lock_Timeout = 30
 Download_Helm_Fault_Type = "helm-client-download-error"
 Create_HelmExe_Fault_Type = "helm-client-create-error"
 Extract_HelmExe_Fault_Type = "helm-client-extract-error"
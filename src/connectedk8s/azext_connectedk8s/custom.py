@@ -14,6 +14,7 @@ import time
 import subprocess
 from subprocess import Popen, PIPE, run, STDOUT, call, DEVNULL
 from base64 import b64encode, b64decode
+from contextlib import contextmanager
 import stat
 import platform
 from xml.dom.pulldom import default_bufsize
@@ -1565,10 +1566,65 @@ def disable_cluster_connect(cmd, client, resource_group_name, cluster_name, kube
                                    True, True)
 
 
+# the libyaml based loader and dumper are several times faster on large kubeconfigs when available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+@contextmanager
+def kubeconfig_lock(path, timeout=consts.Kubeconfig_Lock_Timeout):
+    """Hold <path>.lock while the kubeconfig at path is read, merged and written.
+
+    This is the lock file kubectl uses for the same purpose, so concurrent merges (from the CLI or
+    kubectl) into the same kubeconfig wait for each other instead of losing updates.
+    """
+    lock_path = path + '.lock'
+    deadline = time.time() + timeout
+    delay = 0.05
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            break
+        except FileExistsError:
+            if time.time() > deadline:
+                telemetry.set_exception(exception='Timed out waiting for the kubeconfig lock', fault_type=consts.Failed_To_Merge_Kubeconfig_File,
+                                        summary='Timed out waiting for the kubeconfig lock')
+                raise FileOperationError('Timed out waiting for the kubeconfig lock {}. If no other process is updating '
+                                         'the kubeconfig, delete the lock file and try again.'.format(lock_path))
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def write_kubernetes_configuration(filename, config):
+    """Replace the kubeconfig at filename atomically, so readers never see a partially written file."""
+    # write through symlinks instead of replacing them
+    filename = os.path.realpath(filename)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.' + os.path.basename(filename) + '.')
+    try:
+        with os.fdopen(fd, 'w') as stream:
+            yaml.dump(config, stream, Dumper=YAML_DUMPER, default_flow_style=False)
+            stream.flush()
+            os.fsync(stream.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp_path)
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def load_kubernetes_configuration(filename):
     try:
         with open(filename) as stream:
-            return yaml.safe_load(stream)
+            return yaml.load(stream, Loader=YAML_LOADER)
     except (IOError, OSError) as ex:
         if getattr(ex, 'errno', 0) == errno.ENOENT:
             telemetry.set_exception(exception=ex, fault_type=consts.Kubeconfig_Failed_To_Load_Fault_Type,
@@ -1609,7 +1665,8 @@ def print_or_merge_credentials(path, kubeconfig, overwrite_existing, context_nam
     try:
         additional_file.write(kubeconfig)
         additional_file.flush()
-        merge_kubernetes_configurations(path, temp_path, overwrite_existing, context_name)
+        with kubeconfig_lock(path):
+            merge_kubernetes_configurations(path, temp_path, overwrite_existing, context_name)
     except yaml.YAMLError as ex:
         logger.warning('Failed to merge credentials to kube config file: %s', ex)
     finally:
@@ -1662,13 +1719,12 @@ def merge_kubernetes_configurations(existing_file, addition_file, replace, conte
             logger.warning('%s has permissions "%s".\nIt should be readable and writable only by its owner.',
                            existing_file, existing_file_perms)
 
-    with open(existing_file, 'w+') as stream:
-        try:
-            yaml.safe_dump(existing, stream, default_flow_style=False)
-        except Exception as e:
-            telemetry.set_exception(exception=e, fault_type=consts.Failed_To_Merge_Kubeconfig_File,
-                                    summary='Exception while merging the kubeconfig file')
-            raise CLIInternalError('Exception while merging the kubeconfig file.' + str(e))
+    try:
+        write_kubernetes_configuration(existing_file, existing)
+    except Exception as e:
+        telemetry.set_exception(exception=e, fault_type=consts.Failed_To_Merge_Kubeconfig_File,
+                                summary='Exception while merging the kubeconfig file')
+        raise CLIInternalError('Exception while merging the kubeconfig file.' + str(e))
 
     current_context = addition.get('current-context', 'UNKNOWN')
     msg = 'Merged "{}" as current context in {}'.format(current_context, existing_file)
@@ -1682,34 +1738,34 @@ def handle_merge(existing, addition, key, replace):
         existing[key] = addition[key]
         return
 
-    i = addition[key][0]
-    temp_list = []
-    for j in existing[key]:
-        remove_flag = False
-        if not i.get('name', False) or not j.get('name', False):
-            continue
-        if i['name'] == j['name']:
-            if replace or i == j:
-                remove_flag = True
-            else:
+    # index the existing entries by name, so merging is linear in the size of the kubeconfig
+    entries = existing[key]
+    index = {}
+    for position, entry in enumerate(entries):
+        if entry.get('name', False):
+            index.setdefault(entry['name'], position)
+    replaced = set()
+    for i in addition[key]:
+        position = index.get(i['name']) if i.get('name', False) else None
+        if position is not None:
+            j = entries[position]
+            if not replace and i != j:
                 msg = 'A different object named {} already exists in your kubeconfig file.\nOverwrite?'
                 overwrite = False
                 try:
                     overwrite = prompt_y_n(msg.format(i['name']))
                 except NoTTYException:
                     pass
-                if overwrite:
-                    remove_flag = True
-                else:
+                if not overwrite:
                     msg = 'A different object named {} already exists in {} in your kubeconfig file.'
                     telemetry.set_exception(exception='A different object with same name exists in the kubeconfig file', fault_type=consts.Different_Object_With_Same_Name_Fault_Type,
                                             summary=msg.format(i['name'], key))
                     raise FileOperationError(msg.format(i['name'], key))
-        if not remove_flag:
-            temp_list.append(j)
-
-    existing[key][:] = temp_list
-    existing[key].append(i)
+            replaced.add(position)
+        if i.get('name', False):
+            index[i['name']] = len(entries)
+        entries.append(i)
+    existing[key] = [entry for position, entry in enumerate(entries) if position not in replaced]
 
 
 def client_side_proxy_wrapper(cmd,
@@ -8,6 +8,11 @@ import tarfile
 import os
 import re
 import codecs
+import hashlib
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from io import open
 import requests
 from knack.log import get_logger
@@ -69,55 +74,130 @@ def upload_source_code(cmd, client,
     return relative_path
 
 
+COMMON_VCS_IGNORE_LIST = {'.git', '.gitignore', '.bzr', 'bzrignore', '.hg', '.hgignore', '.svn'}
+GZIP_BLOCK_SIZE = 1024 * 1024  # uncompressed bytes per independently compressed gzip member
+
+
 def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_file_in_tar):
     logger.info("Packing source code into tar to upload...")
 
     original_docker_file_name = os.path.basename(docker_file_path.replace("\\", os.sep))
-    ignore_list, ignore_list_size = _load_dockerignore_file(source_location, original_docker_file_name)
-    common_vcs_ignore_list = {'.git', '.gitignore', '.bzr', 'bzrignore', '.hg', '.hgignore', '.svn'}
-
-    def _ignore_check(tarinfo, parent_ignored, parent_matching_rule_index):
+    ignore_list, _ = _load_dockerignore_file(source_location, original_docker_file_name)
+
+    with open(tar_file_path, "wb") as tar_file, ParallelGzipWriter(tar_file) as gzip_file:
+        # the tar is written as a stream so that it can be compressed block by block
+        with tarfile.open(fileobj=gzip_file, mode="w|") as tar:
+            for path, arcname in _walk_source_code(source_location, ignore_list):
+                tar.add(path, arcname, recursive=False)
+
+            # Add the Dockerfile if it's specified.
+            # In the case of run, there will be no Dockerfile.
+            if docker_file_path:
+                docker_file_tarinfo = tar.gettarinfo(
+                    docker_file_path, docker_file_in_tar)
+                with open(docker_file_path, "rb") as f:
+                    tar.addfile(docker_file_tarinfo, f)
+
+
+def _walk_source_code(source_location, ignore_list):
+    """Yield (path, arcname) for every entry of source_location that is not excluded by .dockerignore.
+
+    Ignore rules are evaluated the same way docker does: the last matching rule wins and an ignored
+    directory's children are still checked, since a later "!" rule may re-include them. A directory is
+    only skipped entirely when no such exception rule has a higher priority than the rule that ignored it.
+    """
+    rules = ignore_list or []
+    # rules are ordered by priority, so only exceptions before this index can re-include a child
+    first_exception_index = next((i for i, rule in enumerate(rules) if not rule.ignore), len(rules))
+
+    def _ignore_check(name, parent_ignored, parent_matching_rule_index):
         # ignore common vcs dir or file
-        if tarinfo.name in common_vcs_ignore_list:
-            logger.info("Excluding '%s' based on default ignore rules", tarinfo.name)
+        if name in COMMON_VCS_IGNORE_LIST:
+            logger.info("Excluding '%s' based on default ignore rules", name)
             return True, parent_matching_rule_index
 
-        if ignore_list is None:
-            # if .dockerignore doesn't exists, inherit from parent
-            # eg, it will ignore the files under .git folder.
-            return parent_ignored, parent_matching_rule_index
-
-        for index, item in enumerate(ignore_list):
+        for index in range(min(parent_matching_rule_index, len(rules))):
             # stop checking the remaining rules whose priorities are lower than the parent matching rule
             # at this point, current item should just inherit from parent
-            if index >= parent_matching_rule_index:
-                break
-            if re.match(item.pattern, tarinfo.name):
-                logger.debug(".dockerignore: rule '%s' matches '%s'.",
-                             item.rule, tarinfo.name)
-                return item.ignore, index
-
-        logger.debug(".dockerignore: no rule for '%s'. parent ignore '%s'",
-                     tarinfo.name, parent_ignored)
-        # inherit from parent
+            if rules[index].regex.match(name):
+                logger.debug(".dockerignore: rule '%s' matches '%s'.", rules[index].rule, name)
+                return rules[index].ignore, index
+
+        # if .dockerignore doesn't exist or no rule matches, inherit from parent
+        # eg, it will ignore the files under .git folder.
         return parent_ignored, parent_matching_rule_index
 
-    with tarfile.open(tar_file_path, "w:gz") as tar:
-        # need to set arcname to empty string as the archive root path
-        _archive_file_recursively(tar,
-                                  source_location,
-                                  arcname="",
-                                  parent_ignored=False,
-                                  parent_matching_rule_index=ignore_list_size,
-                                  ignore_check=_ignore_check)
-
-        # Add the Dockerfile if it's specified.
-        # In the case of run, there will be no Dockerfile.
-        if docker_file_path:
-            docker_file_tarinfo = tar.gettarinfo(
-                docker_file_path, docker_file_in_tar)
-            with open(docker_file_path, "rb") as f:
-                tar.addfile(docker_file_tarinfo, f)
+    def _walk(path, arcname, is_dir, parent_ignored, parent_matching_rule_index):
+        ignored, matching_rule_index = _ignore_check(arcname, parent_ignored, parent_matching_rule_index)
+        if not ignored:
+            yield path, arcname
+        if not is_dir:
+            return
+        if ignored and first_exception_index >= matching_rule_index:
+            logger.debug("Skipping ignored directory '%s'", arcname)
+            return
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            child_arcname = "{}/{}".format(arcname, entry.name) if arcname else entry.name
+            yield from _walk(entry.path, child_arcname, entry.is_dir(follow_symlinks=False),
+                             ignored, matching_rule_index)
+
+    # the archive root has an empty arcname
+    yield from _walk(source_location, "", os.path.isdir(source_location) and not os.path.islink(source_location),
+                     False, len(rules))
+
+
+def _compress_gzip_block(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header and trailer
+    return compressor.compress(data) + compressor.flush()
+
+
+class ParallelGzipWriter:
+    """File-like object compressing what is written to it into a multi-member gzip stream.
+
+    Data is cut into GZIP_BLOCK_SIZE blocks compressed concurrently (zlib releases the GIL) and written
+    to the underlying file in order. Concatenated gzip members are a valid gzip file for any reader.
+    """
+
+    def __init__(self, fileobj, block_size=GZIP_BLOCK_SIZE, max_workers=None):
+        self._fileobj = fileobj
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._pending = []
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[:self._block_size]))
+            del self._buffer[:self._block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(_compress_gzip_block, block))
+        # bound the memory held by blocks waiting to be written
+        while len(self._pending) > self._max_workers * 2:
+            self._fileobj.write(self._pending.pop(0).result())
+
+    def close(self):
+        if self._executor is None:
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        for future in self._pending:
+            self._fileobj.write(future.result())
+        self._pending = []
+        self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 class IgnoreRule:  # pylint: disable=too-few-public-methods
@@ -150,6 +230,7 @@ class IgnoreRule:  # pylint: disable=too-few-public-methods
                 if index < token_length:
                     self.pattern += "/"  # add back / if it's not the last
         self.pattern += "$"
+        self.regex = re.compile(self.pattern)
 
 
 def _load_dockerignore_file(source_location, original_docker_file_name):
@@ -188,31 +269,90 @@ def _load_dockerignore_file(source_location, original_docker_file_name):
     return ignore_list, len(ignore_list)
 
 
-def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matching_rule_index, ignore_check):
-    # create a TarInfo object from the file
-    tarinfo = tar.gettarinfo(name, arcname)
+def _hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(GZIP_BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
 
-    if tarinfo is None:
-        raise CLIInternalError("tarfile: unsupported type {}".format(name))
 
-    # check if the file/dir is ignored
-    ignored, matching_rule_index = ignore_check(
-        tarinfo, parent_ignored, parent_matching_rule_index)
+_source_cache_lock = threading.Lock()
 
-    if not ignored:
-        # append the tar header and data to the archive
-        if tarinfo.isreg():
-            with open(name, "rb") as f:
-                tar.addfile(tarinfo, f)
-        else:
-            tar.addfile(tarinfo)
 
-    # even the dir is ignored, its child items can still be included, so continue to scan
-    if tarinfo.isdir():
-        for f in os.listdir(name):
-            _archive_file_recursively(tar, os.path.join(name, f), os.path.join(arcname, f),
-                                      parent_ignored=ignored, parent_matching_rule_index=matching_rule_index,
-                                      ignore_check=ignore_check)
+class SourceBuildCache:
+    """Remembers which image was built from which source tree, keyed by a hash of the packed content.
+
+    File digests are cached by size and mtime so an unchanged tree is hashed with stat calls only.
+    """
+    FILE_NAME = "containerapp_source_cache.json"
+
+    def __init__(self, cli_ctx):
+        self.path = os.path.join(cli_ctx.config.config_dir, self.FILE_NAME)
+        self._data = {"files": {}, "images": {}}
+        self._data.update(self._load())
+
+    def get_source_hash(self, source_location, docker_file_path=None):
+        source_root = os.path.abspath(source_location)
+        cached_digests = self._data["files"].get(source_root, {})
+        digests = {}
+        sha = hashlib.sha256()
+
+        original_docker_file_name = os.path.basename(docker_file_path.replace("\\", os.sep)) if docker_file_path else "Dockerfile"
+        ignore_list, _ = _load_dockerignore_file(source_location, original_docker_file_name)
+        paths = list(_walk_source_code(source_location, ignore_list))
+        if docker_file_path:
+            paths.append((docker_file_path, "\0dockerfile"))
+        for path, arcname in paths:
+            st = os.lstat(path)
+            if os.path.islink(path):
+                digest = "link:" + os.readlink(path)
+            elif os.path.isdir(path):
+                digest = "dir"
+            else:
+                cached = cached_digests.get(arcname)
+                if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                    digest = cached[2]
+                else:
+                    digest = _hash_file(path)
+                digests[arcname] = [st.st_size, st.st_mtime_ns, digest]
+            sha.update("{}\0{:o}\0{}\n".format(arcname, st.st_mode & 0o777, digest).encode("utf-8"))
+
+        self._data["files"][source_root] = digests
+        return sha.hexdigest()
+
+    def get_image(self, key):
+        return self._data["images"].get(key)
+
+    def set_image(self, key, image):
+        self._data["images"][key] = image
+        self.save()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def save(self):
+        # several builds (e.g. from compose) may save concurrently, so merge with what is on disk
+        with _source_cache_lock:
+            data = self._load()
+            for section in ("files", "images"):
+                merged = data.get(section) if isinstance(data.get(section), dict) else {}
+                merged.update(self._data[section])
+                self._data[section] = merged
+            temp_path = "{}.{}.{}.tmp".format(self.path, os.getpid(), threading.get_ident())
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.debug("Failed to save the source build cache: %s", e)
 
 
 def check_remote_source_code(source_location):
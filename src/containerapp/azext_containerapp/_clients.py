@@ -5,8 +5,13 @@
 # pylint: disable=line-too-long, super-with-arguments, too-many-instance-attributes, consider-using-f-string, no-else-return, no-self-use
 
 import json
+import random
 import time
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 
 from azure.cli.core.util import send_raw_request
 from azure.cli.core.commands.client_factory import get_subscription_id
@@ -17,7 +22,15 @@ logger = get_logger(__name__)
 PREVIEW_API_VERSION = "2022-06-01-preview"
 CURRENT_API_VERSION = PREVIEW_API_VERSION
 POLLING_TIMEOUT = 600  # how many seconds before exiting
-POLLING_SECONDS = 2  # how many seconds between requests
+POLLING_MIN_SECONDS = 1  # first backoff interval when the service gives no Retry-After hint
+POLLING_MAX_SECONDS = 20  # upper bound for the exponential backoff interval
+POLLING_BACKOFF_FACTOR = 1.5
+POLLING_JITTER = 0.2  # +/- fraction applied to every computed interval
+POLLING_MAX_WORKERS = 16  # default thread pool size for wait_for_operations
+# follow the Azure-AsyncOperation/Location headers of the initial response instead of GETting the resource itself
+POLLING_FOLLOW_OPERATION_HEADERS = True
+
+TERMINAL_STATES = ["succeeded", "failed", "canceled", "cancelled"]
 
 
 class PollingAnimation():
@@ -37,28 +50,156 @@ class PollingAnimation():
         sys.stderr.write("\r\033[K")
 
 
-def poll(cmd, request_url, poll_if_status):  # pylint: disable=inconsistent-return-statements
+def _get_retry_after(response):
+    """Return the Retry-After header of a response in seconds, or None if absent/unparseable."""
+    if response is None or not getattr(response, "headers", None):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
     try:
-        start = time.time()
-        end = time.time() + POLLING_TIMEOUT
-        animation = PollingAnimation()
-
-        animation.tick()
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-
-        while r.status_code in [200, 201] and start < end:
-            time.sleep(POLLING_SECONDS)
-            animation.tick()
-
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            r2 = r.json()
-
-            if "properties" not in r2 or "provisioningState" not in r2["properties"] or r2["properties"]["provisioningState"].lower() in ["succeeded", "failed", "canceled"]:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_provisioning_state(body):
+    if not isinstance(body, dict):
+        return None
+    if "properties" not in body or not isinstance(body["properties"], dict):
+        return None
+    return body["properties"].get("provisioningState")
+
+
+class _ContainerAppPoller():
+    """Waits for a single ARM long running operation.
+
+    The poller follows the Azure-AsyncOperation or Location header of the initial response when the service
+    provides one and falls back to GETting the resource itself until its provisioningState is terminal.
+    A failed or canceled async operation raises the error it reports.
+    Intervals start at POLLING_MIN_SECONDS and grow exponentially (with jitter) up to POLLING_MAX_SECONDS,
+    unless the service asks for a specific delay through Retry-After.
+    """
+
+    def __init__(self, cmd, request_url, poll_if_status, initial_response=None, timeout=POLLING_TIMEOUT):
+        self.cmd = cmd
+        self.request_url = request_url
+        self.poll_if_status = poll_if_status
+        self.initial_response = initial_response
+        self.timeout = timeout
+        self.request_count = 0
+        self.elapsed = 0
+        self.timed_out = False
+        self._interval = POLLING_MIN_SECONDS
+
+    @property
+    def is_delete(self):
+        return self.poll_if_status in ["scheduledfordelete", "cancelled"]
+
+    def _get(self, url):
+        self.request_count += 1
+        return send_raw_request(self.cmd.cli_ctx, "GET", url)
+
+    def _next_delay(self, response):
+        retry_after = _get_retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = self._interval * random.uniform(1 - POLLING_JITTER, 1 + POLLING_JITTER)
+        self._interval = min(self._interval * POLLING_BACKOFF_FACTOR, POLLING_MAX_SECONDS)
+        return delay
+
+    def _sleep(self, response, deadline, tick):
+        delay = min(self._next_delay(response), max(deadline - time.time(), 0))
+        while delay > 0:
+            step = min(delay, 0.5) if tick else delay
+            time.sleep(step)
+            delay -= step
+            if tick:
+                tick()
+
+    def _poll_async_operation(self, url, deadline, tick):
+        response = self.initial_response
+        while time.time() < deadline:
+            self._sleep(response, deadline, tick)
+            response = self._get(url)
+            status = response.json().get("status", "") if response.text else ""
+            if status.lower() in TERMINAL_STATES:
+                if status.lower() != "succeeded":
+                    from azure.cli.core.azclierror import AzureResponseError
+                    error = response.json().get("error") or {}
+                    raise AzureResponseError("Operation on {} {}: {}".format(
+                        self.request_url.split("?")[0], status, error.get("message") or error.get("code") or "no error details returned"))
+                return response
+        self.timed_out = True
+        return response
+
+    def _poll_location(self, url, deadline, tick):
+        response = self.initial_response
+        while time.time() < deadline:
+            self._sleep(response, deadline, tick)
+            response = self._get(url)
+            if response.status_code != 202:
+                return response
+        self.timed_out = True
+        return response
+
+    def _poll_resource(self, deadline, tick):
+        # GETs the resource once, then until its provisioningState is terminal, as poll always did
+        response = self._get(self.request_url)
+        while response.status_code in [200, 201]:
+            if time.time() >= deadline:
+                self.timed_out = True
+                break
+            self._sleep(response, deadline, tick)
+            response = self._get(self.request_url)
+            state = _get_provisioning_state(response.json())
+            if state is None or state.lower() in TERMINAL_STATES:
                 break
-            start = time.time()
+        return response
 
+    def wait(self, tick=None):
+        start = time.time()
+        deadline = start + self.timeout
+        headers = self.initial_response.headers if self.initial_response is not None and POLLING_FOLLOW_OPERATION_HEADERS else {}
+        async_url = headers.get("Azure-AsyncOperation") if headers else None
+        location_url = headers.get("Location") if headers else None
+
+        try:
+            if async_url:
+                self._poll_async_operation(async_url, deadline, tick)
+                result = None if self.is_delete else self._get(self.request_url).json()
+            elif location_url:
+                response = self._poll_location(location_url, deadline, tick)
+                if self.is_delete:
+                    result = None
+                elif response.status_code == 200 and response.text:
+                    result = response.json()
+                else:
+                    result = self._get(self.request_url).json()
+            else:
+                result = self._poll_resource(deadline, tick).json()
+        finally:
+            self.elapsed = time.time() - start
+            logger.info("Polled %s with %d GET request(s) in %.1f seconds", self.request_url.split("?")[0], self.request_count, self.elapsed)
+        if self.timed_out:
+            logger.warning("Timed out after %d seconds waiting for %s to finish. The operation may still be in progress; "
+                           "returning its last known state.", self.timeout, self.request_url.split("?")[0])
+        return result
+
+
+def poll(cmd, request_url, poll_if_status, response=None):  # pylint: disable=inconsistent-return-statements
+    animation = PollingAnimation()
+    try:
+        animation.tick()
+        operation = _ContainerAppPoller(cmd, request_url, poll_if_status, initial_response=response)
+        result = operation.wait(tick=animation.tick)
         animation.flush()
-        return r.json()
+        return result
     except Exception as e:  # pylint: disable=broad-except
         animation.flush()
 
@@ -68,6 +209,95 @@ def poll(cmd, request_url, poll_if_status):  # pylint: disable=inconsistent-retu
             raise e
 
 
+class OperationWaitSummary():
+    """Outcome of wait_for_operations: per-operation results/errors plus request accounting."""
+
+    def __init__(self, operations):
+        self.operations = operations
+        self.results = [None] * len(operations)
+        self.errors = [None] * len(operations)
+
+    @property
+    def request_count(self):
+        return sum(o.request_count for o in self.operations)
+
+    @property
+    def failed(self):
+        return [(o, e) for o, e in zip(self.operations, self.errors) if e is not None]
+
+    def to_dict(self):
+        return {
+            "operations": len(self.operations),
+            "failed": len(self.failed),
+            "requests": self.request_count,
+            "maxElapsedSeconds": round(max([o.elapsed for o in self.operations] or [0]), 2)
+        }
+
+
+def wait_for_operations(cmd, operations, max_workers=POLLING_MAX_WORKERS, show_progress=True):
+    """Wait on many _ContainerAppPoller objects concurrently from one thread pool.
+
+    Errors are collected per operation instead of aborting the other waits; delete operations that end
+    with a "not found" error are treated as completed, matching poll().
+    """
+    summary = OperationWaitSummary(operations)
+    if not operations:
+        return summary
+
+    animation = PollingAnimation() if show_progress else None
+    lock = threading.Lock()
+
+    def _wait(index, operation):
+        try:
+            summary.results[index] = operation.wait()
+        except Exception as e:  # pylint: disable=broad-except
+            if not operation.is_delete:
+                with lock:
+                    summary.errors[index] = e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(operations))) as executor:
+        pending = {executor.submit(_wait, i, o) for i, o in enumerate(operations)}
+        while pending:
+            if animation:
+                animation.tick()
+            _, pending = wait_futures(pending, timeout=0.5)
+    if animation:
+        animation.flush()
+
+    logger.info("Waited for %d operation(s) with %d GET request(s) in total", len(operations), summary.request_count)
+    return summary
+
+
+def _get_page(cmd, request_url):
+    return send_raw_request(cmd.cli_ctx, "GET", request_url).json()
+
+
+def _paged(cmd, request_url, formatter=lambda x: x, top=None):
+    """Yield the formatted items of an ARM list operation, following nextLink as the caller consumes them.
+
+    The next page is requested in the background while the items of the current page are being
+    yielded, and nothing past the page holding the top-th item is fetched.
+    """
+    if top is not None and top <= 0:
+        return
+    count = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page = executor.submit(_get_page, cmd, request_url)
+        while page is not None:
+            j = page.result()
+            next_link = j.get("nextLink")
+            page = None
+            if next_link and (top is None or count + len(j.get("value", [])) < top):
+                page = executor.submit(_get_page, cmd, next_link)
+            for item in j.get("value", []):
+                yield formatter(item)
+                count += 1
+                if top is not None and count >= top:
+                    if page is not None:
+                        page.cancel()
+                    return
+
+
 class ContainerAppClient():
     @classmethod
     def create_or_update(cls, cmd, resource_group_name, name, container_app_envelope, no_wait=False):
@@ -94,7 +324,7 @@ class ContainerAppClient():
                 resource_group_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "inprogress")
+            return poll(cmd, request_url, "inprogress", r)
 
         return r.json()
 
@@ -125,8 +355,27 @@ class ContainerAppClient():
                 resource_group_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "inprogress")
+            return poll(cmd, request_url, "inprogress", r)
+
+        return r.json()
+
+    @classmethod
+    def begin_update(cls, cmd, resource_group_name, name, container_app_envelope):
+        """Send the PATCH and return a _ContainerAppPoller to wait on, or the updated app if it completed synchronously."""
+        management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
+        sub_id = get_subscription_id(cmd.cli_ctx)
+        url_fmt = "{}/subscriptions/{}/resourceGroups/{}/providers/Microsoft.App/containerApps/{}?api-version={}"
+        request_url = url_fmt.format(
+            management_hostname.strip('/'),
+            sub_id,
+            resource_group_name,
+            name,
+            CURRENT_API_VERSION)
 
+        r = send_raw_request(cmd.cli_ctx, "PATCH", request_url, body=json.dumps(container_app_envelope))
+
+        if r.status_code == 202:
+            return _ContainerAppPoller(cmd, request_url, "inprogress", initial_response=r)
         return r.json()
 
     @classmethod
@@ -158,7 +407,7 @@ class ContainerAppClient():
             if r.status_code == 202:
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "cancelled")
+                    poll(cmd, request_url, "cancelled", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Containerapp successfully deleted')
@@ -180,9 +429,7 @@ class ContainerAppClient():
         return r.json()
 
     @classmethod
-    def list_by_subscription(cls, cmd, formatter=lambda x: x):
-        app_list = []
-
+    def iter_by_subscription(cls, cmd, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -191,26 +438,10 @@ class ContainerAppClient():
             sub_id,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for app in j["value"]:
-            formatted = formatter(app)
-            app_list.append(formatted)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for app in j["value"]:
-                formatted = formatter(app)
-                app_list.append(formatted)
-
-        return app_list
+        return _paged(cmd, request_url, formatter, top)
 
     @classmethod
-    def list_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x):
-        app_list = []
-
+    def iter_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -221,21 +452,15 @@ class ContainerAppClient():
             resource_group_name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for app in j["value"]:
-            formatted = formatter(app)
-            app_list.append(formatted)
+        return _paged(cmd, request_url, formatter, top)
 
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for app in j["value"]:
-                formatted = formatter(app)
-                app_list.append(formatted)
+    @classmethod
+    def list_by_subscription(cls, cmd, formatter=lambda x: x, top=None):
+        return list(cls.iter_by_subscription(cmd, formatter, top))
 
-        return app_list
+    @classmethod
+    def list_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x, top=None):
+        return list(cls.iter_by_resource_group(cmd, resource_group_name, formatter, top))
 
     @classmethod
     def list_secrets(cls, cmd, resource_group_name, name):
@@ -255,10 +480,7 @@ class ContainerAppClient():
         return r.json()
 
     @classmethod
-    def list_revisions(cls, cmd, resource_group_name, name, formatter=lambda x: x):
-
-        revisions_list = []
-
+    def list_revisions(cls, cmd, resource_group_name, name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -270,21 +492,7 @@ class ContainerAppClient():
             name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for app in j["value"]:
-            formatted = formatter(app)
-            revisions_list.append(formatted)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for app in j["value"]:
-                formatted = formatter(app)
-                revisions_list.append(formatted)
-
-        return revisions_list
+        return list(_paged(cmd, request_url, formatter, top))
 
     @classmethod
     def show_revision(cls, cmd, resource_group_name, container_app_name, name):
@@ -355,9 +563,7 @@ class ContainerAppClient():
         return r.json()
 
     @classmethod
-    def list_replicas(cls, cmd, resource_group_name, container_app_name, revision_name):
-        replica_list = []
-
+    def list_replicas(cls, cmd, resource_group_name, container_app_name, revision_name, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         sub_id = get_subscription_id(cmd.cli_ctx)
         url_fmt = "{}/subscriptions/{}/resourceGroups/{}/providers/Microsoft.App/containerApps/{}/revisions/{}/replicas?api-version={}"
@@ -369,19 +575,7 @@ class ContainerAppClient():
             revision_name,
             CURRENT_API_VERSION)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for replica in j["value"]:
-            replica_list.append(replica)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for replica in j["value"]:
-                replica_list.append(replica)
-
-        return replica_list
+        return list(_paged(cmd, request_url, top=top))
 
     @classmethod
     def get_replica(cls, cmd, resource_group_name, container_app_name, revision_name, replica_name):
@@ -458,7 +652,7 @@ class ManagedEnvironmentClient():
                 resource_group_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "inprogress")
+            return poll(cmd, request_url, "inprogress", r)
 
         return r.json()
 
@@ -487,7 +681,7 @@ class ManagedEnvironmentClient():
                 resource_group_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "waiting")
+            return poll(cmd, request_url, "waiting", r)
 
         return r.json()
 
@@ -520,7 +714,7 @@ class ManagedEnvironmentClient():
             if r.status_code == 202:
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "scheduledfordelete")
+                    poll(cmd, request_url, "scheduledfordelete", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Containerapp environment successfully deleted')
@@ -543,9 +737,7 @@ class ManagedEnvironmentClient():
         return r.json()
 
     @classmethod
-    def list_by_subscription(cls, cmd, formatter=lambda x: x):
-        env_list = []
-
+    def iter_by_subscription(cls, cmd, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -554,26 +746,10 @@ class ManagedEnvironmentClient():
             sub_id,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for env in j["value"]:
-            formatted = formatter(env)
-            env_list.append(formatted)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for env in j["value"]:
-                formatted = formatter(env)
-                env_list.append(formatted)
-
-        return env_list
+        return _paged(cmd, request_url, formatter, top)
 
     @classmethod
-    def list_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x):
-        env_list = []
-
+    def iter_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -584,21 +760,15 @@ class ManagedEnvironmentClient():
             resource_group_name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for env in j["value"]:
-            formatted = formatter(env)
-            env_list.append(formatted)
+        return _paged(cmd, request_url, formatter, top)
 
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for env in j["value"]:
-                formatted = formatter(env)
-                env_list.append(formatted)
+    @classmethod
+    def list_by_subscription(cls, cmd, formatter=lambda x: x, top=None):
+        return list(cls.iter_by_subscription(cmd, formatter, top))
 
-        return env_list
+    @classmethod
+    def list_by_resource_group(cls, cmd, resource_group_name, formatter=lambda x: x, top=None):
+        return list(cls.iter_by_resource_group(cmd, resource_group_name, formatter, top))
 
     @classmethod
     def show_certificate(cls, cmd, resource_group_name, name, certificate_name):
@@ -618,9 +788,7 @@ class ManagedEnvironmentClient():
         return r.json()
 
     @classmethod
-    def list_certificates(cls, cmd, resource_group_name, name, formatter=lambda x: x):
-        certs_list = []
-
+    def list_certificates(cls, cmd, resource_group_name, name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -632,12 +800,7 @@ class ManagedEnvironmentClient():
             name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url, body=None)
-        j = r.json()
-        for cert in j["value"]:
-            formatted = formatter(cert)
-            certs_list.append(formatted)
-        return certs_list
+        return list(_paged(cmd, request_url, formatter, top))
 
     @classmethod
     def create_or_update_certificate(cls, cmd, resource_group_name, name, certificate_name, certificate):
@@ -730,7 +893,7 @@ class GitHubActionClient():
                 resource_group_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "inprogress")
+            return poll(cmd, request_url, "inprogress", r)
 
         return r.json()
 
@@ -779,7 +942,7 @@ class GitHubActionClient():
             if r.status_code == 202:
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "cancelled")
+                    poll(cmd, request_url, "cancelled", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Containerapp github action successfully deleted')
@@ -815,7 +978,7 @@ class DaprComponentClient():
                 environment_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "inprogress")
+            return poll(cmd, request_url, "inprogress", r)
 
         return r.json()
 
@@ -850,7 +1013,7 @@ class DaprComponentClient():
             if r.status_code == 202:
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "cancelled")
+                    poll(cmd, request_url, "cancelled", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Dapr component successfully deleted')
@@ -874,9 +1037,7 @@ class DaprComponentClient():
         return r.json()
 
     @classmethod
-    def list(cls, cmd, resource_group_name, environment_name, formatter=lambda x: x):
-        app_list = []
-
+    def list(cls, cmd, resource_group_name, environment_name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -887,21 +1048,7 @@ class DaprComponentClient():
             environment_name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for app in j["value"]:
-            formatted = formatter(app)
-            app_list.append(formatted)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for app in j["value"]:
-                formatted = formatter(app)
-                app_list.append(formatted)
-
-        return app_list
+        return list(_paged(cmd, request_url, formatter, top))
 
 
 class StorageClient():
@@ -932,7 +1079,7 @@ class StorageClient():
                 env_name,
                 name,
                 api_version)
-            return poll(cmd, request_url, "waiting")
+            return poll(cmd, request_url, "waiting", r)
 
         return r.json()
 
@@ -966,7 +1113,7 @@ class StorageClient():
             if r.status_code == 200:  # 200 successful delete, 204 means storage not found
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "scheduledfordelete")
+                    poll(cmd, request_url, "scheduledfordelete", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Containerapp environment storage successfully deleted')
@@ -990,9 +1137,7 @@ class StorageClient():
         return r.json()
 
     @classmethod
-    def list(cls, cmd, resource_group_name, env_name, formatter=lambda x: x):
-        env_list = []
-
+    def list(cls, cmd, resource_group_name, env_name, formatter=lambda x: x, top=None):
         management_hostname = cmd.cli_ctx.cloud.endpoints.resource_manager
         api_version = CURRENT_API_VERSION
         sub_id = get_subscription_id(cmd.cli_ctx)
@@ -1004,21 +1149,7 @@ class StorageClient():
             env_name,
             api_version)
 
-        r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-        j = r.json()
-        for env in j["value"]:
-            formatted = formatter(env)
-            env_list.append(formatted)
-
-        while j.get("nextLink") is not None:
-            request_url = j["nextLink"]
-            r = send_raw_request(cmd.cli_ctx, "GET", request_url)
-            j = r.json()
-            for env in j["value"]:
-                formatted = formatter(env)
-                env_list.append(formatted)
-
-        return env_list
+        return list(_paged(cmd, request_url, formatter, top))
 
 
 class AuthClient():
@@ -1040,7 +1171,7 @@ class AuthClient():
             return r.json()
         elif r.status_code == 201:
             request_url = f"{management_hostname}subscriptions/{sub_id}/resourceGroups/{resource_group_name}/providers/Microsoft.App/containerApps/{container_app_name}/authConfigs/{auth_config_name}?api-version={api_version}"
-            return poll(cmd, request_url, "waiting")
+            return poll(cmd, request_url, "waiting", r)
 
         return r.json()
 
@@ -1060,7 +1191,7 @@ class AuthClient():
             if r.status_code == 200:  # 200 successful delete, 204 means storage not found
                 from azure.cli.core.azclierror import ResourceNotFoundError
                 try:
-                    poll(cmd, request_url, "scheduledfordelete")
+                    poll(cmd, request_url, "scheduledfordelete", r)
                 except ResourceNotFoundError:
                     pass
                 logger.warning('Containerapp AuthConfig successfully deleted')
@@ -4,6 +4,11 @@
 # --------------------------------------------------------------------------------------------
 # pylint: disable=line-too-long, consider-using-f-string, no-else-return, duplicate-string-formatting-argument, expression-not-assigned, too-many-locals, logging-fstring-interpolation, arguments-differ, abstract-method, logging-format-interpolation, broad-except
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from azure.cli.core.azclierror import ValidationError
 from knack.log import get_logger
 from knack.prompting import prompt, prompt_choice_list
 
@@ -17,6 +22,10 @@ from ._up_utils import (ContainerApp,
 
 logger = get_logger(__name__)
 
+# Services without an explicit registry share the environment's default ACR, so creating
+# (or looking up) that registry must not race between concurrently built services.
+_registry_lock = threading.Lock()
+
 # Monkey patch for log analytics workspace name
 # this allows the test framework to pass down a specific
 # name to support playback of recorded tests.
@@ -48,7 +57,8 @@ def build_containerapp_from_compose_service(cmd,
                                             registry_pass,
                                             env_vars,
                                             logs_key=None,
-                                            logs_customer_id=None):
+                                            logs_customer_id=None,
+                                            quiet=False):
 
     resource_group = ResourceGroup(cmd, name=resource_group_name, location=location)
     env = ContainerAppEnvironment(cmd,
@@ -70,15 +80,97 @@ def build_containerapp_from_compose_service(cmd,
                        env_vars,
                        ingress)
 
-    if not registry_server:
-        _get_registry_from_app(app, True)  # if the app exists, get the registry
-    _get_registry_details(cmd, app, True)  # fetch ACR creds from arguments registry arguments
+    with _registry_lock:
+        if not registry_server:
+            _get_registry_from_app(app, True)  # if the app exists, get the registry
+        _get_registry_details(cmd, app, True)  # fetch ACR creds from arguments registry arguments
 
-    app.create_acr_if_needed()
-    app.run_acr_build(dockerfile, source, False)
+        app.create_acr_if_needed()
+    app.run_acr_build(dockerfile, source, quiet)
     return app.image, app.registry_server, app.registry_user, app.registry_pass
 
 
+def resolve_service_dependencies(compose_file):
+    dependencies = {}
+    for service_name, service in compose_file.ordered_services.items():
+        depends_on = service.depends_on if service.depends_on is not None else []
+        dependencies[service_name] = [str(d) for d in depends_on if str(d) in compose_file.ordered_services]
+    return dependencies
+
+
+def deploy_compose_services(dependencies, deploy_service, max_parallel=1):
+    """Run deploy_service(service_name) for every service, at most max_parallel at a time.
+
+    A service only starts once every service it depends on has been deployed. If a deployment
+    fails, no new services are started, the running ones are allowed to finish and the first
+    error is raised. Services that can never start, because of a depends_on cycle or a dependency
+    on an unknown service, raise a ValidationError naming them. Returns a dict of results and a
+    dict of elapsed seconds, both keyed by service name.
+    """
+    remaining = dict(dependencies)
+    done = set()
+    results = {}
+    timings = {}
+    errors = []
+
+    def _timed_deploy(service_name):
+        start = time.time()
+        try:
+            return deploy_service(service_name)
+        finally:
+            timings[service_name] = time.time() - start
+
+    with ThreadPoolExecutor(max_workers=max(max_parallel, 1)) as executor:
+        running = {}
+        while remaining or running:
+            if not errors:
+                ready = [name for name, deps in remaining.items() if all(d in done for d in deps)]
+                for service_name in ready[:max(max_parallel, 1) - len(running)]:
+                    logger.info("Starting deployment of service %s", service_name)
+                    running[executor.submit(_timed_deploy, service_name)] = service_name
+                    del remaining[service_name]
+            if not running:
+                if remaining and not errors:
+                    raise ValidationError(_blocked_services_message(remaining, dependencies))
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                service_name = running.pop(future)
+                try:
+                    results[service_name] = future.result()
+                    done.add(service_name)
+                except Exception as e:
+                    logger.error("Failed to deploy service %s: %s", service_name, e)
+                    errors.append(e)
+
+    if errors:
+        raise errors[0]
+    return results, timings
+
+
+def _blocked_services_message(remaining, dependencies):
+    blocked = []
+    for service_name, deps in remaining.items():
+        missing = [d for d in deps if d not in dependencies]
+        cyclic = [d for d in deps if d in remaining]
+        reasons = []
+        if missing:
+            reasons.append("unknown service(s) {}".format(", ".join(missing)))
+        if cyclic:
+            reasons.append("service(s) {} that can never be deployed first".format(", ".join(cyclic)))
+        blocked.append("{} depends on {}".format(service_name, " and ".join(reasons)))
+    return "Unable to deploy services with missing or cyclic depends_on: {}".format("; ".join(blocked))
+
+
+def log_service_timings(timings):
+    if not timings:
+        return
+    width = max(len(name) for name in timings)
+    logger.warning("Service deployment times:")
+    for service_name, seconds in timings.items():
+        logger.warning("    %s  %6.1fs", service_name.ljust(width), seconds)
+
+
 def resolve_configuration_element_list(compose_service, unsupported_configuration, area=None):
     if area is not None:
         compose_service = getattr(compose_service, area)
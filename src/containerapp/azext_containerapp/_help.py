@@ -179,7 +179,7 @@ helps['containerapp logs'] = """
 
 helps['containerapp logs show'] = """
     type: command
-    short-summary: Show past logs and/or print logs in real time (with the --follow parameter). Note that the logs are only taken from one revision, replica, and container (for non-system logs).
+    short-summary: Show past logs and/or print logs in real time (with the --follow parameter). Note that the logs are only taken from one revision and container, and from one replica unless --all-replicas is used (for non-system logs).
     examples:
     - name: Fetch the past 20 lines of logs from an app and return
       text: |
@@ -193,6 +193,12 @@ helps['containerapp logs show'] = """
     - name: Fetch logs for a particular revision, replica, and container
       text: |
           az containerapp logs show -n MyContainerapp -g MyResourceGroup --replica MyReplica --revision MyRevision --container MyContainer
+    - name: Print only the timestamp and message of each log line as they come in
+      text: |
+          az containerapp logs show -n MyContainerapp -g MyResourceGroup --follow --fields TimeStamp Log
+    - name: Print logs from every replica of the latest revision as they come in
+      text: |
+          az containerapp logs show -n MyContainerapp -g MyResourceGroup --follow --all-replicas
 """
 
 # Replica Commands
@@ -310,6 +316,31 @@ helps['containerapp revision copy'] = """
           az containerapp revision copy -n MyContainerapp -g MyResourceGroup --cpu 0.75 --memory 1.5Gi
 """
 
+helps['containerapp revision batch'] = """
+    type: command
+    short-summary: Run revision and traffic operations across many container apps from a manifest.
+    long-summary: |
+        Operations on different container apps run concurrently; operations on the same app run in manifest order.
+        The status of every operation is reported, and a failing operation does not stop the others.
+    examples:
+    - name: Shift traffic and label revisions of several apps.
+      text: |
+          # manifest.yml
+          # operations:
+          # - name: frontend
+          #   action: set-traffic
+          #   revisionWeights: [frontend--v2=100]
+          # - name: frontend
+          #   action: add-label
+          #   revision: frontend--v2
+          #   label: stable
+          # - name: backend
+          #   resourceGroup: OtherResourceGroup
+          #   action: deactivate
+          #   revision: backend--v1
+          az containerapp revision batch -g MyResourceGroup --manifest manifest.yml --max-parallel 5
+"""
+
 helps['containerapp revision label'] = """
     type: group
     short-summary: Manage revision labels assigned to traffic weights.
@@ -1151,4 +1182,9 @@ helps['containerapp compose create'] = """
           az containerapp compose create -g MyResourceGroup \\
               --environment MyContainerappEnv \\
               --compose-file-path "path/to/docker-compose.yml"
+    - name: Create the container apps of a Compose configuration, building and creating up to 5 services at a time.
+      text: |
+          az containerapp compose create -g MyResourceGroup \\
+              --environment MyContainerappEnv \\
+              --max-parallel 5
 """
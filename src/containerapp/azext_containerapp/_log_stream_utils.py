@@ -0,0 +1,173 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import queue
+import sys
+import threading
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+# The logstream API returns some characters as literal unicode escapes (e.g. \u0022 for a double quote),
+# which need to be translated to display color/quotations properly. They are translated on whole
+# batches of lines at once, so the per-line cost is paid once per batch rather than once per line.
+_ESCAPES = ((b"\\u0022", b"\x22"), (b"\\u001B", b"\x1b"), (b"\\u002B", b"\x2b"), (b"\\u0027", b"\x27"))
+
+
+def unescape_log_text(data):
+    if b"\\u00" not in data:
+        return data
+    for escape, char in _ESCAPES:
+        if escape in data:
+            data = data.replace(escape, char)
+    return data
+
+
+def iter_log_batches(chunks):
+    """Group a stream of byte chunks into lists of complete, non-empty lines.
+
+    Each batch holds every line completed by one chunk, so a burst of log output is handled
+    (and written) at once instead of line by line.
+    """
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        data = pending + chunk
+        end = data.rfind(b"\n")
+        if end == -1:
+            pending = data
+            continue
+        pending = data[end + 1:]
+        batch = [line for line in data[:end].splitlines() if line]
+        if batch:
+            yield batch
+    if pending.strip():
+        yield [pending]
+
+
+def project_log_line(line, fields):
+    """Return only the given fields of a JSON log line; lines that are not JSON objects are returned unchanged."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return unescape_log_text(line).decode("utf-8", errors="replace")
+    if not isinstance(entry, dict):
+        return unescape_log_text(line).decode("utf-8", errors="replace")
+    if len(fields) == 1:
+        value = entry.get(fields[0])
+        return value if isinstance(value, str) else json.dumps(value)
+    return json.dumps({f: entry[f] for f in fields if f in entry})
+
+
+def format_log_batch(batch, fields=None):
+    if fields:
+        return "\n".join(project_log_line(line, fields) for line in batch) + "\n"
+    return unescape_log_text(b"\n".join(batch) + b"\n").decode("utf-8", errors="replace")
+
+
+def write_log_stream(chunks, out=None, fields=None):
+    """Decode a logstream response body and write it to out (stdout by default) one batch at a time.
+
+    Returns the number of lines written.
+    """
+    out = out or sys.stdout
+    count = 0
+    for batch in iter_log_batches(chunks):
+        out.write(format_log_batch(batch, fields))
+        out.flush()
+        count += len(batch)
+        logger.debug("wrote a batch of %d log lines", len(batch))
+    return count
+
+
+def stream_log_response(resp, fields=None):
+    # chunk_size=None hands over data as soon as it arrives, which matters for --follow
+    return write_log_stream(resp.iter_content(chunk_size=None), fields=fields)
+
+
+REPLICA_BUFFER_LINES = 2000  # lines buffered per stream before that stream's reader blocks
+MERGE_WINDOW_SECONDS = 0.25  # lines arriving within one window are ordered by timestamp before printing
+
+_TIMESTAMP_KEY = b'"TimeStamp":"'
+
+
+def _get_log_line_timestamp(line):
+    start = line.find(_TIMESTAMP_KEY)
+    if start == -1:
+        return b""
+    start += len(_TIMESTAMP_KEY)
+    return line[start:line.find(b'"', start)]
+
+
+_STREAM_DONE = object()
+
+
+def _read_log_source(open_stream, lines, stop):
+    def _put(item):
+        while not stop.is_set():
+            try:
+                lines.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for batch in iter_log_batches(open_stream()):
+            for line in batch:
+                if not _put(line):
+                    return
+    except Exception as e:  # pylint: disable=broad-except
+        _put(e)
+    finally:
+        _put(_STREAM_DONE)
+
+
+def fan_in_log_streams(sources, out=None, fields=None, buffer_lines=REPLICA_BUFFER_LINES, window=MERGE_WINDOW_SECONDS):
+    """Stream several logstreams at once into one output, each line prefixed with the name of its source.
+
+    sources maps a display name to a callable returning an iterable of byte chunks. Every source is read
+    by its own thread into a bounded buffer, so a noisy source only ever blocks its own reader. Lines
+    collected from all buffers during one merge window are sorted by their TimeStamp field before being
+    written. Returns the number of lines written.
+    """
+    out = out or sys.stdout
+    stop = threading.Event()
+    buffers = {}
+    for name, open_stream in sources.items():
+        buffers[name] = queue.Queue(maxsize=buffer_lines)
+        threading.Thread(target=_read_log_source, args=(open_stream, buffers[name], stop), daemon=True).start()
+
+    count = 0
+    try:
+        while buffers:
+            time.sleep(window)
+            merged = []
+            for name, lines in list(buffers.items()):
+                for _ in range(buffer_lines):
+                    try:
+                        line = lines.get_nowait()
+                    except queue.Empty:
+                        break
+                    if line is _STREAM_DONE:
+                        del buffers[name]
+                        break
+                    if isinstance(line, Exception):
+                        logger.warning("Log stream for %s ended with error: %s", name, line)
+                        continue
+                    merged.append((_get_log_line_timestamp(line), name, line))
+            if not merged:
+                continue
+            merged.sort(key=lambda entry: entry[0])
+            out.write("".join(f"[{name}] {format_log_batch([line], fields)}" for _, name, line in merged))
+            out.flush()
+            count += len(merged)
+    finally:
+        stop.set()
+    return count
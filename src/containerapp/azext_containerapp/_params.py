@@ -12,7 +12,7 @@ from azure.cli.core.commands.parameters import (resource_group_name_type, get_lo
 
 from ._validators import (validate_memory, validate_cpu, validate_managed_env_name_or_id, validate_registry_server,
                           validate_registry_user, validate_registry_pass, validate_target_port, validate_ingress,
-                          validate_storage_name_or_id)
+                          validate_storage_name_or_id, validate_top)
 from ._constants import UNAUTHENTICATED_CLIENT_ACTION, FORWARD_PROXY_CONVENTION, MAXIMUM_CONTAINER_APP_NAME_LENGTH, LOG_TYPE_CONSOLE, LOG_TYPE_SYSTEM
 
 
@@ -32,6 +32,9 @@ def load_arguments(self, _):
         c.argument('managed_env', validator=validate_managed_env_name_or_id, options_list=['--environment'], help="Name or resource ID of the container app's environment.")
         c.argument('yaml', type=file_type, help='Path to a .yaml file with the configuration of a container app. All other parameters will be ignored. For an example, see  https://docs.microsoft.com/azure/container-apps/azure-resource-manager-api-spec#examples')
 
+    with self.argument_context('containerapp list') as c:
+        c.argument('top', type=int, validator=validate_top, help="Maximum number of container apps to return. Remaining pages are not requested once this many apps are found.")
+
     with self.argument_context('containerapp exec') as c:
         c.argument('container', help="The name of the container to ssh into")
         c.argument('replica', help="The name of the replica to ssh into. List replicas with 'az containerapp replica list'. A replica may not exist if there is not traffic to your app.")
@@ -50,10 +53,13 @@ def load_arguments(self, _):
         c.argument('name', name_type, id_part=None, help="The name of the Containerapp.")
         c.argument('resource_group_name', arg_type=resource_group_name_type, id_part=None)
         c.argument('kind', options_list=["--type", "-t"], help="Type of logs to stream", arg_type=get_enum_type([LOG_TYPE_CONSOLE, LOG_TYPE_SYSTEM]), default=LOG_TYPE_CONSOLE)
+        c.argument('fields', nargs='+', help="Space-separated fields to print from each json log line, e.g. Log or TimeStamp Log. A single field is printed as plain text.")
+        c.argument('all_replicas', help="Stream the logs of every replica of the revision at once. Lines are prefixed with their replica name and ordered by timestamp.", arg_type=get_three_state_flag())
 
     with self.argument_context('containerapp env logs show') as c:
         c.argument('follow', help="Print logs in real time if present.", arg_type=get_three_state_flag())
         c.argument('tail', help="The number of past logs to print (0-300)", type=int, default=20)
+        c.argument('fields', nargs='+', help="Space-separated fields to print from each json log line. A single field is printed as plain text.")
 
     # Replica
     with self.argument_context('containerapp replica') as c:
@@ -142,6 +148,9 @@ def load_arguments(self, _):
         c.argument('location', arg_type=get_location_type(self.cli_ctx), help='Location of resource. Examples: eastus2, northeurope')
         c.argument('tags', arg_type=tags_type)
 
+    with self.argument_context('containerapp env list') as c:
+        c.argument('top', type=int, validator=validate_top, help="Maximum number of Container Apps environments to return.")
+
     with self.argument_context('containerapp env', arg_group='Monitoring') as c:
         c.argument('logs_destination', arg_type=get_enum_type(["log-analytics", "azure-monitor", "none"]), help='Logs destination.')
         c.argument('logs_customer_id', options_list=['--logs-workspace-id'], help='Workspace ID of the Log Analytics workspace to send diagnostics logs to. Only works with logs destination "log-analytics". You can use \"az monitor log-analytics workspace create\" to create one. Extra billing may apply.')
@@ -232,6 +241,11 @@ def load_arguments(self, _):
         c.argument('from_revision', help='Revision to copy from. Default: latest revision.')
         c.argument('image', options_list=['--image', '-i'], help="Container image, e.g. publisher/image-name:tag.")
 
+    with self.argument_context('containerapp revision batch') as c:
+        c.argument('manifest', options_list=['--manifest'], help='Path to a YAML/JSON file listing the operations to run. Each operation has an action (activate, deactivate, restart, set-traffic or add-label), the container app name and resourceGroup, and the revision, label, revisionWeights or labelWeights it needs.')
+        c.argument('resource_group_name', arg_type=resource_group_name_type, required=False, help='Resource group used for operations that do not specify one.')
+        c.argument('max_parallel', type=int, help='Maximum number of container apps updated at the same time. Operations on the same app always run in manifest order.')
+
     with self.argument_context('containerapp revision label') as c:
         c.argument('name', id_part=None)
         c.argument('revision', help='Name of the revision.')
@@ -379,3 +393,4 @@ def load_arguments(self, _):
         c.argument('environment', options_list=['--environment', '-e'], help='Name or resource id of the Container App environment.')
         c.argument('compose_file_path', options_list=['--compose-file-path', '-f'], help='Path to a Docker Compose file with the configuration to import to Azure Container Apps.')
         c.argument('transport_mapping', options_list=['--transport-mapping', c.deprecate(target='--transport', redirect='--transport-mapping')], action='append', nargs='+', help="Transport options per Container App instance (servicename=transportsetting).")
+        c.argument('max_parallel', type=int, help="Maximum number of services to build and create concurrently. Services still wait for the services listed in their depends_on. ACR build logs are not streamed when greater than 1.")
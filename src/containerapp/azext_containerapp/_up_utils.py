@@ -394,10 +394,39 @@ class ContainerApp(Resource):  # pylint: disable=too-many-instance-attributes
         for k, v in old_command_kwargs.items():
             self.cmd.command_kwargs[k] = v
 
+    def _registry_has_image(self, image):
+        from azure.cli.command_modules.acr.repository import acr_repository_show
+
+        registry_name = self.registry_server[: self.registry_server.rindex(ACR_IMAGE_SUFFIX)]
+        try:
+            acr_repository_show(self.cmd, registry_name, image=image[len(self.registry_server) + 1:],
+                                username=self.registry_user, password=self.registry_pass)
+            return True
+        except Exception as e:
+            logger.debug("Could not find image %s: %s", image, e)
+            return False
+
     def run_acr_build(self, dockerfile, source, quiet=False, build_from_source=False):
+        import os
+        from ._archive_utils import SourceBuildCache
+
         image_name = self.image if self.image is not None else self.name
         from datetime import datetime
 
+        # skip the upload and build entirely when this exact source was already built into this repository
+        cache = SourceBuildCache(self.cmd.cli_ctx)
+        cache_key = None
+        try:
+            source_hash = cache.get_source_hash(source, None if build_from_source else os.path.join(source, dockerfile))
+            cache_key = "{}/{}|{}|{}".format(self.registry_server, image_name, "source" if build_from_source else dockerfile, source_hash)
+        except OSError as e:
+            logger.debug("Failed to hash source code at %s: %s", source, e)
+        cached_image = cache.get_image(cache_key) if cache_key else None
+        if cached_image and self._registry_has_image(cached_image):
+            logger.warning("Source code is unchanged since image %s was built, skipping the upload and ACR build.", cached_image)
+            self.image = cached_image
+            return
+
         now = datetime.now()
         # Add version tag for acr image
         image_name += ":{}".format(
@@ -420,6 +449,8 @@ class ContainerApp(Resource):  # pylint: disable=too-many-instance-attributes
                 dockerfile,
                 quiet,
             )
+        if cache_key:
+            cache.set_image(cache_key, self.image)
 
 
 def _create_service_principal(cmd, resource_group_name, env_resource_group_name):
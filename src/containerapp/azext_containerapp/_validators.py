@@ -69,6 +69,11 @@ def validate_cpu(namespace):
             raise ValidationError("Usage error: --cpu must be a number eg. \"0.5\"") from e
 
 
+def validate_top(namespace):
+    if namespace.top is not None and namespace.top < 1:
+        raise InvalidArgumentValueError("Usage error: --top must be a positive integer")
+
+
 def validate_managed_env_name_or_id(cmd, namespace):
     from azure.cli.core.commands.client_factory import get_subscription_id
     from msrestazure.tools import resource_id
@@ -135,7 +140,7 @@ def validate_ingress(namespace):
                 raise ValidationError("Usage error: must specify --target-port with --ingress")
 
 
-def _set_ssh_defaults(cmd, namespace):
+def _set_ssh_defaults(cmd, namespace, set_replica=True):
     app = ContainerAppClient.show(cmd, namespace.resource_group_name, namespace.name)
     if not app:
         raise ResourceNotFoundError("Could not find a container app")
@@ -144,7 +149,7 @@ def _set_ssh_defaults(cmd, namespace):
         namespace.revision = app.get("properties", {}).get("latestRevisionName")
         if not namespace.revision:
             raise ResourceNotFoundError("Could not find a revision")
-    if not namespace.replica:
+    if set_replica and not namespace.replica:
         # VVV this may not be necessary according to Anthony Chu
         try:
             ping_container_app(app)  # needed to get an alive replica
@@ -197,6 +202,13 @@ def _validate_container_exists(cmd, namespace):
 # also used to validate logstream
 def validate_ssh(cmd, namespace):
     if not hasattr(namespace, "kind") or (namespace.kind and namespace.kind.lower() != LOG_TYPE_SYSTEM):
+        if getattr(namespace, "all_replicas", False):
+            if namespace.replica:
+                raise MutuallyExclusiveArgumentError("Usage error: --replica and --all-replicas cannot be used together")
+            # replicas are discovered when streaming, only the revision and container need defaults
+            _set_ssh_defaults(cmd, namespace, set_replica=False)
+            _validate_revision_exists(cmd, namespace)
+            return
         _set_ssh_defaults(cmd, namespace)
         _validate_revision_exists(cmd, namespace)
         _validate_replica_exists(cmd, namespace)
@@ -105,6 +105,7 @@ def load_command_table(self, _):
         g.custom_show_command('show', 'show_revision', table_transformer=transform_revision_output, exception_handler=ex_handler_factory())
         g.custom_command('copy', 'copy_revision', exception_handler=ex_handler_factory())
         g.custom_command('set-mode', 'set_revision_mode', exception_handler=ex_handler_factory())
+        g.custom_command('batch', 'batch_revision_operations', exception_handler=ex_handler_factory())
 
     with self.command_group('containerapp revision label') as g:
         g.custom_command('add', 'add_revision_label')
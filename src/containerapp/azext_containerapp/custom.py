@@ -7,6 +7,8 @@
 import threading
 import sys
 import time
+from functools import partial
+from itertools import islice
 from urllib.parse import urlparse
 import requests
 
@@ -31,6 +33,7 @@ from msrest.exceptions import DeserializationError
 from ._client_factory import handle_raw_exception
 from ._clients import ManagedEnvironmentClient, ContainerAppClient, GitHubActionClient, DaprComponentClient, StorageClient, AuthClient
 from ._github_oauth import get_github_access_token
+from ._log_stream_utils import stream_log_response, fan_in_log_streams
 from ._models import (
     ManagedEnvironment as ManagedEnvironmentModel,
     VnetConfiguration as VnetConfigurationModel,
@@ -958,25 +961,25 @@ def show_containerapp(cmd, name, resource_group_name, show_secrets=False):
         handle_raw_exception(e)
 
 
-def list_containerapp(cmd, resource_group_name=None, managed_env=None):
+def list_containerapp(cmd, resource_group_name=None, managed_env=None, top=None):
     _validate_subscription_registered(cmd, CONTAINER_APPS_RP)
 
     try:
-        containerapps = []
         if resource_group_name is None:
-            containerapps = ContainerAppClient.list_by_subscription(cmd=cmd)
+            containerapps = ContainerAppClient.iter_by_subscription(cmd=cmd)
         else:
-            containerapps = ContainerAppClient.list_by_resource_group(cmd=cmd, resource_group_name=resource_group_name)
+            containerapps = ContainerAppClient.iter_by_resource_group(cmd=cmd, resource_group_name=resource_group_name)
 
         if managed_env:
             env_name = parse_resource_id(managed_env)["name"].lower()
             if "resource_group" in parse_resource_id(managed_env):
                 ManagedEnvironmentClient.show(cmd, parse_resource_id(managed_env)["resource_group"], parse_resource_id(managed_env)["name"])
-                containerapps = [c for c in containerapps if c["properties"]["managedEnvironmentId"].lower() == managed_env.lower()]
+                containerapps = (c for c in containerapps if c["properties"]["managedEnvironmentId"].lower() == managed_env.lower())
             else:
-                containerapps = [c for c in containerapps if parse_resource_id(c["properties"]["managedEnvironmentId"])["name"].lower() == env_name]
+                containerapps = (c for c in containerapps if parse_resource_id(c["properties"]["managedEnvironmentId"])["name"].lower() == env_name)
 
-        return containerapps
+        # islice stops consuming the pager once top apps are found, so later pages are never requested
+        return list(islice(containerapps, top))
     except CLIError as e:
         handle_raw_exception(e)
 
@@ -1167,15 +1170,14 @@ def show_managed_environment(cmd, name, resource_group_name):
         handle_raw_exception(e)
 
 
-def list_managed_environments(cmd, resource_group_name=None):
+def list_managed_environments(cmd, resource_group_name=None, top=None):
     _validate_subscription_registered(cmd, CONTAINER_APPS_RP)
 
     try:
-        managed_envs = []
         if resource_group_name is None:
-            managed_envs = ManagedEnvironmentClient.list_by_subscription(cmd=cmd)
+            managed_envs = ManagedEnvironmentClient.list_by_subscription(cmd=cmd, top=top)
         else:
-            managed_envs = ManagedEnvironmentClient.list_by_resource_group(cmd=cmd, resource_group_name=resource_group_name)
+            managed_envs = ManagedEnvironmentClient.list_by_resource_group(cmd=cmd, resource_group_name=resource_group_name, top=top)
 
         return managed_envs
     except CLIError as e:
@@ -1551,6 +1553,114 @@ def deactivate_revision(cmd, resource_group_name, revision_name, name=None):
         handle_raw_exception(e)
 
 
+REVISION_BATCH_ACTIONS = ["activate", "deactivate", "restart", "set-traffic", "add-label"]
+
+
+def _load_revision_batch_manifest(manifest, resource_group_name=None):
+    entries = load_yaml_file(manifest)
+    if isinstance(entries, dict):
+        entries = entries.get("operations")
+    if not isinstance(entries, list) or not entries:
+        raise ValidationError("The manifest must contain a list of operations (either at the top level or under 'operations').")
+
+    operations = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValidationError(f"Operation #{index} of the manifest must be an object.")
+        action = str(entry.get("action", "")).lower()
+        if action not in REVISION_BATCH_ACTIONS:
+            raise ValidationError(f"Operation #{index} has an invalid action '{entry.get('action')}'. Allowed values: {', '.join(REVISION_BATCH_ACTIONS)}.")
+        revision = entry.get("revision")
+        name = entry.get("name")
+        if not name and revision and action != "set-traffic":
+            name = _get_app_from_revision(revision)
+        rg = entry.get("resourceGroup") or resource_group_name
+        if not name or not rg:
+            raise ValidationError(f"Operation #{index} must specify 'name' and 'resourceGroup' (or use --resource-group).")
+        if action in ["activate", "deactivate", "restart", "add-label"] and not revision:
+            raise ValidationError(f"Operation #{index} ({action}) must specify 'revision'.")
+        if action == "add-label" and not entry.get("label"):
+            raise ValidationError(f"Operation #{index} (add-label) must specify 'label'.")
+        if action == "set-traffic" and not entry.get("revisionWeights") and not entry.get("labelWeights"):
+            raise ValidationError(f"Operation #{index} (set-traffic) must specify 'revisionWeights' or 'labelWeights'.")
+        operations.append({"name": name, "resourceGroup": rg, "action": action, "revision": revision,
+                           "label": entry.get("label"), "revisionWeights": entry.get("revisionWeights"),
+                           "labelWeights": entry.get("labelWeights")})
+    return operations
+
+
+def _submit_revision_batch_operation(cmd, operation):
+    """Run one manifest operation. Returns a _ContainerAppPoller if the app update is still in progress."""
+    rg, name, action, revision = operation["resourceGroup"], operation["name"], operation["action"], operation["revision"]
+    if action == "activate":
+        return ContainerAppClient.activate_revision(cmd=cmd, resource_group_name=rg, container_app_name=name, name=revision)
+    if action == "deactivate":
+        return ContainerAppClient.deactivate_revision(cmd=cmd, resource_group_name=rg, container_app_name=name, name=revision)
+    if action == "restart":
+        return ContainerAppClient.restart_revision(cmd=cmd, resource_group_name=rg, container_app_name=name, name=revision)
+    if action == "add-label":
+        patch = _get_revision_label_patch(cmd, rg, revision, operation["label"], name, yes=True)
+    else:
+        patch = _get_ingress_traffic_patch(cmd, name, rg, operation["labelWeights"], operation["revisionWeights"])
+    return ContainerAppClient.begin_update(cmd=cmd, resource_group_name=rg, name=name, container_app_envelope=patch)
+
+
+def batch_revision_operations(cmd, manifest, resource_group_name=None, max_parallel=10):
+    from concurrent.futures import ThreadPoolExecutor
+    from ._clients import _ContainerAppPoller, wait_for_operations
+
+    _validate_subscription_registered(cmd, CONTAINER_APPS_RP)
+    if max_parallel < 1:
+        raise InvalidArgumentValueError("--max-parallel must be at least 1.")
+
+    operations = _load_revision_batch_manifest(manifest, resource_group_name)
+    results = [{"name": o["name"], "resourceGroup": o["resourceGroup"], "action": o["action"], "revision": o["revision"],
+                "status": "Succeeded", "error": None, "durationSeconds": None} for o in operations]
+    started = [None] * len(operations)
+    in_progress = {}
+
+    # operations on the same app read and patch the same traffic configuration, so they run in manifest order
+    apps = {}
+    for index, operation in enumerate(operations):
+        apps.setdefault((operation["resourceGroup"].lower(), operation["name"].lower()), []).append(index)
+
+    def _run_app_operations(indexes):
+        for position, index in enumerate(indexes):
+            started[index] = time.time()
+            try:
+                result = _submit_revision_batch_operation(cmd, operations[index])
+                if isinstance(result, _ContainerAppPoller):
+                    if position < len(indexes) - 1:
+                        result.wait()
+                    else:
+                        # the app's last update is left to the shared waiter
+                        in_progress[index] = result
+                        continue
+            except Exception as e:
+                results[index]["status"] = "Failed"
+                results[index]["error"] = str(e)
+            results[index]["durationSeconds"] = round(time.time() - started[index], 2)
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(apps))) as executor:
+        list(executor.map(_run_app_operations, apps.values()))
+
+    if in_progress:
+        indexes = list(in_progress)
+        summary = wait_for_operations(cmd, [in_progress[i] for i in indexes], max_workers=max_parallel)
+        for index, app, error in zip(indexes, summary.results, summary.errors):
+            if error is None and (safe_get(app, "properties", "provisioningState", default="") or "").lower() == "failed":
+                error = f"Provisioning of container app '{operations[index]['name']}' failed."
+            if error is not None:
+                results[index]["status"] = "Failed"
+                results[index]["error"] = str(error)
+            results[index]["durationSeconds"] = round(time.time() - started[index], 2)
+        logger.info("Waited for %d app update(s) using %d polling request(s)", len(indexes), summary.request_count)
+
+    failed = [r for r in results if r["status"] == "Failed"]
+    logger.warning("%d of %d operation(s) succeeded.", len(results) - len(failed), len(results))
+    return results
+
+
 def copy_revision(cmd,
                   resource_group_name,
                   from_revision=None,
@@ -1642,6 +1752,17 @@ def add_revision_label(cmd, resource_group_name, revision, label, name=None, no_
     if not name:
         name = _get_app_from_revision(revision)
 
+    containerapp_patch_def = _get_revision_label_patch(cmd, resource_group_name, revision, label, name, yes)
+
+    try:
+        r = ContainerAppClient.update(
+            cmd=cmd, resource_group_name=resource_group_name, name=name, container_app_envelope=containerapp_patch_def, no_wait=no_wait)
+        return r['properties']['configuration']['ingress']['traffic']
+    except Exception as e:
+        handle_raw_exception(e)
+
+
+def _get_revision_label_patch(cmd, resource_group_name, revision, label, name, yes=False):
     containerapp_def = None
     try:
         containerapp_def = ContainerAppClient.show(cmd=cmd, resource_group_name=resource_group_name, name=name)
@@ -1692,12 +1813,7 @@ def add_revision_label(cmd, resource_group_name, revision, label, name=None, no_
 
     containerapp_patch_def['properties']['configuration']['ingress']['traffic'] = traffic_weight
 
-    try:
-        r = ContainerAppClient.update(
-            cmd=cmd, resource_group_name=resource_group_name, name=name, container_app_envelope=containerapp_patch_def, no_wait=no_wait)
-        return r['properties']['configuration']['ingress']['traffic']
-    except Exception as e:
-        handle_raw_exception(e)
+    return containerapp_patch_def
 
 
 def swap_revision_label(cmd, name, resource_group_name, source_label, target_label, no_wait=False):
@@ -1884,6 +2000,17 @@ def set_ingress_traffic(cmd, name, resource_group_name, label_weights=None, revi
     if not label_weights and not revision_weights:
         raise ValidationError("Must specify either --label-weight or --revision-weight.")
 
+    containerapp_patch_def = _get_ingress_traffic_patch(cmd, name, resource_group_name, label_weights, revision_weights)
+
+    try:
+        r = ContainerAppClient.update(
+            cmd=cmd, resource_group_name=resource_group_name, name=name, container_app_envelope=containerapp_patch_def, no_wait=no_wait)
+        return r['properties']['configuration']['ingress']['traffic']
+    except Exception as e:
+        handle_raw_exception(e)
+
+
+def _get_ingress_traffic_patch(cmd, name, resource_group_name, label_weights=None, revision_weights=None):
     containerapp_def = None
     try:
         containerapp_def = ContainerAppClient.show(cmd=cmd, resource_group_name=resource_group_name, name=name)
@@ -1926,12 +2053,7 @@ def set_ingress_traffic(cmd, name, resource_group_name, label_weights=None, revi
     containerapp_patch_def['properties']['configuration']['ingress'] = {}
     containerapp_patch_def['properties']['configuration']['ingress']['traffic'] = containerapp_def["properties"]["configuration"]["ingress"]["traffic"]
 
-    try:
-        r = ContainerAppClient.update(
-            cmd=cmd, resource_group_name=resource_group_name, name=name, container_app_envelope=containerapp_patch_def, no_wait=no_wait)
-        return r['properties']['configuration']['ingress']['traffic']
-    except Exception as e:
-        handle_raw_exception(e)
+    return containerapp_patch_def
 
 
 def show_ingress_traffic(cmd, name, resource_group_name):
@@ -2542,7 +2664,7 @@ def containerapp_ssh(cmd, resource_group_name, name, container=None, revision=No
 
 
 def stream_containerapp_logs(cmd, resource_group_name, name, container=None, revision=None, replica=None, follow=False,
-                             tail=None, output_format=None, kind=None):
+                             tail=None, output_format=None, kind=None, fields=None, all_replicas=False):
     if tail:
         if tail < 0 or tail > 300:
             raise ValidationError("--tail must be between 0 and 300.")
@@ -2551,6 +2673,8 @@ def stream_containerapp_logs(cmd, resource_group_name, name, container=None, rev
             raise MutuallyExclusiveArgumentError("--type: --container, --replica, and --revision not supported for system logs")
         if output_format and output_format != "json":
             raise MutuallyExclusiveArgumentError("--type: only json logs supported for system logs")
+        if all_replicas:
+            raise MutuallyExclusiveArgumentError("--type: --all-replicas not supported for system logs")
 
     sub = get_subscription_id(cmd.cli_ctx)
     token_response = ContainerAppClient.get_auth_token(cmd, resource_group_name, name)
@@ -2565,11 +2689,31 @@ def stream_containerapp_logs(cmd, resource_group_name, name, container=None, rev
     else:
         url = f"{base_url}/subscriptions/{sub}/resourceGroups/{resource_group_name}/containerApps/{name}/eventstream"
 
-    logger.info("connecting to : %s", url)
     request_params = {"follow": str(follow).lower(),
                       "output": output_format,
                       "tailLines": tail}
     headers = {"Authorization": f"Bearer {token}"}
+
+    if all_replicas:
+        replicas = ContainerAppClient.list_replicas(cmd, resource_group_name, name, revision)
+        if not replicas:
+            raise ResourceNotFoundError(f"Could not find a replica in revision {revision}")
+        session = requests.Session()
+
+        def open_replica_stream(replica_name):
+            replica_url = (f"{base_url}/subscriptions/{sub}/resourceGroups/{resource_group_name}/containerApps/{name}"
+                           f"/revisions/{revision}/replicas/{replica_name}/containers/{container}/logstream")
+            logger.info("connecting to : %s", replica_url)
+            replica_resp = session.get(replica_url, timeout=None, stream=True, params=request_params, headers=headers)
+            if not replica_resp.ok:
+                raise ValidationError(f"Got bad status from the logstream API: {replica_resp.status_code}")
+            return replica_resp.iter_content(chunk_size=None)
+
+        sources = {r["name"]: partial(open_replica_stream, r["name"]) for r in replicas}
+        fan_in_log_streams(sources, fields=fields)
+        return
+
+    logger.info("connecting to : %s", url)
     resp = requests.get(url,
                         timeout=None,
                         stream=True,
@@ -2579,15 +2723,10 @@ def stream_containerapp_logs(cmd, resource_group_name, name, container=None, rev
     if not resp.ok:
         ValidationError(f"Got bad status from the logstream API: {resp.status_code}")
 
-    for line in resp.iter_lines():
-        if line:
-            logger.info("received raw log line: %s", line)
-            # these .replaces are needed to display color/quotations properly
-            # for some reason the API returns garbled unicode special characters (may need to add more in the future)
-            print(line.decode("utf-8").replace("\\u0022", "\u0022").replace("\\u001B", "\u001B").replace("\\u002B", "\u002B").replace("\\u0027", "\u0027"))
+    stream_log_response(resp, fields=fields)
 
 
-def stream_environment_logs(cmd, resource_group_name, name, follow=False, tail=None):
+def stream_environment_logs(cmd, resource_group_name, name, follow=False, tail=None, fields=None):
     if tail:
         if tail < 0 or tail > 300:
             raise ValidationError("--tail must be between 0 and 300.")
@@ -2614,12 +2753,7 @@ def stream_environment_logs(cmd, resource_group_name, name, follow=False, tail=N
     if not resp.ok:
         ValidationError(f"Got bad status from the logstream API: {resp.status_code}")
 
-    for line in resp.iter_lines():
-        if line:
-            logger.info("received raw log line: %s", line)
-            # these .replaces are needed to display color/quotations properly
-            # for some reason the API returns garbled unicode special characters (may need to add more in the future)
-            print(line.decode("utf-8").replace("\\u0022", "\u0022").replace("\\u001B", "\u001B").replace("\\u002B", "\u002B").replace("\\u0027", "\u0027"))
+    stream_log_response(resp, fields=fields)
 
 
 def open_containerapp_in_browser(cmd, name, resource_group_name):
@@ -3768,7 +3902,8 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
                                       registry_pass=None,
                                       transport_mapping=None,
                                       location=None,
-                                      tags=None):
+                                      tags=None,
+                                      max_parallel=1):
 
     from pycomposefile import ComposeFile
 
@@ -3785,7 +3920,14 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
                                  resolve_memory_configuration_from_service,
                                  resolve_replicas_from_service,
                                  resolve_environment_from_service,
-                                 resolve_secret_from_service)
+                                 resolve_secret_from_service,
+                                 resolve_service_dependencies,
+                                 deploy_compose_services,
+                                 log_service_timings)
+
+    max_parallel = max_parallel or 1
+    if max_parallel < 1:
+        raise InvalidArgumentValueError("--max-parallel must be at least 1.")
 
     # Validate managed environment
     parsed_managed_env = parse_resource_id(managed_env)
@@ -3807,8 +3949,7 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
     compose_yaml = load_yaml_file(compose_file_path)
     parsed_compose_file = ComposeFile(compose_yaml)
     logger.info(parsed_compose_file)
-    containerapps_from_compose = []
-    # Using the key to iterate to get the service name
+    # Validate every service up front so an unsupported platform fails before anything is deployed
     # pylint: disable=C0201,C0206
     for service_name in parsed_compose_file.ordered_services.keys():
         service = parsed_compose_file.services[service_name]
@@ -3816,8 +3957,14 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
             message = "Unsupported platform found. "
             message += "Azure Container Apps only supports linux/amd64 container images."
             raise InvalidArgumentValueError(message)
-        image = service.image
         warn_about_unsupported_elements(service)
+
+    # Streaming ACR build logs from several builds at once would interleave them
+    quiet_build = max_parallel > 1
+
+    def deploy_service(service_name):
+        service = parsed_compose_file.services[service_name]
+        image = service.image
         logger.info(  # pylint: disable=W1203
             f"Creating the Container Apps instance for {service_name} under {resource_group_name} in {location}.")
         ingress_type, target_port = resolve_ingress_and_target_port(service)
@@ -3836,7 +3983,7 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
         elif secret_env_ref is not None:
             environment = secret_env_ref
         if service.build is not None:
-            logger.warning("Build configuration defined for this service.")
+            logger.warning("Build configuration defined for service %s.", service_name)
             logger.warning("The build will be performed by Azure Container Registry.")
             context = service.build.context
             dockerfile = "Dockerfile"
@@ -3856,27 +4003,31 @@ def create_containerapps_from_compose(cmd,  # pylint: disable=R0914
                 registry,
                 registry_username,
                 registry_password,
-                environment)
-        containerapps_from_compose.append(
-            create_containerapp(cmd,
-                                service_name,
-                                resource_group_name,
-                                image=image,
-                                container_name=service.container_name,
-                                managed_env=managed_environment["id"],
-                                ingress=ingress_type,
-                                target_port=target_port,
-                                registry_server=registry,
-                                registry_user=registry_username,
-                                registry_pass=registry_password,
-                                transport=transport_setting,
-                                startup_command=startup_command,
-                                args=startup_args,
-                                cpu=cpu,
-                                memory=memory,
-                                env_vars=environment,
-                                secrets=secret_vars,
-                                min_replicas=replicas,
-                                max_replicas=replicas,)
-        )
+                environment,
+                quiet=quiet_build)
+        return create_containerapp(cmd,
+                                   service_name,
+                                   resource_group_name,
+                                   image=image,
+                                   container_name=service.container_name,
+                                   managed_env=managed_environment["id"],
+                                   ingress=ingress_type,
+                                   target_port=target_port,
+                                   registry_server=registry,
+                                   registry_user=registry_username,
+                                   registry_pass=registry_password,
+                                   transport=transport_setting,
+                                   startup_command=startup_command,
+                                   args=startup_args,
+                                   cpu=cpu,
+                                   memory=memory,
+                                   env_vars=environment,
+                                   secrets=secret_vars,
+                                   min_replicas=replicas,
+                                   max_replicas=replicas,)
+
+    service_dependencies = resolve_service_dependencies(parsed_compose_file)
+    deployed, timings = deploy_compose_services(service_dependencies, deploy_service, max_parallel=max_parallel)
+    log_service_timings({name: timings[name] for name in service_dependencies if name in timings})
+    containerapps_from_compose = [deployed[name] for name in service_dependencies]
     return containerapps_from_compose
@@ -2,4 +2,10 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for
 # license information.
-# -----------------------------------------------------------------------------
\ No newline at end of file
+# -----------------------------------------------------------------------------
+
+# The recordings of the scenario tests hold the GETs of the resources being created, updated or deleted, not of the
+# Azure-AsyncOperation/Location URLs, so the tests poll the resources themselves whether they run live or in playback.
+from azext_containerapp import _clients
+
+_clients.POLLING_FOLLOW_OPERATION_HEADERS = False
@@ -0,0 +1,75 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from azext_containerapp._archive_utils import (_pack_source_code, ParallelGzipWriter, SourceBuildCache)
+
+
+def _write(root, relative_path, content="x"):
+    path = os.path.join(root, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class ContainerappArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.work = tempfile.mkdtemp()
+        for relative_path in ["Dockerfile", "app.py", "node_modules/a/index.js", "node_modules/keep/index.js",
+                              "logs/1.log", ".git/HEAD", "src/main.py", "src/build/out.o"]:
+            _write(self.source, relative_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.source)
+        shutil.rmtree(self.work)
+
+    def _packed_names(self, dockerignore):
+        _write(self.source, ".dockerignore", dockerignore)
+        tar_path = os.path.join(self.work, "source.tar.gz")
+        _pack_source_code(self.source, tar_path, os.path.join(self.source, "Dockerfile"), "copied_Dockerfile")
+        with tarfile.open(tar_path, "r:gz") as tar:
+            return {name.rstrip("/") for name in tar.getnames() if name not in ("", "/")}
+
+    def test_pack_applies_dockerignore_rules(self):
+        names = self._packed_names("node_modules\nlogs/*.log\n**/build\n")
+        self.assertEqual(names, {".dockerignore", "Dockerfile", "app.py", "logs", "src", "src/main.py", "copied_Dockerfile"})
+
+    def test_pack_keeps_exceptions_inside_ignored_directories(self):
+        names = self._packed_names("node_modules\n!node_modules/keep\n")
+        self.assertIn("node_modules/keep/index.js", names)
+        self.assertNotIn("node_modules/a/index.js", names)
+        self.assertNotIn(".git/HEAD", names)
+
+    def test_parallel_gzip_roundtrip(self):
+        data = os.urandom(1024) * 3000
+        out = io.BytesIO()
+        with ParallelGzipWriter(out, block_size=64 * 1024, max_workers=4) as writer:
+            for i in range(0, len(data), 10000):
+                writer.write(data[i:i + 10000])
+        self.assertEqual(gzip.decompress(out.getvalue()), data)
+
+    def test_source_hash_changes_with_content_only(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.config_dir = self.work
+        dockerfile = os.path.join(self.source, "Dockerfile")
+
+        first = SourceBuildCache(cli_ctx).get_source_hash(self.source, dockerfile)
+        cache = SourceBuildCache(cli_ctx)
+        self.assertEqual(cache.get_source_hash(self.source, dockerfile), first)
+        cache.set_image("key", "myregistry.azurecr.io/app:1")
+
+        _write(self.source, "app.py", "changed")
+        cache = SourceBuildCache(cli_ctx)
+        self.assertNotEqual(cache.get_source_hash(self.source, dockerfile), first)
+        self.assertEqual(cache.get_image("key"), "myregistry.azurecr.io/app:1")
@@ -0,0 +1,133 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from azure.cli.core.azclierror import AzureResponseError
+
+from azext_containerapp._clients import (_ContainerAppPoller, wait_for_operations, _get_retry_after, _paged)
+
+RESOURCE_URL = "https://management.azure.com/subscriptions/sub/resourceGroups/rg/providers/Microsoft.App/containerApps/app?api-version=2022-06-01-preview"
+ASYNC_URL = "https://management.azure.com/subscriptions/sub/providers/Microsoft.App/locations/eastus/containerappOperationStatuses/op?api-version=2022-06-01-preview"
+
+
+def _response(status_code=200, body=None, headers=None):
+    r = mock.MagicMock()
+    r.status_code = status_code
+    r.headers = headers or {}
+    r.text = "{}" if body is not None else ""
+    r.json.return_value = body
+    return r
+
+
+@mock.patch("azext_containerapp._clients.time.sleep")
+class ContainerappPollerTest(unittest.TestCase):
+    @mock.patch("azext_containerapp._clients.POLLING_FOLLOW_OPERATION_HEADERS", True)
+    def test_follows_async_operation_header(self, _):
+        initial = _response(201, {}, {"Azure-AsyncOperation": ASYNC_URL, "Retry-After": "0"})
+        responses = {
+            ASYNC_URL: [_response(200, {"status": "InProgress"}), _response(200, {"status": "Succeeded"})],
+            RESOURCE_URL: [_response(200, {"properties": {"provisioningState": "Succeeded"}})],
+        }
+
+        def send(_, method, url, **kwargs):
+            self.assertEqual(method, "GET")
+            return responses[url].pop(0)
+
+        with mock.patch("azext_containerapp._clients.send_raw_request", side_effect=send):
+            operation = _ContainerAppPoller(mock.MagicMock(), RESOURCE_URL, "inprogress", initial_response=initial)
+            result = operation.wait()
+
+        self.assertEqual(result["properties"]["provisioningState"], "Succeeded")
+        self.assertEqual(operation.request_count, 3)
+
+    @mock.patch("azext_containerapp._clients.POLLING_FOLLOW_OPERATION_HEADERS", True)
+    def test_raises_the_error_of_a_failed_async_operation(self, _):
+        initial = _response(201, {}, {"Azure-AsyncOperation": ASYNC_URL, "Retry-After": "0"})
+        failed = _response(200, {"status": "Failed", "error": {"code": "InvalidImage", "message": "Image not found."}})
+        with mock.patch("azext_containerapp._clients.send_raw_request", return_value=failed):
+            operation = _ContainerAppPoller(mock.MagicMock(), RESOURCE_URL, "inprogress", initial_response=initial)
+            with self.assertRaisesRegex(AzureResponseError, "Failed: Image not found."):
+                operation.wait()
+
+    def test_ignores_operation_headers_when_disabled(self, _):
+        initial = _response(201, {}, {"Azure-AsyncOperation": ASYNC_URL})
+        responses = [_response(200, {"properties": {"provisioningState": "InProgress"}}),
+                     _response(200, {"properties": {"provisioningState": "Succeeded"}})]
+        with mock.patch("azext_containerapp._clients.send_raw_request", side_effect=lambda *a, **k: responses.pop(0)) as send:
+            operation = _ContainerAppPoller(mock.MagicMock(), RESOURCE_URL, "inprogress", initial_response=initial)
+            operation.wait()
+        self.assertEqual([c[0][2] for c in send.call_args_list], [RESOURCE_URL, RESOURCE_URL])
+
+    def test_falls_back_to_resource_provisioning_state(self, _):
+        responses = [_response(200, {"properties": {"provisioningState": "InProgress"}}),
+                     _response(200, {"properties": {"provisioningState": "Failed"}})]
+        with mock.patch("azext_containerapp._clients.send_raw_request", side_effect=lambda *a, **k: responses.pop(0)):
+            operation = _ContainerAppPoller(mock.MagicMock(), RESOURCE_URL, "inprogress", initial_response=_response(201, {}))
+            result = operation.wait()
+
+        self.assertEqual(result["properties"]["provisioningState"], "Failed")
+        self.assertEqual(operation.request_count, 2)
+        self.assertFalse(operation.timed_out)
+
+    def test_warns_when_polling_times_out(self, _):
+        in_progress = _response(200, {"properties": {"provisioningState": "InProgress"}})
+        with mock.patch("azext_containerapp._clients.send_raw_request", return_value=in_progress), \
+                mock.patch("azext_containerapp._clients.time.time", side_effect=[0, 0, 0, 5, 5]), \
+                mock.patch("azext_containerapp._clients.logger") as logger:
+            operation = _ContainerAppPoller(mock.MagicMock(), RESOURCE_URL, "inprogress", initial_response=_response(201, {}), timeout=5)
+            result = operation.wait()
+
+        self.assertEqual(result["properties"]["provisioningState"], "InProgress")
+        self.assertTrue(operation.timed_out)
+        logger.warning.assert_called_once()
+
+    def test_retry_after(self, _):
+        self.assertEqual(_get_retry_after(_response(headers={"Retry-After": "7"})), 7)
+        self.assertIsNone(_get_retry_after(_response(headers={})))
+        self.assertEqual(_get_retry_after(_response(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})), 0)
+
+    def test_wait_for_operations_collects_errors(self, _):
+        ok = mock.MagicMock(is_delete=False, request_count=2, elapsed=1)
+        ok.wait.return_value = {"name": "ok"}
+        bad = mock.MagicMock(is_delete=False, request_count=1, elapsed=1)
+        bad.wait.side_effect = ValueError("boom")
+
+        summary = wait_for_operations(mock.MagicMock(), [ok, bad], show_progress=False)
+
+        self.assertEqual(summary.results[0], {"name": "ok"})
+        self.assertEqual(len(summary.failed), 1)
+        self.assertEqual(summary.to_dict()["requests"], 3)
+
+
+class ContainerappPaginationTest(unittest.TestCase):
+    def _pages(self, prefix, count, size=2):
+        pages = {}
+        for i in range(count):
+            page = {"value": [f"{prefix}{i * size + j}" for j in range(size)]}
+            if i + 1 < count:
+                page["nextLink"] = f"{prefix}/page{i + 1}"
+            pages[prefix if i == 0 else f"{prefix}/page{i}"] = _response(200, page)
+        return pages
+
+    def test_paged_follows_next_link(self):
+        pages = self._pages("apps", 3)
+        with mock.patch("azext_containerapp._clients.send_raw_request", side_effect=lambda _, m, url: pages[url]):
+            items = list(_paged(mock.MagicMock(), "apps", formatter=str.upper))
+        self.assertEqual(items, ["APPS0", "APPS1", "APPS2", "APPS3", "APPS4", "APPS5"])
+
+    def test_paged_top_stops_fetching(self):
+        pages = self._pages("apps", 3)
+        requested = []
+
+        def send(_, method, url):
+            requested.append(url)
+            return pages[url]
+
+        with mock.patch("azext_containerapp._clients.send_raw_request", side_effect=send):
+            items = list(_paged(mock.MagicMock(), "apps", top=2))
+        self.assertEqual(items, ["apps0", "apps1"])
+        self.assertEqual(requested, ["apps"])
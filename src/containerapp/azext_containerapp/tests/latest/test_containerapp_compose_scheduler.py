@@ -0,0 +1,76 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import threading
+import time
+import unittest
+
+from azure.cli.core.azclierror import ValidationError
+
+from azext_containerapp._compose_utils import deploy_compose_services
+
+
+class ContainerappComposeSchedulerTest(unittest.TestCase):
+    def test_dependencies_finish_before_dependents_start(self):
+        dependencies = {"db": [], "cache": [], "api": ["db", "cache"], "web": ["api"]}
+        finished = []
+        lock = threading.Lock()
+
+        def deploy(service_name):
+            for dependency in dependencies[service_name]:
+                self.assertIn(dependency, finished)
+            time.sleep(0.01)
+            with lock:
+                finished.append(service_name)
+            return {"name": service_name}
+
+        results, timings = deploy_compose_services(dependencies, deploy, max_parallel=4)
+
+        self.assertEqual(set(results), set(dependencies))
+        self.assertEqual(set(timings), set(dependencies))
+        self.assertEqual(finished[-2:], ["api", "web"])
+
+    def test_concurrency_is_bounded(self):
+        dependencies = {f"svc{i}": [] for i in range(8)}
+        active = [0, 0]
+        lock = threading.Lock()
+
+        def deploy(service_name):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return service_name
+
+        deploy_compose_services(dependencies, deploy, max_parallel=3)
+
+        self.assertLessEqual(active[1], 3)
+        self.assertGreater(active[1], 1)
+
+    def test_failure_stops_scheduling_dependents(self):
+        dependencies = {"db": [], "api": ["db"]}
+        started = []
+
+        def deploy(service_name):
+            started.append(service_name)
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            deploy_compose_services(dependencies, deploy, max_parallel=2)
+        self.assertEqual(started, ["db"])
+
+    def test_cyclic_and_unknown_dependencies_are_reported(self):
+        dependencies = {"db": [], "api": ["web"], "web": ["api"], "worker": ["db", "queue"]}
+        deployed = []
+
+        def deploy(service_name):
+            deployed.append(service_name)
+            return service_name
+
+        with self.assertRaisesRegex(ValidationError, "api depends on service.s. web .*; web depends on service.s. api "
+                                                     ".*; worker depends on unknown service.s. queue"):
+            deploy_compose_services(dependencies, deploy, max_parallel=2)
+        self.assertEqual(deployed, ["db"])
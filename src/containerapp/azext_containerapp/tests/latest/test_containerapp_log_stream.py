@@ -0,0 +1,71 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import unittest
+
+from azext_containerapp._log_stream_utils import (iter_log_batches, unescape_log_text, write_log_stream, fan_in_log_streams)
+
+# Shape of the lines returned by the logstream API with --format json
+RECORDED_LINE = (b'{"TimeStamp":"2022-10-05T20:54:01.6424211+00:00",'
+                 b'"Log":"Listening on \\u0022http://0.0.0.0:80\\u0022 \\u001B[32minfo\\u001B[0m"}')
+
+
+def _recorded_stream(lines, chunk_size):
+    body = b"\n".join([RECORDED_LINE] * lines) + b"\n"
+    return [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+
+class ContainerappLogStreamTest(unittest.TestCase):
+    def test_unescape_matches_chained_replace(self):
+        line = RECORDED_LINE.decode("utf-8")
+        expected = line.replace("\\u0022", "\u0022").replace("\\u001B", "\u001B").replace("\\u002B", "\u002B").replace("\\u0027", "\u0027")
+        self.assertEqual(unescape_log_text(RECORDED_LINE).decode("utf-8"), expected)
+
+    def test_batches_reassemble_lines_split_across_chunks(self):
+        batches = list(iter_log_batches([b"first li", b"ne\nsecond\n\nthi", b"rd"]))
+        self.assertEqual([line for batch in batches for line in batch], [b"first line", b"second", b"third"])
+
+    def test_field_projection(self):
+        out = io.StringIO()
+        write_log_stream([RECORDED_LINE + b"\nplain text\n"], out=out, fields=["Log"])
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['Listening on "http://0.0.0.0:80" \x1b[32minfo\x1b[0m', "plain text"])
+
+        out = io.StringIO()
+        write_log_stream([RECORDED_LINE + b"\n"], out=out, fields=["TimeStamp", "Missing"])
+        self.assertEqual(json.loads(out.getvalue()), {"TimeStamp": "2022-10-05T20:54:01.6424211+00:00"})
+
+    def test_fan_in_prefixes_and_orders_replicas(self):
+        def replica_stream(seconds):
+            return lambda: [b"".join(b'{"TimeStamp":"2022-10-05T20:54:%02d","Log":"tick"}\n' % s for s in seconds)]
+
+        def failing_stream():
+            raise ValueError("connection reset")
+
+        out = io.StringIO()
+        written = fan_in_log_streams({"replica-a": replica_stream([1, 3]), "replica-b": replica_stream([2, 4]),
+                                      "replica-c": failing_stream}, out=out, fields=["TimeStamp"], window=0.05)
+
+        self.assertEqual(written, 4)
+        self.assertEqual(out.getvalue().splitlines(), ["[replica-a] 2022-10-05T20:54:01", "[replica-b] 2022-10-05T20:54:02",
+                                                       "[replica-a] 2022-10-05T20:54:03", "[replica-b] 2022-10-05T20:54:04"])
+
+    def test_fan_in_bounded_buffer_does_not_drop_lines(self):
+        noisy = [b"noisy\n" * 500]
+        out = io.StringIO()
+        written = fan_in_log_streams({"noisy": lambda: noisy, "quiet": lambda: [b"quiet\n"]}, out=out, buffer_lines=10, window=0.01)
+
+        self.assertEqual(written, 501)
+        self.assertIn("[quiet] quiet", out.getvalue().splitlines())
+
+    def test_write_recorded_stream_split_into_chunks(self):
+        lines = 5000
+        out = io.StringIO()
+        written = write_log_stream(_recorded_stream(lines, 16 * 1024), out=out)
+
+        self.assertEqual(written, lines)
+        self.assertEqual(out.getvalue(), (unescape_log_text(RECORDED_LINE).decode("utf-8") + "\n") * lines)
@@ -0,0 +1,56 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from azure.cli.core.azclierror import ValidationError
+
+from azext_containerapp.custom import batch_revision_operations, _load_revision_batch_manifest
+
+MANIFEST = {"operations": [
+    {"name": "frontend", "action": "set-traffic", "revisionWeights": ["frontend--v2=100"]},
+    {"name": "frontend", "action": "add-label", "revision": "frontend--v2", "label": "stable"},
+    {"action": "deactivate", "revision": "backend--v1", "resourceGroup": "other-rg"},
+]}
+
+
+@mock.patch("azext_containerapp.custom._validate_subscription_registered")
+class ContainerappRevisionBatchTest(unittest.TestCase):
+    def test_manifest_defaults_and_validation(self, _):
+        with mock.patch("azext_containerapp.custom.load_yaml_file", return_value=MANIFEST):
+            operations = _load_revision_batch_manifest("manifest.yml", "rg")
+        self.assertEqual([(o["resourceGroup"], o["name"], o["action"]) for o in operations],
+                         [("rg", "frontend", "set-traffic"), ("rg", "frontend", "add-label"), ("other-rg", "backend", "deactivate")])
+
+        with mock.patch("azext_containerapp.custom.load_yaml_file", return_value=[{"name": "app", "action": "scale"}]):
+            with self.assertRaises(ValidationError):
+                _load_revision_batch_manifest("manifest.yml", "rg")
+
+    def test_batch_reports_every_operation(self, _):
+        calls = []
+        operation = mock.MagicMock()
+
+        def begin_update(cmd, resource_group_name, name, container_app_envelope):
+            calls.append((name, container_app_envelope))
+            return operation
+
+        summary = mock.MagicMock(results=[{"properties": {"provisioningState": "Succeeded"}}], errors=[None], request_count=2)
+        with mock.patch("azext_containerapp.custom.load_yaml_file", return_value=MANIFEST), \
+                mock.patch("azext_containerapp.custom._get_ingress_traffic_patch", return_value={"traffic": 1}), \
+                mock.patch("azext_containerapp.custom._get_revision_label_patch", return_value={"label": 1}), \
+                mock.patch("azext_containerapp._clients._ContainerAppPoller", mock.MagicMock), \
+                mock.patch("azext_containerapp._clients.wait_for_operations", return_value=summary) as wait, \
+                mock.patch("azext_containerapp.custom.ContainerAppClient") as client:
+            client.begin_update.side_effect = begin_update
+            client.deactivate_revision.side_effect = ValueError("revision not found")
+            results = batch_revision_operations(mock.MagicMock(), "manifest.yml", resource_group_name="rg", max_parallel=2)
+
+        # operations on the same app keep manifest order and only the last update is handed to the shared waiter
+        self.assertEqual(calls, [("frontend", {"traffic": 1}), ("frontend", {"label": 1})])
+        operation.wait.assert_called_once()
+        self.assertEqual(len(wait.call_args[0][1]), 1)
+        self.assertEqual([r["status"] for r in results], ["Succeeded", "Succeeded", "Failed"])
+        self.assertEqual(results[2]["error"], "revision not found")
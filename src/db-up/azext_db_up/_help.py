@@ -14,6 +14,8 @@ helps['mysql up'] = """
           text: az mysql up
         - name: To override default names, provide parameters indicating desired values/existing resources.
           text: az mysql up -g MyResourceGroup -s MyServer -d MyDatabase -u MyUsername -p MyPassword
+        - name: Show how long each provisioning step took.
+          text: az mysql up --timings
 """
 
 helps['postgres up'] = """
@@ -24,6 +26,8 @@ helps['postgres up'] = """
           text: az postgres up
         - name: To override default names, provide parameters indicating desired values/existing resources.
           text: az postgres up -g MyResourceGroup -s MyServer -d MyDatabase -u MyUsername -p MyPassword
+        - name: Show how long each provisioning step took.
+          text: az postgres up --timings
 """
 
 helps['sql up'] = """
@@ -34,6 +38,8 @@ helps['sql up'] = """
           text: az sql up
         - name: To override default names, provide parameters indicating desired values/existing resources.
           text: az sql up -g MyResourceGroup -s MyServer -d MyDatabase -u MyUsername -p MyPassword
+        - name: Show how long each provisioning step took.
+          text: az sql up --timings
 """
 
 helps['mysql down'] = """
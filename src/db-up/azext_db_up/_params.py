@@ -28,6 +28,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
             c.argument('database_name', options_list=['--database-name', '-d'],
                        help='The name of a database to initialize.')
             c.argument('tags', tags_type)
+            c.argument('timings', action='store_true',
+                       help='Include the time spent in each provisioning step in the output.')
 
         if scope != 'sql':  # SQL alreaady has a core command for displaying connection strings
             with self.argument_context('{} show-connection-string'.format(scope)) as c:
@@ -20,4 +20,10 @@ def table_transform_connection_string(result):
         entry['Property'] = key
         entry['Value'] = connection_strings[key]
         table_result.append(entry)
+
+    for step, seconds in result.get('timings', {}).items():
+        entry = OrderedDict()
+        entry['Property'] = 'time: {}'.format(step)
+        entry['Value'] = '{}s'.format(seconds)
+        table_result.append(entry)
     return table_result
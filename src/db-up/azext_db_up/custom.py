@@ -8,6 +8,7 @@ import os
 import re
 import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from msrestazure.azure_exceptions import CloudError
 from knack.log import get_logger
 from knack.util import CLIError
@@ -20,174 +21,204 @@ from azext_db_up._client_factory import (
     cf_postgres_firewall_rules, cf_postgres_config, cf_postgres_db,
     cf_sql_firewall_rules, cf_sql_db,
     resource_client_factory)
-from azext_db_up.util import update_kwargs, resolve_poller
+from azext_db_up.util import update_kwargs, ProvisioningPipeline
 
 logger = get_logger(__name__)
 
+IP_ADDRESS_CHECKS = 20
+IP_ADDRESS_CHECK_WORKERS = 5
+
 
 def mysql_up(cmd, client, resource_group_name=None, server_name=None, location=None, backup_retention=None,
              sku_name=None, geo_redundant_backup=None, storage_mb=None, administrator_login=None,
-             administrator_login_password=None, version=None, ssl_enforcement=None, database_name=None, tags=None):
+             administrator_login_password=None, version=None, ssl_enforcement=None, database_name=None, tags=None,
+             timings=False):
     db_context = DbContext(
         azure_sdk=mysql, cf_firewall=cf_mysql_firewall_rules, cf_db=cf_mysql_db,
         cf_config=cf_mysql_config, logging_name='MySQL', connector=mysql_connector, command_group='mysql',
         server_client=client)
+    pipeline = ProvisioningPipeline()
 
-    try:
-        server_result = client.get(resource_group_name, server_name)
+    server_result = _get_server(client, resource_group_name, server_name)
+    if server_result is not None:
         logger.warning('Found existing MySQL Server \'%s\' in group \'%s\'',
                        server_name, resource_group_name)
         # update server if needed
-        server_result = _update_server(
-            db_context, cmd, client, server_result, resource_group_name, server_name, backup_retention,
-            geo_redundant_backup, storage_mb, administrator_login_password, version, ssl_enforcement, tags)
-    except CloudError:
+        pipeline.add('server', lambda _: _update_server(
+            db_context, client, server_result, resource_group_name, server_name, backup_retention,
+            geo_redundant_backup, storage_mb, administrator_login_password, version, ssl_enforcement, tags))
+    else:
         # Create mysql server
         if administrator_login_password is None:
             administrator_login_password = str(uuid.uuid4())
-        server_result = _create_server(
-            db_context, cmd, resource_group_name, server_name, location, backup_retention,
+        pipeline.add('server', lambda _: _create_server(
+            db_context, resource_group_name, server_name, location, backup_retention,
             sku_name, geo_redundant_backup, storage_mb, administrator_login, administrator_login_password, version,
-            ssl_enforcement, tags)
+            ssl_enforcement, tags))
 
         # Set timeout configuration
-        logger.warning('Configuring wait timeout to 8 hours...')
-        config_client = cf_mysql_config(cmd.cli_ctx, None)
-        resolve_poller(
-            config_client.create_or_update(resource_group_name, server_name, 'wait_timeout', '28800'),
-            cmd.cli_ctx, 'MySQL Configuration Update')
+        pipeline.add('configuration', lambda _: _configure_mysql_wait_timeout(cmd, resource_group_name, server_name),
+                     depends_on=['server'])
 
         # Create firewall rule to allow for Azure IPs
-        _create_azure_firewall_rule(db_context, cmd, resource_group_name, server_name)
+        pipeline.add('azure-firewall-rule', lambda _: _create_azure_firewall_rule(
+            db_context, cmd, resource_group_name, server_name), depends_on=['server'])
 
     # Create mysql database if it does not exist
-    _create_database(db_context, cmd, resource_group_name, server_name, database_name)
+    pipeline.add('database', lambda _: _create_database(
+        db_context, cmd, resource_group_name, server_name, database_name), depends_on=['server'])
 
     # check ip address(es) of the user and configure firewall rules
     mysql_errors = (mysql_connector.errors.DatabaseError, mysql_connector.errors.InterfaceError)
-    host, user = _configure_firewall_rules(
-        db_context, mysql_errors, cmd, server_result, resource_group_name, server_name, administrator_login,
-        administrator_login_password, database_name)
+    pipeline.add('firewall-rules', lambda results: _configure_firewall_rules(
+        db_context, mysql_errors, cmd, results['server'], resource_group_name, server_name, administrator_login,
+        administrator_login_password, database_name), depends_on=['server'])
 
     # connect to mysql and run some commands
     if administrator_login_password is not None:
-        _run_mysql_commands(host, user, administrator_login_password, database_name)
+        pipeline.add('user', lambda results: _run_mysql_commands(
+            _get_host(results), _get_user(administrator_login, server_name), administrator_login_password,
+            database_name), depends_on=['database', 'firewall-rules'])
 
-    return {
+    host, user = _get_host(pipeline.run()), _get_user(administrator_login, server_name)
+    return _add_timings({
         'connectionStrings': _create_mysql_connection_string(
             host, user, administrator_login_password, database_name),
         'host': host,
         'username': user,
         'password': administrator_login_password if administrator_login_password is not None else '*****'
-    }
+    }, pipeline, timings)
 
 
 def postgres_up(cmd, client, resource_group_name=None, server_name=None, location=None, backup_retention=None,
                 sku_name=None, geo_redundant_backup=None, storage_mb=None, administrator_login=None,
-                administrator_login_password=None, version=None, ssl_enforcement=None, database_name=None, tags=None):
+                administrator_login_password=None, version=None, ssl_enforcement=None, database_name=None, tags=None,
+                timings=False):
     db_context = DbContext(
         azure_sdk=postgresql, cf_firewall=cf_postgres_firewall_rules, cf_db=cf_postgres_db,
         cf_config=cf_postgres_config, logging_name='PostgreSQL', connector=psycopg2, command_group='postgres',
         server_client=client)
+    pipeline = ProvisioningPipeline()
 
-    try:
-        server_result = client.get(resource_group_name, server_name)
+    server_result = _get_server(client, resource_group_name, server_name)
+    if server_result is not None:
         logger.warning('Found existing PostgreSQL Server \'%s\' in group \'%s\'',
                        server_name, resource_group_name)
         # update server if needed
-        server_result = _update_server(
-            db_context, cmd, client, server_result, resource_group_name, server_name, backup_retention,
-            geo_redundant_backup, storage_mb, administrator_login_password, version, ssl_enforcement, tags)
-    except CloudError:
+        pipeline.add('server', lambda _: _update_server(
+            db_context, client, server_result, resource_group_name, server_name, backup_retention,
+            geo_redundant_backup, storage_mb, administrator_login_password, version, ssl_enforcement, tags))
+    else:
         # Create postgresql server
         if administrator_login_password is None:
             administrator_login_password = str(uuid.uuid4())
-        server_result = _create_server(
-            db_context, cmd, resource_group_name, server_name, location, backup_retention,
+        pipeline.add('server', lambda _: _create_server(
+            db_context, resource_group_name, server_name, location, backup_retention,
             sku_name, geo_redundant_backup, storage_mb, administrator_login, administrator_login_password, version,
-            ssl_enforcement, tags)
-
-        # # Set timeout configuration
-        # logger.warning('Configuring wait timeout to 8 hours...')
-        # config_client = cf_postgres_config(cmd.cli_ctx, None)
-        # resolve_poller(
-        #     config_client.create_or_update(
-        #         resource_group_name, server_name, 'idle_in_transaction_session_timeout', '28800000'),
-        #     cmd.cli_ctx, 'PostgreSQL Configuration Update')
+            ssl_enforcement, tags))
 
     # Create postgresql database if it does not exist
-    _create_database(db_context, cmd, resource_group_name, server_name, database_name)
+    pipeline.add('database', lambda _: _create_database(
+        db_context, cmd, resource_group_name, server_name, database_name), depends_on=['server'])
 
     # check ip address(es) of the user and configure firewall rules
     postgres_errors = (psycopg2.OperationalError)
-    host, user = _configure_firewall_rules(
-        db_context, postgres_errors, cmd, server_result, resource_group_name, server_name, administrator_login,
-        administrator_login_password, database_name)
+    pipeline.add('firewall-rules', lambda results: _configure_firewall_rules(
+        db_context, postgres_errors, cmd, results['server'], resource_group_name, server_name, administrator_login,
+        administrator_login_password, database_name), depends_on=['server'])
 
     # Create firewall rule to allow for Azure IPs
     # - Moved here to run every time after other firewall rules are configured because
     #   bug on server disables this whenever other firewall rules are added.
-    _create_azure_firewall_rule(db_context, cmd, resource_group_name, server_name)
+    pipeline.add('azure-firewall-rule', lambda _: _create_azure_firewall_rule(
+        db_context, cmd, resource_group_name, server_name), depends_on=['firewall-rules'])
 
     # connect to postgresql and run some commands
     if administrator_login_password is not None:
-        _run_postgresql_commands(host, user, administrator_login_password, database_name)
+        pipeline.add('user', lambda results: _run_postgresql_commands(
+            _get_host(results), _get_user(administrator_login, server_name), administrator_login_password,
+            database_name), depends_on=['database', 'firewall-rules'])
 
-    return _form_response(
+    host, user = _get_host(pipeline.run()), _get_user(administrator_login, server_name)
+    return _add_timings(_form_response(
         _create_postgresql_connection_string(host, user, administrator_login_password, database_name),
         host, user,
         administrator_login_password if administrator_login_password is not None else '*****'
-    )
+    ), pipeline, timings)
 
 
 def sql_up(cmd, client, resource_group_name=None, server_name=None, location=None, administrator_login=None,
-           administrator_login_password=None, version=None, database_name=None, tags=None):
+           administrator_login_password=None, version=None, database_name=None, tags=None, timings=False):
     _ensure_pymssql()
     import pymssql
     db_context = DbContext(
         azure_sdk=sql, cf_firewall=cf_sql_firewall_rules, cf_db=cf_sql_db,
         logging_name='SQL', command_group='sql', server_client=client, connector=pymssql)
+    pipeline = ProvisioningPipeline()
 
-    try:
-        server_result = client.get(resource_group_name, server_name)
+    server_result = _get_server(client, resource_group_name, server_name)
+    if server_result is not None:
         logger.warning('Found existing SQL Server \'%s\' in group \'%s\'',
                        server_name, resource_group_name)
         # update server if needed
-        server_result = _update_sql_server(
-            db_context, cmd, client, server_result, resource_group_name, server_name, administrator_login_password,
-            version, tags)
-    except CloudError:
+        pipeline.add('server', lambda _: _update_sql_server(
+            db_context, client, server_result, resource_group_name, server_name, administrator_login_password,
+            version, tags))
+    else:
         # Create sql server
         if administrator_login_password is None:
             administrator_login_password = str(uuid.uuid4())
-        server_result = _create_sql_server(
-            db_context, cmd, resource_group_name, server_name, location, administrator_login,
-            administrator_login_password, version, tags)
+        pipeline.add('server', lambda _: _create_sql_server(
+            db_context, resource_group_name, server_name, location, administrator_login,
+            administrator_login_password, version, tags))
 
         # Create firewall rule to allow for Azure IPs
-        _create_azure_firewall_rule(db_context, cmd, resource_group_name, server_name)
+        pipeline.add('azure-firewall-rule', lambda _: _create_azure_firewall_rule(
+            db_context, cmd, resource_group_name, server_name), depends_on=['server'])
 
     # Create sql database if it does not exist
-    _create_sql_database(db_context, cmd, resource_group_name, server_name, database_name, location)
+    pipeline.add('database', lambda _: _create_sql_database(
+        db_context, cmd, resource_group_name, server_name, database_name, location), depends_on=['server'])
 
     # check ip address(es) of the user and configure firewall rules
     sql_errors = (pymssql.InterfaceError, pymssql.OperationalError)
-    host, user = _configure_firewall_rules(
-        db_context, sql_errors, cmd, server_result, resource_group_name, server_name, administrator_login,
-        administrator_login_password, database_name, {'tds_version': '7.0'})
-
-    user = '{}@{}'.format(administrator_login, server_name)
-    host = server_result.fully_qualified_domain_name
+    pipeline.add('firewall-rules', lambda results: _configure_firewall_rules(
+        db_context, sql_errors, cmd, results['server'], resource_group_name, server_name, administrator_login,
+        administrator_login_password, database_name, {'tds_version': '7.0'}), depends_on=['server'])
 
     # connect to sql server and run some commands
     if administrator_login_password is not None:
-        _run_sql_commands(host, user, administrator_login_password, database_name)
+        pipeline.add('user', lambda results: _run_sql_commands(
+            _get_host(results), _get_user(administrator_login, server_name), administrator_login_password,
+            database_name), depends_on=['database', 'firewall-rules'])
 
-    return _form_response(
+    host, user = _get_host(pipeline.run()), _get_user(administrator_login, server_name)
+    return _add_timings(_form_response(
         _create_sql_connection_string(host, user, administrator_login_password, database_name),
         host, user,
         administrator_login_password if administrator_login_password is not None else '*****'
-    )
+    ), pipeline, timings)
+
+
+def _get_server(client, resource_group_name, server_name):
+    try:
+        return client.get(resource_group_name, server_name)
+    except CloudError:
+        return None
+
+
+def _get_host(results):
+    return results['server'].fully_qualified_domain_name
+
+
+def _get_user(administrator_login, server_name):
+    return '{}@{}'.format(administrator_login, server_name)
+
+
+def _add_timings(result, pipeline, timings):
+    if timings:
+        result['timings'] = pipeline.timings_output()
+    return result
 
 
 def _ensure_pymssql():
@@ -423,43 +454,44 @@ def _configure_firewall_rules(
     if administrator_login_password is not None:
         kwargs['password'] = administrator_login_password
     kwargs.update(extra_connector_args or {})
-    addresses = set()
-    logger.warning('Checking your ip address...')
-    for _ in range(20):
+    pattern = re.compile(r'.*[\'"](?P<ipAddress>[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+)[\'"]')
+
+    def _check_ip_address(_):
         try:
             connection = connector.connect(**kwargs)
             connection.close()
         except connector_errors as ex:
-            pattern = re.compile(r'.*[\'"](?P<ipAddress>[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+)[\'"]')
             try:
-                addresses.add(pattern.match(str(ex)).groupdict().get('ipAddress'))
+                return pattern.match(str(ex)).groupdict().get('ipAddress')
             except AttributeError:
                 pass
+        return None
 
-    # Create firewall rules for devbox if needed
+    logger.warning('Checking your ip address...')
+    with ThreadPoolExecutor(max_workers=IP_ADDRESS_CHECK_WORKERS) as executor:
+        addresses = set(executor.map(_check_ip_address, range(IP_ADDRESS_CHECKS))) - {None}
+
+    # Create firewall rules for devbox if needed, all of them at once
     firewall_client = cf_firewall(cmd.cli_ctx, None)
+    firewall_results = []
 
     if addresses and len(addresses) == 1:
         ip_address = addresses.pop()
         logger.warning('Configuring server firewall rule, \'devbox\', to allow for your ip address: %s', ip_address)
-        resolve_poller(
-            firewall_client.create_or_update(resource_group_name, server_name, 'devbox', ip_address, ip_address),
-            cmd.cli_ctx, '{} Firewall Rule Create/Update'.format(logging_name))
+        firewall_results.append(
+            firewall_client.create_or_update(resource_group_name, server_name, 'devbox', ip_address, ip_address))
     elif addresses:
         logger.warning('Detected dynamic IP address, configuring firewall rules for IP addresses encountered...')
         logger.warning('IP Addresses: %s', ', '.join(list(addresses)))
-        firewall_results = []
         for i, ip_address in enumerate(addresses):
             firewall_results.append(firewall_client.create_or_update(
                 resource_group_name, server_name, 'devbox' + str(i), ip_address, ip_address))
-        for result in firewall_results:
-            resolve_poller(result, cmd.cli_ctx, '{} Firewall Rule Create/Update'.format(logging_name))
     logger.warning('If %s server declines your IP address, please create a new firewall rule using:', logging_name)
     logger.warning('    `az %s server firewall-rule create -g %s -s %s -n {rule_name} '
                    '--start-ip-address {ip_address} --end-ip-address {ip_address}`',
                    command_group, resource_group_name, server_name)
 
-    return host, user
+    return firewall_results
 
 
 def _create_database(db_context, cmd, resource_group_name, server_name, database_name):
@@ -470,9 +502,8 @@ def _create_database(db_context, cmd, resource_group_name, server_name, database
         database_client.get(resource_group_name, server_name, database_name)
     except CloudError:
         logger.warning('Creating %s database \'%s\'...', logging_name, database_name)
-        resolve_poller(
-            database_client.create_or_update(resource_group_name, server_name, database_name), cmd.cli_ctx,
-            '{} Database Create/Update'.format(logging_name))
+        return database_client.create_or_update(resource_group_name, server_name, database_name)
+    return None
 
 
 def _create_sql_database(db_context, cmd, resource_group_name, server_name, database_name, location):
@@ -483,23 +514,26 @@ def _create_sql_database(db_context, cmd, resource_group_name, server_name, data
     except CloudError:
         logger.warning('Creating %s database \'%s\'...', logging_name, database_name)
         params = azure_sdk.models.Database(location=location)
-        resolve_poller(
-            database_client.create_or_update(resource_group_name, server_name, database_name, params), cmd.cli_ctx,
-            '{} Database Create/Update'.format(logging_name))
+        return database_client.create_or_update(resource_group_name, server_name, database_name, params)
+    return None
 
 
 def _create_azure_firewall_rule(db_context, cmd, resource_group_name, server_name):
     # allow access to azure ip addresses
-    cf_firewall, logging_name = db_context.cf_firewall, db_context.logging_name
+    cf_firewall = db_context.cf_firewall
     logger.warning('Configuring server firewall rule, \'azure-access\', to accept connections from all '
                    'Azure resources...')
     firewall_client = cf_firewall(cmd.cli_ctx, None)
-    resolve_poller(
-        firewall_client.create_or_update(resource_group_name, server_name, 'azure-access', '0.0.0.0', '0.0.0.0'),
-        cmd.cli_ctx, '{} Firewall Rule Create/Update'.format(logging_name))
+    return firewall_client.create_or_update(resource_group_name, server_name, 'azure-access', '0.0.0.0', '0.0.0.0')
+
+
+def _configure_mysql_wait_timeout(cmd, resource_group_name, server_name):
+    logger.warning('Configuring wait timeout to 8 hours...')
+    config_client = cf_mysql_config(cmd.cli_ctx, None)
+    return config_client.create_or_update(resource_group_name, server_name, 'wait_timeout', '28800')
 
 
-def _create_server(db_context, cmd, resource_group_name, server_name, location, backup_retention, sku_name,
+def _create_server(db_context, resource_group_name, server_name, location, backup_retention, sku_name,
                    geo_redundant_backup, storage_mb, administrator_login, administrator_login_password, version,
                    ssl_enforcement, tags):
     logging_name, azure_sdk, server_client = db_context.logging_name, db_context.azure_sdk, db_context.server_client
@@ -519,12 +553,10 @@ def _create_server(db_context, cmd, resource_group_name, server_name, location,
         location=location,
         tags=tags)
 
-    return resolve_poller(
-        server_client.create(resource_group_name, server_name, parameters), cmd.cli_ctx,
-        '{} Server Create'.format(logging_name))
+    return server_client.create(resource_group_name, server_name, parameters)
 
 
-def _create_sql_server(db_context, cmd, resource_group_name, server_name, location, administrator_login,
+def _create_sql_server(db_context, resource_group_name, server_name, location, administrator_login,
                        administrator_login_password, version, tags):
     logging_name, azure_sdk, server_client = db_context.logging_name, db_context.azure_sdk, db_context.server_client
     logger.warning('Creating %s Server \'%s\' in group \'%s\'...', logging_name, server_name, resource_group_name)
@@ -536,12 +568,10 @@ def _create_sql_server(db_context, cmd, resource_group_name, server_name, locati
         location=location,
         tags=tags)
 
-    return resolve_poller(
-        server_client.create_or_update(resource_group_name, server_name, parameters), cmd.cli_ctx,
-        '{} Server Create'.format(logging_name))
+    return server_client.create_or_update(resource_group_name, server_name, parameters)
 
 
-def _update_server(db_context, cmd, client, server_result, resource_group_name, server_name, backup_retention,
+def _update_server(db_context, client, server_result, resource_group_name, server_name, backup_retention,
                    geo_redundant_backup, storage_mb, administrator_login_password, version, ssl_enforcement, tags):
     # storage profile params
     storage_profile_kwargs = {}
@@ -567,12 +597,11 @@ def _update_server(db_context, cmd, client, server_result, resource_group_name,
     if server_update_kwargs:
         logger.warning('Updating existing %s Server \'%s\' with given arguments', logging_name, server_name)
         params = db_sdk.models.ServerUpdateParameters(**server_update_kwargs)
-        return resolve_poller(client.update(
-            resource_group_name, server_name, params), cmd.cli_ctx, '{} Server Update'.format(logging_name))
+        return client.update(resource_group_name, server_name, params)
     return server_result
 
 
-def _update_sql_server(db_context, cmd, client, server_result, resource_group_name, server_name,
+def _update_sql_server(db_context, client, server_result, resource_group_name, server_name,
                        administrator_login_password, version, tags):
     db_sdk, logging_name = db_context.azure_sdk, db_context.logging_name
 
@@ -586,8 +615,7 @@ def _update_sql_server(db_context, cmd, client, server_result, resource_group_na
     if server_update_kwargs:
         logger.warning('Updating existing %s Server \'%s\' with given arguments', logging_name, server_name)
         params = db_sdk.models.ServerUpdate(**server_update_kwargs)
-        return resolve_poller(client.update(
-            resource_group_name, server_name, params), cmd.cli_ctx, '{} Server Update'.format(logging_name))
+        return client.update(resource_group_name, server_name, params)
     return server_result
 
 
@@ -0,0 +1,144 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+from unittest import mock
+
+from azext_db_up import custom
+from azext_db_up.util import ProvisioningPipeline
+
+
+class NotFound(Exception):
+    pass
+
+
+class FakeOperations(object):
+    """Starts fake long running operations, keeping track of how many of them are in flight at the same time."""
+    def __init__(self):
+        self.started = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def start(self, name, result=None, wait_for=1):
+        with self.lock:
+            self.started.append(name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return FakePoller(self, result, wait_for)
+
+    def finish(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class FakePoller(object):
+    """An operation that finishes once `wait_for` operations were started, or after 100 polls."""
+    def __init__(self, operations, result, wait_for):
+        self.operations = operations
+        self._result = result
+        self.wait_for = wait_for
+        self.polls = 0
+        self.finished = False
+
+    def done(self):
+        if not self.finished:
+            self.polls += 1
+            if len(self.operations.started) >= self.wait_for or self.polls > 100:
+                self.finished = True
+                self.operations.finish()
+        return self.finished
+
+    def result(self):
+        return self._result
+
+
+class FakeArmClient(FakeOperations):
+    """Stands for the servers, databases, configurations and firewall rules operations of the management client."""
+    def get(self, *_):
+        raise NotFound()
+
+    def create(self, resource_group_name, server_name, parameters):
+        return self.start('server', mock.MagicMock(fully_qualified_domain_name=server_name + '.mysql.azure.com'))
+
+    def create_or_update(self, resource_group_name, server_name, name, *args):
+        # the configuration, database and firewall rules are expected to be created together
+        return self.start(name, wait_for=5)
+
+
+@mock.patch('azext_db_up.util.LRO_POLL_INTERVAL', 0.001)
+class DbUpPipelineTest(unittest.TestCase):
+    def test_pipeline_runs_independent_steps_together(self):
+        operations = FakeOperations()
+        pipeline = ProvisioningPipeline()
+        pipeline.add('server', lambda _: operations.start('server', 'srv'))
+        pipeline.add('database', lambda _: operations.start('database', wait_for=4), depends_on=['server'])
+        pipeline.add('rules', lambda _: [operations.start('rule1', 1, wait_for=4),
+                                         operations.start('rule2', 2, wait_for=4)], depends_on=['server'])
+        pipeline.add('user', lambda results: (results['server'], results['rules']), depends_on=['database', 'rules'])
+
+        results = pipeline.run()
+
+        self.assertEqual(results['user'], ('srv', [1, 2]))
+        self.assertEqual(operations.started[0], 'server')
+        self.assertEqual(operations.max_in_flight, 3)
+        self.assertEqual(set(pipeline.timings_output()), {'server', 'database', 'rules', 'user', 'total'})
+
+        with self.assertRaises(ValueError):
+            pipeline.add('grant', lambda _: None, depends_on=['users'])
+
+    @mock.patch('azext_db_up.util.PROGRESS_LOG_INTERVAL', 0)
+    def test_pipeline_logs_the_steps_in_flight(self):
+        operations = FakeOperations()
+        pipeline = ProvisioningPipeline()
+        pipeline.add('server', lambda _: operations.start('server', wait_for=3))
+        pipeline.add('rules', lambda _: operations.start('rules', wait_for=3))
+        pipeline.add('database', lambda _: operations.start('database'), depends_on=['server'])
+
+        with mock.patch('azext_db_up.util.logger') as logger:
+            pipeline.run()
+
+        messages = [call[0][1] for call in logger.warning.call_args_list]
+        self.assertEqual(messages[0], 'server, rules')
+        self.assertTrue(any('database' in message for message in messages))
+
+    def test_pipeline_raises_the_error_of_a_step(self):
+        def fail(_):
+            raise RuntimeError('conflict')
+
+        pipeline = ProvisioningPipeline()
+        pipeline.add('server', lambda _: 'srv')
+        pipeline.add('database', fail, depends_on=['server'])
+        with self.assertRaisesRegex(RuntimeError, 'conflict'):
+            pipeline.run()
+
+    def test_mysql_up_against_mocked_arm(self):
+        arm_client = FakeArmClient()
+        connector = mock.MagicMock()
+        connector.errors.DatabaseError = connector.errors.InterfaceError = ValueError
+        connector.connect.side_effect = ValueError("Host '10.0.0.1' is not allowed to connect to this server")
+        factory = mock.MagicMock(return_value=arm_client)
+
+        with mock.patch.multiple('azext_db_up.custom', CloudError=NotFound, mysql_connector=connector,
+                                 cf_mysql_firewall_rules=factory, cf_mysql_db=factory, cf_mysql_config=factory,
+                                 mysql=mock.MagicMock(), _run_mysql_commands=mock.DEFAULT) as patches:
+            result = custom.mysql_up(mock.MagicMock(), arm_client, 'rg', 'server1', 'westus', 7, 'GP_Gen5_2',
+                                     'Disabled', 5120, 'admin', 'Passw0rd!', '5.7', 'Enabled', 'sampledb',
+                                     timings=True)
+
+        self.assertEqual(result['host'], 'server1.mysql.azure.com')
+        patches['_run_mysql_commands'].assert_called_once_with(
+            'server1.mysql.azure.com', 'admin@server1', 'Passw0rd!', 'sampledb')
+        # once the server exists, the configuration, the database and all the firewall rules are created together
+        self.assertEqual(arm_client.started[0], 'server')
+        self.assertEqual(sorted(arm_client.started[1:]), ['azure-access', 'devbox', 'sampledb', 'wait_timeout'])
+        self.assertEqual(arm_client.max_in_flight, 4)
+        self.assertEqual(set(result['timings']), {'server', 'configuration', 'azure-firewall-rule', 'database',
+                                                  'firewall-rules', 'user', 'total'})
+
+
+if __name__ == '__main__':
+    unittest.main()
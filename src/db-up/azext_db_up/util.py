@@ -5,8 +5,13 @@
 
 import random
 import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from knack.config import CLIConfig
-from azure.cli.core.commands import LongRunningOperation, _is_poller
+from knack.log import get_logger
+
+logger = get_logger(__name__)
 
 CONFIG_DIR = os.path.expanduser(os.path.join('~', '.azext_db_up'))
 ENV_VAR_PREFIX = 'AZEXT'
@@ -19,6 +24,8 @@ CONFIG_MAP = {
     'sql': SQL_CONFIG_SECTION
 }
 DB_CONFIG = CLIConfig(config_dir=CONFIG_DIR, config_env_var_prefix=ENV_VAR_PREFIX)
+LRO_POLL_INTERVAL = 2
+PROGRESS_LOG_INTERVAL = 15  # how many seconds between two logs of the steps still running
 
 
 def create_random_resource_name(prefix='azure', length=15):
@@ -53,7 +60,82 @@ def update_kwargs(kwargs, key, value):
         kwargs[key] = value
 
 
-def resolve_poller(result, cli_ctx, name):
-    if _is_poller(result):
-        return LongRunningOperation(cli_ctx, 'Starting {}'.format(name))(result)
-    return result
+def _is_operation(result):
+    # pollers of both the vendored and the track 2 SDKs
+    return callable(getattr(result, 'done', None)) and callable(getattr(result, 'result', None))
+
+
+class ProvisioningPipeline:
+    """
+    Runs the steps of an `up` command as soon as the steps they depend on have finished, so that independent steps
+    run concurrently. A step is a function of the results of the previous steps, returning its own result or the
+    long running operation(s) it started. Those operations are all polled by the pipeline itself instead of one
+    blocking wait per operation.
+    """
+    def __init__(self, poll_interval=None, max_workers=8):
+        self.poll_interval = LRO_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.max_workers = max_workers
+        self.timings = OrderedDict()
+        self._steps = OrderedDict()
+
+    def add(self, name, func, depends_on=()):
+        unknown = [dependency for dependency in depends_on if dependency not in self._steps]
+        if unknown:
+            raise ValueError("Step '{}' depends on unknown steps: {}".format(name, ', '.join(unknown)))
+        self._steps[name] = (func, tuple(depends_on))
+
+    def run(self):
+        results = {}
+        pending = OrderedDict(self._steps)
+        started = {}
+        running = {}  # future -> name of the step starting its operations
+        operations = {}  # name of the step -> operations it is waiting for
+        start = last_progress_log = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running or operations:
+                in_flight = [name for name in self._steps if name in operations or name in running.values()]
+                if in_flight and time.perf_counter() - last_progress_log >= PROGRESS_LOG_INTERVAL:
+                    last_progress_log = time.perf_counter()
+                    logger.warning("Waiting for %s...", ', '.join(in_flight))
+
+                for name, step_operations in list(operations.items()):
+                    if all(operation.done() for operation in step_operations):
+                        del operations[name]
+                        step_results = [operation.result() for operation in step_operations]
+                        self._complete(name, step_results if len(step_results) > 1 else step_results[0],
+                                       results, started)
+
+                for name, (func, depends_on) in list(pending.items()):
+                    if all(dependency in results for dependency in depends_on):
+                        del pending[name]
+                        started[name] = time.perf_counter()
+                        running[executor.submit(func, results)] = name
+
+                if running:
+                    done, _ = wait(list(running), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+                    if operations:
+                        time.sleep(self.poll_interval)
+
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    if isinstance(result, list) and result and all(_is_operation(r) for r in result):
+                        operations[name] = result
+                    elif _is_operation(result):
+                        operations[name] = [result]
+                    else:
+                        self._complete(name, result, results, started)
+
+        self.timings['total'] = time.perf_counter() - start
+        return results
+
+    def _complete(self, name, result, results, started):
+        results[name] = result
+        self.timings[name] = time.perf_counter() - started[name]
+        logger.info("Step '%s' finished in %.1fs", name, self.timings[name])
+
+    def timings_output(self):
+        return OrderedDict((name, round(seconds, 2)) for name, seconds in self.timings.items())
@@ -9,7 +9,7 @@ import sys
 from codecs import open
 from setuptools import setup, find_packages
 
-VERSION = "0.2.7"
+VERSION = "0.2.8"
 
 CLASSIFIERS = [
     'Development Status :: 4 - Beta',
@@ -3,11 +3,10 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import sys
-import json
-
-from subprocess import check_output, STDOUT, CalledProcessError
-from knack.util import CLIError
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from knack.log import get_logger
 logger = get_logger(__name__)
@@ -15,72 +14,96 @@ logger = get_logger(__name__)
 EXTENSION_TAG_STRING = 'created_by=image-copy-extension'
 
 
-# pylint: disable=inconsistent-return-statements
-def run_cli_command(cmd, return_as_json=False):
-    try:
-        cmd_output = check_output(cmd, stderr=STDOUT, universal_newlines=True)
-        logger.debug('command: %s ended with output: %s', cmd, cmd_output)
-
-        if return_as_json:
-            if cmd_output:
-                # cleanup to resolve invalid JSON in underlying azure cli  - issue #979
-                # Related to: https://github.com/Azure/azure-cli/issues/10687
-                json_start_chars = {"{", "["}
-                json_start_at = next((i for i, ch in enumerate(str(cmd_output)) if ch in json_start_chars), -1)
-                logger.debug('json output starts at position: %i ', json_start_at)
-                if json_start_at > 0:
-                    logger.debug("json output did not start at position 0, stripping the prefix.")
-                    cmd_output = str(cmd_output)[json_start_at:]
-                    logger.debug("json output after fix:")
-                    logger.debug(cmd_output)
-
-                json_output = json.loads(cmd_output)
-                return json_output
-
-            raise CLIError("Command returned an unexpected empty string.")
-        return cmd_output
-    except CalledProcessError as ex:
-        logger.error('command failed: %s', cmd)
-        logger.error('output: %s', ex.output)
-        raise ex
-    except Exception as ex:
-        logger.error('command ended with an error: %s', cmd)
-        logger.error('args: %s', ex.args)
-        raise ex
-
-
-def prepare_cli_command(cmd, output_as_json=True, tags=None, subscription=None, only_show_errors=None):
-    full_cmd = [sys.executable, '-m', 'azure.cli'] + cmd
-
-    if output_as_json:
-        full_cmd += ['--output', 'json']
-    else:
-        full_cmd += ['--output', 'tsv']
-
-    # override the default subscription if needed
-    if subscription is not None:
-        full_cmd += ['--subscription', subscription]
-
-    # tag newly created resources, containers don't have tags
-    if 'create' in cmd and ('container' not in cmd):
-        full_cmd += ['--tags', EXTENSION_TAG_STRING]
-
-        if tags is not None:
-            for k, v in tags.items():
-                if v == '':
-                    full_cmd.append(k)
-                else:
-                    full_cmd.append(k + '=' + v)
-
-    # use --only-show-errors to run CLI commands if user specified
-    if only_show_errors:
-        full_cmd += ['--only-show-errors']
-
-    return full_cmd
+def get_tags(tags=None):
+    # tag newly created resources with the extension tag, on top of the tags of the user
+    key, value = EXTENSION_TAG_STRING.split('=')
+    result = {key: value}
+    result.update(tags or {})
+    return result
+
+
+class ImageCopyClients:
+    """
+    SDK clients shared by all the target locations. Azure SDK clients are safe to use from several threads, so each
+    client is created once per subscription (or storage account) and reused instead of starting a new CLI per step.
+    """
+    def __init__(self, cli_ctx):
+        self.cli_ctx = cli_ctx
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, factory):
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = factory()
+            return self._clients[key]
+
+    def _mgmt(self, resource_type, subscription):
+        from azure.cli.core.commands.client_factory import get_mgmt_service_client
+        return self._get((resource_type, subscription),
+                         lambda: get_mgmt_service_client(self.cli_ctx, resource_type, subscription_id=subscription))
+
+    def compute(self, subscription=None):
+        from azure.cli.core.profiles import ResourceType
+        return self._mgmt(ResourceType.MGMT_COMPUTE, subscription)
+
+    def storage(self, subscription=None):
+        from azure.cli.core.profiles import ResourceType
+        return self._mgmt(ResourceType.MGMT_STORAGE, subscription)
+
+    def resource(self, subscription=None):
+        from azure.cli.core.profiles import ResourceType
+        return self._mgmt(ResourceType.MGMT_RESOURCE_RESOURCES, subscription)
+
+    def blob_service(self, blob_endpoint, account_key):
+        from azure.cli.core.profiles import ResourceType, get_sdk
+        blob_service_client = get_sdk(self.cli_ctx, ResourceType.DATA_STORAGE_BLOB,
+                                      '_blob_service_client#BlobServiceClient')
+        return self._get(blob_endpoint, lambda: blob_service_client(account_url=blob_endpoint, credential=account_key))
+
+    def compute_models(self, *names):
+        from azure.cli.core.profiles import ResourceType, get_sdk
+        return get_sdk(self.cli_ctx, ResourceType.MGMT_COMPUTE, *names, mod='models')
+
+    def storage_models(self, *names):
+        from azure.cli.core.profiles import ResourceType, get_sdk
+        return get_sdk(self.cli_ctx, ResourceType.MGMT_STORAGE, *names, mod='models')
+
+    def resource_models(self, *names):
+        from azure.cli.core.profiles import ResourceType, get_sdk
+        return get_sdk(self.cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES, *names, mod='models')
+
+
+class PhaseTimer:
+    """Records how long each phase of the copy took, per target location."""
+    def __init__(self):
+        self._timings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name, location=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._timings.setdefault(name, []).append((location, elapsed))
+
+    def report(self):
+        if not self._timings:
+            return
+        logger.warning('Time spent per phase:')
+        with self._lock:
+            for name, timings in self._timings.items():
+                locations = ', '.join('{0} {1:.1f}s'.format(location, elapsed)
+                                      for location, elapsed in timings if location)
+                logger.warning('  %s: %.1fs%s', name, max(elapsed for _, elapsed in timings),
+                               ' ({0})'.format(locations) if locations else '')
 
 
 def get_storage_account_id_from_blob_path(blob_path, resource_group, subscription_id):
-    from msrestazure.tools import resource_id
+    from azure.mgmt.core.tools import resource_id
 
     logger.debug('Getting storage account id for blob: %s', blob_path)
 
@@ -3,13 +3,12 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import datetime
-import time
+import threading
 
 from knack.util import CLIError
 from knack.log import get_logger
 
-from azext_imagecopy.cli_utils import run_cli_command, prepare_cli_command, get_storage_account_id_from_blob_path
+from azext_imagecopy.cli_utils import get_tags, get_storage_account_id_from_blob_path
 
 logger = get_logger(__name__)
 
@@ -18,12 +17,14 @@ STORAGE_ACCOUNT_NAME_LENGTH = 24
 
 # pylint: disable=too-many-statements
 # pylint: disable=too-many-locals
-def create_target_image(location, transient_resource_group_name, source_type, source_object_name,
-                        source_os_disk_snapshot_name, source_os_disk_snapshot_url, source_os_type,
-                        target_resource_group_name, azure_pool_frequency, tags, target_name, target_subscription,
-                        export_as_snapshot, timeout, hyper_v_generation, only_show_errors=None):
+def create_target_image(clients, copy_poller, timer, location, transient_resource_group_name, source_type,
+                        source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url, source_os_type,
+                        target_resource_group_name, tags, target_name, target_subscription,
+                        export_as_snapshot, hyper_v_generation):
 
     hyper_v_generation = 'V1' if hyper_v_generation is None else hyper_v_generation
+    storage_client = clients.storage(target_subscription)
+    compute_client = clients.compute(target_subscription)
 
     random_string = get_random_string(
         STORAGE_ACCOUNT_NAME_LENGTH - len(location))
@@ -32,82 +33,36 @@ def create_target_image(location, transient_resource_group_name, source_type, so
     logger.warning(
         "%s - Creating target storage account (can be slow sometimes)", location)
     target_storage_account_name = location.lower() + random_string
-    cli_cmd = prepare_cli_command(['storage', 'account', 'create',
-                                   '--name', target_storage_account_name,
-                                   '--resource-group', transient_resource_group_name,
-                                   '--location', location,
-                                   '--sku', 'Standard_LRS'],
-                                  subscription=target_subscription,
-                                  only_show_errors=only_show_errors)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-    target_blob_endpoint = json_output['primaryEndpoints']['blob']
-
-    # Setup the target storage account
-    cli_cmd = prepare_cli_command(['storage', 'account', 'keys', 'list',
-                                   '--account-name', target_storage_account_name,
-                                   '--resource-group', transient_resource_group_name],
-                                  subscription=target_subscription,
-                                  only_show_errors=only_show_errors)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-
-    target_storage_account_key = json_output[0]['value']
-    logger.debug("storage account key: %s", target_storage_account_key)
-
-    expiry_format = "%Y-%m-%dT%H:%MZ"
-    expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=timeout)
-    logger.debug(
-        "create target storage sas using timeout seconds: %d", timeout)
-
-    cli_cmd = prepare_cli_command(['storage', 'account', 'generate-sas',
-                                   '--account-name', target_storage_account_name,
-                                   '--account-key', target_storage_account_key,
-                                   '--expiry', expiry.strftime(expiry_format),
-                                   '--permissions', 'aclrpuw', '--resource-types',
-                                   'sco', '--services', 'b', '--https-only'],
-                                  output_as_json=False,
-                                  subscription=target_subscription,
-                                  only_show_errors=only_show_errors)
-
-    sas_token = run_cli_command(cli_cmd)
-    sas_token = sas_token.rstrip("\n\r")  # STRANGE
-    logger.debug("sas token: %s", sas_token)
+    StorageAccountCreateParameters, StorageSku = clients.storage_models('StorageAccountCreateParameters', 'Sku')
+    with timer.phase('Create target storage account', location):
+        storage_account = storage_client.storage_accounts.begin_create(
+            transient_resource_group_name, target_storage_account_name,
+            StorageAccountCreateParameters(sku=StorageSku(name='Standard_LRS'), kind='StorageV2',
+                                           location=location, tags=get_tags())).result()
+        target_blob_endpoint = storage_account.primary_endpoints.blob
+
+        # The data plane is reached with the account key, no SAS token has to be generated for the copy
+        target_storage_account_key = storage_client.storage_accounts.list_keys(
+            transient_resource_group_name, target_storage_account_name).keys[0].value
 
     # create a container in the target blob storage account
     logger.warning(
         "%s - Creating container in the target storage account", location)
     target_container_name = 'snapshots'
-    cli_cmd = prepare_cli_command(['storage', 'container', 'create',
-                                   '--name', target_container_name,
-                                   '--account-name', target_storage_account_name],
-                                  subscription=target_subscription,
-                                  only_show_errors=only_show_errors)
-
-    run_cli_command(cli_cmd)
+    blob_service_client = clients.blob_service(target_blob_endpoint, target_storage_account_key)
+    with timer.phase('Create container', location):
+        blob_service_client.create_container(target_container_name)
 
     # Copy the snapshot to the target region using the SAS URL
     blob_name = source_os_disk_snapshot_name + '.vhd'
     logger.warning(
         "%s - Copying blob to target storage account", location)
-    cli_cmd = prepare_cli_command(['storage', 'blob', 'copy', 'start',
-                                   '--source-uri', source_os_disk_snapshot_url,
-                                   '--destination-blob', blob_name,
-                                   '--destination-container', target_container_name,
-                                   '--account-name', target_storage_account_name,
-                                   '--sas-token', sas_token],
-                                  subscription=target_subscription,
-                                  only_show_errors=only_show_errors)
-
-    run_cli_command(cli_cmd)
-
-    # Wait for the copy to complete
-    start_datetime = datetime.datetime.now()
-    wait_for_blob_copy_operation(blob_name, target_container_name, target_storage_account_name,
-                                 azure_pool_frequency, location, target_subscription, only_show_errors=only_show_errors)
-    msg = "{0} - Copy time: {1}".format(
-        location, datetime.datetime.now() - start_datetime)
-    logger.warning(msg)
+    blob_client = blob_service_client.get_blob_client(target_container_name, blob_name)
+    with timer.phase('Copy blob', location):
+        blob_client.start_copy_from_url(source_os_disk_snapshot_url)
+
+        # Wait for the copy to complete
+        copy_poller.wait(location, blob_client)
 
     # Create the snapshot in the target region from the copied blob
     logger.warning(
@@ -124,17 +79,15 @@ def create_target_image(location, transient_resource_group_name, source_type, so
                                                                       transient_resource_group_name,
                                                                       target_subscription)
 
-    cmd_content = ['snapshot', 'create',
-                   '--resource-group', snapshot_resource_group_name,
-                   '--name', target_snapshot_name,
-                   '--location', location,
-                   '--source', target_blob_path,
-                   '--source-storage-account-id', source_storage_account_id,
-                   '--hyper-v-generation', hyper_v_generation]
-    cli_cmd = prepare_cli_command(cmd_content, subscription=target_subscription, only_show_errors=only_show_errors)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-    target_snapshot_id = json_output['id']
+    Snapshot, SnapshotSku, CreationData = clients.compute_models('Snapshot', 'SnapshotSku', 'CreationData')
+    with timer.phase('Create target snapshot', location):
+        target_snapshot = compute_client.snapshots.begin_create_or_update(
+            snapshot_resource_group_name, target_snapshot_name,
+            Snapshot(location=location, tags=get_tags(), sku=SnapshotSku(name='Standard_LRS'),
+                     hyper_v_generation=hyper_v_generation,
+                     creation_data=CreationData(create_option='Import', source_uri=target_blob_path,
+                                                storage_account_id=source_storage_account_id))).result()
+    target_snapshot_id = target_snapshot.id
 
     # Optionally create the final image
     if export_as_snapshot:
@@ -149,59 +102,94 @@ def create_target_image(location, transient_resource_group_name, source_type, so
         else:
             target_image_name = target_name
 
-        cmd_content = ['image', 'create',
-                       '--resource-group', target_resource_group_name,
-                       '--name', target_image_name,
-                       '--location', location,
-                       '--os-type', source_os_type,
-                       '--source', target_snapshot_id,
-                       '--hyper-v-generation', hyper_v_generation]
-        cli_cmd = prepare_cli_command(cmd_content,
-                                      tags=tags,
-                                      subscription=target_subscription,
-                                      only_show_errors=only_show_errors)
-
-        run_cli_command(cli_cmd)
-
-
-def wait_for_blob_copy_operation(blob_name, target_container_name, target_storage_account_name,
-                                 azure_pool_frequency, location, subscription, only_show_errors=None):
-    copy_status = "pending"
-    prev_progress = -1
-    while copy_status == "pending":
-        cli_cmd = prepare_cli_command(['storage', 'blob', 'show',
-                                       '--name', blob_name,
-                                       '--container-name', target_container_name,
-                                       '--account-name', target_storage_account_name],
-                                      subscription=subscription,
-                                      only_show_errors=only_show_errors)
-
-        json_output = run_cli_command(cli_cmd, return_as_json=True)
-        copy_status = json_output["properties"]["copy"]["status"]
-        copy_progress_1, copy_progress_2 = json_output["properties"]["copy"]["progress"].split(
-            "/")
+        Image, ImageStorageProfile, ImageOSDisk, SubResource = clients.compute_models(
+            'Image', 'ImageStorageProfile', 'ImageOSDisk', 'SubResource')
+        with timer.phase('Create image', location):
+            compute_client.images.begin_create_or_update(
+                target_resource_group_name, target_image_name,
+                Image(location=location, tags=get_tags(tags), hyper_v_generation=hyper_v_generation,
+                      storage_profile=ImageStorageProfile(
+                          os_disk=ImageOSDisk(os_type=source_os_type, os_state='Generalized',
+                                              snapshot=SubResource(id=target_snapshot_id))))).result()
+
+
+class _BlobCopy:  # pylint: disable=too-few-public-methods
+    def __init__(self, location, blob_client):
+        self.location = location
+        self.blob_client = blob_client
+        self.status = 'pending'
+        self.progress = -1
+        self.done = threading.Event()
+
+
+class BlobCopyPoller:
+    """
+    Polls the status of the blob copies of all the target locations from a single thread, instead of one
+    polling loop per location.
+    """
+    def __init__(self, azure_pool_frequency):
+        self.azure_pool_frequency = azure_pool_frequency
+        self._copies = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='image-copy-poller', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and release the locations still waiting for their copy."""
+        self._stopped.set()
+        with self._lock:
+            copies, self._copies = self._copies, []
+        for copy in copies:
+            copy.status = 'aborted'
+            copy.done.set()
+
+    def wait(self, location, blob_client):
+        """Block until the copy to the blob has finished, and raise if it did not succeed."""
+        copy = _BlobCopy(location, blob_client)
+        with self._lock:
+            if self._stopped.is_set():
+                raise CLIError('Blob copy cancelled')
+            self._copies.append(copy)
+        copy.done.wait()
+
+        if copy.status != 'success':
+            logger.error(
+                "%s - The copy operation didn't succeed. Last status: %s", location, copy.status)
+            raise CLIError('Blob copy failed')
+
+    def _run(self):
+        while not self._stopped.wait(self.azure_pool_frequency):
+            with self._lock:
+                copies = list(self._copies)
+            for copy in copies:
+                try:
+                    self._poll(copy)
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.error("%s - Unable to get the status of the copy operation: %s", copy.location, ex)
+                    copy.status = 'unknown'
+                if copy.status != 'pending':
+                    with self._lock:
+                        if copy in self._copies:
+                            self._copies.remove(copy)
+                    copy.done.set()
+
+    @staticmethod
+    def _poll(copy):
+        copy_properties = copy.blob_client.get_blob_properties().copy
+        copy.status = copy_properties.status
+        copy_progress_1, copy_progress_2 = copy_properties.progress.split("/")
         current_progress = int(
             int(copy_progress_1) / int(copy_progress_2) * 100)
 
-        if current_progress != prev_progress:
+        if current_progress != copy.progress:
             msg = "{0} - Copy progress: {1}%"\
-                .format(location, str(current_progress))
+                .format(copy.location, str(current_progress))
             logger.warning(msg)
 
-        prev_progress = current_progress
-
-        try:
-            time.sleep(azure_pool_frequency)
-        except KeyboardInterrupt:
-            return
-
-    if copy_status != 'success':
-        logger.error(
-            "The copy operation didn't succeed. Last status: %s", copy_status)
-        logger.error("Command run: %s", cli_cmd)
-        logger.error("Command output: %s", json_output)
-
-        raise CLIError('Blob copy failed')
+        copy.progress = current_progress
 
 
 def get_random_string(length):
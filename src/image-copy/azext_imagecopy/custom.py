@@ -3,13 +3,13 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 
 from knack.util import CLIError
 from knack.log import get_logger
 
-from azext_imagecopy.cli_utils import run_cli_command, prepare_cli_command, get_storage_account_id_from_blob_path
-from azext_imagecopy.create_target import create_target_image
+from azext_imagecopy.cli_utils import ImageCopyClients, PhaseTimer, get_tags, get_storage_account_id_from_blob_path
+from azext_imagecopy.create_target import BlobCopyPoller, create_target_image
 
 logger = get_logger(__name__)
 
@@ -21,116 +21,98 @@ def imagecopy(cmd, source_resource_group_name, source_object_name, target_locati
               target_resource_group_name, temporary_resource_group_name='image-copy-rg',
               source_type='image', cleanup=False, parallel_degree=-1, tags=None, target_name=None,
               target_subscription=None, export_as_snapshot='false', timeout=3600):
-    only_show_errors = cmd.cli_ctx.only_show_errors
+    clients = ImageCopyClients(cmd.cli_ctx)
+    timer = PhaseTimer()
+    compute_client = clients.compute()
     if cleanup:
         # If --cleanup is set, forbid using an existing temporary resource group name.
         # It is dangerous to clean up an existing resource group.
-        cli_cmd = prepare_cli_command(['group', 'exists', '-n', temporary_resource_group_name],
-                                      output_as_json=False,
-                                      only_show_errors=only_show_errors)
-        cmd_output = run_cli_command(cli_cmd)
-        if 'true' in cmd_output:
+        if clients.resource().resource_groups.check_existence(temporary_resource_group_name):
             raise CLIError('Don\'t specify an existing resource group in --temporary-resource-group-name '
                            'when --cleanup is set')
 
     if not target_subscription:
         from azure.cli.core.commands.client_factory import get_subscription_id
         target_subscription = get_subscription_id(cmd.cli_ctx)
+    else:
+        from azure.cli.core._profile import Profile
+        # --target-subscription accepts the name or the ID of the subscription
+        target_subscription = Profile(cli_ctx=cmd.cli_ctx).get_subscription(target_subscription)['id']
     logger.debug('subscription id - %s', target_subscription)
 
     # get the os disk id from source vm/image
     logger.warning("Getting OS disk ID of the source VM/image")
-    cli_cmd = prepare_cli_command([source_type, 'show',
-                                   '--name', source_object_name,
-                                   '--resource-group', source_resource_group_name],
-                                  only_show_errors=only_show_errors)
-
-    json_cmd_output = run_cli_command(cli_cmd, return_as_json=True)
+    with timer.phase('Get source'):
+        if source_type == 'vm':
+            source = compute_client.virtual_machines.get(source_resource_group_name, source_object_name)
+        else:
+            source = compute_client.images.get(source_resource_group_name, source_object_name)
 
-    if json_cmd_output['storageProfile']['dataDisks']:
+    if source.storage_profile.data_disks:
         logger.warning(
             "Data disks in the source detected, but are ignored by this extension!")
 
+    source_os_disk = source.storage_profile.os_disk
     source_os_disk_id = None
     source_os_disk_type = None
 
-    try:
-        source_os_disk_id = json_cmd_output['storageProfile']['osDisk']['managedDisk']['id']
-        if source_os_disk_id is None:
-            raise TypeError
+    if getattr(source_os_disk, 'managed_disk', None) is not None and source_os_disk.managed_disk.id:
+        source_os_disk_id = source_os_disk.managed_disk.id
         source_os_disk_type = "DISK"
+    elif getattr(source_os_disk, 'blob_uri', None):
+        source_os_disk_id = source_os_disk.blob_uri
+        source_os_disk_type = "BLOB"
+    elif getattr(source_os_disk, 'snapshot', None) is not None and source_os_disk.snapshot.id:
+        # images created by e.g. image-copy extension
+        source_os_disk_id = source_os_disk.snapshot.id
+        source_os_disk_type = "SNAPSHOT"
+    if source_os_disk_type is not None:
         logger.debug("found %s: %s", source_os_disk_type, source_os_disk_id)
-    except TypeError:
-        try:
-            source_os_disk_id = json_cmd_output['storageProfile']['osDisk']['blobUri']
-            if source_os_disk_id is None:
-                raise TypeError
-            source_os_disk_type = "BLOB"
-            logger.debug("found %s: %s", source_os_disk_type,
-                         source_os_disk_id)
-        except TypeError:
-            try:  # images created by e.g. image-copy extension
-                source_os_disk_id = json_cmd_output['storageProfile']['osDisk']['snapshot']['id']
-                if source_os_disk_id is None:
-                    raise TypeError
-                source_os_disk_type = "SNAPSHOT"
-                logger.debug("found %s: %s", source_os_disk_type,
-                             source_os_disk_id)
-            except TypeError:
-                pass
 
     if source_os_disk_type is None or source_os_disk_id is None:
         logger.error(
             'Unable to locate a supported OS disk type in the provided source object')
         raise CLIError('Invalid OS Disk Source Type')
 
-    source_os_type = json_cmd_output['storageProfile']['osDisk']['osType']
+    source_os_type = source_os_disk.os_type
     logger.debug("source_os_disk_type: %s. source_os_disk_id: %s. source_os_type: %s",
                  source_os_disk_type, source_os_disk_id, source_os_type)
 
+    if timeout < 3600:
+        logger.error("Timeout should be greater than 3600 seconds")
+        raise CLIError('Invalid Timeout')
+
     # create source snapshots
     # TODO: skip creating another snapshot when the source is a snapshot
     logger.warning("Creating source snapshot")
     source_os_disk_snapshot_name = source_object_name + '_os_disk_snapshot'
-    snapshot_location = json_cmd_output['location']
-    hyper_v_generation = json_cmd_output['hyperVGeneration']
+    snapshot_location = source.location
+    hyper_v_generation = getattr(source, 'hyper_v_generation', None)
+    Snapshot, SnapshotSku, CreationData, GrantAccessData = clients.compute_models(
+        'Snapshot', 'SnapshotSku', 'CreationData', 'GrantAccessData')
     if source_os_disk_type == "BLOB":
         source_storage_account_id = get_storage_account_id_from_blob_path(source_os_disk_id,
                                                                           source_resource_group_name,
                                                                           target_subscription)
-        cmd_content = ['snapshot', 'create',
-                       '--name', source_os_disk_snapshot_name,
-                       '--location', snapshot_location,
-                       '--resource-group', source_resource_group_name,
-                       '--source', source_os_disk_id,
-                       '--source-storage-account-id', source_storage_account_id]
+        creation_data = CreationData(create_option='Import', source_uri=source_os_disk_id,
+                                     storage_account_id=source_storage_account_id)
     else:
-        cmd_content = ['snapshot', 'create',
-                       '--name', source_os_disk_snapshot_name,
-                       '--location', snapshot_location,
-                       '--resource-group', source_resource_group_name,
-                       '--source', source_os_disk_id]
-    if hyper_v_generation:
-        cmd_content = cmd_content + ['--hyper-v-generation', hyper_v_generation]
-    cli_cmd = prepare_cli_command(cmd_content, only_show_errors=only_show_errors)
-    run_cli_command(cli_cmd)
+        creation_data = CreationData(create_option='Copy', source_resource_id=source_os_disk_id)
+    with timer.phase('Create source snapshot'):
+        compute_client.snapshots.begin_create_or_update(
+            source_resource_group_name, source_os_disk_snapshot_name,
+            Snapshot(location=snapshot_location, tags=get_tags(), sku=SnapshotSku(name='Standard_LRS'),
+                     hyper_v_generation=hyper_v_generation, creation_data=creation_data)).result()
 
     # Get SAS URL for the snapshotName
     logger.warning(
         "Getting sas url for the source snapshot with timeout: %d seconds", timeout)
-    if timeout < 3600:
-        logger.error("Timeout should be greater than 3600 seconds")
-        raise CLIError('Invalid Timeout')
+    with timer.phase('Grant access to source snapshot'):
+        access_uri = compute_client.snapshots.begin_grant_access(
+            source_resource_group_name, source_os_disk_snapshot_name,
+            GrantAccessData(access='Read', duration_in_seconds=timeout)).result()
 
-    cli_cmd = prepare_cli_command(['snapshot', 'grant-access',
-                                   '--name', source_os_disk_snapshot_name,
-                                   '--resource-group', source_resource_group_name,
-                                   '--duration-in-seconds', str(timeout)],
-                                  only_show_errors=only_show_errors)
-
-    json_output = run_cli_command(cli_cmd, return_as_json=True)
-
-    source_os_disk_snapshot_url = json_output['accessSas']
+    source_os_disk_snapshot_url = access_uri.access_sas
     logger.debug("source os disk snapshot url: %s",
                  source_os_disk_snapshot_url)
 
@@ -139,120 +121,97 @@ def imagecopy(cmd, source_resource_group_name, source_object_name, target_locati
     transient_resource_group_name = temporary_resource_group_name
     # pick the first location for the temp group
     transient_resource_group_location = target_location[0].strip()
-    create_resource_group(transient_resource_group_name,
-                          transient_resource_group_location,
-                          target_subscription,
-                          only_show_errors)
-
-    target_locations_count = len(target_location)
-    logger.warning("Target location count: %s", target_locations_count)
-
-    create_resource_group(target_resource_group_name,
-                          target_location[0].strip(),
-                          target_subscription,
-                          only_show_errors)
+    with timer.phase('Create resource groups'):
+        create_resource_group(clients, transient_resource_group_name,
+                              transient_resource_group_location,
+                              target_subscription)
+
+        target_locations_count = len(target_location)
+        logger.warning("Target location count: %s", target_locations_count)
+
+        create_resource_group(clients, target_resource_group_name,
+                              target_location[0].strip(),
+                              target_subscription)
+
+    # try to get a handle on arm's 409s
+    azure_pool_frequency = 5
+    if target_locations_count >= 5:
+        azure_pool_frequency = 15
+    elif target_locations_count >= 3:
+        azure_pool_frequency = 10
+
+    if parallel_degree == -1:
+        parallel_degree = target_locations_count
+    if parallel_degree == 1:
+        logger.debug("Starting sync process for all locations")
+    else:
+        logger.warning("Starting async process for all locations")
 
-    pool = None
+    # The target locations share the SDK clients and one poller for all the blob copies
+    copy_poller = BlobCopyPoller(azure_pool_frequency)
+    copy_poller.start()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(parallel_degree, target_locations_count)))
+    failed_locations = []
     try:
-
-        # try to get a handle on arm's 409s
-        azure_pool_frequency = 5
-        if target_locations_count >= 5:
-            azure_pool_frequency = 15
-        elif target_locations_count >= 3:
-            azure_pool_frequency = 10
-
-        if (target_locations_count == 1) or (parallel_degree == 1):
-            # Going to copy to targets one-by-one
-            logger.debug("Starting sync process for all locations")
-            for location in target_location:
-                location = location.strip()
-                create_target_image(location, transient_resource_group_name, source_type,
-                                    source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
-                                    source_os_type, target_resource_group_name, azure_pool_frequency,
-                                    tags, target_name, target_subscription, export_as_snapshot, timeout,
-                                    hyper_v_generation, only_show_errors)
-        else:
-            if parallel_degree == -1:
-                pool = Pool(target_locations_count)
-            else:
-                pool = Pool(min(parallel_degree, target_locations_count))
-
-            tasks = []
-            for location in target_location:
-                location = location.strip()
-                task_content = (location, transient_resource_group_name, source_type,
-                                source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
-                                source_os_type, target_resource_group_name, azure_pool_frequency,
-                                tags, target_name, target_subscription, export_as_snapshot, timeout,
-                                hyper_v_generation, only_show_errors)
-                tasks.append(task_content)
-
-            logger.warning("Starting async process for all locations")
-
-            for task in tasks:
-                pool.apply_async(create_target_image, task)
-
-            pool.close()
-            pool.join()
+        tasks = {}
+        for location in target_location:
+            location = location.strip()
+            tasks[location] = executor.submit(
+                create_target_image, clients, copy_poller, timer, location, transient_resource_group_name,
+                source_type, source_object_name, source_os_disk_snapshot_name, source_os_disk_snapshot_url,
+                source_os_type, target_resource_group_name, tags, target_name, target_subscription,
+                export_as_snapshot, hyper_v_generation)
+
+        for location, task in tasks.items():
+            try:
+                task.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("%s - Copy failed: %s", location, ex)
+                failed_locations.append(location)
 
     except KeyboardInterrupt:
         logger.warning('User cancelled the operation')
         if cleanup:
             logger.warning('To cleanup temporary resources look for ones tagged with "image-copy-extension". \n'
                            'You can use the following command: az resource list --tag created_by=image-copy-extension')
-        if pool is not None:
-            pool.terminate()
+        for task in tasks.values():
+            task.cancel()
+        executor.shutdown(wait=False)
         return
+    finally:
+        copy_poller.stop()
+        executor.shutdown(wait=False)
 
     # Cleanup
     if cleanup:
         logger.warning('Deleting transient resources')
 
-        # Delete resource group
-        cli_cmd = prepare_cli_command(['group', 'delete', '--no-wait', '--yes',
-                                       '--name', transient_resource_group_name],
-                                      subscription=target_subscription,
-                                      only_show_errors=only_show_errors)
-        run_cli_command(cli_cmd)
-
-        # Revoke sas for source snapshot
-        cli_cmd = prepare_cli_command(['snapshot', 'revoke-access',
-                                       '--name', source_os_disk_snapshot_name,
-                                       '--resource-group', source_resource_group_name],
-                                      only_show_errors=only_show_errors)
-        run_cli_command(cli_cmd)
-
-        # Delete source snapshot
-        # TODO: skip this if source is snapshot and not creating a new one
-        cli_cmd = prepare_cli_command(['snapshot', 'delete',
-                                       '--name', source_os_disk_snapshot_name,
-                                       '--resource-group', source_resource_group_name],
-                                      only_show_errors=only_show_errors)
-        run_cli_command(cli_cmd)
+        with timer.phase('Cleanup'):
+            # Delete resource group
+            clients.resource(target_subscription).resource_groups.begin_delete(transient_resource_group_name)
 
-    logger.warning('Image copy finished')
+            # Revoke sas for source snapshot
+            compute_client.snapshots.begin_revoke_access(source_resource_group_name,
+                                                         source_os_disk_snapshot_name).result()
 
+            # Delete source snapshot
+            # TODO: skip this if source is snapshot and not creating a new one
+            compute_client.snapshots.begin_delete(source_resource_group_name, source_os_disk_snapshot_name).result()
 
-def create_resource_group(resource_group_name, location, subscription=None, only_show_errors=None):
-    # check if target resource group exists
-    cli_cmd = prepare_cli_command(['group', 'exists',
-                                   '--name', resource_group_name],
-                                  output_as_json=False,
-                                  subscription=subscription,
-                                  only_show_errors=only_show_errors)
+    timer.report()
+    if failed_locations:
+        raise CLIError('Image copy failed for: {}'.format(', '.join(failed_locations)))
+    logger.warning('Image copy finished')
 
-    cmd_output = run_cli_command(cli_cmd)
 
-    if 'true' in cmd_output:
+def create_resource_group(clients, resource_group_name, location, subscription=None):
+    resource_client = clients.resource(subscription)
+    # check if target resource group exists
+    if resource_client.resource_groups.check_existence(resource_group_name):
         return
 
     # create the target resource group
     logger.warning("Creating resource group: %s", resource_group_name)
-    cli_cmd = prepare_cli_command(['group', 'create',
-                                   '--name', resource_group_name,
-                                   '--location', location],
-                                  subscription=subscription,
-                                  only_show_errors=only_show_errors)
-
-    run_cli_command(cli_cmd)
+    ResourceGroup = clients.resource_models('ResourceGroup')
+    resource_client.resource_groups.create_or_update(resource_group_name,
+                                                     ResourceGroup(location=location, tags=get_tags()))
@@ -0,0 +1,104 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+from unittest import mock
+
+from knack.util import CLIError
+
+from azext_imagecopy.create_target import BlobCopyPoller
+from azext_imagecopy.custom import imagecopy
+
+
+class FakeBlobClient(object):
+    """A blob whose copy progresses by one step each time its properties are read."""
+    def __init__(self, steps, final_status='success'):
+        self.steps = steps
+        self.final_status = final_status
+        self.polls = 0
+        self.poll_threads = set()
+
+    def start_copy_from_url(self, source_url):
+        self.source_url = source_url
+
+    def get_blob_properties(self):
+        self.polls += 1
+        self.poll_threads.add(threading.get_ident())
+        done = min(self.polls, self.steps)
+        status = 'pending' if done < self.steps else self.final_status
+        return mock.MagicMock(copy=mock.MagicMock(status=status, progress='{}/{}'.format(done, self.steps)))
+
+
+class ImageCopyEngineTest(unittest.TestCase):
+    def test_one_poller_for_all_copies(self):
+        poller = BlobCopyPoller(0.001)
+        poller.start()
+        self.addCleanup(poller.stop)
+        blobs = {'eastus': FakeBlobClient(3), 'westus': FakeBlobClient(5), 'northeurope': FakeBlobClient(2, 'failed')}
+        errors = {}
+
+        def wait(location):
+            try:
+                poller.wait(location, blobs[location])
+            except CLIError as ex:
+                errors[location] = str(ex)
+
+        waiters = [threading.Thread(target=wait, args=(location,)) for location in blobs]
+        for waiter in waiters:
+            waiter.start()
+        for waiter in waiters:
+            waiter.join(10)
+
+        self.assertEqual(errors, {'northeurope': 'Blob copy failed'})
+        self.assertEqual([blob.polls for blob in blobs.values()], [3, 5, 2])
+        # every copy was polled from the same thread
+        self.assertEqual(len(set.union(*(blob.poll_threads for blob in blobs.values()))), 1)
+
+    def test_stop_releases_waiting_copies(self):
+        poller = BlobCopyPoller(60)
+        poller.start()
+        threading.Timer(0.05, poller.stop).start()
+        with self.assertRaisesRegex(CLIError, 'Blob copy failed'):
+            poller.wait('eastus', FakeBlobClient(1))
+
+    @mock.patch('azure.cli.core.commands.client_factory.get_subscription_id', return_value='sub')
+    @mock.patch('azext_imagecopy.custom.BlobCopyPoller', lambda _: BlobCopyPoller(0.001))
+    @mock.patch('azext_imagecopy.custom.ImageCopyClients')
+    def test_image_copy_runs_in_process(self, clients_cls, _):
+        clients = clients_cls.return_value
+        for get_models in [clients.compute_models, clients.storage_models, clients.resource_models]:
+            get_models.side_effect = lambda *names: tuple(mock.MagicMock() for _ in names) if len(names) > 1 \
+                else mock.MagicMock()
+        clients.resource.return_value.resource_groups.check_existence.return_value = False
+        source = clients.compute.return_value.images.get.return_value
+        source.storage_profile.data_disks = []
+        source.storage_profile.os_disk.managed_disk.id = '/subscriptions/sub/disks/osdisk'
+        source.storage_profile.os_disk.os_type = 'Linux'
+        source.location = 'westus'
+        source.hyper_v_generation = 'V2'
+        blobs = {}
+        clients.blob_service.return_value.get_blob_client.side_effect = \
+            lambda container, blob: blobs.setdefault(threading.get_ident(), FakeBlobClient(2))
+
+        with mock.patch('azext_imagecopy.cli_utils.logger') as timing_logger:
+            imagecopy(mock.MagicMock(), 'source-rg', 'image1', ['eastus', 'westeurope', 'japaneast'], 'target-rg',
+                      export_as_snapshot=False)
+
+        clients_cls.assert_called_once()
+        images = clients.compute.return_value.images.begin_create_or_update
+        self.assertEqual(sorted(c[0][1] for c in images.call_args_list),
+                         ['image1-eastus', 'image1-japaneast', 'image1-westeurope'])
+        # the source snapshot SAS is the source of every copy
+        access_sas = clients.compute.return_value.snapshots.begin_grant_access.return_value.result.return_value.access_sas
+        self.assertEqual({blob.source_url for blob in blobs.values()}, {access_sas})
+        self.assertEqual(len(blobs), 3)
+        reported_phases = [c[0][1] for c in timing_logger.warning.call_args_list if len(c[0]) > 1]
+        for phase in ['Create source snapshot', 'Create target storage account', 'Copy blob', 'Create image']:
+            self.assertIn(phase, reported_phases)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,11 @@ from knack.log import get_logger
 
 logger = get_logger(__name__)
 
+# the command table is cached in one shard per command module and extension, the index keeps the key
+# (version and modification time) each shard was dumped for
+SHARD_INDEX_FILE = 'index.json'
+CORE_SHARD = 'core'
+
 
 class AzInteractiveCommandsLoader(MainCommandsLoader):  # pylint: disable=too-few-public-methods
 
@@ -66,7 +71,7 @@ class AzInteractiveCommandsLoader(MainCommandsLoader):  # pylint: disable=too-fe
 # pylint: disable=too-few-public-methods
 class FreshTable(object):
     """
-    this class generates and dumps the fresh command table into a file
+    this class generates the fresh command table and dumps the shards of it which are out of date
     as well as installs all the modules
     """
     loader = None
@@ -75,24 +80,38 @@ class FreshTable(object):
         self.shell_ctx = shell_ctx
 
     def dump_command_table(self, shell_ctx=None):
-        """ dumps the command table """
+        """ dumps the shards of the command table which are out of date, returns whether any shard changed """
         from azure.cli.core.commands.arm import register_global_subscription_argument, register_ids_argument
         from knack import events
         import timeit
 
         start_time = timeit.default_timer()
         shell_ctx = shell_ctx or self.shell_ctx
-        main_loader = AzInteractiveCommandsLoader(shell_ctx.cli_ctx)
+        shard_dir = get_shard_dir(shell_ctx.config)
+        sources = get_command_sources()
+        shard_keys = _read_json(os.path.join(shard_dir, SHARD_INDEX_FILE)) or {}
+        stale = {name for name, key in sources.items() if shard_keys.get(name) != key}
+        removed = set(shard_keys) - set(sources)
 
+        # the loaded command table is still needed for the dynamic completions
+        main_loader = AzInteractiveCommandsLoader(shell_ctx.cli_ctx)
         main_loader.load_command_table(None)
         main_loader.load_arguments(None)
         register_global_subscription_argument(shell_ctx.cli_ctx)
         register_ids_argument(shell_ctx.cli_ctx)
         shell_ctx.cli_ctx.raise_event(events.EVENT_INVOKER_POST_CMD_TBL_CREATE, commands_loader=main_loader)
         cmd_table = main_loader.command_table
+        FreshTable.loader = main_loader
+
+        if not stale and not removed:
+            logger.debug('Command table shards are up to date: %s sec', timeit.default_timer() - start_time)
+            return False
 
-        cmd_table_data = {}
+        shards = {name: {} for name in stale}
         for command_name, cmd in cmd_table.items():
+            cmd_table_data = shards.get(get_shard_name(cmd))
+            if cmd_table_data is None:
+                continue
 
             try:
                 command_description = cmd.description
@@ -119,55 +138,162 @@ class FreshTable(object):
             except (ImportError, ValueError):
                 pass
 
-        load_help_files(cmd_table_data)
-        elapsed = timeit.default_timer() - start_time
-        logger.debug('Command table dumped: %s sec', elapsed)
-        FreshTable.loader = main_loader
-
-        # dump into the cache file
-        command_file = shell_ctx.config.get_help_files()
-        with open(os.path.join(get_cache_dir(shell_ctx), command_file), 'w') as help_file:
-            json.dump(cmd_table_data, help_file, default=lambda x: x.target or '', skipkeys=True)
+        # dump the shards, the help files are kept unparsed until the command is completed for the first time
+        if not os.path.exists(shard_dir):
+            os.makedirs(shard_dir)
+        shard_help = get_shard_help(shards)
+        for name, cmd_table_data in shards.items():
+            _write_json(os.path.join(shard_dir, name + '.json'),
+                        {'commands': cmd_table_data, 'help': shard_help[name]})
+            shard_keys[name] = sources[name]
+        for name in removed:
+            shard_keys.pop(name, None)
+            try:
+                os.remove(os.path.join(shard_dir, name + '.json'))
+            except OSError:
+                pass
+        _write_json(os.path.join(shard_dir, SHARD_INDEX_FILE), shard_keys)
 
+        elapsed = timeit.default_timer() - start_time
+        logger.debug('Command table shards dumped: %s (%s sec)', ', '.join(sorted(stale)) or 'none', elapsed)
+        return True
+
+
+def get_shard_name(cmd):
+    """ the shard of a command is the command module or extension it was loaded from """
+    source = getattr(cmd, 'command_source', None)
+    extension_name = getattr(source, 'extension_name', None)
+    if extension_name:
+        return 'extension-' + extension_name
+    if isinstance(source, str):
+        return 'module-' + source
+    return CORE_SHARD
+
+
+def get_command_sources():
+    """ maps the shard of every installed command module and extension to the key it is up to date for """
+    import pkgutil
+    import azure.cli.command_modules
+    from azure.cli.core import __version__ as core_version
+    from azure.cli.core.extension import get_extensions
+
+    sources = {CORE_SHARD: {'version': core_version}}
+    for finder, name, is_package in pkgutil.iter_modules(azure.cli.command_modules.__path__):
+        if is_package:
+            sources['module-' + name] = {'version': core_version,
+                                         'mtime': _get_mtime(os.path.join(finder.path, name))}
+    for ext in get_extensions():
+        sources['extension-' + ext.name] = {'version': ext.version, 'mtime': _get_mtime(ext.path)}
+    return sources
+
+
+def get_shard_help(shards):
+    """ collects the unparsed help of the commands of every shard and of the groups they are in """
+    shard_help = {name: {} for name in shards}
+    shards_by_name = {}
+    for shard, cmd_table_data in shards.items():
+        for command_name in cmd_table_data:
+            words = command_name.split()
+            for i in range(1, len(words) + 1):
+                shards_by_name.setdefault(' '.join(words[:i]), set()).add(shard)
+
+    for name, help_yaml in helps.items():
+        for shard in shards_by_name.get(name, ()):
+            shard_help[shard][name] = help_yaml
+    return shard_help
+
+
+def load_command_shards(config):
+    """ loads the cached command table from all the shards, returns the commands and their unparsed help """
+    shard_dir = get_shard_dir(config)
+    commands, help_entries = {}, {}
+    if not os.path.isdir(shard_dir):
+        # cache dumped by a previous version, all in one file with the help already applied
+        with open(os.path.join(config.get_config_dir(), 'cache', config.get_help_files()), 'r') as help_file:
+            return json.load(help_file), help_entries
+
+    for name in sorted(os.listdir(shard_dir)):
+        if name == SHARD_INDEX_FILE or not name.endswith('.json'):
+            continue
+        shard = _read_json(os.path.join(shard_dir, name))
+        if shard:
+            commands.update(shard['commands'])
+            help_entries.update(shard['help'])
+    if not commands:
+        raise IOError('No cached command table found in {}'.format(shard_dir))
+    return commands, help_entries
 
-def load_help_files(data):
-    """ loads all the extra information from help files """
-    for command_name, help_yaml in helps.items():
 
-        help_entry = yaml.safe_load(help_yaml)
-        try:
-            help_type = help_entry['type']
-        except KeyError:
-            continue
+def _get_mtime(path):
+    try:
+        return max([os.path.getmtime(path)] + [entry.stat().st_mtime for entry in os.scandir(path)])
+    except OSError:
+        return None
 
-        # if there is extra help for this command but it's not reflected in the command table
-        if command_name not in data and help_type == 'command':
-            logger.debug('Command: %s not found in command table', command_name)
-            continue
 
-        short_summary = help_entry.get('short-summary')
-        if short_summary and help_type == 'command':
-            data[command_name]['help'] = short_summary
-        else:
-            # must be a command group or sub-group
-            data[command_name] = {'help': short_summary}
-            continue
+def _read_json(path):
+    try:
+        with open(path, 'r') as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return None
 
-        if 'parameters' in help_entry:
-            for param in help_entry['parameters']:
-                # this could fail if the help file and options list are not in the same order
-                param_name = param['name'].split()[0]
 
-                if param_name not in data[command_name]['parameters']:
-                    logger.debug('Command %s does not have parameter: %s', command_name, param_name)
-                    continue
+def _write_json(path, data):
+    """ writes next to the target first, so that a reader never sees a partially written shard """
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'w') as json_file:
+        json.dump(data, json_file, default=lambda x: x.target or '', skipkeys=True)
+    os.replace(temp_path, path)
 
-                if 'short-summary' in param:
-                    data[command_name]['parameters'][param_name]['help'] = param["short-summary"]
 
-        if 'examples' in help_entry:
-            data[command_name]['examples'] = [[example['name'], example['text']]
-                                              for example in help_entry['examples']]
+def load_help_files(data):
+    """ loads all the extra information from help files """
+    for command_name, help_yaml in helps.items():
+        load_help_entry(data, command_name, help_yaml)
+
+
+def load_help_entry(data, command_name, help_yaml):
+    """ loads the extra information from the help file of one command or group """
+    help_entry = yaml.safe_load(help_yaml)
+    try:
+        help_type = help_entry['type']
+    except KeyError:
+        return
+
+    # if there is extra help for this command but it's not reflected in the command table
+    if command_name not in data and help_type == 'command':
+        logger.debug('Command: %s not found in command table', command_name)
+        return
+
+    short_summary = help_entry.get('short-summary')
+    if short_summary and help_type == 'command':
+        data[command_name]['help'] = short_summary
+    else:
+        # must be a command group or sub-group
+        data[command_name] = {'help': short_summary}
+        return
+
+    if 'parameters' in help_entry:
+        for param in help_entry['parameters']:
+            # this could fail if the help file and options list are not in the same order
+            param_name = param['name'].split()[0]
+
+            if param_name not in data[command_name]['parameters']:
+                logger.debug('Command %s does not have parameter: %s', command_name, param_name)
+                continue
+
+            if 'short-summary' in param:
+                data[command_name]['parameters'][param_name]['help'] = param["short-summary"]
+
+    if 'examples' in help_entry:
+        data[command_name]['examples'] = [[example['name'], example['text']]
+                                          for example in help_entry['examples']]
+
+
+def get_shard_dir(config):
+    """ gets the location of the shards of the cached command table """
+    return os.path.join(config.get_config_dir(), 'cache', os.path.splitext(config.get_help_files())[0])
 
 
 def get_cache_dir(shell_ctx):
@@ -196,13 +196,14 @@ class AzInteractiveShell(object):
         self._update_toolbar()
         cli.request_redraw()
 
-    def restart_completer(self):
-        command_info = GatherCommands(self.config)
-        if not self.completer:
+    def restart_completer(self, commands_changed=True):
+        if commands_changed or not self.completer:
+            # pick up the shards of the command table that were just dumped
+            command_info = GatherCommands(self.config)
             self.completer.start(command_info)
+            if not self.lexer:
+                self.lexer = get_az_lexer(command_info)
         self.completer.initialize_command_table_attributes()
-        if not self.lexer:
-            self.lexer = get_az_lexer(command_info)
         self._cli = None
 
     def _space_examples(self, list_examples, rows, section_value):
@@ -69,6 +69,8 @@ class AzCompleter(Completer):
         self.command_examples = None
         # a dictionary of commands with parameters with multiple names (e.g. {'vm create':{-n: --name}})
         self.command_param_info = {}
+        # applies the help file of a command the first time it is completed
+        self._load_help = None
 
         # information about what completions to generate
         self.current_command = ''
@@ -102,6 +104,7 @@ class AzCompleter(Completer):
         self.param_description = commands.param_descript
         self.command_examples = commands.command_example
         self.command_param_info = commands.command_param_info or self.command_param_info
+        self._load_help = getattr(commands, 'load_help', None)
 
         if global_params:
             self.global_param = commands.global_param
@@ -170,6 +173,10 @@ class AzCompleter(Completer):
         self.subtree, self.current_command, self.leftover_args = self.command_tree.get_sub_tree(text_split)
         self.shell_ctx.cli_ctx.raise_event(EVENT_INTERACTIVE_POST_SUB_TREE_CREATE, subtree=self.subtree)
         self.complete_command = not self.subtree.children
+        if self._load_help:
+            self._load_help(self.current_command)
+            if self.unfinished_word:
+                self._load_help(' '.join([self.current_command, self.unfinished_word]).strip())
 
         for comp in sort_completions(self.gen_cmd_and_param_completions()):
             yield comp
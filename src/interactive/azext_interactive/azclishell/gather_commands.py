@@ -4,8 +4,6 @@
 # --------------------------------------------------------------------------------------------
 
 import math
-import os
-import json
 from knack.log import get_logger
 
 from .command_tree import CommandBranch, CommandHead
@@ -85,6 +83,10 @@ class GatherCommands(object):
         self.param_descript = {}
         self.completer = None
         self.command_param_info = {}
+        # the cached command table and the help files which are not applied to it yet
+        self._data = {}
+        self._help_entries = {}
+        self._cols = 0
 
         self.global_param_descriptions = GLOBAL_PARAM_DESCRIPTIONS
         self.output_choices = OUTPUT_CHOICES
@@ -112,55 +114,72 @@ class GatherCommands(object):
 
     def _gather_from_files(self, config):
         """ gathers from the files in a way that is convienent to use """
-        command_file = config.get_help_files()
-        cache_path = os.path.join(config.get_config_dir(), 'cache')
-        cols = _get_window_columns()
+        from ._dump_commands import load_command_shards
 
-        with open(os.path.join(cache_path, command_file), 'r') as help_file:
-            data = json.load(help_file)
+        self._data, self._help_entries = load_command_shards(config)
+        self._cols = int(_get_window_columns())
         self.add_exit()
-        commands = data.keys()
 
-        for command in commands:
-            branch = self.command_tree
-            for word in command.split():
-                if word not in self.completable:
-                    self.completable.append(word)
-                if not branch.has_child(word):
-                    branch.add_child(CommandBranch(word))
-                branch = branch.get_child(word)
-
-            description = data[command]['help']
-            self.descrip[command] = add_new_lines(description, line_min=int(cols) - 2 * TOLERANCE)
-
-            if 'examples' in data[command]:
-                examples = []
-                for example in data[command]['examples']:
-                    examples.append([
-                        add_new_lines(example[0], line_min=int(cols) - 2 * TOLERANCE),
-                        add_new_lines(example[1], line_min=int(cols) - 2 * TOLERANCE)])
-                self.command_example[command] = examples
-
-            command_params = data[command].get('parameters', {})
-            for param in command_params:
-                if '==SUPPRESS==' not in command_params[param]['help']:
-                    param_aliases = set()
-
-                    for par in command_params[param]['name']:
-                        param_aliases.add(par)
-
-                        self.param_descript[command + " " + par] = \
-                            add_new_lines(
-                                command_params[param]['required'] +
-                                " " + command_params[param]['help'],
-                                line_min=int(cols) - 2 * TOLERANCE)
-                        if par not in self.completable_param:
-                            self.completable_param.append(par)
-
-                    param_doubles = self.command_param_info.get(command, {})
-                    for alias in param_aliases:
-                        param_doubles[alias] = param_aliases
-                    self.command_param_info[command] = param_doubles
+        for command in list(self._data):
+            self._add_command(command)
+
+    def load_help(self, command):
+        """ applies the help file of a command or group the first time it is completed """
+        from ._dump_commands import load_help_entry
+
+        help_yaml = self._help_entries.pop(command, None)
+        if help_yaml is None:
+            return
+        try:
+            load_help_entry(self._data, command, help_yaml)
+        except (TypeError, KeyError, ValueError, AttributeError) as ex:
+            logger.debug('Failed to load the help of %s: %s', command, ex)
+            return
+        if command in self._data:
+            self._add_command(command)
+
+    def _add_command(self, command):
+        data = self._data
+        cols = self._cols
+        branch = self.command_tree
+        for word in command.split():
+            if word not in self.completable:
+                self.completable.append(word)
+            if not branch.has_child(word):
+                branch.add_child(CommandBranch(word))
+            branch = branch.get_child(word)
+
+        description = data[command]['help']
+        self.descrip[command] = add_new_lines(description, line_min=int(cols) - 2 * TOLERANCE)
+
+        if 'examples' in data[command]:
+            examples = []
+            for example in data[command]['examples']:
+                examples.append([
+                    add_new_lines(example[0], line_min=int(cols) - 2 * TOLERANCE),
+                    add_new_lines(example[1], line_min=int(cols) - 2 * TOLERANCE)])
+            self.command_example[command] = examples
+
+        command_params = data[command].get('parameters', {})
+        for param in command_params:
+            if '==SUPPRESS==' not in command_params[param]['help']:
+                param_aliases = set()
+
+                for par in command_params[param]['name']:
+                    param_aliases.add(par)
+
+                    self.param_descript[command + " " + par] = \
+                        add_new_lines(
+                            command_params[param]['required'] +
+                            " " + command_params[param]['help'],
+                            line_min=int(cols) - 2 * TOLERANCE)
+                    if par not in self.completable_param:
+                        self.completable_param.append(par)
+
+                param_doubles = self.command_param_info.get(command, {})
+                for alias in param_aliases:
+                    param_doubles[alias] = param_aliases
+                self.command_param_info[command] = param_doubles
 
     def get_all_subcommands(self):
         """ returns all the subcommands """
@@ -18,7 +18,7 @@ class LoadCommandTableThread(threading.Thread):
         from ._dump_commands import FreshTable
 
         try:
-            FreshTable(self.shell).dump_command_table(self.shell)
-            self.initialize_function()
+            commands_changed = FreshTable(self.shell).dump_command_table(self.shell)
+            self.initialize_function(commands_changed)
         except KeyboardInterrupt:
             pass
@@ -0,0 +1,118 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from azext_interactive.azclishell import _dump_commands
+from azext_interactive.azclishell._dump_commands import FreshTable, get_shard_dir
+from azext_interactive.azclishell.gather_commands import GatherCommands
+
+VM_CREATE_HELP = """
+type: command
+short-summary: Create an Azure Virtual Machine.
+parameters:
+  - name: --name -n
+    short-summary: Name of the virtual machine.
+examples:
+  - name: Create a default VM.
+    text: az vm create -n MyVm -g MyResourceGroup
+"""
+
+VM_HELP = """
+type: group
+short-summary: Manage Linux or Windows virtual machines.
+"""
+
+
+class FakeConfig(object):
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+
+    def get_config_dir(self):
+        return self.config_dir
+
+    def get_help_files(self):
+        return 'help_dump.json'
+
+
+def _command(source, description, options=('--name', '-n')):
+    argument = mock.MagicMock(options_list=list(options))
+    argument.type.settings = {'required': True, 'help': 'The name.'}
+    return mock.MagicMock(command_source=source, description=description, arguments={'name': argument})
+
+
+@mock.patch('azext_interactive.azclishell.gather_commands._get_window_columns', lambda: 200)
+class CommandShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.shell_ctx = mock.MagicMock(config=FakeConfig(self.config_dir))
+        self.shard_dir = get_shard_dir(self.shell_ctx.config)
+
+    def _dump(self, sources, cmd_table):
+        loader = mock.MagicMock(command_table=cmd_table)
+        with mock.patch.object(_dump_commands, 'get_command_sources', return_value=sources), \
+                mock.patch.object(_dump_commands, 'AzInteractiveCommandsLoader', return_value=loader), \
+                mock.patch.object(_dump_commands, 'helps', {'vm create': VM_CREATE_HELP, 'vm': VM_HELP}), \
+                mock.patch('azure.cli.core.commands.arm.register_global_subscription_argument'), \
+                mock.patch('azure.cli.core.commands.arm.register_ids_argument'):
+            return FreshTable(self.shell_ctx).dump_command_table()
+
+    def test_only_stale_shards_are_dumped(self):
+        extension_source = mock.MagicMock(extension_name='vm-preview')
+        cmd_table = {'vm create': _command('vm', 'Create a VM.'),
+                     'vm preview': _command(extension_source, 'Preview a VM.')}
+        sources = {'core': {'version': '2.40.0'},
+                   'module-vm': {'version': '2.40.0', 'mtime': 1},
+                   'extension-vm-preview': {'version': '0.1.0', 'mtime': 1}}
+
+        self.assertTrue(self._dump(sources, cmd_table))
+        self.assertEqual(sorted(os.listdir(self.shard_dir)),
+                         ['core.json', 'extension-vm-preview.json', 'index.json', 'module-vm.json'])
+        with open(os.path.join(self.shard_dir, 'module-vm.json')) as shard_file:
+            shard = json.load(shard_file)
+        self.assertEqual(list(shard['commands']), ['vm create'])
+        # the help is dumped unparsed, for the commands of the shard and their groups
+        self.assertEqual(shard['help'], {'vm create': VM_CREATE_HELP, 'vm': VM_HELP})
+
+        # nothing changed: no shard is written again
+        self.assertFalse(self._dump(sources, cmd_table))
+
+        # upgrading the extension only rebuilds its shard
+        sources['extension-vm-preview'] = {'version': '0.2.0', 'mtime': 2}
+        with mock.patch.object(_dump_commands, '_write_json', wraps=_dump_commands._write_json) as write_json:
+            self.assertTrue(self._dump(sources, cmd_table))
+        self.assertEqual([os.path.basename(c[0][0]) for c in write_json.call_args_list],
+                         ['extension-vm-preview.json', 'index.json'])
+
+        # removing the extension removes its shard
+        del sources['extension-vm-preview']
+        self.assertTrue(self._dump(sources, cmd_table))
+        self.assertNotIn('extension-vm-preview.json', os.listdir(self.shard_dir))
+
+    def test_help_is_applied_on_first_completion(self):
+        self._dump({'module-vm': {'version': '2.40.0', 'mtime': 1}}, {'vm create': _command('vm', 'Create a VM.')})
+
+        commands = GatherCommands(self.shell_ctx.config)
+        self.assertEqual(commands.descrip['vm create'].strip(), 'Create a VM.')
+        self.assertEqual(commands.command_example['vm create'], [])
+        self.assertIn('vm', commands.command_tree.children)
+        self.assertNotIn('vm', commands.descrip)
+
+        commands.load_help('vm create')
+        commands.load_help('vm')
+        self.assertEqual(commands.descrip['vm create'].strip(), 'Create an Azure Virtual Machine.')
+        self.assertEqual(commands.command_example['vm create'][0][0].strip(), 'Create a default VM.')
+        self.assertEqual(commands.param_descript['vm create -n'].strip(), '[Required] Name of the virtual machine.')
+        self.assertEqual(commands.descrip['vm'].strip(), 'Manage Linux or Windows virtual machines.')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -104,6 +104,11 @@ helps['quantum job submit'] = """
             az quantum job submit -g MyResourceGroup -w MyWorkspace -l MyLocation -t MyTarget \\
                 --job-name MyJob --job-input-format qir.v1 --job-input-file MyQirBitcode.bc \\
                 --entry-point MyQirEntryPoint
+      - name: Submit a batch of jobs, one for each QIR bitcode file of a parameter sweep.
+        text: |-
+            az quantum job submit -g MyResourceGroup -w MyWorkspace -l MyLocation -t MyTarget \\
+                --job-name MySweep --job-input-format qir.v1 --job-input-file sweep/*.bc \\
+                --entry-point MyQirEntryPoint
 """
 
 helps['quantum job wait'] = """
@@ -114,6 +119,9 @@ helps['quantum job wait'] = """
         text: |-
             az quantum job wait -g MyResourceGroup -w MyWorkspace -l MyLocation \\
                 -j yyyyyyyy-yyyy-yyyy-yyyy-yyyyyyyyyyyy --max-poll-wait-secs 60 -o table
+      - name: Wait for completion of all the jobs of the workspace that are still running.
+        text: |-
+            az quantum job wait -g MyResourceGroup -w MyWorkspace -l MyLocation --all -o table
 """
 
 helps['quantum job cancel'] = """
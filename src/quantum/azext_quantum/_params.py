@@ -53,9 +53,11 @@ def load_arguments(self, _):
     auto_accept_type = CLIArgumentType(help='If specified, provider terms are accepted without an interactive Y/N prompt.')
     autoadd_only_type = CLIArgumentType(help='If specified, only the plans flagged "autoAdd" are displayed.')
     job_input_file_type = CLIArgumentType(help='The location of the input file to submit. Required for QIR, QIO, and pass-through jobs. Ignored on Q# jobs.')
+    job_input_files_type = CLIArgumentType(options_list=['--job-input-file'], nargs='+', help='The location of the input file to submit. Required for QIR, QIO, and pass-through jobs. Ignored on Q# jobs. Several files can be given to submit a batch of jobs, one per file, which are named after their file.')
     job_input_format_type = CLIArgumentType(help='The format of the file to submit. Omit this parameter on Q# jobs.')
     job_output_format_type = CLIArgumentType(help='The expected job output format. Ignored on Q# jobs.')
     entry_point_type = CLIArgumentType(help='The entry point for the QIR program or circuit. Required for QIR. Ignored on Q# jobs.')
+    wait_all_type = CLIArgumentType(options_list=['--all'], action='store_true', help='If specified, wait for all the jobs of the workspace that have not completed, instead of a single job.')
 
     with self.argument_context('quantum workspace') as c:
         c.argument('workspace_name', workspace_name_type)
@@ -87,12 +89,15 @@ def load_arguments(self, _):
     with self.argument_context('quantum job submit') as c:
         c.argument('job_params', job_params_type)
         c.argument('target_capability', target_capability_type)
-        c.argument('job_input_file', job_input_file_type)
+        c.argument('job_input_file', job_input_files_type)
         c.argument('job_input_format', job_input_format_type)
         c.argument('job_output_format', job_output_format_type)
         c.argument('entry_point', entry_point_type)
         c.positional('program_args', program_args_type)
 
+    with self.argument_context('quantum job wait') as c:
+        c.argument('all_jobs', wait_all_type)
+
     with self.argument_context('quantum execute') as c:
         c.argument('workspace_name', workspace_name_type)
         c.argument('target_id', target_id_type)
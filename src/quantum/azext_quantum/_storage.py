@@ -23,11 +23,9 @@ from azure.storage.blob import (
 logger = logging.getLogger(__name__)
 
 
-def create_container(
-    connection_string: str, container_name: str
-) -> ContainerClient:
+def create_blob_service_client(connection_string: str) -> BlobServiceClient:
     """
-    Creates and initialize a container; returns the client needed to access it.
+    Creates a storage client, which can be shared by all the containers of the account.
     """
     blob_service_client = BlobServiceClient.from_connection_string(
         connection_string
@@ -36,10 +34,7 @@ def create_container(
         f'{"Initializing storage client for account:"}'
         + f"{blob_service_client.account_name}"
     )
-
-    container_client = blob_service_client.get_container_client(container_name)
-    create_container_using_client(container_client)
-    return container_client
+    return blob_service_client
 
 
 def create_container_using_client(container_client: ContainerClient):
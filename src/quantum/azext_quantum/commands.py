@@ -59,6 +59,13 @@ def transform_jobs(results):
     return [transform_job(job) for job in sorted(results, key=creation, reverse=True)]
 
 
+def transform_job_or_jobs(result):
+    # Batch submissions and `az quantum job wait --all` return a list of jobs
+    if isinstance(result, list):
+        return transform_jobs(result)
+    return transform_job(result)
+
+
 def transform_offerings(offerings):
     def one(offering):
         return OrderedDict([
@@ -158,8 +165,8 @@ def load_command_table(self, _):
     with self.command_group('quantum job', job_ops) as j:
         j.command('list', 'list', validator=validate_workspace_info, table_transformer=transform_jobs)
         j.show_command('show', 'job_show', validator=validate_workspace_info, table_transformer=transform_job)
-        j.command('submit', 'submit', validator=validate_workspace_and_target_info, table_transformer=transform_job)
-        j.command('wait', 'wait', validator=validate_workspace_info, table_transformer=transform_job)
+        j.command('submit', 'submit', validator=validate_workspace_and_target_info, table_transformer=transform_job_or_jobs)
+        j.command('wait', 'wait', validator=validate_workspace_info, table_transformer=transform_job_or_jobs)
         j.command('output', 'output', validator=validate_workspace_info, table_transformer=transform_output)
         j.command('cancel', 'cancel', validator=validate_workspace_info, table_transformer=transform_job)
 
@@ -16,9 +16,9 @@ import knack.log
 from azure.cli.command_modules.storage.operations.account import show_storage_account_connection_string
 from azure.cli.core.azclierror import (FileOperationError, AzureInternalError,
                                        InvalidArgumentValueError, AzureResponseError,
-                                       RequiredArgumentMissingError)
+                                       RequiredArgumentMissingError, MutuallyExclusiveArgumentError)
 
-from .._storage import create_container, upload_blob
+from .._storage import create_blob_service_client, upload_blob
 
 from .._client_factory import cf_jobs, _get_data_credentials
 from .workspace import WorkspaceInfo
@@ -28,6 +28,7 @@ from .target import TargetInfo, get_provider
 MINIMUM_MAX_POLL_WAIT_SECS = 1
 DEFAULT_SHOTS = 500
 QIO_DEFAULT_TIMEOUT = 100
+MAX_CONCURRENT_REQUESTS = 8
 
 ERROR_MSG_MISSING_INPUT_FORMAT = "The following argument is required: --job-input-format"  # NOTE: The Azure CLI core generates a similar error message, but "the" is lowercase and "arguments" is always plural.
 ERROR_MSG_MISSING_OUTPUT_FORMAT = "The following argument is required: --job-output-format"
@@ -214,6 +215,10 @@ def submit(cmd, program_args, resource_group_name, workspace_name, location, tar
     """
     Submit a quantum program to run on Azure Quantum.
     """
+    # `az quantum job submit` accepts several input files, which are submitted as a batch of jobs
+    if isinstance(job_input_file, type([])) and len(job_input_file) == 1:
+        job_input_file = job_input_file[0]
+
     if job_input_file is None:
         return _submit_qsharp(cmd, program_args, resource_group_name, workspace_name, location, target_id,
                               project, job_name, shots, storage, no_build, job_params, target_capability)
@@ -332,73 +337,29 @@ def _submit_directly_to_service(cmd, resource_group_name, workspace_name, locati
             content_encoding = job_params["contentEncoding"]
             del job_params["contentEncoding"]
 
-    # Prepare for input file upload according to job type
+    # Set the content type and encoding of the input data according to job type
     if job_type == QIO_JOB:
         if content_type is None:
             content_type = "application/json"
         if content_encoding is None:
             content_encoding = "gzip"
-        try:
-            with open(job_input_file, encoding="utf-8") as qio_file:
-                uncompressed_blob_data = qio_file.read()
-        except (IOError, OSError) as e:
-            raise FileOperationError(f"An error occurred opening the input file: {job_input_file}") from e
-
-        if ("content_type" in uncompressed_blob_data and "application/x-protobuf" in uncompressed_blob_data) or (content_type.lower() == "application/x-protobuf"):
-            raise InvalidArgumentValueError('Content type "application/x-protobuf" is not supported.')
-
-        # Compress the input data (This code is based on to_blob in qdk-python\azure-quantum\azure\quantum\optimization\problem.py)
-        data = io.BytesIO()
-        with gzip.GzipFile(fileobj=data, mode="w") as fo:
-            fo.write(uncompressed_blob_data.encode())
-        blob_data = data.getvalue()
-
-    else:
-        if job_type == QIR_JOB:
-            if content_type is None:
-                if provider_id.lower() == "rigetti":
-                    content_type = "application/octet-stream"
-                else:
-                    # MAINTENANCE NOTE: The following value is valid for QCI and Quantinuum.
-                    # Make sure it's correct for new providers when they are added. If not,
-                    # modify this logic.
-                    content_type = "application/x-qir.v1"
-            content_encoding = None
-        try:
-            with open(job_input_file, "rb") as input_file:
-                blob_data = input_file.read()
-        except (IOError, OSError) as e:
-            raise FileOperationError(f"An error occurred opening the input file: {job_input_file}") from e
-
-    # Upload the input file to the workspace's storage account
-    if storage is None:
-        from .workspace import get as ws_get
-        ws = ws_get(cmd)
-        if ws.storage_account is None:
-            raise RequiredArgumentMissingError("No storage account specified or linked with workspace.")
-        storage = ws.storage_account.split('/')[-1]
-    job_id = str(uuid.uuid4())
-    container_name = "quantum-job-" + job_id
-    connection_string_dict = show_storage_account_connection_string(cmd, resource_group_name, storage)
-    connection_string = connection_string_dict["connectionString"]
-    container_client = create_container(connection_string, container_name)
-    blob_name = "inputData"
-
-    knack_logger.warning("Uploading input data...")
-    try:
-        blob_uri = upload_blob(container_client, blob_name, content_type, content_encoding, blob_data, False)
-    except Exception as e:
-        # Unexplained behavior:
-        #    QIR bitcode input and QIO (gzip) input data get UnicodeDecodeError on jobs run in tests using
-        #    "azdev test --live", but the same commands are successful when run interactively.
-        #    See commented-out tests in test_submit in test_quantum_jobs.py
-        error_msg = f"Input file upload failed.\nError type: {type(e)}"
-        if isinstance(e, UnicodeDecodeError):
-            error_msg += f"\nReason: {e.reason}"
-        raise AzureResponseError(error_msg) from e
-
-    start_of_blob_name = blob_uri.find(blob_name)
-    container_uri = blob_uri[0:start_of_blob_name - 1]
+    elif job_type == QIR_JOB:
+        if content_type is None:
+            if provider_id.lower() == "rigetti":
+                content_type = "application/octet-stream"
+            else:
+                # MAINTENANCE NOTE: The following value is valid for QCI and Quantinuum.
+                # Make sure it's correct for new providers when they are added. If not,
+                # modify this logic.
+                content_type = "application/x-qir.v1"
+        content_encoding = None
+
+    # A single input file is submitted as one job, a list of input files as a batch of jobs
+    is_batch = isinstance(job_input_file, type([]))    # "list" has been redefined as a function name
+    input_files = job_input_file if is_batch else [job_input_file]
+    for input_file in input_files:
+        if not os.path.isfile(input_file):
+            raise FileOperationError(f"An error occurred opening the input file: {input_file}")
 
     # Combine separate command-line parameters (like shots, target_capability, and entry_point) with job_params
     if job_params is None:
@@ -441,20 +402,121 @@ def _submit_directly_to_service(cmd, resource_group_name, workspace_name, locati
                 job_params["timeout"] = QIO_DEFAULT_TIMEOUT
             job_params = {"params": job_params}
 
-    # Submit the job
+    # The input files are uploaded to the workspace's storage account, through a single storage client
+    if storage is None:
+        from .workspace import get as ws_get
+        ws = ws_get(cmd)
+        if ws.storage_account is None:
+            raise RequiredArgumentMissingError("No storage account specified or linked with workspace.")
+        storage = ws.storage_account.split('/')[-1]
+    connection_string_dict = show_storage_account_connection_string(cmd, resource_group_name, storage)
+    blob_service_client = create_blob_service_client(connection_string_dict["connectionString"])
     client = cf_jobs(cmd.cli_ctx, ws_info.subscription, ws_info.resource_group, ws_info.name, ws_info.location)
-    job_details = {'name': job_name,
-                   'container_uri': container_uri,
-                   'input_data_format': job_input_format,
-                   'output_data_format': job_output_format,
-                   'inputParams': job_params,
-                   'provider_id': provider_id,
-                   'target': target_info.target_id,
-                   'metadata': metadata,
-                   'tags': tags}
 
-    knack_logger.warning("Submitting job...")
-    return client.create(job_id, job_details)
+    def submit_job(input_file, name):
+        blob_data = _read_job_input_file(input_file, job_type, content_type)
+        job_id = str(uuid.uuid4())
+        container_uri = _upload_job_input(blob_service_client, job_id, content_type, content_encoding, blob_data)
+        job_details = {'name': name,
+                       'container_uri': container_uri,
+                       'input_data_format': job_input_format,
+                       'output_data_format': job_output_format,
+                       'inputParams': job_params,
+                       'provider_id': provider_id,
+                       'target': target_info.target_id,
+                       'metadata': metadata,
+                       'tags': tags}
+        if not is_batch:
+            knack_logger.warning("Submitting job...")
+        return client.create(job_id, job_details)
+
+    if not is_batch:
+        knack_logger.warning("Uploading input data...")
+        return submit_job(job_input_file, job_name)
+
+    return _submit_batch(submit_job, input_files, job_name)
+
+
+def _submit_batch(submit_job, input_files, job_name):
+    """
+    Upload the input files and submit their jobs concurrently. Each job is named after its input file.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    knack_logger.warning("Uploading input data and submitting %s jobs...", len(input_files))
+    names = []
+    for input_file in input_files:
+        name = os.path.splitext(os.path.basename(input_file))[0]
+        names.append(f"{job_name}-{name}" if job_name else name)
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        futures = [executor.submit(submit_job, input_file, name) for input_file, name in zip(input_files, names)]
+
+    jobs = []
+    failed_files = []
+    for input_file, future in zip(input_files, futures):
+        try:
+            jobs.append(future.result())
+        except Exception as e:
+            logger.error("Submission of %s failed: %s", input_file, e)
+            failed_files.append(input_file)
+
+    if failed_files:
+        for job in jobs:
+            knack_logger.warning("Job id: %s", job.id)
+        raise AzureResponseError(f"Failed to submit {len(failed_files)} of {len(input_files)} jobs: {', '.join(failed_files)}")
+    return jobs
+
+
+def _read_job_input_file(job_input_file, job_type, content_type):
+    """
+    Returns the data of the input file to upload, compressed for QIO jobs.
+    """
+    if job_type == QIO_JOB:
+        try:
+            with open(job_input_file, encoding="utf-8") as qio_file:
+                uncompressed_blob_data = qio_file.read()
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"An error occurred opening the input file: {job_input_file}") from e
+
+        if ("content_type" in uncompressed_blob_data and "application/x-protobuf" in uncompressed_blob_data) or (content_type.lower() == "application/x-protobuf"):
+            raise InvalidArgumentValueError('Content type "application/x-protobuf" is not supported.')
+
+        # Compress the input data (This code is based on to_blob in qdk-python\azure-quantum\azure\quantum\optimization\problem.py)
+        data = io.BytesIO()
+        with gzip.GzipFile(fileobj=data, mode="w") as fo:
+            fo.write(uncompressed_blob_data.encode())
+        return data.getvalue()
+
+    try:
+        with open(job_input_file, "rb") as input_file:
+            return input_file.read()
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"An error occurred opening the input file: {job_input_file}") from e
+
+
+def _upload_job_input(blob_service_client, job_id, content_type, content_encoding, blob_data):
+    """
+    Upload the input data of a job to its own container, and return the uri of the container.
+    """
+    container_name = "quantum-job-" + job_id
+    container_client = blob_service_client.get_container_client(container_name)
+    blob_name = "inputData"
+
+    try:
+        blob_uri = upload_blob(container_client, blob_name, content_type, content_encoding, blob_data, False)
+    except Exception as e:
+        # Unexplained behavior:
+        #    QIR bitcode input and QIO (gzip) input data get UnicodeDecodeError on jobs run in tests using
+        #    "azdev test --live", but the same commands are successful when run interactively.
+        #    See commented-out tests in test_submit in test_quantum_jobs.py
+        error_msg = f"Input file upload failed.\nError type: {type(e)}"
+        if isinstance(e, UnicodeDecodeError):
+            error_msg += f"\nReason: {e.reason}"
+        raise AzureResponseError(error_msg) from e
+
+    start_of_blob_name = blob_uri.find(blob_name)
+    return blob_uri[0:start_of_blob_name - 1]
 
 
 def _submit_qsharp(cmd, program_args, resource_group_name, workspace_name, location, target_id,
@@ -497,82 +559,88 @@ def _submit_qsharp(cmd, program_args, resource_group_name, workspace_name, locat
     raise AzureInternalError("Failed to submit job.")
 
 
-def _parse_blob_url(url):
-    from urllib.parse import urlparse
-    o = urlparse(url)
-
-    try:
-        account_name = o.netloc.split('.')[0]
-        container = o.path.split('/')[-2]
-        blob = o.path.split('/')[-1]
-        sas_token = o.query
-    except IndexError as e:
-        raise InvalidArgumentValueError(f"Failed to parse malformed blob URL: {url}") from e
-
-    return {
-        "account_name": account_name,
-        "container": container,
-        "blob": blob,
-        "sas_token": sas_token
-    }
-
-
 def output(cmd, job_id, resource_group_name, workspace_name, location):
     """
     Get the results of running a Q# job.
     """
-    import tempfile
-    from azure.cli.command_modules.storage._client_factory import blob_data_service_factory
+    from azure.storage.blob import BlobClient
 
-    path = os.path.join(tempfile.gettempdir(), job_id)
     info = WorkspaceInfo(cmd, resource_group_name, workspace_name, location)
     client = cf_jobs(cmd.cli_ctx, info.subscription, info.resource_group, info.name, info.location)
     job = client.get(job_id)
 
-    if os.path.exists(path):
-        logger.debug("Using existing blob from %s", path)
-    else:
-        logger.debug("Downloading job results blob into %s", path)
-
-        if job.status != "Succeeded":
-            return job  # If "-o table" is specified, this allows transform_output() in commands.py
-            #             to format the output, so the error info is shown. If "-o json" or no "-o"
-            #             parameter is specified, then the full JSON job output is displayed, being
-            #             consistent with other commands.
-
-        args = _parse_blob_url(job.output_data_uri)
-        blob_service = blob_data_service_factory(cmd.cli_ctx, args)
-        blob_service.get_blob_to_path(args['container'], args['blob'], path)
-
-    with open(path) as json_file:
-        lines = [line.strip() for line in json_file.readlines()]
-
-        # Receiving an empty response is valid.
-        if len(lines) == 0:
-            return
-
-        if job.target.startswith("microsoft.simulator") and job.target != "microsoft.simulator.resources-estimator":
-            result_start_line = len(lines) - 1
-            is_result_string = lines[-1].endswith('"')
-            if is_result_string:
-                while result_start_line >= 0 and not lines[result_start_line].startswith('"'):
-                    result_start_line -= 1
-            if result_start_line < 0:
-                raise AzureResponseError("Job output is malformed, mismatched quote characters.")
-
-            # Print the job output and then the result of the operation as a histogram.
-            # If the result is a string, trim the quotation marks.
-            print('\n'.join(lines[:result_start_line]))
-            raw_result = ' '.join(lines[result_start_line:])
-            result = raw_result[1:-1] if is_result_string else raw_result
-            print('_' * len(result) + '\n')
-
-            json_string = '{ "histogram" : { "' + result + '" : 1 } }'
-            data = json.loads(json_string)
+    if job.status != "Succeeded":
+        return job  # If "-o table" is specified, this allows transform_output() in commands.py
+        #             to format the output, so the error info is shown. If "-o json" or no "-o"
+        #             parameter is specified, then the full JSON job output is displayed, being
+        #             consistent with other commands.
+
+    # The results blob is streamed, it is not downloaded to a file first
+    logger.debug("Streaming job results blob of job %s", job_id)
+    downloader = BlobClient.from_blob_url(job.output_data_uri).download_blob()
+
+    if job.target.startswith("microsoft.simulator") and job.target != "microsoft.simulator.resources-estimator":
+        return _parse_simulator_output(_iter_lines(downloader.chunks()))
+
+    # Receiving an empty response is valid.
+    data = downloader.readall()
+    if not data.strip():
+        return
+    return json.loads(data)
+
+
+def _iter_lines(chunks):
+    """
+    Yields the lines of a stream of bytes chunks, without their line endings.
+    """
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if pending:
+        yield pending.decode("utf-8")
+
+
+def _parse_simulator_output(lines):
+    """
+    Prints the output of the Q# program as its lines are received, and returns its result as a histogram.
+    The result is the last line, or the lines from the last one starting with a quote if the result is a string.
+    """
+    last_line = None    # Printed once the next line is received, unless it is the result
+    result_lines = []   # Lines from the last one starting with a quote, held until the end of the output
+    for line in (line.strip() for line in lines):
+        if line.startswith('"'):
+            for held_line in result_lines or ([] if last_line is None else [last_line]):
+                print(held_line)
+            result_lines = [line]
+            last_line = None
+        elif result_lines:
+            result_lines.append(line)
         else:
-            json_file.seek(0)  # Reset the file pointer before loading
-            data = json.load(json_file)
-        return data
+            if last_line is not None:
+                print(last_line)
+            last_line = line
+
+    # Receiving an empty response is valid.
+    if last_line is None and not result_lines:
+        return
+
+    # Print the job output and then the result of the operation as a histogram.
+    # If the result is a string, trim the quotation marks.
+    is_result_string = (result_lines[-1] if result_lines else last_line).endswith('"')
+    if is_result_string:
+        if not result_lines:
+            raise AzureResponseError("Job output is malformed, mismatched quote characters.")
+        result = ' '.join(result_lines)[1:-1]
+    else:
+        for held_line in result_lines[:-1]:
+            print(held_line)
+        result = result_lines[-1] if result_lines else last_line
+    print('_' * len(result) + '\n')
+
+    return {"histogram": {result: 1}}
 
 
 def _validate_max_poll_wait_secs(max_poll_wait_secs):
@@ -591,14 +659,21 @@ def _validate_max_poll_wait_secs(max_poll_wait_secs):
     return valid_max_poll_wait_secs
 
 
-def wait(cmd, job_id, resource_group_name, workspace_name, location, max_poll_wait_secs=5):
+def wait(cmd, job_id=None, resource_group_name=None, workspace_name=None, location=None, max_poll_wait_secs=5, all_jobs=False):
     """
     Place the CLI in a waiting state until the job finishes running.
     """
     import time
 
+    if all_jobs and job_id:
+        raise MutuallyExclusiveArgumentError("Usage error: --job-id and --all cannot be used together.")
+    if not all_jobs and not job_id:
+        raise RequiredArgumentMissingError("The following argument is required: --job-id (or --all to wait for all the jobs)")
+
     info = WorkspaceInfo(cmd, resource_group_name, workspace_name, location)
     client = cf_jobs(cmd.cli_ctx, info.subscription, info.resource_group, info.name, info.location)
+    if all_jobs:
+        return _wait_all(client, max_poll_wait_secs)
 
     # TODO: LROPoller...
     wait_indicators_used = False
@@ -620,6 +695,37 @@ def wait(cmd, job_id, resource_group_name, workspace_name, location, max_poll_wa
     return job
 
 
+def _wait_all(client, max_poll_wait_secs):
+    """
+    Wait for all the jobs of the workspace which haven't completed yet. A single polling loop refreshes all of
+    them on each poll, and then only polls the jobs which are still running.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_poll_wait_secs = _validate_max_poll_wait_secs(max_poll_wait_secs)
+    poll_wait = 0.2
+    pending = {}
+    completed = []
+    for job in client.list():
+        if _has_completed(job):
+            continue
+        pending[job.id] = job
+    knack_logger.warning("Waiting for %s jobs...", len(pending))
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        while pending:
+            time.sleep(poll_wait)
+            poll_wait = max_poll_wait_secs if poll_wait >= max_poll_wait_secs else poll_wait * 1.5
+            for job in executor.map(client.get, tuple(pending)):
+                if _has_completed(job):
+                    del pending[job.id]
+                    completed.append(job)
+                    knack_logger.warning("Job %s %s, %s jobs left.", job.id, job.status.lower(), len(pending))
+
+    return completed
+
+
 def job_show(cmd, job_id, resource_group_name, workspace_name, location):
     """
     Get the job's status and details.
@@ -3,21 +3,24 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import contextlib
+import io
 import json
 import os
 import pytest
 import unittest
+from unittest import mock
 
 from azure.cli.testsdk.scenario_tests import AllowLargeResponse, live_only
 from azure.cli.testsdk import ScenarioTest
-from azure.cli.core.azclierror import InvalidArgumentValueError, AzureInternalError
+from azure.cli.core.azclierror import InvalidArgumentValueError, AzureInternalError, AzureResponseError, MutuallyExclusiveArgumentError, RequiredArgumentMissingError
 
 from .utils import get_test_subscription_id, get_test_resource_group, get_test_workspace, get_test_workspace_location, issue_cmd_with_param_missing, get_test_workspace_storage, get_test_workspace_random_name
 from ..._client_factory import _get_data_credentials
-from ...commands import transform_output
+from ...commands import transform_output, transform_job_or_jobs
 from ...operations.workspace import WorkspaceInfo, DEPLOYMENT_NAME_PREFIX
 from ...operations.target import TargetInfo
-from ...operations.job import _generate_submit_args, _parse_blob_url, _validate_max_poll_wait_secs, build, _convert_numeric_params
+from ...operations.job import _generate_submit_args, _validate_max_poll_wait_secs, build, _convert_numeric_params, _iter_lines, _parse_simulator_output, _submit_batch, _wait_all, wait
 
 TEST_DIR = os.path.abspath(os.path.join(os.path.abspath(__file__), '..'))
 
@@ -109,16 +112,6 @@ class QuantumJobsScenarioTest(ScenarioTest):
         self.assertIn("key1=value1", args)
         self.assertIn("key2=value2", args)
 
-    def test_parse_blob_url(self):
-        sas = "sv=2018-03-28&sr=c&sig=some-sig&sp=racwl"
-        url = f"https://getest2.blob.core.windows.net/qio/rawOutputData?{sas}"
-        args = _parse_blob_url(url)
-
-        self.assertEquals(args['account_name'], "getest2")
-        self.assertEquals(args['container'], "qio")
-        self.assertEquals(args['blob'], "rawOutputData")
-        self.assertEquals(args['sas_token'], sas)
-
     def test_transform_output(self):
         # Call with a good histogram
         test_job_results = '{"Histogram":["[0,0,0]",0.125,"[1,0,0]",0.125,"[0,1,0]",0.125,"[1,1,0]",0.125]}'
@@ -259,6 +252,80 @@ class QuantumJobsScenarioTest(ScenarioTest):
         _convert_numeric_params(test_job_params)
         assert test_job_params == {"string1": "string_value1", "metadata": {"meta1": "meta_value1", "meta2": "2"}, "integer1": 1}
 
+    def test_parse_simulator_output(self):
+        def parse(output, chunk_size=4):
+            data = output.encode()
+            chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+            printed = io.StringIO()
+            with contextlib.redirect_stdout(printed):
+                result = _parse_simulator_output(_iter_lines(chunks))
+            return printed.getvalue(), result
+
+        # The result is the last line...
+        printed, result = parse("Hello\nfrom Q#\n[0,1,1]\n")
+        self.assertEqual(printed, "Hello\nfrom Q#\n_______\n\n")
+        self.assertEqual(result, {"histogram": {"[0,1,1]": 1}})
+
+        # ...or the lines from the last one starting with a quote when the result is a string
+        printed, result = parse('"quoted output"\nHello\n"multi-line\nresult"')
+        self.assertEqual(printed.splitlines()[:2], ['"quoted output"', 'Hello'])
+        self.assertEqual(result, {"histogram": {"multi-line result": 1}})
+
+        # Multi-byte characters may be split across chunks
+        self.assertEqual(parse("\u00e9t\u00e9", chunk_size=1)[1], {"histogram": {"\u00e9t\u00e9": 1}})
+
+        # Receiving an empty response is valid.
+        self.assertEqual(parse(""), ("", None))
+
+        with self.assertRaises(AzureResponseError):
+            parse('Hello\nresult"')
+
+    def test_transform_job_or_jobs(self):
+        job = {'name': 'job', 'id': '1', 'status': 'Succeeded', 'target': 'ionq.simulator', 'creationTime': '2023-01-01', 'endExecutionTime': None, 'costEstimate': None}
+        self.assertEqual(transform_job_or_jobs(job)['Id'], '1')
+        later_job = dict(job, id='2', creationTime='2023-01-02')
+        self.assertEqual([row['Id'] for row in transform_job_or_jobs([job, later_job])], ['2', '1'])
+
+    def test_submit_batch(self):
+        submitted = []
+
+        def submit_job(input_file, name):
+            if input_file == "sweep/broken.bc":
+                raise AzureResponseError("Input file upload failed.")
+            submitted.append(name)
+            return mock.MagicMock(id=name)
+
+        jobs = _submit_batch(submit_job, ["sweep/p1.bc", "sweep/p2.bc"], "MySweep")
+        self.assertEqual([job.id for job in jobs], ["MySweep-p1", "MySweep-p2"])
+
+        with self.assertRaises(AzureResponseError) as context:
+            _submit_batch(submit_job, ["sweep/p3.bc", "sweep/broken.bc"], None)
+        self.assertEqual(str(context.exception), "Failed to submit 1 of 2 jobs: sweep/broken.bc")
+        self.assertIn("p3", submitted)
+
+    @mock.patch("time.sleep")
+    def test_wait_all(self, _):
+        class FakeJobs:
+            def __init__(self):
+                self.polls = {"running-1": 2, "running-2": 1, "done": 0}
+
+            def list(self):
+                return [mock.MagicMock(id=job_id, status="Succeeded" if polls == 0 else "Executing") for job_id, polls in self.polls.items()]
+
+            def get(self, job_id):
+                self.polls[job_id] -= 1
+                return mock.MagicMock(id=job_id, status="Succeeded" if self.polls[job_id] == 0 else "Executing")
+
+        client = FakeJobs()
+        jobs = _wait_all(client, 1)
+        self.assertEqual([job.id for job in jobs], ["running-2", "running-1"])
+        self.assertEqual(client.polls, {"running-1": 0, "running-2": 0, "done": 0})
+
+        with self.assertRaises(MutuallyExclusiveArgumentError):
+            wait(self, "yyyyyyyy-yyyy-yyyy-yyyy-yyyyyyyyyyyy", all_jobs=True)
+        with self.assertRaises(RequiredArgumentMissingError):
+            wait(self)
+
     @live_only()
     def test_submit(self):
         test_location = get_test_workspace_location()
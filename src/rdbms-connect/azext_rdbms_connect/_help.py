@@ -34,6 +34,10 @@ example:
     text: az mysql flexible-server execute -n testServer -u username -p password --querytext "select host, user from mysql.user;" --output table
   - name: Connect to a flexible server and execute a sql file.
     text: az mysql flexible-server execute -n testServer -u username -p password --file-path path_to_sql_file
+  - name: Connect to a flexible server and execute a sql file, committing every 500 statements.
+    text: az mysql flexible-server execute -n testServer -u username -p password --file-path path_to_sql_file --batch-size 500
+  - name: Connect to a flexible server and export all the rows of a query to a JSON Lines file.
+    text: az mysql flexible-server execute -n testServer -u username -p password -d flexibleserverdb --querytext "select * from orders;" --export-file orders.jsonl --export-format jsonl
 """
 
 helps['postgres flexible-server execute'] = """
@@ -44,4 +48,8 @@ example:
     text: az postgres flexible-server execute -n testServer -u username -p password --querytext "select * from pg_user;" --output table
   - name: Connect to a flexible server and execute a sql file.
     text: az mysql flexible-server execute -n testServer -u username -p password --file-path path_to_sql_file
+  - name: Connect to a flexible server and execute a sql file, committing every 500 statements.
+    text: az postgres flexible-server execute -n testServer -u username -p password --file-path path_to_sql_file --batch-size 500
+  - name: Connect to a flexible server and export all the rows of a query to a CSV file.
+    text: az postgres flexible-server execute -n testServer -u username -p password --querytext "select * from pg_stat_activity;" --export-file activity.csv
 """
@@ -5,7 +5,9 @@
 # pylint: disable=line-too-long
 
 from knack.arguments import CLIArgumentType
+from azure.cli.core.commands.parameters import get_enum_type
 from azure.cli.core.local_context import LocalContextAttribute, LocalContextAction
+from ._sql_utils import EXPORT_FORMATS
 
 
 def load_arguments(self, _):
@@ -39,4 +41,7 @@ def load_arguments(self, _):
                        help='The login password of the administrator.')
             c.argument('database_name', arg_type=database_name_arg_type, options_list=['--database-name', '-d'], help='The name of a database.')
             c.argument('querytext', options_list=['--querytext', '-q'], help='A query to run against the flexible server.')
-            c.argument('file_path', options_list=['--file-path', '-f'], help='The path of the sql file to execute.')
+            c.argument('file_path', options_list=['--file-path', '-f'], help='The path of the sql file to execute. The statements of the file are run one at a time.')
+            c.argument('batch_size', options_list=['--batch-size'], type=int, help='Number of statements of the sql file to run in each transaction. If a statement fails, the statements of its batch are rolled back. By default postgres runs the whole file in one transaction and mysql commits every statement on its own. Postgres statements that cannot run in a transaction, like CREATE DATABASE or VACUUM, commit the statements before them and run on their own.')
+            c.argument('export_file', options_list=['--export-file'], help='The path of a file to write all the rows of the query output to, instead of returning the first 30 rows.')
+            c.argument('export_format', options_list=['--export-format'], arg_type=get_enum_type(EXPORT_FORMATS), help='The format of the export file: CSV with a header row, or JSON Lines.')
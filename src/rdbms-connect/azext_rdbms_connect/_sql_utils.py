@@ -0,0 +1,131 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import csv
+import json
+import re
+
+EXPORT_FORMATS = ['csv', 'jsonl']
+EXPORT_FETCH_SIZE = 1000
+
+_DOLLAR_QUOTE = re.compile(r'\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$')
+_MYSQL_DELIMITER = re.compile(r'\s*delimiter\s+(\S+)\s*$', re.IGNORECASE)
+_LEADING_COMMENTS = re.compile(r'(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*', re.DOTALL)
+# postgres statements that fail with "cannot run inside a transaction block"
+_POSTGRES_NON_TRANSACTIONAL = re.compile(
+    r'(?:vacuum|alter\s+system|(?:create|drop)\s+(?:database|tablespace|subscription)|'
+    r'alter\s+database\s+\S+\s+set\s+tablespace|create\s+(?:unique\s+)?index\s+concurrently|'
+    r'drop\s+index\s+concurrently|reindex\s+(?:\([^)]*\)\s*)?\w+\s+concurrently)\b', re.IGNORECASE)
+
+
+def split_sql_statements(lines, server_type):
+    """
+    Split the lines of a sql script into statements, yielding (line number, statement) pairs as soon as a statement is
+    complete so that the script is never held in memory as a whole. Delimiters inside strings, quoted identifiers,
+    comments and (for postgres) dollar quoted bodies are ignored, and the mysql client DELIMITER command is honored.
+    """
+    delimiter = ';'
+    statement = []
+    start_line = None
+    # closing token of the string, identifier or comment being read, '\n' for a comment running to the end of line
+    closing = None
+    escapes = False
+    for line_number, line in enumerate(lines, 1):
+        if closing is None and start_line is None and server_type == 'mysql':
+            match = _MYSQL_DELIMITER.match(line)
+            if match:
+                delimiter = match.group(1)
+                continue
+
+        segment_start = i = 0
+        while i < len(line):
+            if closing == '\n':
+                break
+            if closing is not None:
+                if escapes and line[i] == '\\':
+                    i += 2
+                elif line.startswith(closing, i):
+                    i += len(closing)
+                    closing = None
+                else:
+                    i += 1
+                continue
+
+            if line.startswith(delimiter, i):
+                statement.append(line[segment_start:i])
+                if start_line is not None:
+                    yield start_line, ''.join(statement).strip()
+                statement, start_line = [], None
+                i += len(delimiter)
+                segment_start = i
+                continue
+
+            char = line[i]
+            if line.startswith('--', i) and (server_type != 'mysql' or line[i + 2:i + 3].isspace() or
+                                             i + 2 == len(line)) or char == '#' and server_type == 'mysql':
+                closing = '\n'
+                continue
+            if line.startswith('/*', i):
+                closing, escapes = '*/', False
+                i += 2
+                continue
+
+            if start_line is None and not char.isspace():
+                start_line = line_number
+            if char in '\'"' or char == '`' and server_type == 'mysql':
+                closing = char
+                escapes = server_type == 'mysql' and char != '`' or \
+                    server_type == 'postgres' and char == "'" and i > 0 and line[i - 1] in 'Ee'
+                i += 1
+            elif char == '$' and server_type == 'postgres' and _DOLLAR_QUOTE.match(line, i):
+                closing = _DOLLAR_QUOTE.match(line, i).group(0)
+                escapes = False
+                i += len(closing)
+            else:
+                i += 1
+
+        statement.append(line[segment_start:])
+        if closing == '\n':
+            closing = None
+
+    if start_line is not None:
+        yield start_line, ''.join(statement).strip()
+
+
+def runs_outside_transaction(statement):
+    """
+    Tell whether postgres refuses to run the statement inside a transaction block, e.g. CREATE DATABASE, VACUUM or
+    CREATE INDEX CONCURRENTLY.
+    """
+    return bool(_POSTGRES_NON_TRANSACTIONAL.match(statement, _LEADING_COMMENTS.match(statement).end()))
+
+
+def export_rows(cursor, export_file, export_format, fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Write the rows of an executed query to a file as CSV or JSON Lines, fetching them `fetch_size` at a time so that
+    memory use does not depend on the number of rows. Returns the number of rows written.
+    """
+    rows = cursor.fetchmany(fetch_size)
+    if not cursor.description:
+        raise ValueError('The query did not return any rows to export.')
+    row_headers = [column[0] for column in cursor.description]
+
+    count = 0
+    with open(export_file, 'w', encoding='utf-8', newline='') as output:
+        if export_format == 'csv':
+            writer = csv.writer(output)
+            writer.writerow(row_headers)
+            write_row = writer.writerow
+        else:
+            def write_row(row):
+                output.write(json.dumps(dict(zip(row_headers, row)), default=str))
+                output.write('\n')
+
+        while rows:
+            for row in rows:
+                write_row(row)
+            count += len(rows)
+            rows = cursor.fetchmany(fetch_size)
+    return count
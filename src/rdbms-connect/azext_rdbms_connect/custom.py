@@ -4,14 +4,18 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: disable=import-error,too-many-locals,too-many-statements,too-many-nested-blocks
+import atexit
 import os
+import time
 from knack.util import CLIError
 from knack.log import get_logger
 import psycopg2
 import pymysql
 from pymysql.constants import CLIENT
-from azure.cli.core.azclierror import RequiredArgumentMissingError, AzureConnectionError, ArgumentUsageError
+from azure.cli.core.azclierror import RequiredArgumentMissingError, AzureConnectionError, ArgumentUsageError, \
+    InvalidArgumentValueError
 from azure.cli.core.extension import EXTENSIONS_DIR
+from ._sql_utils import EXPORT_FETCH_SIZE, export_rows, runs_outside_transaction, split_sql_statements
 
 
 logger = get_logger(__name__)
@@ -51,7 +55,8 @@ def connect_to_flexible_server_postgres(cmd, server_name, administrator_login, a
 
 
 def execute_flexible_server_mysql(cmd, server_name, administrator_login, administrator_login_password,
-                                  database_name=None, querytext=None, file_path=None):
+                                  database_name=None, querytext=None, file_path=None, export_file=None,
+                                  export_format='csv', batch_size=None):
     mysql_server_endpoint = cmd.cli_ctx.cloud.suffixes.mysql_server_endpoint
     return connect_to_server_helper(server_type="mysql",
                                     endpoint=mysql_server_endpoint,
@@ -61,11 +66,15 @@ def execute_flexible_server_mysql(cmd, server_name, administrator_login, adminis
                                     administrator_login_password=administrator_login_password,
                                     database_name=database_name,
                                     query_command=querytext,
-                                    file_path=file_path)
+                                    file_path=file_path,
+                                    export_file=export_file,
+                                    export_format=export_format,
+                                    batch_size=batch_size)
 
 
 def execute_flexible_server_postgres(cmd, server_name, administrator_login, administrator_login_password,
-                                     database_name=None, querytext=None, file_path=None):
+                                     database_name=None, querytext=None, file_path=None, export_file=None,
+                                     export_format='csv', batch_size=None):
     postgresql_server_endpoint = cmd.cli_ctx.cloud.suffixes.postgresql_server_endpoint
     return connect_to_server_helper(server_type="postgres",
                                     endpoint=postgresql_server_endpoint,
@@ -75,12 +84,16 @@ def execute_flexible_server_postgres(cmd, server_name, administrator_login, admi
                                     administrator_login_password=administrator_login_password,
                                     database_name=database_name,
                                     query_command=querytext,
-                                    file_path=file_path)
+                                    file_path=file_path,
+                                    export_file=export_file,
+                                    export_format=export_format,
+                                    batch_size=batch_size)
 
 
 def connect_to_server_helper(server_type, endpoint, default_db_name, server_name, administrator_login,
                              administrator_login_password, database_name, query_command=None,
-                             interactive=None, file_path=None):
+                             interactive=None, file_path=None, export_file=None, export_format='csv',
+                             batch_size=None):
     host = '{}{}'.format(server_name, endpoint)
     json_data = None
 
@@ -95,6 +108,14 @@ def connect_to_server_helper(server_type, endpoint, default_db_name, server_name
         raise RequiredArgumentMissingError("Please provide password (--admin-password / -p) or "
                                            "run in --interactive mode.")
 
+    if export_file is not None and query_command is None:
+        raise ArgumentUsageError("Please provide the query (--querytext / -q) whose output to export.")
+    if batch_size is not None:
+        if file_path is None:
+            raise ArgumentUsageError("--batch-size can only be used to run a sql file (--file-path / -f).")
+        if batch_size < 1:
+            raise InvalidArgumentValueError("--batch-size must be greater than 0.")
+
     # run in either interactive or simple connection mode
     if interactive is not None:
         if query_command is not None:
@@ -107,24 +128,24 @@ def connect_to_server_helper(server_type, endpoint, default_db_name, server_name
                              server_name=server_name,
                              database_name=database_name,
                              login_username=administrator_login)
+        return json_data
 
-    elif file_path is None:
-        json_data = _connect_execute_query(server_type=server_type,
-                                           host=host,
-                                           server_name=server_name,
-                                           database_name=database_name,
-                                           login_username=administrator_login,
-                                           login_pw=administrator_login_password,
-                                           query=query_command)
+    # the sql file and the query run over the same connection
+    session = get_session(server_type=server_type,
+                          host=host,
+                          server_name=server_name,
+                          database_name=database_name,
+                          login_username=administrator_login,
+                          login_pw=administrator_login_password)
 
     if file_path is not None:
-        _connect_execute_file(server_type=server_type,
-                              host=host,
-                              server_name=server_name,
-                              database_name=database_name,
-                              login_username=administrator_login,
-                              login_pw=administrator_login_password,
-                              file_path=file_path)
+        _execute_file(session, file_path, batch_size)
+
+    if query_command is not None:
+        if export_file is not None:
+            _export_query(session, query_command, export_file, export_format)
+        else:
+            json_data = _execute_query(session, query_command)
 
     return json_data
 
@@ -164,111 +185,216 @@ def _connect_interactive(server_type, host, server_name, database_name, login_us
         raise AzureConnectionError("Unable to open interactive mode to {0}. Error: {1}".format(server_name, e))
 
 
-def _connect_execute_query(server_type, host, server_name, database_name, login_username, login_pw, query=None):
-    json_data = None
+class FlexibleServerSession:
+    """
+    A connection to a flexible server. Sessions live as long as the CLI process, so the queries and sql files run
+    against the same database reuse one connection instead of connecting again.
+    """
+    def __init__(self, server_type, host, server_name, database_name, login_username, login_pw):
+        self.server_type = server_type
+        self.host = host
+        self.server_name = server_name
+        self.database_name = database_name
+        self.login_username = login_username
+        self.login_pw = login_pw
+        self.connection = None
+
+    def connect(self):
+        try:
+            connection_kwargs = {
+                'host': self.host,
+                'database': self.database_name,
+                'user': self.login_username,
+                'password': self.login_pw
+            }
+
+            # depending on server type, use the right connection library to test the connetion
+            if self.server_type == "postgres":
+                self.connection = psycopg2.connect(**connection_kwargs)
+                self.connection.set_session(autocommit=True)
+            else:
+                # set ssl param to allow for connection
+                connection_kwargs['ssl'] = {"fake_flag_to_enable_tls": True}
+                connection_kwargs['client_flag'] = CLIENT.MULTI_STATEMENTS
+                connection_kwargs['autocommit'] = True
+                self.connection = pymysql.connect(**connection_kwargs)
+            logger.warning('Successfully connected to %s.', self.server_name)
+        except Exception as e:
+            logger.warning("Failed connection to %s. Check error and validate firewall and public access "
+                           "or virtual network settings.", self.server_name)
+            raise AzureConnectionError("Unable to connect to flexible server: {}".format(e))
 
-    # connect to server
-    try:
-        connection_kwargs = {
-            'host': host,
-            'database': database_name,
-            'user': login_username,
-            'password': login_pw
-        }
-
-        # depending on server type, use the right connection library to test the connetion
-        if server_type == "postgres":
-            connection = psycopg2.connect(**connection_kwargs)
-            connection.set_session(autocommit=True)
+    def is_alive(self):
+        if self.connection is None:
+            return False
+        try:
+            if self.server_type == "postgres":
+                if self.connection.closed:
+                    return False
+                with self.connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            else:
+                self.connection.ping(reconnect=False)
+            return True
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+    def set_autocommit(self, autocommit):
+        if self.server_type == "postgres":
+            self.connection.set_session(autocommit=autocommit)
         else:
-            # set ssl param to allow for connection
-            connection_kwargs['ssl'] = {"fake_flag_to_enable_tls": True}
-            connection_kwargs['autocommit'] = True
-            connection = pymysql.connect(**connection_kwargs)
-        logger.warning('Successfully connected to %s.', server_name)
-    except Exception as e:
-        logger.warning("Failed connection to %s. Check error and validate firewall and public access "
-                       "or virtual network settings.", server_name)
-        raise AzureConnectionError("Unable to connect to flexible server: {}".format(e))
-
-    if query is not None:
+            self.connection.autocommit(autocommit)
+
+    def cursor(self, streaming=False):
+        # streaming cursors keep the rows on the server and send them as they are fetched
+        if not streaming:
+            return self.connection.cursor()
+        if self.server_type == "postgres":
+            cursor = self.connection.cursor(name='azext_rdbms_connect_export', withhold=True)
+            cursor.itersize = EXPORT_FETCH_SIZE
+            return cursor
+        return self.connection.cursor(pymysql.cursors.SSCursor)
+
+    def close(self):
         try:
-            cursor = connection.cursor()
-            cursor.execute(query)
-            logger.warning("Ran Database Query: '%s'", query)
-            logger.warning("Retrieving first 30 rows of query output, if applicable.")
-
-            # only print out if rows were returned
-            if cursor.description:
-                result = cursor.fetchmany(30)  # limit to 30 rows of output for now
-                row_headers = [x[0] for x in cursor.description]  # this will extract row headers
-                # format the result for a clean display
-                json_data = []
-                for rv in result:
-                    json_data.append(dict(zip(row_headers, rv)))
-        except Exception as e:
-            raise CLIError("Unable to execute query '{0}': {1}".format(query, e))
-        finally:
-            try:
-                cursor.close()
-                logger.warning("Closed the connection to %s", server_name)
-            except Exception as e:  # pylint: disable=broad-except
-                logger.warning('Unable to close connection cursor.')
-                raise CLIError(str(e))
+            self.connection.close()
+            logger.info("Closed the connection to %s", self.server_name)
+        except Exception:  # pylint: disable=broad-except
+            logger.info('Unable to close the connection to %s.', self.server_name)
 
-    return json_data
 
+_sessions = {}
 
-def _connect_execute_file(server_type, host, server_name, database_name, login_username, login_pw, file_path):
 
-    # connect to server
-    try:
-        connection_kwargs = {
-            'host': host,
-            'database': database_name,
-            'user': login_username,
-            'password': login_pw
-        }
-
-        # depending on server type, use the right connection library to test the connetion
-        if server_type == "postgres":
-            connection = psycopg2.connect(**connection_kwargs)
-            connection.set_session(autocommit=True)
-        else:
-            # set ssl param to allow for connection
-            connection_kwargs['ssl'] = {"fake_flag_to_enable_tls": True}
-            connection_kwargs['client_flag'] = CLIENT.MULTI_STATEMENTS
-            connection_kwargs['autocommit'] = True
-            connection = pymysql.connect(**connection_kwargs)
+def get_session(server_type, host, server_name, database_name, login_username, login_pw):
+    key = (server_type, host, database_name, login_username)
+    session = _sessions.get(key)
+    if session is not None and session.login_pw == login_pw and session.is_alive():
+        logger.info('Reusing the connection to %s.', server_name)
+        return session
+
+    if session is not None:
+        session.close()
+    session = FlexibleServerSession(server_type, host, server_name, database_name, login_username, login_pw)
+    session.connect()
+    _sessions[key] = session
+    return session
 
+
+@atexit.register
+def close_sessions():
+    while _sessions:
+        _sessions.popitem()[1].close()
+
+
+def _execute_query(session, query):
+    json_data = None
+    cursor = None
+    try:
+        cursor = session.cursor()
+        cursor.execute(query)
+        logger.warning("Ran Database Query: '%s'", query)
+        logger.warning("Retrieving first 30 rows of query output, if applicable.")
+
+        # only print out if rows were returned
+        if cursor.description:
+            result = cursor.fetchmany(30)  # limit to 30 rows of output, use --export-file to get all of them
+            row_headers = [x[0] for x in cursor.description]  # this will extract row headers
+            # format the result for a clean display
+            json_data = []
+            for rv in result:
+                json_data.append(dict(zip(row_headers, rv)))
     except Exception as e:
-        logger.warning("Failed connection to %s. Check error and validate firewall and public access "
-                       "or virtual network settings.", server_name)
-        raise AzureConnectionError("Unable to connect to flexible server: {}".format(e))
+        raise CLIError("Unable to execute query '{0}': {1}".format(query, e))
+    finally:
+        _close_cursor(cursor)
+
+    return json_data
+
 
-    # Execute the file
-    fail_flag = False
+def _export_query(session, query, export_file, export_format):
+    cursor = None
+    start = time.perf_counter()
+    try:
+        cursor = session.cursor(streaming=True)
+        cursor.execute(query)
+        logger.warning("Ran Database Query: '%s'", query)
+        count = export_rows(cursor, export_file, export_format)
+    except Exception as e:
+        raise CLIError("Unable to export the output of query '{0}': {1}".format(query, e))
+    finally:
+        _close_cursor(cursor)
+    logger.warning("Exported %d rows to '%s' in %.2fs.", count, export_file, time.perf_counter() - start)
+
+
+def _execute_file(session, file_path, batch_size=None):
+    # statements are sent one at a time, committing every `batch_size` statements when transaction batching is on.
+    # Without it, postgres runs the whole file in one transaction, as when the file was sent in a single query.
+    # Postgres statements that cannot run in a transaction, like CREATE DATABASE, commit what ran before them and
+    # run on their own.
+    cursor = None
+    statement_number, uncommitted = 0, 0
+    transactional = bool(batch_size) or session.server_type == "postgres"
+    timings = []
+    start = time.perf_counter()
     try:
         logger.warning("Running sql file '%s'...", file_path)
-        cursor = connection.cursor()
+        cursor = session.cursor()
+        if transactional:
+            session.set_autocommit(False)
 
         with open(file_path, "r", encoding="utf-8-sig") as sql_file:
-            cursor.execute(sql_file.read())
-
-        if server_type == 'postgres':
-            logger.warning('Successfully executed the file.')
+            for statement_number, (line_number, statement) in \
+                    enumerate(split_sql_statements(sql_file, session.server_type), 1):
+                outside_transaction = transactional and session.server_type == "postgres" and \
+                    runs_outside_transaction(statement)
+                if outside_transaction:
+                    if uncommitted:
+                        session.connection.commit()
+                        uncommitted = 0
+                    session.set_autocommit(True)
+                statement_start = time.perf_counter()
+                try:
+                    cursor.execute(statement)
+                finally:
+                    if outside_transaction:
+                        session.set_autocommit(False)
+                elapsed = time.perf_counter() - statement_start
+                timings.append((elapsed, line_number))
+                logger.info("Statement %d (line %d) ran in %.3fs", statement_number, line_number, elapsed)
+
+                if transactional and not outside_transaction:
+                    uncommitted += 1
+                    if uncommitted == batch_size:
+                        session.connection.commit()
+                        uncommitted = 0
+        if uncommitted:
+            session.connection.commit()
     except Exception as e:
-        fail_flag = True
         logger.warning("Unable to execute the sql file %s", file_path)
+        if transactional:
+            session.connection.rollback()
+            if uncommitted:
+                logger.warning("Rolled back the last %d statements of the file.", uncommitted)
+        if statement_number:
+            raise CLIError("Statement {0} (line {1}): {2}".format(statement_number, line_number, e))
         raise CLIError(e)
     finally:
-        if cursor is not None:
-            try:
-                cursor.close()
-                if not fail_flag and server_type == 'mysql':
-                    logger.warning('Successfully executed the file.')
-                logger.warning("Closed the connection to %s", server_name)
-            except Exception as e:  # pylint: disable=broad-except
-                if server_type == 'postgres':
-                    raise CLIError("Unable to close connection cursor. " + str(e))
-                raise CLIError(str(e))
+        _close_cursor(cursor)
+        if transactional:
+            session.set_autocommit(True)
+
+    logger.warning('Successfully executed the file: %d statements in %.2fs.', len(timings),
+                   time.perf_counter() - start)
+    if timings:
+        slowest = max(timings)
+        logger.warning('The slowest statement (line %d) ran in %.3fs.', slowest[1], slowest[0])
+
+
+def _close_cursor(cursor):
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning('Unable to close connection cursor.')
+            raise CLIError(str(e))
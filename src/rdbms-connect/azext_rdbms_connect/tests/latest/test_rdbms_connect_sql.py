@@ -0,0 +1,169 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from knack.util import CLIError
+
+from azext_rdbms_connect._sql_utils import export_rows, runs_outside_transaction, split_sql_statements
+from azext_rdbms_connect.custom import _execute_file
+
+
+class FakeCursor(object):
+    def __init__(self, rows=None, fail_on=None):
+        self.rows = rows or []
+        self.description = [('id',), ('name',)] if rows is not None else None
+        self.fetches = 0
+        self.fail_on = fail_on
+        self.executed = []
+
+    def execute(self, statement):
+        if statement == self.fail_on:
+            raise ValueError('syntax error')
+        self.executed.append(statement)
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class RdbmsConnectSqlTest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def _split(self, script, server_type):
+        return list(split_sql_statements(io.StringIO(script), server_type))
+
+    def test_split_postgres_statements(self):
+        script = ("-- create; the table\n"
+                  "CREATE TABLE t (a text); INSERT INTO t VALUES ('a;b'), (E'x\\';y');\n"
+                  "CREATE FUNCTION f() RETURNS int AS $body$\n"
+                  "BEGIN RETURN 1; END;\n"
+                  "$body$ LANGUAGE plpgsql;\n"
+                  "/* ; */ SELECT \"a;\" FROM t\n")
+        self.assertEqual(self._split(script, 'postgres'), [
+            (2, '-- create; the table\nCREATE TABLE t (a text)'),
+            (2, "INSERT INTO t VALUES ('a;b'), (E'x\\';y')"),
+            (3, 'CREATE FUNCTION f() RETURNS int AS $body$\nBEGIN RETURN 1; END;\n$body$ LANGUAGE plpgsql'),
+            (6, '/* ; */ SELECT "a;" FROM t')])
+
+    def test_split_mysql_statements(self):
+        script = ("INSERT INTO t VALUES ('it\\'s;'), (`a;b`); # done;\n"
+                  "DELIMITER //\n"
+                  "CREATE PROCEDURE p() BEGIN SELECT 1; END//\n"
+                  "DELIMITER ;\n"
+                  "SELECT 2--1;\n"
+                  ";\n")
+        self.assertEqual(self._split(script, 'mysql'), [
+            (1, "INSERT INTO t VALUES ('it\\'s;'), (`a;b`)"),
+            (3, '# done;\nCREATE PROCEDURE p() BEGIN SELECT 1; END'),
+            (5, 'SELECT 2--1')])
+
+    def test_export_rows_in_batches(self):
+        rows = [(i, 'name{}'.format(i)) for i in range(25)]
+
+        cursor = FakeCursor(list(rows))
+        csv_file = os.path.join(self.test_dir, 'rows.csv')
+        self.assertEqual(export_rows(cursor, csv_file, 'csv', fetch_size=10), 25)
+        self.assertEqual(cursor.fetches, 4)
+        with open(csv_file, encoding='utf-8', newline='') as f:
+            self.assertEqual(list(csv.reader(f)), [['id', 'name']] + [[str(i), n] for i, n in rows])
+
+        jsonl_file = os.path.join(self.test_dir, 'rows.jsonl')
+        self.assertEqual(export_rows(FakeCursor(list(rows)), jsonl_file, 'jsonl', fetch_size=10), 25)
+        with open(jsonl_file, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], [{'id': i, 'name': n} for i, n in rows])
+
+        with self.assertRaises(ValueError):
+            export_rows(FakeCursor(), csv_file, 'csv')
+
+    def test_execute_file_commits_in_batches(self):
+        sql_file = os.path.join(self.test_dir, 'script.sql')
+        with open(sql_file, 'w', encoding='utf-8') as f:
+            f.write(''.join('INSERT INTO t VALUES ({});\n'.format(i) for i in range(5)))
+
+        session = mock.MagicMock(server_type='postgres')
+        session.cursor.return_value = cursor = FakeCursor()
+        _execute_file(session, sql_file, batch_size=2)
+        self.assertEqual(len(cursor.executed), 5)
+        self.assertEqual(session.connection.commit.call_count, 3)
+        self.assertEqual(session.set_autocommit.call_args_list, [mock.call(False), mock.call(True)])
+
+        session = mock.MagicMock(server_type='postgres')
+        session.cursor.return_value = FakeCursor(fail_on='INSERT INTO t VALUES (3)')
+        with self.assertRaisesRegex(CLIError, r'Statement 4 \(line 4\)'):
+            _execute_file(session, sql_file, batch_size=2)
+        session.connection.commit.assert_called_once_with()
+        session.connection.rollback.assert_called_once_with()
+
+    def test_execute_file_without_batch_size(self):
+        sql_file = os.path.join(self.test_dir, 'script.sql')
+        with open(sql_file, 'w', encoding='utf-8') as f:
+            f.write(''.join('INSERT INTO t VALUES ({});\n'.format(i) for i in range(5)))
+
+        # postgres runs the whole file in one transaction
+        session = mock.MagicMock(server_type='postgres')
+        session.cursor.return_value = FakeCursor(fail_on='INSERT INTO t VALUES (3)')
+        with self.assertRaisesRegex(CLIError, r'Statement 4 \(line 4\)'):
+            _execute_file(session, sql_file)
+        session.connection.commit.assert_not_called()
+        session.connection.rollback.assert_called_once_with()
+
+        session = mock.MagicMock(server_type='postgres')
+        session.cursor.return_value = FakeCursor()
+        _execute_file(session, sql_file)
+        session.connection.commit.assert_called_once_with()
+        self.assertEqual(session.set_autocommit.call_args_list, [mock.call(False), mock.call(True)])
+
+        # mysql commits every statement on its own
+        session = mock.MagicMock(server_type='mysql')
+        session.cursor.return_value = cursor = FakeCursor()
+        _execute_file(session, sql_file)
+        self.assertEqual(len(cursor.executed), 5)
+        session.connection.commit.assert_not_called()
+        session.set_autocommit.assert_not_called()
+
+
+    def test_runs_outside_transaction(self):
+        for statement in ['CREATE DATABASE app', 'drop database if exists app', 'VACUUM ANALYZE t',
+                          'CREATE UNIQUE INDEX CONCURRENTLY i ON t (id)', 'DROP INDEX CONCURRENTLY i',
+                          'REINDEX (VERBOSE) TABLE CONCURRENTLY t', "ALTER SYSTEM SET work_mem = '64MB'",
+                          '-- create the database\n/* first */ CREATE DATABASE app']:
+            self.assertTrue(runs_outside_transaction(statement), statement)
+        for statement in ['CREATE INDEX i ON t (id)', 'CREATE TABLE concurrently (id int)',
+                          'INSERT INTO t VALUES (1)', "SELECT 'VACUUM'", 'ALTER DATABASE app SET work_mem = 1']:
+            self.assertFalse(runs_outside_transaction(statement), statement)
+
+    def test_execute_file_runs_non_transactional_statements_on_their_own(self):
+        sql_file = os.path.join(self.test_dir, 'script.sql')
+        with open(sql_file, 'w', encoding='utf-8') as f:
+            f.write('CREATE TABLE t (id int);\nINSERT INTO t VALUES (1);\nCREATE INDEX CONCURRENTLY i ON t (id);\n'
+                    'INSERT INTO t VALUES (2);\nVACUUM t;\n')
+
+        session = mock.MagicMock(server_type='postgres')
+        session.cursor.return_value = cursor = FakeCursor()
+        session.connection.commit.side_effect = lambda: cursor.executed.append('COMMIT')
+        session.set_autocommit.side_effect = lambda autocommit: cursor.executed.append(autocommit)
+        _execute_file(session, sql_file)
+
+        self.assertEqual(cursor.executed, [False, 'CREATE TABLE t (id int)', 'INSERT INTO t VALUES (1)', 'COMMIT',
+                                           True, 'CREATE INDEX CONCURRENTLY i ON t (id)', False,
+                                           'INSERT INTO t VALUES (2)', 'COMMIT', True, 'VACUUM t', False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,6 +41,13 @@ helps['graph query'] = """
         - name: --allow-partial-scopes -a
           type: bool
           short-summary: Indicates if query should succeed when only partial number of subscription underneath can be processed by server.
+        - name: --all
+          type: bool
+          short-summary: Get all the results of the query, following the skip tokens to the last page.
+          long-summary: >
+            Subscriptions are split into shards of 1000 and management groups into shards of 10, which are queried concurrently.
+            The rows of all the shards are streamed to stdout as one JSON array, and the number of pages and requests used is reported at the end.
+            --first sets the page size. --output and --query are not applied. Aggregations such as summarize are computed per shard.
     examples:
         - name: Query resources requesting a subset of resource fields.
           text: >
@@ -60,6 +67,9 @@ helps['graph query'] = """
         - name: Query with the skip token.
           text: >
             az graph query -q "where type =~ "Microsoft.Compute" | project name, tags" --skip-token skip_token_value_from_previous_query_response
+        - name: Get all the results of the query, across all the accessible subscriptions.
+          text: >
+            az graph query -q "where type =~ "Microsoft.Compute" | project id, name, tags" --all
 """
 
 
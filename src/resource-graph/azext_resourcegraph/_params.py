@@ -42,6 +42,8 @@ def load_arguments(self, _):
         c.argument('allow_partial_scopes', options_list=['--allow-partial-scopes', '-a'],
                    arg_type=get_three_state_flag(), required=False, default=False,
                    help='Indicates if query should succeed when only partial number of subscription underneath can be processed by server.')
+        c.argument('fetch_all', options_list=['--all'], action='store_true', required=False,
+                   help='Get all the results of the query, following the skip tokens and splitting the subscriptions or management groups into concurrent queries when there are more than allowed in one request. The rows are written to the output as they arrive.')
 
     with self.argument_context('graph shared-query') as c:
         c.argument('graph_query', options_list=['--graph-query', '--q', '-q'],
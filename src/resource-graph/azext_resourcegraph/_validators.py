@@ -23,6 +23,15 @@ def validate_query_args(namespace):
         recommendation = 'Try to pass --subscriptions param only or --management-groups param only.'
         raise InvalidArgumentValueError(error_msg, recommendation)
 
+    if namespace.fetch_all:
+        if namespace.skip is not None or namespace.skip_token is not None:
+            error_msg = '--all cannot be passed together with --skip or --skip-token.'
+            recommendation = 'Remove --skip and --skip-token, --all already pages through all the results.'
+            raise InvalidArgumentValueError(error_msg, recommendation)
+        # With --all, --first is the size of each page
+        namespace.first = namespace.first or __ROWS_PER_PAGE
+        return
+
     if namespace.first is not None:
         namespace.first = min(namespace.first, __ROWS_PER_PAGE)
     elif namespace.skip_token is None:
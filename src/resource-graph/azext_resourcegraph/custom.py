@@ -7,7 +7,11 @@
 
 import json
 import os
+import queue
+import sys
+import threading
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import requests
@@ -27,11 +31,17 @@ from .vendored_sdks.resourcegraph.models import \
 
 __SUBSCRIPTION_LIMIT = 1000
 __MANAGEMENT_GROUP_LIMIT = 10
+__MAX_CONCURRENT_SHARDS = 4
+__PAGES_IN_FLIGHT_PER_SHARD = 2
 __logger = get_logger(__name__)
 
 
-def execute_query(client, graph_query, first, skip, subscriptions, management_groups, allow_partial_scopes, skip_token):
-    # type: (ResourceGraphClient, str, int, int, list[str], list[str], bool, str) -> object
+def execute_query(client, graph_query, first, skip, subscriptions, management_groups, allow_partial_scopes, skip_token,
+                  fetch_all=False):
+    # type: (ResourceGraphClient, str, int, int, list[str], list[str], bool, str, bool) -> object
+    if fetch_all:
+        return _execute_query_all(client, graph_query, first, subscriptions, management_groups, allow_partial_scopes)
+
     mgs_list = management_groups
     if mgs_list is not None and len(mgs_list) > __MANAGEMENT_GROUP_LIMIT:
         mgs_list = mgs_list[:__MANAGEMENT_GROUP_LIMIT]
@@ -82,10 +92,7 @@ def execute_query(client, graph_query, first, skip, subscriptions, management_gr
                              "see the docs for an example: https://aka.ms/arg-results-truncated")
 
     except HttpResponseError as ex:
-        if ex.model.error.code == 'BadRequest':
-            raise BadRequestError(json.dumps(_to_dict(ex.model.error), indent=4)) from ex
-
-        raise AzureInternalError(json.dumps(_to_dict(ex.model.error), indent=4)) from ex
+        _raise_query_error(ex)
 
     result_dict = dict()
     result_dict['data'] = response.data
@@ -96,6 +103,133 @@ def execute_query(client, graph_query, first, skip, subscriptions, management_gr
     return result_dict
 
 
+def _execute_query_all(client, graph_query, first, subscriptions, management_groups, allow_partial_scopes):
+    # type: (ResourceGraphClient, str, int, list[str], list[str], bool) -> None
+    """Run the query against every scope, following the skip tokens to the last page.
+
+    Scopes over the per request limit are split into shards that are queried concurrently. Rows are written to
+    stdout as a JSON array as soon as their page arrives, so results are never held in memory as a whole.
+    """
+    if management_groups is not None:
+        shards = [{'management_groups': mgs} for mgs in _split_scopes(management_groups, __MANAGEMENT_GROUP_LIMIT)]
+    else:
+        subs_list = subscriptions or _get_cached_subscriptions()
+        shards = [{'subscriptions': subs} for subs in _split_scopes(subs_list, __SUBSCRIPTION_LIMIT)]
+
+    stats = {'rows': 0, 'pages': 0, 'requests': 0}
+    stats_lock = threading.Lock()
+
+    def count_request(_):
+        with stats_lock:
+            stats['requests'] += 1
+
+    # Bounded, so shards that page faster than rows are written wait instead of buffering their pages
+    pages = queue.Queue(maxsize=__PAGES_IN_FLIGHT_PER_SHARD * min(len(shards), __MAX_CONCURRENT_SHARDS))
+    stopped = threading.Event()
+
+    def fetch_shard(shard):
+        try:
+            for response in _query_pages(client, graph_query, first, allow_partial_scopes, count_request, **shard):
+                if stopped.is_set():
+                    return
+                pages.put(response)
+        except Exception as ex:
+            pages.put(ex)
+        finally:
+            pages.put(None)
+
+    error = None
+    with ThreadPoolExecutor(max_workers=min(len(shards), __MAX_CONCURRENT_SHARDS)) as executor:
+        for shard in shards:
+            executor.submit(fetch_shard, shard)
+
+        writer = _JsonArrayWriter(sys.stdout)
+        running = len(shards)
+        while running:
+            response = pages.get()
+            if response is None:
+                running -= 1
+            elif isinstance(response, Exception):
+                # Keep draining the queue until every shard stopped, so none of them stays blocked on it
+                error = error or response
+                stopped.set()
+            elif error is None:
+                stats['pages'] += 1
+                stats['rows'] += len(response.data)
+                for row in response.data:
+                    writer.write(row)
+        writer.close()
+
+    if error is not None:
+        raise error
+
+    __logger.warning("Fetched %d rows in %d pages using %d requests across %d %s.",
+                     stats['rows'], stats['pages'], stats['requests'], len(shards),
+                     'shard' if len(shards) == 1 else 'shards')
+
+
+def _query_pages(client, graph_query, first, allow_partial_scopes, raw_response_hook,
+                 subscriptions=None, management_groups=None):
+    skip_token = None
+    while True:
+        request = QueryRequest(
+            query=graph_query,
+            subscriptions=subscriptions,
+            management_groups=management_groups,
+            options=QueryRequestOptions(
+                top=first,
+                skip_token=skip_token,
+                result_format=ResultFormat.object_array,
+                allow_partial_scopes=allow_partial_scopes
+            ))
+        try:
+            response = client.resources(request, raw_response_hook=raw_response_hook)  # type: QueryResponse
+        except HttpResponseError as ex:
+            _raise_query_error(ex)
+
+        if response.result_truncated == ResultTruncated.true and not response.skip_token:
+            __logger.warning("Unable to paginate the results of the query. "
+                             "Some resources may be missing from the results. "
+                             "To rewrite the query and enable paging, "
+                             "see the docs for an example: https://aka.ms/arg-results-truncated")
+        yield response
+
+        skip_token = response.skip_token
+        if not skip_token:
+            return
+
+
+def _split_scopes(scopes, limit):
+    # type: (list[str], int) -> list[list[str]]
+    if not scopes:
+        return [scopes]
+    return [scopes[i:i + limit] for i in range(0, len(scopes), limit)]
+
+
+def _raise_query_error(ex):
+    if ex.model.error.code == 'BadRequest':
+        raise BadRequestError(json.dumps(_to_dict(ex.model.error), indent=4)) from ex
+
+    raise AzureInternalError(json.dumps(_to_dict(ex.model.error), indent=4)) from ex
+
+
+class _JsonArrayWriter:
+    """Write a JSON array one element at a time, formatted like the json output of the CLI."""
+
+    def __init__(self, out):
+        self._out = out
+        self._empty = True
+
+    def write(self, item):
+        text = json.dumps(item, ensure_ascii=False, indent=2, sort_keys=True)
+        self._out.write(('[\n  ' if self._empty else ',\n  ') + text.replace('\n', '\n  '))
+        self._empty = False
+
+    def close(self):
+        self._out.write('[]\n' if self._empty else '\n]\n')
+        self._out.flush()
+
+
 def create_shared_query(client, resource_group_name,
                         resource_name, description,
                         graph_query, location='global', tags=None):
@@ -0,0 +1,90 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+from azure.cli.core.azclierror import AzureInternalError
+from azure.core.exceptions import HttpResponseError
+
+from azext_resourcegraph.custom import execute_query
+from azext_resourcegraph.vendored_sdks.resourcegraph.models import Error, ErrorResponse, QueryResponse, ResultTruncated
+
+ROWS_PER_SUBSCRIPTION = 3
+
+
+class FakeResourceGraphClient(object):
+    """Pages through ROWS_PER_SUBSCRIPTION rows for each subscription of the request, `top` rows at a time."""
+    def __init__(self, fail_on_subscription=None):
+        self.scopes = []
+        self.fail_on_subscription = fail_on_subscription
+        self.lock = threading.Lock()
+
+    def resources(self, request, raw_response_hook=None):
+        raw_response_hook(None)
+        subscriptions = request.subscriptions
+        if self.fail_on_subscription in subscriptions:
+            error = HttpResponseError(message='throttled')
+            error.model = ErrorResponse(error=Error(code='RateLimiting', message='Too many requests.'))
+            raise error
+        with self.lock:
+            self.scopes.append(len(subscriptions))
+
+        rows = [{'id': '{}/{}'.format(sub, i)} for sub in subscriptions for i in range(ROWS_PER_SUBSCRIPTION)]
+        start = int(request.options.skip_token or 0)
+        end = start + request.options.top
+        return QueryResponse(total_records=len(rows), count=len(rows[start:end]), data=rows[start:end],
+                             result_truncated=ResultTruncated.false,
+                             skip_token=str(end) if end < len(rows) else None)
+
+
+class ResourceGraphQueryAllTest(unittest.TestCase):
+    def _query_all(self, client, subscriptions, first=1000):
+        out = io.StringIO()
+        with mock.patch('sys.stdout', out):
+            result = execute_query(client, 'project id', first, None, subscriptions, None, False, None,
+                                   fetch_all=True)
+        self.assertIsNone(result)
+        return json.loads(out.getvalue())
+
+    def test_query_all_shards_subscriptions_and_follows_skip_tokens(self):
+        subscriptions = ['sub{}'.format(i) for i in range(2500)]
+        client = FakeResourceGraphClient()
+
+        with mock.patch('azext_resourcegraph.custom.__logger') as logger:
+            rows = self._query_all(client, subscriptions)
+
+        self.assertEqual(len(rows), 2500 * ROWS_PER_SUBSCRIPTION)
+        self.assertEqual(len({row['id'] for row in rows}), len(rows))
+        # 3 shards of at most 1000 subscriptions, 3 pages of 1000 rows for each full shard
+        self.assertEqual(sorted(set(client.scopes)), [500, 1000])
+        self.assertEqual(len(client.scopes), 3 + 3 + 2)
+        logger.warning.assert_called_once_with(mock.ANY, 7500, 8, 8, 3, 'shards')
+
+    def test_query_all_pages_one_row_at_a_time(self):
+        client = FakeResourceGraphClient()
+        rows = self._query_all(client, ['sub0'], first=1)
+
+        self.assertEqual(rows, [{'id': 'sub0/{}'.format(i)} for i in range(ROWS_PER_SUBSCRIPTION)])
+        self.assertEqual(len(client.scopes), ROWS_PER_SUBSCRIPTION)
+
+    def test_query_all_without_cached_subscriptions_prints_no_rows(self):
+        with mock.patch('azext_resourcegraph.custom._get_cached_subscriptions', return_value=[]) as cached:
+            self.assertEqual(self._query_all(FakeResourceGraphClient(), []), [])
+        cached.assert_called_once_with()
+
+    def test_query_all_raises_the_error_of_a_shard(self):
+        subscriptions = ['sub{}'.format(i) for i in range(5000)]
+        client = FakeResourceGraphClient(fail_on_subscription='sub3000')
+
+        with self.assertRaises(AzureInternalError), mock.patch('sys.stdout', io.StringIO()):
+            execute_query(client, 'project id', 1, None, subscriptions, None, False, None, fetch_all=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=wrong-import-order
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from knack.log import get_logger
+from azure.cli.core.azclierror import InvalidArgumentValueError
+
+logger = get_logger(__name__)
+
+LOG_LINE_LIMIT = 2 ** 20  # a line without line ending is flushed once this many bytes are buffered
+INSTANCE_BUFFER_BATCHES = 256  # batches of lines (one per network read) buffered per instance before its reader blocks
+MERGE_WINDOW_IN_SEC = 0.25  # how long lines of all instances are collected before they are written together
+
+_LOGGER_SEGMENT_REGEX = re.compile(r'([^\.])[^\.]+\.')
+_LOGGER_LENGTH_REGEX = re.compile(r'\blogger\{(\d+)\}')
+
+
+def _split_lines(text, newline):
+    # unlike splitlines(), only split on the line feed the logstream API ends its lines with
+    lines = text.split(newline)
+    last = lines.pop()
+    lines = [line + newline for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+class _LogRecord(dict):
+    '''A parsed JSON log line; fields missing from the line format as empty strings.'''
+    def __missing__(self, key):
+        return ''
+
+
+def build_log_shortener(length):
+    if length <= 0:
+        raise InvalidArgumentValueError('Logger length in `logger{length}` should be positive')
+
+    # logger names repeat on almost every line, so each one is shortened once
+    cache = {}
+
+    def shortener(logger_name):
+        '''
+        Try shorten the logger name to the specified length.
+        '''
+        short_name = cache.get(logger_name)
+        if short_name is not None:
+            return short_name
+        short_name = logger_name
+        # first, try to shorten the package name to one letter, e.g.,
+        #     org.springframework.cloud.netflix.eureka.config.DiscoveryClientOptionalArgsConfiguration
+        # to: o.s.c.n.e.c.DiscoveryClientOptionalArgsConfiguration
+        while len(short_name) > length:
+            short_name, count = _LOGGER_SEGMENT_REGEX.subn(r'\1.', short_name, 1)
+            if count < 1:
+                break
+
+        # then, cut off the leading packages if necessary
+        short_name = short_name[-length:]
+        cache[logger_name] = short_name
+        return short_name
+
+    return shortener
+
+
+def build_log_formatter(format_json):
+    '''
+    Build the formatter of a batch of log lines based on the format_json argument. The returned function takes
+    a list of decoded lines (with their line endings) and returns the list of formatted records.
+    '''
+    if not format_json:
+        return list
+
+    shortener = None
+    match = _LOGGER_LENGTH_REGEX.search(format_json)
+    if match:
+        shortener = build_log_shortener(int(match[1]))
+        format_json = _LOGGER_LENGTH_REGEX.sub('logger', format_json, 1)
+    format_record = format_json.format_map
+    loads = json.loads
+    first_exception = True
+
+    def format_batch(lines):
+        nonlocal first_exception
+        formatted = []
+        for line in lines:
+            try:
+                # Add n=\n so that in Windows CMD it's easy to specify customized format with line ending
+                # e.g., "{timestamp} {message}{n}"
+                # (Windows CMD does not escape \n in string literal.)
+                record = _LogRecord(n='\n')
+                record.update(loads(line))
+                if shortener and record.get('logger') is not None:
+                    record['logger'] = shortener(record['logger'])
+                formatted.append(format_record(record))
+            except Exception:  # pylint: disable=broad-except
+                if first_exception:
+                    # enable this format error logging only with --verbose
+                    logger.info("Failed to format log line '{}'".format(line), exc_info=sys.exc_info())
+                    first_exception = False
+                formatted.append(line)
+        return formatted
+
+    return format_batch
+
+
+def iter_log_batches(chunks, limit=LOG_LINE_LIMIT):
+    '''
+    Group a stream of byte chunks into lists of complete lines (line endings included). If no line ending was
+    found and the buffered content size is larger than the limit, the buffer is returned as a line directly.
+    '''
+    pending = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        data = pending + chunk
+        end = data.rfind(b'\n')
+        if end == -1:
+            pending = data
+            if len(pending) >= limit:
+                yield [pending]
+                pending = b''
+            continue
+        pending = data[end + 1:]
+        yield _split_lines(data[:end + 1], b'\n')
+        if len(pending) >= limit:
+            yield [pending]
+            pending = b''
+    if pending:
+        yield [pending]
+
+
+def decode_log_batch(batch, encoding=None):
+    '''
+    Decode a batch of lines at once, replacing what the console encoding cannot display.
+    '''
+    encoding = encoding or sys.stdout.encoding or 'utf-8'
+    text = b''.join(batch).decode(encoding='utf-8', errors='replace')
+    if encoding.lower().replace('-', '') != 'utf8':
+        text = text.encode(encoding, errors='replace').decode(encoding, errors='replace')
+    return _split_lines(text, '\n')
+
+
+def write_app_log(chunks, formatter, out=None):
+    '''
+    Format and write a log stream one batch at a time. Returns the number of lines written.
+    '''
+    out = out or sys.stdout
+    count = 0
+    for batch in iter_log_batches(chunks):
+        out.write(''.join(formatter(decode_log_batch(batch, getattr(out, 'encoding', None)))))
+        out.flush()
+        count += len(batch)
+    return count
+
+
+_STREAM_DONE = object()
+
+
+def _read_instance_log(open_stream, lines, stop):
+    def _put(item):
+        while not stop.is_set():
+            try:
+                lines.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for batch in iter_log_batches(open_stream()):
+            if not _put(batch):
+                return
+    except Exception as e:  # pylint: disable=broad-except
+        _put(e)
+    finally:
+        _put(_STREAM_DONE)
+
+
+def fan_in_app_logs(sources, formatter, out=None, buffer_batches=INSTANCE_BUFFER_BATCHES, window=MERGE_WINDOW_IN_SEC):
+    '''
+    Stream the logs of several instances at once into one output, each line prefixed with its instance name.
+
+    sources maps an instance name to a callable returning an iterable of byte chunks. Every instance is read by
+    its own thread into a bounded buffer, so a noisy instance only ever blocks its own reader. Whatever arrived
+    from all instances during one merge window is formatted and written together, in arrival order per
+    instance. Returns the number of lines written; the first error of a stream is raised once all streams end.
+    '''
+    out = out or sys.stdout
+    encoding = getattr(out, 'encoding', None)
+    stop = threading.Event()
+    buffers = {}
+    for name, open_stream in sources.items():
+        buffers[name] = queue.Queue(maxsize=buffer_batches)
+        threading.Thread(target=_read_instance_log, args=(open_stream, buffers[name], stop), daemon=True).start()
+
+    count = 0
+    errors = []
+    try:
+        while buffers:
+            time.sleep(window)
+            merged = []
+            for name, batches in list(buffers.items()):
+                prefix = '[{}] '.format(name)
+                # take at most what the buffer holds, so a noisy instance cannot keep the window open
+                for _ in range(buffer_batches):
+                    try:
+                        batch = batches.get_nowait()
+                    except queue.Empty:
+                        break
+                    if batch is _STREAM_DONE:
+                        del buffers[name]
+                        break
+                    if isinstance(batch, Exception):
+                        logger.warning("Log stream of instance %s ended with error: %s", name, batch)
+                        errors.append(batch)
+                        continue
+                    for record in formatter(decode_log_batch(batch, encoding)):
+                        # keep one record per line even if the format has no line ending
+                        merged.append(prefix + record if record.endswith('\n') else prefix + record + '\n')
+                    count += len(batch)
+            if merged:
+                out.write(''.join(merged))
+                out.flush()
+    finally:
+        stop.set()
+    if errors:
+        raise errors[0]
+    return count
@@ -17,6 +17,7 @@ from msrestazure.azure_exceptions import CloudError
 from .vendored_sdks.appplatform.v2022_05_01_preview import models
 from ._deployment_uploadable_factory import uploader_selector
 from ._log_stream import LogStream
+from ._stream_utils import print_blob_logs
 from .vendored_sdks.appplatform.v2022_01_01_preview.models._app_platform_management_client_enums import SupportedRuntimeValue
 
 logger = get_logger(__name__)
@@ -134,7 +135,8 @@ class BuildService:
     def _try_print_build_logs(self, build_result_id):
         blob_url = self._try_get_build_log_url(build_result_id)
         if blob_url:
-            sys.stdout.write(requests.get(blob_url).text)
+            # the build has finished, so the blob is read to its end in a few large requests and not followed
+            print_blob_logs(blob_url, is_done=lambda: True)
 
     def _try_get_build_log_url(self, build_result_id):
         resource_id = parse_resource_id(build_result_id)
@@ -185,7 +187,8 @@ class BuildService:
                 logger.debug('start to stream log for stage {}'.format(stage.name))
                 self.progress_bar and self.progress_bar.end()
                 std_encoding = sys.stdout.encoding
-                for content in response.iter_content():
+                # chunk_size=None hands over the log as it arrives instead of one byte at a time
+                for content in response.iter_content(chunk_size=None):
                     if content:
                         sys.stdout.write(content.decode(encoding='utf-8', errors='replace')
                                          .encode(std_encoding, errors='replace')
@@ -4,13 +4,14 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: disable=wrong-import-order
+import os
 from knack.log import get_logger
 from azure.cli.core.azclierror import InvalidArgumentValueError
 from .vendored_sdks.appplatform.v2022_01_01_preview import models
-from ._deployment_uploadable_factory import FileUpload, FolderUpload
+from ._deployment_uploadable_factory import FileUpload, FolderUpload, UploadCheckpoint
 from azure.core.exceptions import HttpResponseError
 from time import sleep
-from ._stream_utils import stream_logs
+from ._stream_utils import stream_logs, deployment_is_done
 from ._buildservices_factory import BuildService
 from threading import Timer
 
@@ -60,18 +61,31 @@ class UploadDeployableBuilder(EmptyDeployableBuilder):
         return 3
 
     def build_deployable_path(self, **kwargs):
-        logger.warning('[1/{}] Requesting for upload URL.'.format(kwargs['total_steps']))
-        upload_info = self.client.apps.get_resource_upload_url(self.resource_group,
-                                                               self.service,
-                                                               self.app)
-        if not upload_info.upload_url:
-            raise InvalidArgumentValueError('Failed to get a SAS URL to upload context.')
+        checkpoint = self._get_checkpoint(**kwargs)
+        if checkpoint and checkpoint.is_resumable():
+            logger.warning('[1/{}] Reusing the upload URL of the previous unfinished upload.'.format(kwargs['total_steps']))
+            upload_url, relative_path = checkpoint.upload_url, checkpoint.relative_path
+        else:
+            logger.warning('[1/{}] Requesting for upload URL.'.format(kwargs['total_steps']))
+            upload_info = self.client.apps.get_resource_upload_url(self.resource_group,
+                                                                   self.service,
+                                                                   self.app)
+            if not upload_info.upload_url:
+                raise InvalidArgumentValueError('Failed to get a SAS URL to upload context.')
+            upload_url, relative_path = upload_info.upload_url, upload_info.relative_path
+            if checkpoint:
+                checkpoint.reset(upload_url, relative_path)
         logger.warning('[2/{}] Uploading package to blob.'.format(kwargs['total_steps']))
-        self._get_uploader(upload_url=upload_info.upload_url).upload_and_build(**kwargs)
-        return upload_info.relative_path
+        self._get_uploader(upload_url=upload_url, checkpoint=checkpoint).upload_and_build(**kwargs)
+        return relative_path
+
+    def _get_checkpoint(self, artifact_path=None, **_):
+        if not artifact_path or not os.path.isfile(artifact_path):
+            return None
+        return UploadCheckpoint.for_artifact(self.cmd.cli_ctx, artifact_path, self.resource_group, self.service, self.app)
 
-    def _get_uploader(self, upload_url=None):
-        return FileUpload(upload_url=upload_url, cli_ctx=self.cmd.cli_ctx)
+    def _get_uploader(self, upload_url=None, checkpoint=None):
+        return FileUpload(upload_url=upload_url, cli_ctx=self.cmd.cli_ctx, checkpoint=checkpoint)
 
 
 class SourceBuildDeployableBuilder(UploadDeployableBuilder):
@@ -81,7 +95,11 @@ class SourceBuildDeployableBuilder(UploadDeployableBuilder):
             self.retrieve_log(**kwargs)
         return relative_path
 
-    def _get_uploader(self, upload_url=None):
+    def _get_checkpoint(self, **_):
+        # the source tarball is built again for every deploy, so there is nothing to resume
+        return None
+
+    def _get_uploader(self, upload_url=None, checkpoint=None):
         return FolderUpload(upload_url=upload_url, cli_ctx=self.cmd.cli_ctx)
 
     def get_source_type(self, **_):
@@ -109,7 +127,8 @@ class SourceBuildDeployableBuilder(UploadDeployableBuilder):
 
             logger.warning("Trying to fetch build logs")
             stream_logs(client.deployments, resource_group, service,
-                        app, deployment, logger_level_func=print)
+                        app, deployment, logger_level_func=print,
+                        is_done=deployment_is_done(client.deployments, resource_group, service, app, deployment))
         old_log_url = get_log_url()
         timer = Timer(3, get_logs_loop)
         timer.daemon = True
@@ -4,14 +4,99 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: disable=wrong-import-order
+import hashlib
+import json
 import os
-from re import L
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs
+from knack.log import get_logger
 from azure.cli.core.azclierror import InvalidArgumentValueError
 from azure.cli.core.profiles import ResourceType, get_sdk
 from ._utils import (get_azure_files_info, _pack_source_code)
 
+logger = get_logger(__name__)
+
+# Azure Files accepts at most 4 MiB per Put Range request
+MAX_UPLOAD_RANGE_SIZE_MB = 4
+DEFAULT_UPLOAD_MAX_CONNECTIONS = 8
+UPLOAD_RANGE_RETRIES = 3
+# an upload URL is only resumed while its SAS token stays valid for at least this long
+UPLOAD_RESUME_MIN_VALIDITY = timedelta(minutes=10)
+_CHECKPOINT_SAVE_INTERVAL = 2
+
+
+class UploadCheckpoint:
+    '''
+    Local record of an artifact upload: the upload URL it goes to and the ranges already uploaded.
+    It is kept in the CLI config directory until the upload completes, so a failed or interrupted
+    deploy of the same unchanged artifact resumes instead of starting from zero.
+    '''
+    def __init__(self, path, artifact_path, upload_url=None, relative_path=None, range_size=None, created=False,
+                 completed=None):
+        self.path = path
+        self.artifact_path = artifact_path
+        self.upload_url = upload_url
+        self.relative_path = relative_path
+        self.range_size = range_size
+        self.created = created
+        self.completed = set(completed or [])
+        self._last_saved = 0
+
+    @classmethod
+    def for_artifact(cls, cli_ctx, artifact_path, resource_group, service, app):
+        '''Return the checkpoint of the given artifact and app, loading the previous upload if there is one.'''
+        stat = os.stat(artifact_path)
+        key = json.dumps([resource_group.lower(), service.lower(), app.lower(), os.path.abspath(artifact_path),
+                          stat.st_size, stat.st_mtime_ns])
+        path = os.path.join(cli_ctx.config.config_dir, 'spring_upload_checkpoints',
+                            hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return cls(path, artifact_path, data['uploadUrl'], data['relativePath'], data['rangeSize'],
+                       data['created'], data['completed'])
+        except (OSError, ValueError, KeyError):
+            return cls(path, artifact_path)
+
+    def is_resumable(self):
+        if not self.upload_url or not self.relative_path or not self.created:
+            return False
+        expiry = parse_qs(self.upload_url.partition('?')[2]).get('se')
+        try:
+            expiry = datetime.strptime(expiry[0], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            return False
+        return expiry - datetime.now(timezone.utc) > UPLOAD_RESUME_MIN_VALIDITY
+
+    def reset(self, upload_url, relative_path):
+        self.upload_url = upload_url
+        self.relative_path = relative_path
+        self.range_size = None
+        self.created = False
+        self.completed = set()
+
+    def save(self, force=True):
+        if not force and time.time() - self._last_saved < _CHECKPOINT_SAVE_INTERVAL:
+            return
+        self._last_saved = time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with os.fdopen(os.open(temp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump({'uploadUrl': self.upload_url, 'relativePath': self.relative_path, 'rangeSize': self.range_size,
+                       'created': self.created, 'completed': sorted(self.completed)}, f)
+        os.replace(temp_path, self.path)
+
+    def delete(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
 
 class Empty:
     def upload_and_build(self, **_):
@@ -22,7 +107,7 @@ class FileUpload:
     '''
     Upload a file in local file system to upload url
     '''
-    def __init__(self, upload_url, cli_ctx):
+    def __init__(self, upload_url, cli_ctx, checkpoint=None):
         account_name, endpoint_suffix, share_name, relative_name, sas_token = get_azure_files_info(upload_url)
         self.account_name = account_name
         self.endpoint_suffix = endpoint_suffix
@@ -30,31 +115,107 @@ class FileUpload:
         self.relative_name = relative_name
         self.sas_token = sas_token
         self.cli_ctx = cli_ctx
+        self.checkpoint = checkpoint
 
-    def upload_and_build(self, artifact_path, **_):
+    def upload_and_build(self, artifact_path, upload_range_size=None, upload_max_connections=None, **_):
         if not artifact_path:
             raise InvalidArgumentValueError('--artifact-path is not set.')
         artifact_type_list = {'.zip', '.tar.gz', '.tar', '.jar', '.war'}
         if os.path.splitext(artifact_path)[-1] in artifact_type_list:
-            self._upload(artifact_path)
+            self._upload(artifact_path, upload_range_size, upload_max_connections)
         else:
             raise InvalidArgumentValueError('Unexpected artifact file type, must be one of .zip, .tar.gz, .tar, .jar, .war.')
 
-    def _upload(self, artifact_path):
+    def _upload(self, artifact_path, range_size_mb=None, max_connections=None):
+        '''
+        Upload the file as ranges over several connections. Uploaded ranges are recorded in the checkpoint,
+        so a retried upload only sends what is missing.
+        '''
         FileService = get_sdk(self.cli_ctx, ResourceType.DATA_STORAGE, 'file#FileService')
         file_service = FileService(self.account_name, sas_token=self.sas_token, endpoint_suffix=self.endpoint_suffix)
-        file_service.create_file_from_path(self.share_name, None, self.relative_name, artifact_path)
+        checkpoint = self.checkpoint or UploadCheckpoint(None, artifact_path)
+        size = os.path.getsize(artifact_path)
+        range_size = (range_size_mb or MAX_UPLOAD_RANGE_SIZE_MB) * 1024 * 1024
+        max_connections = max_connections or DEFAULT_UPLOAD_MAX_CONNECTIONS
+
+        if checkpoint.created and (checkpoint.range_size != range_size or
+                                   not self._remote_file_matches(file_service, size)):
+            # ranges recorded with another range size do not line up, and a missing file has lost them; start over
+            checkpoint.created = False
+        if not checkpoint.created:
+            file_service.create_file(self.share_name, None, self.relative_name, size)
+            checkpoint.created = True
+            checkpoint.range_size = range_size
+            checkpoint.completed = set()
+            self._save_checkpoint(checkpoint)
+        elif checkpoint.completed:
+            logger.warning('Resuming upload, %d of %d bytes were uploaded before.',
+                           min(len(checkpoint.completed) * range_size, size), size)
+
+        pending = [start for start in range(0, size, range_size) if start not in checkpoint.completed]
+        lock = threading.Lock()
+        local = threading.local()
+        open_files = []
+        started = time.time()
+
+        def upload_range(start):
+            if not hasattr(local, 'file'):
+                # one handle per connection
+                local.file = open(artifact_path, 'rb')  # pylint: disable=consider-using-with
+                with lock:
+                    open_files.append(local.file)
+            local.file.seek(start)
+            data = local.file.read(min(range_size, size - start))
+            for attempt in range(UPLOAD_RANGE_RETRIES):
+                try:
+                    file_service.update_range(self.share_name, None, self.relative_name, data,
+                                              start, start + len(data) - 1)
+                    break
+                except Exception:  # pylint: disable=broad-except
+                    if attempt == UPLOAD_RANGE_RETRIES - 1:
+                        raise
+                    time.sleep(2 ** attempt)
+            with lock:
+                checkpoint.completed.add(start)
+                self._save_checkpoint(checkpoint, force=False)
+            return len(data)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_connections) as executor:
+                uploaded = sum(executor.map(upload_range, pending))
+        finally:
+            for f in open_files:
+                f.close()
+            self._save_checkpoint(checkpoint)
+
+        elapsed = max(time.time() - started, 0.001)
+        logger.warning('Uploaded %.1f MB in %.1f seconds (%.1f MB/s over %d connections).',
+                       uploaded / 1024 / 1024, elapsed, uploaded / 1024 / 1024 / elapsed, max_connections)
+        if self.checkpoint:
+            self.checkpoint.delete()
+
+    def _remote_file_matches(self, file_service, size):
+        try:
+            remote = file_service.get_file_properties(self.share_name, None, self.relative_name)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return remote.properties.content_length == size
+
+    @staticmethod
+    def _save_checkpoint(checkpoint, force=True):
+        if checkpoint.path:
+            checkpoint.save(force=force)
 
 
 class FolderUpload(FileUpload):
     '''
     Compress and upload a folder in local file system to upload url
     '''
-    def upload_and_build(self, source_path, **kwargs):
+    def upload_and_build(self, source_path, upload_range_size=None, upload_max_connections=None, **kwargs):
         if not source_path:
             raise InvalidArgumentValueError('--source-path is not set.')
         artifact_path = self._compress_folder(source_path)
-        self._upload(artifact_path)
+        self._upload(artifact_path, upload_range_size, upload_max_connections)
 
     def _compress_folder(self, folder):
         file_path = os.path.join(tempfile.gettempdir(), 'build_archive_{}.tar.gz'.format(uuid.uuid4().hex))
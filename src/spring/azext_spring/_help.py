@@ -259,6 +259,8 @@ helps['spring app deploy'] = """
       text: az spring app deploy -n MyApp -s MyCluster -g MyResourceGroup --config-file-patterns MyPatterns --artifact-path app.jar
     - name: Deploy a pre-built jar to an app with build env (For Enterprise tier only).
       text: az spring app deploy -n MyApp -s MyCluster -g MyResourceGroup --artifact-path app.jar --build-env BP_JVM_VERSION=11.*
+    - name: Deploy a large pre-built jar over 16 connections. Running the command again after an interrupted upload resumes it.
+      text: az spring app deploy -n MyApp -s MyCluster -g MyResourceGroup --artifact-path app.jar --upload-max-connections 16
 """
 
 helps['spring app scale'] = """
@@ -354,6 +356,9 @@ helps['spring app log'] = """
 helps['spring app logs'] = """
     type: command
     short-summary: Show logs of an app instance, logs will be streamed when setting '-f/--follow'.
+    examples:
+    - name: Stream the logs of all instances of the production deployment into one output.
+      text: az spring app logs -n MyApp -s MyCluster -g MyResourceGroup --all-instances -f
 """
 
 helps['spring app connect'] = """
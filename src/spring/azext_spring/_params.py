@@ -13,9 +13,10 @@ from ._validators import (validate_env, validate_cosmos_type, validate_resource_
                           validate_vnet, validate_vnet_required_parameters, validate_node_resource_group,
                           validate_tracing_parameters_asc_create, validate_tracing_parameters_asc_update,
                           validate_app_insights_parameters, validate_instance_count, validate_java_agent_parameters,
-                          validate_ingress_timeout, validate_jar, validate_ingress_send_timeout,
+                          validate_ingress_timeout, validate_jar, validate_upload_options, validate_ingress_send_timeout,
                           validate_ingress_session_max_age, validate_config_server_ssh_or_warn,
-                          validate_remote_debugging_port, validate_ingress_client_auth_certificates)
+                          validate_remote_debugging_port, validate_ingress_client_auth_certificates,
+                          validate_log_instances)
 from ._validators_enterprise import (only_support_enterprise, validate_builder_resource, validate_builder_create,
                                      validate_builder_update, validate_build_pool_size,
                                      validate_git_uri, validate_acc_git_url, validate_acc_git_refs, validate_acs_patterns, validate_config_file_patterns,
@@ -355,6 +356,8 @@ def load_arguments(self, _):
     def prepare_logs_argument(c):
         '''`app log tail` is deprecated. `app logs` is the new choice. They share the same command processor.'''
         c.argument('instance', options_list=['--instance', '-i'], help='Name of an existing instance of the deployment.')
+        c.argument('all_instances', action='store_true', validator=validate_log_instances,
+                   help='Stream the logs of all instances of the deployment at once, each line prefixed with its instance name.')
         c.argument('lines', type=int, help='Number of lines to show. Maximum is 10000', validator=validate_log_lines)
         c.argument('follow', options_list=['--follow ', '-f'], help='Specify if the logs should be streamed.', action='store_true')
         c.argument('since', help='Only return logs newer than a relative duration like 5s, 2m, or 1h. Maximum is 1h', validator=validate_log_since)
@@ -441,6 +444,12 @@ def load_arguments(self, _):
             c.argument(
                 'disable_validation', arg_type=get_three_state_flag(),
                 help='If true, disable jar validation.')
+            c.argument(
+                'upload_range_size', type=int, arg_group='Upload', validator=validate_upload_options,
+                help='Size in MiB of each range of the artifact or source package uploaded in parallel, from 1 to 4. Default: 4.')
+            c.argument(
+                'upload_max_connections', type=int, arg_group='Upload',
+                help='Maximum number of connections used to upload the artifact or source package. Default: 8.')
             c.argument('builder', help='(Enterprise Tier Only) Build service builder used to build the executable.', default='default')
             c.argument(
                 'main_entry', options_list=[
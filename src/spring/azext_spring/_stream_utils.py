@@ -7,8 +7,6 @@
 
 import time
 import colorama   # pylint: disable=import-error
-from io import BytesIO
-from random import uniform
 from knack.util import CLIError
 from knack.log import get_logger
 from msrestazure.azure_exceptions import CloudError
@@ -19,7 +17,13 @@ from ._utils import get_blob_info
 logger = get_logger(__name__)
 
 DEFAULT_CHUNK_SIZE = 1024 * 4
+MAX_CHUNK_SIZE = 1024 * 1024 * 4
 DEFAULT_LOG_TIMEOUT_IN_SEC = 60 * 30  # 30 minutes
+# the blob is polled every ACTIVE_POLL_INTERVAL_IN_SEC while it grows, and backs off to
+# IDLE_POLL_INTERVAL_IN_SEC while nothing is written
+ACTIVE_POLL_INTERVAL_IN_SEC = 0.5
+IDLE_POLL_INTERVAL_IN_SEC = 5
+DONE_CHECK_INTERVAL_IN_SEC = 5
 
 
 def stream_logs(client,
@@ -29,7 +33,8 @@ def stream_logs(client,
                 deployment,
                 no_format=False,
                 raise_error_on_failure=True,
-                logger_level_func=logger.warning):
+                logger_level_func=logger.warning,
+                is_done=None):
     log_file_sas = None
     error_msg = "Could not get logs for Service: {}".format(service)
 
@@ -60,151 +65,172 @@ def stream_logs(client,
                  container_name,
                  blob_name,
                  raise_error_on_failure,
-                 logger_level_func)
+                 logger_level_func,
+                 is_done)
 
 
-def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-statements, too-many-branches
-                 byte_size,
-                 timeout_in_seconds,
-                 blob_service,
-                 container_name,
-                 blob_name,
-                 raise_error_on_failure,
-                 logger_level_func):
-
-    if not no_format:
-        colorama.init()
-
-    stream = BytesIO()
-    metadata = {}
-    start = 0
-    end = byte_size - 1
-    available = 0
-    sleep_time = 1
-    max_sleep_time = 15
-    num_fails = 0
-    num_fails_for_backoff = 3
-    consecutive_sleep_in_sec = 0
+def print_blob_logs(blob_sas_url, logger_level_func=print, is_done=None):
+    '''
+    Print the log blob behind a SAS URL, following it until is_done() returns True or the blob is complete.
+    '''
+    account_name, endpoint_suffix, container_name, blob_name, sas_token = get_blob_info(blob_sas_url)
+    blob_service = AppendBlobService(account_name=account_name, sas_token=sas_token, endpoint_suffix=endpoint_suffix)
+    return AppendBlobTailer(blob_service, container_name, blob_name, logger_level_func, is_done=is_done).tail()
 
-    blob_exists = False
 
-    def safe_get_blob_properties():
+def deployment_is_done(client, resource_group, service, app, deployment):
+    '''
+    Return a callable telling whether the deployment has reached a terminal provisioning state.
+    '''
+    def _is_done():
+        try:
+            resource = client.get(resource_group, service, app, deployment)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return (resource.properties.provisioning_state or '').lower() in ('succeeded', 'failed', 'canceled')
+    return _is_done
+
+
+class AppendBlobTailer:  # pylint: disable=too-many-instance-attributes
+    '''
+    Print an append blob while it is being written.
+
+    Every poll reads everything appended since the previous one, in requests that grow from min_chunk_size
+    up to MAX_CHUNK_SIZE as long as each of them comes back full, so a large backlog takes few requests
+    and a slowly growing log takes small ones. Only complete lines are printed. The blob is polled every
+    ACTIVE_POLL_INTERVAL_IN_SEC while it grows and less often while it is idle. Tailing stops when the blob
+    is marked complete, when is_done() returns True (after a final read), or after timeout_in_seconds
+    without new data.
+    '''
+    def __init__(self, blob_service, container_name, blob_name, logger_level_func,
+                 min_chunk_size=DEFAULT_CHUNK_SIZE, timeout_in_seconds=DEFAULT_LOG_TIMEOUT_IN_SEC, is_done=None):
+        self.blob_service = blob_service
+        self.container_name = container_name
+        self.blob_name = blob_name
+        self.logger_level_func = logger_level_func
+        self.min_chunk_size = min_chunk_size
+        self.timeout_in_seconds = timeout_in_seconds
+        self.is_done = is_done
+        self.metadata = {}
+        self.available = 0
+        self.position = 0
+        self.request_count = 0
+        self._blob_exists = False
+        self._pending = b''
+
+    def _refresh_properties(self):
         '''
         In recent storage SDK, the get_blob_properties will output error logs on BlobNotFound (and also raise
         AzureHttpError(404)). There is no way to suppress the error logging from the callsite.
         However, in our scenario, such BlobNotFound error is expected before the build actually kicks off.
         To get rid of the error logging, we only call the get_blob_properties after the blob is created.
         '''
-        nonlocal blob_exists
-        if not blob_exists:
-            blob_exists = blob_service.exists(
-                container_name=container_name, blob_name=blob_name)
-        if blob_exists:
-            return blob_service.get_blob_properties(
-                container_name=container_name, blob_name=blob_name)
-        return None
-
-    # Try to get the initial properties so there's no waiting.
-    # If the storage call fails, we'll just sleep and try again after.
-    try:
-        props = safe_get_blob_properties()
-        if props:
-            metadata = props.metadata
-            available = props.properties.content_length
-    except (AttributeError, AzureHttpError):
-        pass
-
-    while (_blob_is_not_complete(metadata) or start < available):
-        while start < available:
-            # Success! Reset our polling backoff.
-            sleep_time = 1
-            num_fails = 0
-            consecutive_sleep_in_sec = 0
+        try:
+            if not self._blob_exists:
+                self.request_count += 1
+                self._blob_exists = self.blob_service.exists(container_name=self.container_name,
+                                                             blob_name=self.blob_name)
+            if self._blob_exists:
+                self.request_count += 1
+                props = self.blob_service.get_blob_properties(container_name=self.container_name,
+                                                              blob_name=self.blob_name)
+                self.metadata = props.metadata
+                self.available = props.properties.content_length
+        except AzureHttpError as ae:
+            if ae.status_code != 404:
+                raise CLIError(ae)
 
+    def _read_available(self):
+        chunk_size = self.min_chunk_size
+        while self.position < self.available:
+            end = self.position + min(chunk_size, self.available - self.position) - 1
             try:
-                old_byte_size = len(stream.getvalue())
-                blob_service.get_blob_to_stream(
-                    container_name=container_name,
-                    blob_name=blob_name,
-                    start_range=start,
-                    end_range=end,
-                    stream=stream)
-
-                curr_bytes = stream.getvalue()
-                new_byte_size = len(curr_bytes)
-                amount_read = new_byte_size - old_byte_size
-                start += amount_read
-                end = start + byte_size - 1
-
-                # Only scan what's newly read. If nothing is read, default to 0.
-                min_scan_range = max(new_byte_size - amount_read - 1, 0)
-                for i in range(new_byte_size - 1, min_scan_range, -1):
-                    if curr_bytes[i - 1:i + 1] == b'\r\n':
-                        flush = curr_bytes[:i]  # won't logger.warning \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        logger_level_func(flush.decode('utf-8', errors='ignore'))
-                        break
-                    if curr_bytes[i:i + 1] == b'\n':
-                        flush = curr_bytes[:i + 1]  # won't logger.warning \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        logger_level_func(flush.decode('utf-8', errors='ignore'))
-                        break
-
+                self.request_count += 1
+                data = self.blob_service.get_blob_to_bytes(container_name=self.container_name,
+                                                           blob_name=self.blob_name,
+                                                           start_range=self.position,
+                                                           end_range=end).content
             except AzureHttpError as ae:
                 if ae.status_code != 404:
                     raise CLIError(ae)
-            except KeyboardInterrupt:
-                curr_bytes = stream.getvalue()
-                if curr_bytes:
-                    logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
                 return
-
-        try:
-            props = safe_get_blob_properties()
-            if props:
-                metadata = props.metadata
-                available = props.properties.content_length
-        except AzureHttpError as ae:
-            if ae.status_code != 404:
-                raise CLIError(ae)
-        except KeyboardInterrupt:
-            if curr_bytes:
-                logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
-            return
-        except Exception as err:
-            raise CLIError(err)
-
-        if consecutive_sleep_in_sec > timeout_in_seconds:
-            # Flush anything remaining in the buffer - this would be the case
-            # if the file has expired and we weren't able to detect any \r\n
-            curr_bytes = stream.getvalue()
-            if curr_bytes:
-                logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
-
+            if not data:
+                return
+            self.position += len(data)
+            self._emit(data)
+            if len(data) >= chunk_size:
+                chunk_size = min(chunk_size * 4, MAX_CHUNK_SIZE)
+
+    def _emit(self, data):
+        data = self._pending + data
+        end = data.rfind(b'\n')
+        if end == -1:
+            self._pending = data
             return
+        self._pending = data[end + 1:]
+        lines = data[:end]
+        if lines.endswith(b'\r'):
+            lines = lines[:-1]
+        self.logger_level_func(lines.decode('utf-8', errors='ignore'))
+
+    def flush(self):
+        if self._pending:
+            self.logger_level_func(self._pending.decode('utf-8', errors='ignore'))
+            self._pending = b''
+
+    def tail(self):
+        interval = ACTIVE_POLL_INTERVAL_IN_SEC
+        last_data = time.time()
+        next_done_check = 0
+        done = False
+        while True:
+            self._refresh_properties()
+            if self.position < self.available:
+                self._read_available()
+                interval = ACTIVE_POLL_INTERVAL_IN_SEC
+                last_data = time.time()
+            if done or not _blob_is_not_complete(self.metadata):
+                break
+            now = time.time()
+            if self.is_done and now >= next_done_check:
+                next_done_check = now + DONE_CHECK_INTERVAL_IN_SEC
+                # poll once more, so whatever was written before the end is printed
+                done = self.is_done()
+                if done:
+                    continue
+            if now - last_data > self.timeout_in_seconds:
+                break
+            time.sleep(interval)
+            interval = min(interval * 1.5, IDLE_POLL_INTERVAL_IN_SEC)
+        self.flush()
+        logger.debug('Read %d bytes of logs with %d storage requests', self.position, self.request_count)
+        return self.metadata
+
+
+def _stream_logs(no_format,
+                 byte_size,
+                 timeout_in_seconds,
+                 blob_service,
+                 container_name,
+                 blob_name,
+                 raise_error_on_failure,
+                 logger_level_func,
+                 is_done=None):
 
-        # If no new data available but not complete, sleep before trying to process additional data.
-        if (_blob_is_not_complete(metadata) and start >= available):
-            num_fails += 1
-
-            if num_fails >= num_fails_for_backoff:
-                num_fails = 0
-                sleep_time = min(sleep_time * 2, max_sleep_time)
-
-            rnd = uniform(1, 2)  # 1.0 <= x < 2.0
-            total_sleep_time = sleep_time + rnd
-            consecutive_sleep_in_sec += total_sleep_time
-            time.sleep(total_sleep_time)
-
-    # One final check to see if there's anything in the buffer to flush
-    # E.g., metadata has been set and start == available, but the log file
-    # didn't end in \r\n, so we were unable to flush out the final contents.
-    curr_bytes = stream.getvalue()
+    if not no_format:
+        colorama.init()
 
-    if curr_bytes:
-        logger_level_func(curr_bytes.decode('utf-8', errors='ignore'))
+    tailer = AppendBlobTailer(blob_service, container_name, blob_name, logger_level_func,
+                              min_chunk_size=byte_size, timeout_in_seconds=timeout_in_seconds, is_done=is_done)
+    try:
+        metadata = tailer.tail()
+    except KeyboardInterrupt:
+        tailer.flush()
+        return
+    except CLIError:
+        raise
+    except Exception as err:
+        raise CLIError(err)
 
     build_status = _get_run_status(metadata).lower()
     logger_level_func("Log status was: {}".format(build_status))
@@ -218,6 +218,11 @@ def validate_log_since(namespace):
             raise InvalidArgumentValueError("--since can not be more than 1h")
 
 
+def validate_log_instances(namespace):
+    if namespace.all_instances and namespace.instance:
+        raise ArgumentUsageError("Conflict detected: '--instance' and '--all-instances' can not be set at the same time.")
+
+
 def validate_jvm_options(namespace):
     if namespace.jvm_options is not None:
         namespace.jvm_options = namespace.jvm_options.strip('\'')
@@ -582,6 +587,13 @@ def _validate_route_table(namespace, vnet_obj):
             '--service-runtime-subnet and --app-subnet should both associate with different route tables or neither.')
 
 
+def validate_upload_options(namespace):
+    if namespace.upload_range_size is not None and not 1 <= namespace.upload_range_size <= 4:
+        raise InvalidArgumentValueError('--upload-range-size must be between 1 and 4 (MiB).')
+    if namespace.upload_max_connections is not None and namespace.upload_max_connections < 1:
+        raise InvalidArgumentValueError('--upload-max-connections must be at least 1.')
+
+
 def validate_jar(namespace):
     if namespace.disable_validation:
         telemetry.set_user_fault("jar validation is disabled")
@@ -306,6 +306,8 @@ def app_deploy(cmd, client, resource_group, service, name,
                readiness_probe_config=None,
                startup_probe_config=None,
                termination_grace_period_seconds=None,
+               upload_range_size=None,
+               upload_max_connections=None,
                # general
                no_wait=False):
     '''app_deploy
@@ -356,6 +358,8 @@ def app_deploy(cmd, client, resource_group, service, name,
         'readiness_probe_config_file_path': readiness_probe_config,
         'startup_probe_config_file_path': startup_probe_config,
         'termination_grace_period_seconds': termination_grace_period_seconds,
+        'upload_range_size': upload_range_size,
+        'upload_max_connections': upload_max_connections,
         'no_wait': no_wait
     }
 
@@ -415,6 +419,8 @@ def deployment_create(cmd, client, resource_group, service, app, name,
                       readiness_probe_config=None,
                       startup_probe_config=None,
                       termination_grace_period_seconds=None,
+                      upload_range_size=None,
+                      upload_max_connections=None,
                       # general
                       no_wait=False):
     '''deployment_create
@@ -464,6 +470,8 @@ def deployment_create(cmd, client, resource_group, service, app, name,
         'readiness_probe_config_file_path': readiness_probe_config,
         'startup_probe_config_file_path': startup_probe_config,
         'termination_grace_period_seconds': termination_grace_period_seconds,
+        'upload_range_size': upload_range_size,
+        'upload_max_connections': upload_max_connections,
         'no_wait': no_wait
     }
 
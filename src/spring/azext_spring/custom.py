@@ -6,7 +6,6 @@
 # pylint: disable=unused-argument, logging-format-interpolation, protected-access, wrong-import-order, too-many-lines
 import logging
 import requests
-import re
 import os
 import time
 from azure.cli.core._profile import Profile
@@ -17,7 +16,7 @@ from azure.mgmt.redis import RedisManagementClient
 from requests.auth import HTTPBasicAuth
 import yaml  # pylint: disable=import-error
 from time import sleep
-from ._stream_utils import stream_logs
+from ._stream_utils import stream_logs, deployment_is_done
 from azure.mgmt.core.tools import (parse_resource_id, is_valid_resource_id)
 from ._utils import (get_portal_uri, get_spring_sku)
 from knack.util import CLIError
@@ -44,8 +43,8 @@ from threading import Thread
 import sys
 import json
 import base64
-from collections import defaultdict
 from ._log_stream import LogStream
+from ._app_log_utils import build_log_formatter, fan_in_app_logs, write_app_log
 from ._build_service import _update_default_build_agent_pool
 
 logger = get_logger(__name__)
@@ -395,30 +394,31 @@ def app_scale(cmd, client, resource_group, service, name,
 def app_get_build_log(cmd, client, resource_group, service, name, deployment=None):
     if deployment.properties.source.type != "Source":
         raise CLIError("{} deployment has no build logs.".format(deployment.properties.source.type))
-    return stream_logs(client.deployments, resource_group, service, name, deployment.name)
+    return stream_logs(client.deployments, resource_group, service, name, deployment.name,
+                       is_done=deployment_is_done(client.deployments, resource_group, service, name, deployment.name))
 
 
-def app_tail_log(cmd, client, resource_group, service, name,
-                 deployment=None, instance=None, follow=False, lines=50, since=None, limit=2048, format_json=None):
+def app_tail_log(cmd, client, resource_group, service, name, deployment=None, instance=None, follow=False,
+                 lines=50, since=None, limit=2048, format_json=None, all_instances=False):
     if not instance:
         if not deployment.properties.instances:
             raise CLIError("No instances found for deployment '{0}' in app '{1}'".format(
                 deployment.name, name))
         instances = deployment.properties.instances
-        if len(instances) > 1:
+        if len(instances) > 1 and not all_instances:
             logger.warning("Multiple app instances found:")
             for temp_instance in instances:
                 logger.warning("{}".format(temp_instance.name))
-            logger.warning("Please use '-i/--instance' parameter to specify the instance name")
+            logger.warning("Please use '-i/--instance' parameter to specify the instance name, "
+                           "or '--all-instances' to stream the logs of all of them")
             return None
-        instance = instances[0].name
+        if len(instances) == 1 or not all_instances:
+            instance = instances[0].name
 
     log_stream = LogStream(client, resource_group, service)
     if not log_stream:
         raise CLIError("To use the log streaming feature, please enable the test endpoint by running 'az spring test-endpoint enable -n {0} -g {1}'".format(service, resource_group))
 
-    streaming_url = "https://{0}/api/logstream/apps/{1}/instances/{2}".format(
-        log_stream.base_url, name, instance)
     params = {}
     params["tailLines"] = lines
     params["limitBytes"] = limit
@@ -427,10 +427,19 @@ def app_tail_log(cmd, client, resource_group, service, name,
     if follow:
         params["follow"] = True
 
+    def _streaming_url(instance_name):
+        streaming_url = "https://{0}/api/logstream/apps/{1}/instances/{2}".format(
+            log_stream.base_url, name, instance_name)
+        return streaming_url + ("?{}".format(parse.urlencode(params)) if params else "")
+
     exceptions = []
-    streaming_url += "?{}".format(parse.urlencode(params)) if params else ""
-    t = Thread(target=_get_app_log, args=(
-        streaming_url, "primary", log_stream.primary_key, format_json, exceptions))
+    if not instance:
+        urls = {i.name: _streaming_url(i.name) for i in deployment.properties.instances}
+        t = Thread(target=_get_all_instances_app_log, args=(
+            urls, "primary", log_stream.primary_key, format_json, exceptions))
+    else:
+        t = Thread(target=_get_app_log, args=(
+            _streaming_url(instance), "primary", log_stream.primary_key, format_json, exceptions))
     t.daemon = True
     t.start()
 
@@ -996,126 +1005,32 @@ def _get_redis_primary_key(cli_ctx, resource_id):
     return keys.primary_key
 
 
-# pylint: disable=bare-except, too-many-statements
-def _get_app_log(url, user_name, password, format_json, exceptions):
-    logger_seg_regex = re.compile(r'([^\.])[^\.]+\.')
-
-    def build_log_shortener(length):
-        if length <= 0:
-            raise InvalidArgumentValueError('Logger length in `logger{length}` should be positive')
-
-        def shortener(record):
-            '''
-            Try shorten the logger property to the specified length before feeding it to the formatter.
-            '''
-            logger_name = record.get('logger', None)
-            if logger_name is None:
-                return record
-
-            # first, try to shorten the package name to one letter, e.g.,
-            #     org.springframework.cloud.netflix.eureka.config.DiscoveryClientOptionalArgsConfiguration
-            # to: o.s.c.n.e.c.DiscoveryClientOptionalArgsConfiguration
-            while len(logger_name) > length:
-                logger_name, count = logger_seg_regex.subn(r'\1.', logger_name, 1)
-                if count < 1:
-                    break
-
-            # then, cut off the leading packages if necessary
-            logger_name = logger_name[-length:]
-            record['logger'] = logger_name
-            return record
-
-        return shortener
-
-    def build_formatter():
-        '''
-        Build the log line formatter based on the format_json argument.
-        '''
-        nonlocal format_json
-
-        def identity(o):
-            return o
-
-        if format_json is None or len(format_json) == 0:
-            return identity
-
-        logger_regex = re.compile(r'\blogger\{(\d+)\}')
-        match = logger_regex.search(format_json)
-        pre_processor = identity
-        if match:
-            length = int(match[1])
-            pre_processor = build_log_shortener(length)
-            format_json = logger_regex.sub('logger', format_json, 1)
-
-        first_exception = True
-
-        def format_line(line):
-            nonlocal first_exception
-            try:
-                log_record = json.loads(line)
-                # Add n=\n so that in Windows CMD it's easy to specify customized format with line ending
-                # e.g., "{timestamp} {message}{n}"
-                # (Windows CMD does not escape \n in string literal.)
-                return format_json.format_map(pre_processor(defaultdict(str, n="\n", **log_record)))
-            except:
-                if first_exception:
-                    # enable this format error logging only with --verbose
-                    logger.info("Failed to format log line '{}'".format(line), exc_info=sys.exc_info())
-                    first_exception = False
-                return line
-
-        return format_line
-
-    def iter_lines(response, limit=2 ** 20):
-        '''
-        Returns a line iterator from the response content. If no line ending was found and the buffered content size is
-        larger than the limit, the buffer will be yielded directly.
-        '''
-        buffer = []
-        total = 0
-        for content in response.iter_content(chunk_size=None):
-            if not content:
-                if len(buffer) > 0:
-                    yield b''.join(buffer)
-                break
+def _open_app_log(url, user_name, password):
+    def open_stream():
+        response = requests.get(url, stream=True, auth=HTTPBasicAuth(user_name, password))
+        if response.status_code != 200:
+            response.close()
+            raise CLIError("Failed to connect to the server with status code '{}' and reason '{}'".format(
+                response.status_code, response.reason))
+        with response:
+            yield from response.iter_content(chunk_size=None)
 
-            start = 0
-            while start < len(content):
-                line_end = content.find(b'\n', start)
-                should_print = False
-                if line_end < 0:
-                    next = (content if start == 0 else content[start:])
-                    buffer.append(next)
-                    total += len(next)
-                    start = len(content)
-                    should_print = total >= limit
-                else:
-                    buffer.append(content[start:line_end + 1])
-                    start = line_end + 1
-                    should_print = True
-
-                if should_print:
-                    yield b''.join(buffer)
-                    buffer.clear()
-                    total = 0
-
-    with requests.get(url, stream=True, auth=HTTPBasicAuth(user_name, password)) as response:
-        try:
-            if response.status_code != 200:
-                raise CLIError("Failed to connect to the server with status code '{}' and reason '{}'".format(
-                    response.status_code, response.reason))
-            std_encoding = sys.stdout.encoding
+    return open_stream
 
-            formatter = build_formatter()
 
-            for line in iter_lines(response):
-                decoded = (line.decode(encoding='utf-8', errors='replace')
-                           .encode(std_encoding, errors='replace')
-                           .decode(std_encoding, errors='replace'))
-                print(formatter(decoded), end='')
+def _get_app_log(url, user_name, password, format_json, exceptions):
+    try:
+        write_app_log(_open_app_log(url, user_name, password)(), build_log_formatter(format_json))
+    except CLIError as e:
+        exceptions.append(e)
+
 
-        except CLIError as e:
-            exceptions.append(e)
+def _get_all_instances_app_log(urls, user_name, password, format_json, exceptions):
+    sources = {instance: _open_app_log(url, user_name, password) for instance, url in urls.items()}
+    try:
+        fan_in_app_logs(sources, build_log_formatter(format_json))
+    except CLIError as e:
+        exceptions.append(e)
 
 
 def storage_callback(pipeline_response, deserialized, headers):
@@ -0,0 +1,67 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import io
+import json
+import unittest
+
+from ..._app_log_utils import build_log_formatter, fan_in_app_logs, iter_log_batches
+
+DEFAULT_FORMAT = '{timestamp} {level:>5} [{thread:>15.15}] {logger{39}:<40.40}: {message}\n{stackTrace}'
+
+# Shape of the lines returned by the logstream API when structured logging is enabled
+RECORDED_LINE = json.dumps({
+    'timestamp': '2022-10-05T20:54:01.642Z',
+    'level': 'INFO',
+    'thread': 'main',
+    'logger': 'org.springframework.cloud.netflix.eureka.config.DiscoveryClientOptionalArgsConfiguration',
+    'message': 'Eureka HTTP Client uses RestTemplate.',
+    'stackTrace': ''
+}).encode('utf-8')
+
+
+class TestAppLogs(unittest.TestCase):
+    def test_batches_reassemble_lines_split_across_chunks(self):
+        batches = list(iter_log_batches([b'first li', b'ne\nsecond\r\n', b'third'], limit=1024))
+        self.assertEqual([line for batch in batches for line in batch], [b'first line\n', b'second\r\n', b'third'])
+
+        batches = list(iter_log_batches([b'abc', b'def', b'g\n'], limit=4))
+        self.assertEqual(batches, [[b'abcdef'], [b'g\n']])
+
+    def test_formatter(self):
+        format_batch = build_log_formatter(DEFAULT_FORMAT)
+        formatted = format_batch([RECORDED_LINE.decode('utf-8') + '\n', 'not json\n', '{"message": "m"}\n'])
+        self.assertEqual(formatted, [
+            '2022-10-05T20:54:01.642Z  INFO [           main] iscoveryClientOptionalArgsConfiguration : '
+            'Eureka HTTP Client uses RestTemplate.\n',
+            'not json\n',
+            '       [               ]                                         : m\n'])
+
+        self.assertEqual(build_log_formatter(None)(['a\n', 'b\n']), ['a\n', 'b\n'])
+        self.assertEqual(build_log_formatter('{message}{n}')(['{"message": "m", "n": "!"}']), ['m!'])
+
+    def test_fan_in_prefixes_instances(self):
+        def failing_stream():
+            raise ValueError('connection reset')
+
+        out = io.StringIO()
+        # the other instances are still streamed to the end before the error is raised
+        with self.assertRaisesRegex(ValueError, 'connection reset'):
+            fan_in_app_logs({'app-1': lambda: [b'{"message": "one"}\n{"message": "two"}\n'],
+                             'app-2': lambda: [b'{"message": "three"}\n'],
+                             'app-3': failing_stream},
+                            build_log_formatter('{message}'), out=out, window=0.01)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line for line in lines if line.startswith('[app-1]')], ['[app-1] one', '[app-1] two'])
+        self.assertEqual([line for line in lines if line.startswith('[app-2]')], ['[app-2] three'])
+
+    def test_fan_in_bounded_buffer_does_not_drop_lines(self):
+        out = io.StringIO()
+        written = fan_in_app_logs({'noisy': lambda: [b'noisy\n'] * 500, 'quiet': lambda: [b'quiet\n']},
+                                  build_log_formatter(None), out=out, buffer_batches=8, window=0.001)
+
+        self.assertEqual(written, 501)
+        self.assertEqual(out.getvalue().count('[noisy] noisy\n'), 500)
+        self.assertIn('[quiet] quiet', out.getvalue().splitlines())
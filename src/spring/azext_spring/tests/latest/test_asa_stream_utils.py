@@ -0,0 +1,66 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import unittest
+from types import SimpleNamespace
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+from ..._stream_utils import AppendBlobTailer
+
+
+class FakeAppendBlob:
+    '''An append blob that grows by one write every time its properties are read.'''
+    def __init__(self, writes, complete=True):
+        self.writes = list(writes)
+        self.content = b''
+        self.complete = complete
+        self.ranges = []
+
+    def exists(self, **_):
+        return True
+
+    def get_blob_properties(self, **_):
+        if self.writes:
+            self.content += self.writes.pop(0)
+        metadata = {'__complete_status': 'succeeded'} if self.complete and not self.writes else {}
+        return SimpleNamespace(metadata=metadata, properties=SimpleNamespace(content_length=len(self.content)))
+
+    def get_blob_to_bytes(self, start_range, end_range, **_):
+        self.ranges.append((start_range, end_range))
+        return SimpleNamespace(content=self.content[start_range:end_range + 1])
+
+
+@mock.patch('azext_spring._stream_utils.time.sleep')
+class TestAppendBlobTailer(unittest.TestCase):
+    def test_prints_complete_lines_until_blob_is_complete(self, sleep):
+        blob = FakeAppendBlob([b'Step 1/3\r\nStep 2', b'/3\nStep 3/3', b''])
+        lines = []
+        metadata = AppendBlobTailer(blob, 'logs', 'build.log', lines.append).tail()
+
+        self.assertEqual('\n'.join(lines).splitlines(), ['Step 1/3', 'Step 2/3', 'Step 3/3'])
+        self.assertEqual(metadata, {'__complete_status': 'succeeded'})
+        # a growing blob is polled without backing off
+        self.assertTrue(all(call[0][0] < 1 for call in sleep.call_args_list))
+
+    def test_large_backlog_grows_the_chunk_size(self, _):
+        blob = FakeAppendBlob([b'x' * 1023 + b'\n'] * 1024)
+        blob.content = b''.join(blob.writes)
+        blob.writes = []
+        lines = []
+        AppendBlobTailer(blob, 'logs', 'build.log', lines.append).tail()
+
+        self.assertEqual(sum(len(line) + 1 for line in lines), len(blob.content))
+        self.assertLess(len(blob.ranges), 10)
+
+    @mock.patch('azext_spring._stream_utils.DONE_CHECK_INTERVAL_IN_SEC', 0)
+    def test_stops_when_deployment_is_done(self, _):
+        blob = FakeAppendBlob([b'building\n', b'done\n'], complete=False)
+        is_done = mock.MagicMock(side_effect=[False, True])
+        lines = []
+        AppendBlobTailer(blob, 'logs', 'build.log', lines.append, is_done=is_done).tail()
+
+        self.assertEqual(lines, ['building', 'done'])
@@ -0,0 +1,107 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+from ..._deployment_uploadable_factory import FileUpload, UploadCheckpoint
+
+UPLOAD_URL = 'https://mystorage.file.core.windows.net/root/my-relative-path?sv=2018-03-28&sr=f&sig=my-fake-pass&se={}&sp=w'
+MB = 1024 * 1024
+
+
+class FakeFileService:
+    def __init__(self, fail_at=None):
+        self.content = None
+        self.fail_at = fail_at
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *_, **__):
+        return self
+
+    def create_file(self, share_name, directory_name, file_name, content_length):
+        self.created += 1
+        self.content = bytearray(content_length)
+
+    def get_file_properties(self, share_name, directory_name, file_name):
+        return SimpleNamespace(properties=SimpleNamespace(content_length=len(self.content)))
+
+    def update_range(self, share_name, directory_name, file_name, data, start_range, end_range):
+        if start_range == self.fail_at:
+            raise ConnectionResetError('connection reset')
+        with self.lock:
+            self.content[start_range:end_range + 1] = data
+
+
+class TestRangedUpload(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.artifact = os.path.join(self.directory, 'app.jar')
+        with open(self.artifact, 'wb') as f:
+            f.write(os.urandom(9 * MB + 123))
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.directory
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _upload(self, service, checkpoint):
+        with mock.patch('azext_spring._deployment_uploadable_factory.get_sdk', return_value=service), \
+                mock.patch('azext_spring._deployment_uploadable_factory.time.sleep'):
+            FileUpload(checkpoint.upload_url, self.cli_ctx, checkpoint=checkpoint).upload_and_build(
+                self.artifact, upload_range_size=1, upload_max_connections=4)
+
+    def _checkpoint(self):
+        return UploadCheckpoint.for_artifact(self.cli_ctx, self.artifact, 'rg', 'asc', 'app')
+
+    def test_interrupted_upload_resumes(self):
+        checkpoint = self._checkpoint()
+        checkpoint.reset(UPLOAD_URL.format('2999-01-01T00:00:00Z'), 'my-relative-path')
+        service = FakeFileService(fail_at=5 * MB)
+        with self.assertRaises(ConnectionResetError):
+            self._upload(service, checkpoint)
+
+        checkpoint = self._checkpoint()
+        self.assertTrue(checkpoint.is_resumable())
+        self.assertNotIn(5 * MB, checkpoint.completed)
+        done_before = set(checkpoint.completed)
+
+        uploaded = []
+        service.fail_at = None
+        original = service.update_range
+
+        def record(share_name, directory_name, file_name, data, start_range, end_range):
+            uploaded.append(start_range)
+            original(share_name, directory_name, file_name, data, start_range, end_range)
+        service.update_range = record
+        self._upload(service, checkpoint)
+
+        self.assertEqual(service.created, 1)
+        self.assertFalse(set(uploaded) & done_before)
+        with open(self.artifact, 'rb') as f:
+            self.assertEqual(bytes(service.content), f.read())
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_expired_upload_url_is_not_resumed(self):
+        checkpoint = self._checkpoint()
+        checkpoint.reset(UPLOAD_URL.format('2021-12-28T06%3A43%3A17Z'), 'my-relative-path')
+        checkpoint.created = True
+        self.assertFalse(checkpoint.is_resumable())
+
+    def test_changed_artifact_gets_new_checkpoint(self):
+        checkpoint = self._checkpoint()
+        checkpoint.reset(UPLOAD_URL.format('2999-01-01T00:00:00Z'), 'my-relative-path')
+        checkpoint.save()
+        with open(self.artifact, 'ab') as f:
+            f.write(b'changed')
+        self.assertNotEqual(self._checkpoint().path, checkpoint.path)
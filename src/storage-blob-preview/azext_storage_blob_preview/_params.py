@@ -48,6 +48,10 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
                                       completer=get_storage_name_completion_list(t_table_service, 'list_tables'))
     progress_type = CLIArgumentType(help='Include this flag to disable progress reporting for the command.',
                                     action='store_true')
+    max_workers_type = CLIArgumentType(
+        type=int, help='Maximum number of blobs transferred at the same time. Large blobs are transferred in parallel '
+        'chunks. With 1 the progress of each blob is reported, otherwise the number of blobs transferred. '
+        'Default to 8.')
     sas_help = 'The permissions the SAS grants. Allowed values: {}. Do not use if a stored access policy is ' \
                'referenced with --policy-name that specifies this value. Can be combined.'
 
@@ -190,6 +194,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_container')
         c.argument('source_share')
 
+    with self.argument_context('storage blob copy start-batch') as c:
+        c.argument('max_workers', max_workers_type)
+
     with self.argument_context('storage blob delete') as c:
         c.register_blob_arguments()
         c.register_precondition_options()
@@ -241,8 +248,10 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.ignore('container_name')
         c.argument('destination', options_list=('--destination', '-d'))
         c.argument('source', options_list=('--source', '-s'))
-        c.extra('max_concurrency', options_list='--max-connections', type=int, default=2,
-                help='The number of parallel connections with which to download.')
+        c.extra('max_concurrency', options_list='--max-connections', type=int,
+                help='The number of parallel connections with which to download each blob larger than 64MB. '
+                'Default to 4.')
+        c.argument('max_workers', max_workers_type)
         c.extra('no_progress', progress_type)
 
     with self.argument_context('storage blob exists') as c:
@@ -460,7 +469,8 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source', options_list=('--source', '-s'))
         c.argument('destination', options_list=('--destination', '-d'))
         c.argument('max_connections', type=int,
-                   help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+                   help='Maximum number of parallel connections to use for each blob larger than 64MB. Default to 4.')
+        c.argument('max_workers', max_workers_type)
         c.argument('maxsize_condition', arg_group='Content Control')
         c.argument('validate_content', action='store_true', min_api='2016-05-31', arg_group='Content Control')
         c.argument('blob_type', options_list=('--type', '-t'), arg_type=get_enum_type(get_blob_types()))
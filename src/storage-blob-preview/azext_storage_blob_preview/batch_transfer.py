@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from knack.log import get_logger
+from knack.util import CLIError
+
+logger = get_logger(__name__)
+
+# number of blobs transferred at the same time
+DEFAULT_BATCH_WORKERS = 8
+# blobs at or above this size are transferred alone, in chunks over several connections; the sdk uploads smaller
+# blobs with a single put (max_single_put_size)
+LARGE_BLOB_SIZE = 64 * 1024 * 1024
+LARGE_BLOB_CONNECTIONS = 4
+# failures listed in the error raised at the end of a batch
+MAX_REPORTED_FAILURES = 10
+
+
+class BatchTransferSummary:  # pylint: disable=too-few-public-methods
+    def __init__(self, operation):
+        self.operation = operation
+        self.total = 0
+        self.transferred = 0
+        self.skipped = 0
+        self.transferred_bytes = 0
+        self.failures = []
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def completed(self):
+        return self.transferred + self.skipped + len(self.failures)
+
+    @property
+    def elapsed(self):
+        return (self.end or time.time()) - self.start
+
+    def log(self):
+        elapsed = self.elapsed
+        logger.warning('%s %d of %d blobs (%s) in %.1fs, %s/s, %d skipped due to "Failed Precondition", %d failed',
+                       self.operation, self.transferred, self.total, _format_size(self.transferred_bytes), elapsed,
+                       _format_size(self.transferred_bytes / elapsed if elapsed else 0), self.skipped,
+                       len(self.failures))
+
+    def raise_for_failures(self):
+        if not self.failures:
+            return
+        details = '\n'.join('  {}: {}'.format(name, error) for name, error in self.failures[:MAX_REPORTED_FAILURES])
+        if len(self.failures) > MAX_REPORTED_FAILURES:
+            details += '\n  ... and {} more'.format(len(self.failures) - MAX_REPORTED_FAILURES)
+        raise CLIError('{} of {} blobs failed:\n{}'.format(len(self.failures), self.total, details))
+
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024
+    return '{:.1f} TiB'.format(size)
+
+
+def run_batch_transfer(items, transfer, operation, size_of=None, name_of=str, max_workers=None,
+                       on_completed=None):
+    """
+    Transfer the items with a bounded pool of workers while they are still being listed.
+
+    items can be a lazy iterable, e.g. a container listing; at most twice max_workers tasks are queued ahead of
+    the workers, so listing and transfers overlap without the listing being buffered. transfer(item, large)
+    returns (include, result) like check_precondition_success; large tells whether the item is at least
+    LARGE_BLOB_SIZE and should be transferred in parallel chunks. A failing item does not stop the others.
+    on_completed(item, summary) is called after each item, one call at a time, e.g. to report progress.
+
+    Returns the results of the included transfers in item order and the BatchTransferSummary.
+    """
+    max_workers = max_workers or DEFAULT_BATCH_WORKERS
+    summary = BatchTransferSummary(operation)
+    results = {}
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max_workers * 2)
+
+    def _run(index, item, size):
+        try:
+            try:
+                include, result = transfer(item, size >= LARGE_BLOB_SIZE)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.info('Failed to transfer %s: %s', name_of(item), ex)
+                with lock:
+                    summary.failures.append((name_of(item), ex))
+                    if on_completed:
+                        on_completed(item, summary)
+                return
+            with lock:
+                if include:
+                    results[index] = result
+                    summary.transferred += 1
+                    summary.transferred_bytes += size
+                else:
+                    summary.skipped += 1
+                if on_completed:
+                    on_completed(item, summary)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, item in enumerate(items):
+            with lock:
+                summary.total += 1
+            size = size_of(item) if size_of else 0
+            slots.acquire()  # pylint: disable=consider-using-with
+            executor.submit(_run, index, item, size)
+
+    summary.end = time.time()
+    return [results[index] for index in sorted(results)], summary
@@ -13,6 +13,7 @@ from azure.cli.command_modules.storage.url_quote_util import make_encoded_file_u
 from knack.log import get_logger
 from knack.util import CLIError
 
+from ..batch_transfer import LARGE_BLOB_CONNECTIONS, run_batch_transfer
 from ..util import (create_file_share_from_storage_client,
                     create_short_lived_share_sas,
                     filter_none, collect_blobs, collect_blob_objects, collect_files,
@@ -108,7 +109,7 @@ def set_blob_immutability_policy(cmd, client, expiry_time=None, policy_mode=None
 def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                             destination_path=None, source_container=None, source_share=None,
                             source_sas=None, pattern=None, dryrun=False, source_account_name=None,
-                            source_account_key=None):
+                            source_account_key=None, max_workers=None):
     """Copy a group of blob or files to a blob container."""
     if dryrun:
         logger.warning('copy files or blobs to blob container')
@@ -142,9 +143,17 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                                                     source_blob_name=blob_name,
                                                     source_sas=source_sas)
 
-        return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
-                                                                                 source_container,
-                                                                                 pattern)))
+        if dryrun:
+            return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
+                                                                                     source_container,
+                                                                                     pattern)))
+        # copies run on the service, so every blob is a small request regardless of its size
+        blobs = (blob for blob, _ in collect_blob_objects(source_client, source_container, pattern))
+        results, summary = run_batch_transfer(blobs, lambda blob, _: (True, action_blob_copy(blob)), 'Started copy of',
+                                              max_workers=max_workers)
+        summary.log()
+        summary.raise_for_failures()
+        return results
 
     if source_share:
         # copy blob from file share
@@ -167,29 +176,25 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                 return _copy_file_to_blob_container(client, source_client, container_name, destination_path,
                                                     source_share, source_sas, dir_name, file_name)
 
-        return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
-                                                                                 source_client,
-                                                                                 source_share,
-                                                                                 pattern)))
+        if dryrun:
+            return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
+                                                                                     source_client,
+                                                                                     source_share,
+                                                                                     pattern)))
+        results, summary = run_batch_transfer(collect_files(cmd, source_client, source_share, pattern),
+                                              lambda file_info, _: (True, action_file_copy(file_info)),
+                                              'Started copy of', max_workers=max_workers)
+        summary.log()
+        summary.raise_for_failures()
+        return results
     raise ValueError('Fail to find source. Neither blob container or file share is specified')
 
 
 # pylint: disable=unused-argument, too-many-locals
 def storage_blob_download_batch(client, source, destination, container_name, pattern=None, dryrun=False,
-                                progress_callback=None, socket_timeout=None, **kwargs):
-    source_blobs = collect_blobs(client, container_name, pattern)
-    blobs_to_download = {}
-    for blob_name in source_blobs:
-        # remove starting path seperator and normalize
-        normalized_blob_name = normalize_blob_file_path(None, blob_name)
-        if normalized_blob_name in blobs_to_download:
-            raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` parameter '
-                           'to select for a subset of blobs to download OR utilize the `storage blob download` '
-                           'command instead to download individual blobs.'.format(normalized_blob_name))
-        blobs_to_download[normalized_blob_name] = blob_name
-
-    results = []
+                                progress_callback=None, socket_timeout=None, max_workers=None, **kwargs):
     if dryrun:
+        source_blobs = collect_blobs(client, container_name, pattern)
         # download_blobs = _blob_precondition_check(source_blobs, if_modified_since=if_modified_since,
         #                                           if_unmodified_since=if_unmodified_since)
         logger.warning('download action: from %s to %s', source, destination)
@@ -199,45 +204,68 @@ def storage_blob_download_batch(client, source, destination, container_name, pat
         logger.warning(' operations')
         for b in source_blobs:
             logger.warning('  - %s', b)
+        return []
 
-    else:
-        @check_precondition_success
-        def _download_blob(*args, **kwargs):
-            blob = download_blob(*args, **kwargs)
-            return blob.name
-
-        # Tell progress reporter to reuse the same hook
-        if progress_callback:
-            progress_callback.reuse = True
-
-        for index, blob_normed in enumerate(blobs_to_download):
-            from azure.cli.core.azclierror import FileOperationError
-            # add blob name and number to progress message
-            if progress_callback:
-                progress_callback.message = '{}/{}: "{}"'.format(
-                    index + 1, len(blobs_to_download), blobs_to_download[blob_normed])
-            blob_client = client.get_blob_client(container=container_name,
-                                                 blob=blobs_to_download[blob_normed])
-            destination_path = os.path.join(destination, os.path.normpath(blob_normed))
-            destination_folder = os.path.dirname(destination_path)
-            # Failed when there is same name for file and folder
-            if os.path.isfile(destination_path) and os.path.exists(destination_folder):
-                raise FileOperationError("%s already exists in %s. Please rename existing file or choose another "
-                                         "destination folder. ")
-            if not os.path.exists(destination_folder):
-                mkdir_p(destination_folder)
-            include, result = _download_blob(client=blob_client, file_path=destination_path,
-                                             progress_callback=progress_callback, **kwargs)
-            if include:
-                results.append(result)
-
-        # end progress hook
-        if progress_callback:
-            progress_callback.hook.end()
-        num_failures = len(blobs_to_download) - len(results)
-        if num_failures:
-            logger.warning('%s of %s files not downloaded due to "Failed Precondition"',
-                           num_failures, len(blobs_to_download))
+    @check_precondition_success
+    def _download_blob(*args, **kwargs):
+        blob = download_blob(*args, **kwargs)
+        return blob.name
+
+    # Per blob progress is only meaningful when the blobs are downloaded one at a time, otherwise the number of
+    # blobs downloaded is reported
+    sequential = max_workers == 1
+    if progress_callback and sequential:
+        progress_callback.reuse = True
+    max_concurrency = kwargs.pop('max_concurrency', None)
+
+    def _blobs_to_download():
+        # the blobs are downloaded while the container is still being listed
+        download_paths = set()
+        for blob_name, blob in collect_blob_objects(client, container_name, pattern):
+            # remove starting path seperator and normalize
+            normalized_blob_name = normalize_blob_file_path(None, blob_name)
+            if normalized_blob_name in download_paths:
+                raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` '
+                               'parameter to select for a subset of blobs to download OR utilize the '
+                               '`storage blob download` command instead to download individual blobs.'
+                               .format(normalized_blob_name))
+            download_paths.add(normalized_blob_name)
+            yield blob_name, normalized_blob_name, blob
+
+    def _download_source_blob(source_blob, large):
+        from azure.cli.core.azclierror import FileOperationError
+        blob_name, blob_normed, _ = source_blob
+        # add blob name to progress message
+        if progress_callback and sequential:
+            progress_callback.message = '"{}"'.format(blob_name)
+        blob_client = client.get_blob_client(container=container_name, blob=blob_name)
+        destination_path = os.path.join(destination, os.path.normpath(blob_normed))
+        destination_folder = os.path.dirname(destination_path)
+        # Failed when there is same name for file and folder
+        if os.path.isfile(destination_path) and os.path.exists(destination_folder):
+            raise FileOperationError("%s already exists in %s. Please rename existing file or choose another "
+                                     "destination folder. ")
+        if not os.path.exists(destination_folder):
+            mkdir_p(destination_folder)
+        return _download_blob(client=blob_client, file_path=destination_path,
+                              progress_callback=progress_callback if sequential else None,
+                              max_concurrency=(max_concurrency or LARGE_BLOB_CONNECTIONS) if large else 1, **kwargs)
+
+    def _report_downloaded(source_blob, summary):
+        progress_callback.hook.add(message='"{}"'.format(source_blob[0]), value=summary.completed,
+                                   total_val=summary.total)
+
+    results, summary = run_batch_transfer(_blobs_to_download(), _download_source_blob, 'Downloaded',
+                                          size_of=lambda source_blob: getattr(source_blob[2], 'size', None) or 0,
+                                          name_of=lambda source_blob: source_blob[0], max_workers=max_workers,
+                                          on_completed=_report_downloaded if progress_callback and not sequential
+                                          else None)
+
+    # end progress hook
+    if progress_callback:
+        progress_callback.hook.end()
+    summary.log()
+    summary.raise_for_failures()
     return results
 
 
@@ -245,9 +273,10 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
                               source_files=None, destination_path=None,
                               container_name=None, blob_type=None,
                               content_settings=None, metadata=None, validate_content=False,
-                              maxsize_condition=None, max_connections=2, lease_id=None, progress_callback=None,
+                              maxsize_condition=None, max_connections=None, lease_id=None, progress_callback=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False, socket_timeout=None, **kwargs):
+                              if_none_match=None, timeout=None, dryrun=False, socket_timeout=None, max_workers=None,
+                              **kwargs):
     def _create_return_result(blob_content_settings, upload_result=None):
         return {
             'Blob': client.url,
@@ -274,38 +303,49 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
         def _upload_blob(*args, **kwargs):
             return upload_blob(*args, **kwargs)
 
-        # Tell progress reporter to reuse the same hook
-        if progress_callback:
+        # Per blob progress is only meaningful when the blobs are uploaded one at a time, otherwise the number of
+        # blobs uploaded is reported
+        sequential = max_workers == 1
+        if progress_callback and sequential:
             progress_callback.reuse = True
 
-        for index, source_file in enumerate(source_files):
-            src, dst = source_file
-            # logger.warning('uploading %s', src)
+        def _upload_source_file(source_file, large):
+            index, (src, dst) = source_file
             guessed_content_settings = guess_content_type(src, content_settings, t_content_settings)
+            blob_name = normalize_blob_file_path(destination_path, dst)
 
             # add blob name and number to progress message
-            if progress_callback:
-                progress_callback.message = '{}/{}: "{}"'.format(
-                    index + 1, len(source_files), normalize_blob_file_path(destination_path, dst))
-            blob_client = client.get_blob_client(container=container_name,
-                                                 blob=normalize_blob_file_path(destination_path, dst))
+            if progress_callback and sequential:
+                progress_callback.message = '{}/{}: "{}"'.format(index + 1, len(source_files), blob_name)
+            blob_client = client.get_blob_client(container=container_name, blob=blob_name)
             include, result = _upload_blob(cmd, blob_client, file_path=src,
                                            blob_type=blob_type, content_settings=guessed_content_settings,
                                            metadata=metadata, validate_content=validate_content,
-                                           maxsize_condition=maxsize_condition, max_connections=max_connections,
-                                           lease_id=lease_id, progress_callback=progress_callback,
+                                           maxsize_condition=maxsize_condition,
+                                           max_connections=(max_connections or LARGE_BLOB_CONNECTIONS) if large else 1,
+                                           lease_id=lease_id,
+                                           progress_callback=progress_callback if sequential else None,
                                            if_modified_since=if_modified_since,
                                            if_unmodified_since=if_unmodified_since, if_match=if_match,
                                            if_none_match=if_none_match, timeout=timeout, **kwargs)
-            if include:
-                results.append(_create_return_result(blob_content_settings=guessed_content_settings,
-                                                     upload_result=result))
+            if not include:
+                return False, None
+            return True, _create_return_result(blob_content_settings=guessed_content_settings, upload_result=result)
+
+        def _report_uploaded(source_file, summary):
+            progress_callback.hook.add(message='"{}"'.format(source_file[1][0]), value=summary.completed,
+                                       total_val=len(source_files))
+
+        results, summary = run_batch_transfer(enumerate(source_files), _upload_source_file, 'Uploaded',
+                                              size_of=lambda source_file: os.path.getsize(source_file[1][0]),
+                                              name_of=lambda source_file: source_file[1][0], max_workers=max_workers,
+                                              on_completed=_report_uploaded if progress_callback and not sequential
+                                              else None)
         # end progress hook
         if progress_callback:
             progress_callback.hook.end()
-        num_failures = len(source_files) - len(results)
-        if num_failures:
-            logger.warning('%s of %s files not uploaded due to "Failed Precondition"', num_failures, len(source_files))
+        summary.log()
+        summary.raise_for_failures()
     return results
 
 
@@ -0,0 +1,98 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+from knack.util import CLIError
+
+from ...batch_transfer import LARGE_BLOB_SIZE, run_batch_transfer
+
+
+class StorageBatchTransferTest(unittest.TestCase):
+    def test_transfers_small_blobs_concurrently_and_large_ones_in_chunks(self):
+        sizes = {'big': LARGE_BLOB_SIZE}
+        sizes.update({'small{}'.format(i): 1024 for i in range(8)})
+        calls = []
+        lock = threading.Lock()
+        all_started = threading.Barrier(4, timeout=5)
+
+        def transfer(name, large):
+            with lock:
+                calls.append((name, large))
+            if name in ('small0', 'small1', 'small2', 'small3'):
+                # the first small blobs only finish once all of them are in flight at the same time
+                all_started.wait()
+            return True, name
+
+        results, summary = run_batch_transfer(list(sizes), transfer, 'Uploaded', size_of=sizes.get, max_workers=4)
+
+        # results keep the listing order no matter in which order the workers finished
+        self.assertEqual(results, list(sizes))
+        self.assertEqual([name for name, large in calls if large], ['big'])
+        self.assertEqual((summary.total, summary.transferred, summary.failures),
+                         (len(sizes), len(sizes), []))
+        self.assertEqual(summary.transferred_bytes, sum(sizes.values()))
+
+    def test_listing_overlaps_transfers_with_bounded_queue(self):
+        listed = []
+        transferred = threading.Event()
+
+        def listing():
+            for i in range(200):
+                listed.append(i)
+                yield i
+
+        def transfer(item, _):
+            transferred.set()
+            time.sleep(0.001)
+            return True, item
+
+        max_listed_before_first_transfer = []
+
+        def size_of(_):
+            if not transferred.is_set():
+                max_listed_before_first_transfer.append(len(listed))
+            return 0
+
+        results, _ = run_batch_transfer(listing(), transfer, 'Copied', size_of=size_of, max_workers=2)
+
+        self.assertEqual(len(results), 200)
+        # no more than the blobs allowed in flight are listed ahead of the workers
+        self.assertLessEqual(max(max_listed_before_first_transfer), 2 * 2 + 1)
+
+    def test_reports_each_completed_blob(self):
+        progress = []
+
+        def transfer(name, _):
+            if name == 'missing':
+                raise ValueError('blob not found')
+            return True, name
+
+        run_batch_transfer(['a', 'missing', 'b'], transfer, 'Downloaded', max_workers=2,
+                           on_completed=lambda name, summary: progress.append((name, summary.completed)))
+
+        # failed blobs count as completed too
+        self.assertEqual(sorted(name for name, _ in progress), ['a', 'b', 'missing'])
+        self.assertEqual(sorted(completed for _, completed in progress), [1, 2, 3])
+
+    def test_failures_and_skips_are_summarized(self):
+        def transfer(name, _):
+            if name == 'missing':
+                raise ValueError('blob not found')
+            return name != 'unmodified', name
+
+        results, summary = run_batch_transfer(['a', 'missing', 'unmodified', 'b'], transfer, 'Downloaded')
+
+        self.assertEqual(results, ['a', 'b'])
+        self.assertEqual((summary.transferred, summary.skipped), (2, 1))
+        self.assertEqual([name for name, _ in summary.failures], ['missing'])
+        with self.assertRaisesRegex(CLIError, 'missing: blob not found'):
+            summary.raise_for_failures()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -667,7 +667,11 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         from ._validators import process_file_upload_batch_parameters
         c.argument('source', options_list=('--source', '-s'), validator=process_file_upload_batch_parameters)
         c.argument('destination', options_list=('--destination', '-d'))
-        c.argument('max_connections', arg_group='Upload Control', type=int)
+        c.argument('max_connections', arg_group='Upload Control', type=int,
+                   help='Maximum number of parallel connections used to upload the ranges of each file.')
+        c.argument('max_workers', arg_group='Upload Control', type=int,
+                   help='Maximum number of files uploaded at the same time. Progress of each file is only reported '
+                   'with 1. Default to 8.')
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
         c.register_content_settings_argument(t_file_content_settings, update=False, arg_group='Content Settings',
                                              process_md5=True)
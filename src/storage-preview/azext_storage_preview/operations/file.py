@@ -3,8 +3,13 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from knack.log import get_logger
 
+# number of files uploaded at the same time by storage file upload-batch
+DEFAULT_UPLOAD_WORKERS = 8
+
 
 def storage_file_upload(client, local_file_path, content_settings=None,
                         metadata=None, validate_content=False, progress_callback=None, max_connections=2, timeout=None):
@@ -31,7 +36,7 @@ def storage_file_upload(client, local_file_path, content_settings=None,
 
 def storage_file_upload_batch(cmd, client, destination, source, destination_path=None, pattern=None, dryrun=False,
                               validate_content=False, content_settings=None, max_connections=1, metadata=None,
-                              progress_callback=None):
+                              progress_callback=None, max_workers=None):
     """ Upload local files to Azure Storage File Share in batch """
 
     from ..util import glob_files_locally, normalize_blob_file_path, guess_content_type
@@ -50,23 +55,50 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
                  'Type': guess_content_type(src, content_settings, settings_class).content_type} for src, dst in
                 source_files]
 
-    # TODO: Performance improvement
-    # 1. Upload files in parallel
-    def _upload_action(src, dst):
-        dst = normalize_blob_file_path(destination_path, dst)
-        dir_name = os.path.dirname(dst)
-        file_name = os.path.basename(dst)
+    max_workers = max_workers or DEFAULT_UPLOAD_WORKERS
+    # Per file progress is only meaningful when the files are uploaded one at a time
+    if max_workers > 1:
+        progress_callback = None
+    destinations = [normalize_blob_file_path(destination_path, dst) for _, dst in source_files]
 
-        _make_directory_in_files_share(client, dir_name)
+    # every directory is created once, parents before children, before any file is uploaded
+    _make_directories_in_files_share(client, {os.path.dirname(dst) for dst in destinations}, max_workers)
 
+    def _upload_action(src, dst):
         logger.warning('uploading %s', src)
 
         storage_file_upload(client.get_file_client(dst), src, content_settings, metadata, validate_content,
                             progress_callback, max_connections)
 
-        return make_file_url(client, dir_name, file_name)
+        return make_file_url(client, os.path.dirname(dst), os.path.basename(dst))
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_upload_action, (src for src, _ in source_files), destinations))
+    elapsed = max(time.time() - start, 1e-6)
+    total_bytes = sum(os.path.getsize(src) for src, _ in source_files)
+    logger.warning('uploaded %d files (%d bytes) in %.1fs: %.1f files/sec, %.1f MiB/sec', len(results), total_bytes,
+                   elapsed, len(results) / elapsed, total_bytes / elapsed / 1024 / 1024)
+    return results
+
+
+def _make_directories_in_files_share(share_client, directory_paths, max_workers=1):
+    """
+    Create the given directories and all their parents, each exactly once. The directories are created level by
+    level, breadth-first, so that every parent exists before its children; the directories of one level are
+    created in parallel.
+    """
+    levels = {}
+    for directory_path in directory_paths:
+        while directory_path:
+            levels.setdefault(directory_path.count('/'), set()).add(directory_path)
+            directory_path = os.path.dirname(directory_path)
 
-    return list(_upload_action(src, dst) for src, dst in source_files)
+    existing_dirs = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for depth in sorted(levels):
+            list(executor.map(lambda dir_name: _make_directory_in_files_share(share_client, dir_name, existing_dirs),
+                              sorted(levels[depth])))
 
 
 def _make_directory_in_files_share(share_client, directory_path, existing_dirs=None):
@@ -89,7 +121,7 @@ def _make_directory_in_files_share(share_client, directory_path, existing_dirs=N
         p = os.path.dirname(p)
 
     for dir_name in reversed(parents):
-        if existing_dirs and (dir_name in existing_dirs):
+        if existing_dirs is not None and (dir_name in existing_dirs):
             continue
 
         try:
@@ -100,5 +132,5 @@ def _make_directory_in_files_share(share_client, directory_path, existing_dirs=N
             from knack.util import CLIError
             raise CLIError('Failed to create directory {}'.format(dir_name))
 
-        if existing_dirs:
-            existing_dirs.add(directory_path)
+        if existing_dirs is not None:
+            existing_dirs.add(dir_name)
@@ -0,0 +1,65 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from ...operations.file import storage_file_upload_batch
+
+
+class FakeShareClient(object):
+    primary_endpoint = 'https://account.file.core.windows.net/share'
+
+    def __init__(self):
+        self.created_dirs = []
+        self.uploaded = {}
+        self._lock = threading.Lock()
+
+    def get_directory_client(self, directory_path):
+        client = mock.MagicMock()
+        client.create_directory.side_effect = lambda: self._create(directory_path)
+        return client
+
+    def _create(self, directory_path):
+        parent = os.path.dirname(directory_path)
+        assert not parent or parent in self.created_dirs, 'parent of {} does not exist'.format(directory_path)
+        with self._lock:
+            self.created_dirs.append(directory_path)
+
+    def get_file_client(self, file_path):
+        client = mock.MagicMock()
+        client.upload_file.side_effect = lambda data, length, **_: self.uploaded.update({file_path: data.read()})
+        return client
+
+
+class StorageFileUploadBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        for path in ['a/b/c/1.txt', 'a/b/c/2.txt', 'a/b/3.txt', 'a/d/4.txt', '5.txt']:
+            full_path = os.path.join(self.source, *path.split('/'))
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as f:
+                f.write(path.encode())
+
+    def test_upload_batch_creates_each_directory_once(self):
+        client = FakeShareClient()
+
+        results = storage_file_upload_batch(mock.MagicMock(), client, 'share', self.source, destination_path='root',
+                                            max_workers=4)
+
+        self.assertEqual(sorted(client.created_dirs),
+                         ['root', 'root/a', 'root/a/b', 'root/a/b/c', 'root/a/d'])
+        self.assertEqual(client.uploaded['root/a/b/c/1.txt'], b'a/b/c/1.txt')
+        self.assertEqual(len(client.uploaded), 5)
+        self.assertIn(FakeShareClient.primary_endpoint + '/root/a/d/4.txt', results)
+
+
+if __name__ == '__main__':
+    unittest.main()
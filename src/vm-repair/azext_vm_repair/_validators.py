@@ -56,7 +56,7 @@ def validate_create(cmd, namespace):
     if namespace.repair_group_name:
         if namespace.repair_group_name == namespace.resource_group_name:
             raise CLIError('The repair resource group name cannot be the same as the source VM resource group.')
-        _validate_resource_group_name(namespace.repair_group_name)
+        _validate_resource_group_name(cmd, namespace.repair_group_name)
     else:
         namespace.repair_group_name = 'repair-' + namespace.vm_name + '-' + timestamp
 
@@ -287,7 +287,7 @@ def _validate_disk_name(disk_name):
         raise CLIError('Disk name only allow up to 80 characters.')
 
 
-def _validate_resource_group_name(rg_name):
+def _validate_resource_group_name(cmd, rg_name):
     from knack.prompting import prompt_y_n
     rg_pattern = r'[0-9a-zA-Z._\-()]+$'
     # if match is null or ends in period, then raise error
@@ -296,7 +296,7 @@ def _validate_resource_group_name(rg_name):
 
     if len(rg_name) > 90:
         raise CLIError('Resource group name only allow up to 90 characters.')
-    if _check_existing_rg(rg_name):
+    if _check_existing_rg(cmd, rg_name):
         if not prompt_y_n('Resource Group already exists. Continue to use existing resource group? If operation fails you will prompted to delete resource group'):
             raise CLIError('Resource group with name \'{}\' already exists within subscription.'.format(rg_name))
         logger.warning("Using preexisting resource group")
@@ -14,7 +14,7 @@ from azure.cli.core.commands.client_factory import get_subscription_id
 
 from .telemetry import _track_command_telemetry, _track_run_command_telemetry
 
-from .repair_utils import _get_function_param_dict
+from .repair_utils import _get_function_param_dict, StepTimer
 
 STATUS_SUCCESS = 'SUCCESS'
 STATUS_ERROR = 'ERROR'
@@ -67,6 +67,9 @@ class command_helper:
         # Return dict
         self.return_dict = {}
 
+        # Time spent on each step of the command
+        self.timer = StepTimer()
+
         # Verbose flag for command
         self.is_verbose = any(handler.level == logging.INFO for handler in get_logger().handlers)
 
@@ -7,13 +7,16 @@
 import json
 import timeit
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
 from knack.log import get_logger
 
 from azure.cli.command_modules.vm.custom import get_vm, _is_linux_os
 from azure.cli.command_modules.storage.storage_url_helpers import StorageResourceIdentifier
-from msrestazure.tools import parse_resource_id
+from azure.cli.core.commands.client_factory import get_subscription_id
+from azure.core.exceptions import HttpResponseError
+from msrestazure.tools import parse_resource_id, resource_id
 from .exceptions import SkuDoesNotSupportHyperV
 
 from .command_helper_class import command_helper
@@ -31,7 +34,13 @@ from .repair_utils import (
     _process_bash_parameters,
     _parse_run_script_raw_logs,
     _check_script_succeeded,
-    _fetch_disk_info,
+    _copy_managed_disk,
+    _delete_managed_disk,
+    _attach_managed_data_disk,
+    _detach_managed_data_disk,
+    _swap_managed_os_disk,
+    _create_repair_rg,
+    _compute_client,
     _unlock_singlepass_encrypted_disk,
     _invoke_run_command,
     _get_cloud_init_script,
@@ -67,19 +76,53 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
         resource_tag = _get_repair_resource_tag(resource_group_name, vm_name)
         created_resources = []
 
-        # Fetch OS image urn and set OS type for disk create
-        if is_linux and _uses_managed_disk(source_vm):
-            # os_image_urn = "UbuntuLTS"
+        # Set OS type for disk create
+        hyperV_generation_linux = None
+        if is_linux and is_managed:
             os_type = 'Linux'
-            hyperV_generation_linux = _check_linux_hyperV_gen(source_vm)
-            if hyperV_generation_linux == 'V2':
-                logger.info('Generation 2 VM detected, RHEL/Centos/Oracle 6 distros not available to be used for rescue VM ')
-                os_image_urn = _select_distro_linux_gen2(distro)
-            else:
-                os_image_urn = _select_distro_linux(distro)
+            hyperV_generation_linux = _check_linux_hyperV_gen(cmd, source_vm, source_vm_instance_view)
         else:
-            os_image_urn = _fetch_compatible_windows_os_urn(source_vm)
             os_type = 'Windows'
+        zone = source_vm.zones[0] if source_vm.zones else None
+
+        # The lookups of the repair VM image and size, the repair resource group and the copy of the OS disk
+        # are independent of each other and run concurrently
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            # Fetch OS image urn
+            if os_type == 'Linux' and hyperV_generation_linux == 'V2':
+                logger.info('Generation 2 VM detected, RHEL/Centos/Oracle 6 distros not available to be used for rescue VM ')
+                image_future = executor.submit(command.timer.timed, 'Fetch repair VM image', _select_distro_linux_gen2, cmd, distro, source_vm.location)
+            elif os_type == 'Linux':
+                image_future = executor.submit(command.timer.timed, 'Fetch repair VM image', _select_distro_linux, cmd, distro, source_vm.location)
+            else:
+                image_future = executor.submit(command.timer.timed, 'Fetch repair VM image', _fetch_compatible_windows_os_urn, cmd, source_vm)
+
+            # Fetch VM size of repair VM
+            sku_future = executor.submit(command.timer.timed, 'Fetch repair VM size', _fetch_compatible_sku, cmd, source_vm, enable_nested)
+
+            # Create new resource group
+            rg_future = executor.submit(command.timer.timed, 'Create resource group', _create_repair_rg, cmd, repair_group_name, source_vm.location)
+
+            # Copy OS disk
+            copy_future = None
+            if is_managed:
+                logger.info('Source VM uses managed disks. Creating repair VM with managed disks.\n')
+                copy_future = executor.submit(command.timer.timed, 'Copy OS disk', _copy_managed_disk, cmd, resource_group_name, target_disk_name, copy_disk_name,
+                                              zone, 'V2' if hyperV_generation_linux == 'V2' else None)
+
+        if copy_future:
+            copy_disk_id = copy_future.result()
+        try:
+            os_image_urn = image_future.result()
+            sku = sku_future.result()
+            rg_future.result()
+            if not sku:
+                raise SkuNotAvailableError('Failed to find compatible VM size for source VM\'s OS disk within given region and subscription.')
+        except Exception:
+            # The copied disk is created in the source resource group, which is not cleaned up
+            if copy_disk_id:
+                _delete_managed_disk(cmd, resource_group_name, copy_disk_name)
+            raise
 
         # Set up base create vm command
         if is_linux:
@@ -89,70 +132,43 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
             create_repair_vm_command = 'az vm create -g {g} -n {n} --tag {tag} --image {image} --admin-username {username} --admin-password {password} --public-ip-address {option}' \
                 .format(g=repair_group_name, n=repair_vm_name, tag=resource_tag, image=os_image_urn, username=repair_username, password=repair_password, option=associate_public_ip)
 
-        # Fetch VM size of repair VM
-        sku = _fetch_compatible_sku(source_vm, enable_nested)
-        if not sku:
-            raise SkuNotAvailableError('Failed to find compatible VM size for source VM\'s OS disk within given region and subscription.')
         create_repair_vm_command += ' --size {sku}'.format(sku=sku)
 
         # Set availability zone for vm
-        if source_vm.zones:
-            zone = source_vm.zones[0]
+        if zone:
             create_repair_vm_command += ' --zone {zone}'.format(zone=zone)
 
-        # Create new resource group
-        if not _check_existing_rg(repair_group_name):
-            create_resource_group_command = 'az group create -l {loc} -n {group_name}' \
-                                            .format(loc=source_vm.location, group_name=repair_group_name)
-            logger.info('Creating resource group for repair VM and its resources...')
-            _call_az_command(create_resource_group_command)
-
         # MANAGED DISK
         if is_managed:
-            logger.info('Source VM uses managed disks. Creating repair VM with managed disks.\n')
-
-            # Copy OS disk command
-            disk_sku, location, os_type, hyperV_generation = _fetch_disk_info(resource_group_name, target_disk_name)
-            copy_disk_command = 'az disk create -g {g} -n {n} --source {s} --sku {sku} --location {loc} --os-type {os_type} --query id -o tsv' \
-                                .format(g=resource_group_name, n=copy_disk_name, s=target_disk_name, sku=disk_sku, loc=location, os_type=os_type)
-
-            # Only add hyperV variable when available
-            if hyperV_generation:
-                copy_disk_command += ' --hyper-v-generation {hyperV}'.format(hyperV=hyperV_generation)
-            elif is_linux and hyperV_generation_linux == 'V2':
-                logger.info('The disk did not contain the information of gen2 , but the machine is created from gen2 image')
-                copy_disk_command += ' --hyper-v-generation {hyperV}'.format(hyperV=hyperV_generation_linux)
-            # Set availability zone for vm when available
-            if source_vm.zones:
-                zone = source_vm.zones[0]
-                copy_disk_command += ' --zone {zone}'.format(zone=zone)
-            # Copy OS Disk
-            logger.info('Copying OS disk of source VM...')
-            copy_disk_id = _call_az_command(copy_disk_command).strip('\n')
-
             # Create VM according to the two conditions: is_linux, unlock_encrypted_vm
             # Only in the case of a Linux VM without encryption the data-disk gets attached after VM creation.
             # This is required to prevent an incorrect boot due to an UUID mismatch
             if not is_linux:
                 # windows
-                _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
+                with command.timer.step('Create repair VM'):
+                    _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
 
             if not is_linux and unlock_encrypted_vm:
                 # windows with encryption
-                _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
-                _unlock_encrypted_vm_run(repair_vm_name, repair_group_name, is_linux)
+                with command.timer.step('Create repair VM'):
+                    _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
+                with command.timer.step('Unlock encrypted disk'):
+                    _unlock_encrypted_vm_run(cmd, repair_vm_name, repair_group_name, is_linux)
 
             if is_linux and unlock_encrypted_vm:
                 # linux with encryption
-                _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
-                _unlock_encrypted_vm_run(repair_vm_name, repair_group_name, is_linux)
+                with command.timer.step('Create repair VM'):
+                    _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username)
+                with command.timer.step('Unlock encrypted disk'):
+                    _unlock_encrypted_vm_run(cmd, repair_vm_name, repair_group_name, is_linux)
 
             if is_linux and (not unlock_encrypted_vm):
                 # linux without encryption
-                _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username, fix_uuid=True)
+                with command.timer.step('Create repair VM'):
+                    _create_repair_vm(copy_disk_id, create_repair_vm_command, repair_password, repair_username, fix_uuid=True)
                 logger.info('Attaching copied disk to repair VM as data disk...')
-                attach_disk_command = "az vm disk attach -g {g} --name {disk_id} --vm-name {vm_name} ".format(g=repair_group_name, disk_id=copy_disk_id, vm_name=repair_vm_name)
-                _call_az_command(attach_disk_command)
+                with command.timer.step('Attach copied disk'):
+                    _attach_managed_data_disk(cmd, repair_group_name, repair_vm_name, copy_disk_id)
 
         # UNMANAGED DISK
         else:
@@ -182,14 +198,16 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
             copy_snapshot_command = 'az storage blob copy start -c {c} -b {name} --source-uri {source} --connection-string "{con_string}"' \
                                     .format(c=storage_account.container, name=copy_disk_name, source=snapshot_uri, con_string=connection_string)
             logger.info('Creating a copy disk from the snapshot...')
-            _call_az_command(copy_snapshot_command, secure_params=[connection_string])
+            with command.timer.step('Copy OS disk'):
+                _call_az_command(copy_snapshot_command, secure_params=[connection_string])
             # Generate the copied disk uri
             copy_disk_id = os_disk_uri.rstrip(storage_account.blob) + copy_disk_name
 
             # Create new repair VM with copied ummanaged disk command
             create_repair_vm_command = create_repair_vm_command + ' --use-unmanaged-disk'
             logger.info('Creating repair VM while disk copy is in progress...')
-            _call_az_command(create_repair_vm_command, secure_params=[repair_password, repair_username])
+            with command.timer.step('Create repair VM'):
+                _call_az_command(create_repair_vm_command, secure_params=[repair_password, repair_username])
 
             logger.info('Checking if disk copy is done...')
             copy_check_command = 'az storage blob show -c {c} -n {name} --connection-string "{con_string}" --query properties.copy.status -o tsv' \
@@ -208,27 +226,28 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
         if enable_nested:
             logger.info("Running Script win-enable-nested-hyperv.ps1 to install HyperV")
 
-            run_hyperv_command = "az vm repair run -g {g} -n {name} --run-id win-enable-nested-hyperv --parameters gen={gen}" \
-                .format(g=repair_group_name, name=repair_vm_name, gen=vm_hypervgen)
-            ret_enable_nested = _call_az_command(run_hyperv_command)
+            repair_vm_id = resource_id(subscription=get_subscription_id(cmd.cli_ctx), resource_group=repair_group_name,
+                                       namespace='Microsoft.Compute', type='virtualMachines', name=repair_vm_name)
+            with command.timer.step('Enable nested HyperV'):
+                ret_enable_nested = run(cmd, repair_vm_name, repair_group_name, run_id='win-enable-nested-hyperv', repair_vm_id=repair_vm_id,
+                                        parameters=['gen={gen}'.format(gen=vm_hypervgen)])
 
             logger.debug("az vm repair run hyperv command returned: %s", ret_enable_nested)
 
-            if str.find(ret_enable_nested, "SuccessRestartRequired") > -1:
-                restart_cmd = 'az vm restart -g {rg} -n {vm}'.format(rg=repair_group_name, vm=repair_vm_name)
+            if str.find(ret_enable_nested.get('logs', ''), "SuccessRestartRequired") > -1:
                 logger.info("Restarting Repair VM")
-                restart_ret = _call_az_command(restart_cmd)
-                logger.debug(restart_ret)
+                with command.timer.step('Restart repair VM'):
+                    _compute_client(cmd).virtual_machines.begin_restart(repair_group_name, repair_vm_name).result()
 
                 # invoking hyperv script again
                 logger.info("Running win-enable-nested-hyperv.ps1 again to create nested VM")
-                run_hyperv_command = "az vm repair run -g {g} -n {name} --run-id win-enable-nested-hyperv --parameters gen={gen}" \
-                    .format(g=repair_group_name, name=repair_vm_name, gen=vm_hypervgen)
-                ret_enable_nested_again = _call_az_command(run_hyperv_command)
+                with command.timer.step('Enable nested HyperV'):
+                    ret_enable_nested_again = run(cmd, repair_vm_name, repair_group_name, run_id='win-enable-nested-hyperv', repair_vm_id=repair_vm_id,
+                                                  parameters=['gen={gen}'.format(gen=vm_hypervgen)])
 
                 logger.debug("stderr: %s", ret_enable_nested_again)
 
-        created_resources = _list_resource_ids_in_rg(repair_group_name)
+        created_resources = _list_resource_ids_in_rg(cmd, repair_group_name)
         command.set_status_success()
 
     # Some error happened. Stop command and clean-up resources.
@@ -236,7 +255,7 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
         command.error_stack_trace = traceback.format_exc()
         command.error_message = "Command interrupted by user input."
         command.message = "Command interrupted by user input. Cleaning up resources."
-    except AzCommandError as azCommandError:
+    except (AzCommandError, HttpResponseError) as azCommandError:
         command.error_stack_trace = traceback.format_exc()
         command.error_message = str(azCommandError)
         command.message = "Repair create failed. Cleaning up created resources."
@@ -272,10 +291,10 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
     if not command.is_status_success():
         command.set_status_error()
         return_dict = command.init_return_dict()
-        if _check_existing_rg(repair_group_name):
-            _clean_up_resources(repair_group_name, confirm=True)
+        if _check_existing_rg(cmd, repair_group_name):
+            _clean_up_resources(cmd, repair_group_name, confirm=True)
         else:
-            _clean_up_resources(repair_group_name, confirm=False)
+            _clean_up_resources(cmd, repair_group_name, confirm=False)
     else:
         created_resources.append(copy_disk_id)
         command.message = 'Your repair VM \'{n}\' has been created in the resource group \'{repair_rg}\' with disk \'{d}\' attached as data disk. ' \
@@ -293,6 +312,7 @@ def create(cmd, vm_name, resource_group_name, repair_password=None, repair_usern
         return_dict['created_resources'] = created_resources
 
         logger.info('\n%s\n', command.message)
+    command.timer.report()
     return return_dict
 
 
@@ -313,18 +333,15 @@ def restore(cmd, vm_name, resource_group_name, disk_name=None, repair_vm_id=None
         # MANAGED DISK
         if is_managed:
             source_disk = source_vm.storage_profile.os_disk.name
-            # Detach repaired data disk command
-            detach_disk_command = 'az vm disk detach -g {g} --vm-name {repair} --name {disk}' \
-                                  .format(g=repair_resource_group, repair=repair_vm_name, disk=disk_name)
-            # Update OS disk with repaired data disk
-            attach_fixed_command = 'az vm update -g {g} -n {n} --os-disk {disk}' \
-                                   .format(g=resource_group_name, n=vm_name, disk=disk_name)
 
-            # Maybe run attach and delete concurrently
+            # The repaired disk can only be attached to the source VM once detached from the repair VM
             logger.info('Detaching repaired data disk from repair VM...')
-            _call_az_command(detach_disk_command)
+            with command.timer.step('Detach repaired disk'):
+                _detach_managed_data_disk(cmd, repair_resource_group, repair_vm_name, disk_name)
+            # Update OS disk with repaired data disk
             logger.info('Attaching repaired data disk to source VM as an OS disk...')
-            _call_az_command(attach_fixed_command)
+            with command.timer.step('Swap OS disk'):
+                _swap_managed_os_disk(cmd, resource_group_name, vm_name, disk_name)
         # UNMANAGED DISK
         else:
             source_disk = source_vm.storage_profile.os_disk.vhd.uri
@@ -341,17 +358,19 @@ def restore(cmd, vm_name, resource_group_name, disk_name=None, repair_vm_id=None
             attach_unmanaged_command = 'az vm update -g {g} -n {n} --set storageProfile.osDisk.vhd.uri="{uri}"' \
                                        .format(g=resource_group_name, n=vm_name, uri=disk_uri)
             logger.info('Detaching repaired data disk from repair VM...')
-            _call_az_command(detach_unamanged_command)
+            with command.timer.step('Detach repaired disk'):
+                _call_az_command(detach_unamanged_command)
             logger.info('Attaching repaired data disk to source VM as an OS disk...')
-            _call_az_command(attach_unmanaged_command)
+            with command.timer.step('Swap OS disk'):
+                _call_az_command(attach_unmanaged_command)
         # Clean
-        _clean_up_resources(repair_resource_group, confirm=not yes)
+        _clean_up_resources(cmd, repair_resource_group, confirm=not yes)
         command.set_status_success()
     except KeyboardInterrupt:
         command.error_stack_trace = traceback.format_exc()
         command.error_message = "Command interrupted by user input."
         command.message = "Command interrupted by user input. If the restore command fails at retry, please rerun the repair process from \'az vm repair create\'."
-    except AzCommandError as azCommandError:
+    except (AzCommandError, HttpResponseError) as azCommandError:
         command.error_stack_trace = traceback.format_exc()
         command.error_message = str(azCommandError)
         command.message = "Repair restore failed. If the restore command fails at retry, please rerun the repair process from \'az vm repair create\'."
@@ -374,6 +393,7 @@ def restore(cmd, vm_name, resource_group_name, disk_name=None, repair_vm_id=None
         return_dict = command.init_return_dict()
         logger.info('\n%s\n', return_dict['message'])
 
+    command.timer.report()
     return return_dict
 
 
@@ -407,7 +427,8 @@ def run(cmd, vm_name, resource_group_name, run_id=None, repair_vm_id=None, custo
         # Normal scenario with run id
         if not custom_script_file:
             # Fetch run path from GitHub
-            repair_script_path = _fetch_run_script_path(run_id)
+            with command.timer.step('Fetch run script map'):
+                repair_script_path = _fetch_run_script_path(run_id)
             run_command_params.append('script_path="./{}"'.format(repair_script_path))
 
         # Custom script scenario for script testers
@@ -430,7 +451,8 @@ def run(cmd, vm_name, resource_group_name, run_id=None, repair_vm_id=None, custo
 
         # Run script and measure script run-time
         script_start_time = timeit.default_timer()
-        stdout, stderr = _invoke_run_command(script_name, repair_vm_name, repair_resource_group, is_linux, run_command_params, additional_scripts)
+        with command.timer.step('Run script'):
+            stdout, stderr = _invoke_run_command(cmd, script_name, repair_vm_name, repair_resource_group, is_linux, run_command_params, additional_scripts)
         command.script.run_time = timeit.default_timer() - script_start_time
         logger.debug("stderr: %s", stderr)
 
@@ -469,7 +491,7 @@ def run(cmd, vm_name, resource_group_name, run_id=None, repair_vm_id=None, custo
         command.error_stack_trace = traceback.format_exc()
         command.error_message = "Command interrupted by user input."
         command.message = "Repair run failed. Command interrupted by user input."
-    except AzCommandError as azCommandError:
+    except (AzCommandError, HttpResponseError) as azCommandError:
         command.error_stack_trace = traceback.format_exc()
         command.error_message = str(azCommandError)
         command.message = "Repair run failed."
@@ -503,6 +525,7 @@ def run(cmd, vm_name, resource_group_name, run_id=None, repair_vm_id=None, custo
         return_dict['vm_name'] = repair_vm_name
         return_dict['resource_group'] = repair_resource_group
 
+    command.timer.report()
     return return_dict
 
 
@@ -550,7 +573,7 @@ def reset_nic(cmd, vm_name, resource_group_name, yes=False):
         VM_OFF_MESSAGE = 'VM is not running. The VM must be in running to reset its NIC.\n'
 
         vm_instance_view = get_vm(cmd, resource_group_name, vm_name, 'instanceView')
-        VM_started = _check_n_start_vm(vm_name, resource_group_name, not yes, VM_OFF_MESSAGE, vm_instance_view)
+        VM_started = _check_n_start_vm(cmd, vm_name, resource_group_name, not yes, VM_OFF_MESSAGE, vm_instance_view)
         if not VM_started:
             raise CommandCanceledByUserError("Could not get consent to run VM before resetting the NIC.")
 
@@ -620,7 +643,7 @@ def reset_nic(cmd, vm_name, resource_group_name, yes=False):
         command.error_stack_trace = traceback.format_exc()
         command.error_message = "Command interrupted by user input."
         command.message = "Command interrupted by user input."
-    except AzCommandError as azCommandError:
+    except (AzCommandError, HttpResponseError) as azCommandError:
         command.set_status_error()
         command.error_stack_trace = traceback.format_exc()
         command.error_message = str(azCommandError)
@@ -8,6 +8,11 @@ import subprocess
 import shlex
 import os
 import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from json import loads
 import pkgutil
 import requests
@@ -19,6 +24,9 @@ from .encryption_types import Encryption
 from .exceptions import (AzCommandError, WindowsOsNotAvailableError, RunScriptNotFoundForIdError, SkuDoesNotSupportHyperV, SuseNotAvailableError)
 
 REPAIR_MAP_URL = 'https://raw.githubusercontent.com/Azure/repair-script-library/master/map.json'
+# The run script map is cached on disk, and revalidated with its ETag once the TTL expired
+RUN_SCRIPT_MAP_CACHE_FILE_NAME = 'vm_repair_script_map.json'
+RUN_SCRIPT_MAP_CACHE_TTL = 60 * 60
 
 logger = get_logger(__name__)
 
@@ -58,6 +66,70 @@ def _is_gen2(vm):
     return 1
 
 
+_MGMT_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_mgmt_client(cmd, resource_type):
+    """
+    SDK clients are created once per command and shared by all its steps, including the ones running concurrently.
+    They are stored on the command object, so they are released with it.
+    """
+    from azure.cli.core.commands.client_factory import get_mgmt_service_client
+    with _MGMT_CLIENTS_LOCK:
+        clients = vars(cmd).setdefault('_vm_repair_mgmt_clients', {})
+        if resource_type not in clients:
+            clients[resource_type] = get_mgmt_service_client(cmd.cli_ctx, resource_type)
+        return clients[resource_type]
+
+
+def _compute_client(cmd):
+    from azure.cli.core.profiles import ResourceType
+    return _get_mgmt_client(cmd, ResourceType.MGMT_COMPUTE)
+
+
+def _resource_client(cmd):
+    from azure.cli.core.profiles import ResourceType
+    return _get_mgmt_client(cmd, ResourceType.MGMT_RESOURCE_RESOURCES)
+
+
+def _compute_models(cmd, *names):
+    from azure.cli.core.profiles import ResourceType, get_sdk
+    return get_sdk(cmd.cli_ctx, ResourceType.MGMT_COMPUTE, *names, mod='models')
+
+
+class StepTimer:
+    """
+    Records how long each step of a command took. Steps may run concurrently.
+    """
+    def __init__(self):
+        self._timings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._timings[name] = self._timings.get(name, 0) + elapsed
+
+    def timed(self, name, func, *args, **kwargs):
+        """ Runs func as the step name, to be submitted to an executor """
+        with self.step(name):
+            return func(*args, **kwargs)
+
+    def report(self):
+        with self._lock:
+            timings = list(self._timings.items())
+        if not timings:
+            return
+        logger.warning('Time spent per step:')
+        for name, elapsed in timings:
+            logger.warning('  %s: %.1fs', name, elapsed)
+
+
 def _call_az_command(command_string, run_async=False, secure_params=None):
     """
     Uses subprocess to run a command string. To hide sensitive parameters from logs, add the
@@ -95,7 +167,7 @@ def _call_az_command(command_string, run_async=False, secure_params=None):
     return None
 
 
-def _invoke_run_command(script_name, vm_name, rg_name, is_linux, parameters=None, additional_custom_scripts=None):
+def _invoke_run_command(cmd, script_name, vm_name, rg_name, is_linux, parameters=None, additional_custom_scripts=None):
     """
     Use azure run command to run the scripts within the vm-repair/scripts file and return stdout, stderr.
     """
@@ -116,29 +188,32 @@ def _invoke_run_command(script_name, vm_name, rg_name, is_linux, parameters=None
     else:
         command_id = RUN_COMMAND_RUN_PS_ID
 
-    # Process script list to scripts string
-    additional_scripts_string = ''
-    if additional_custom_scripts:
-        for script in additional_custom_scripts:
-            additional_scripts_string += ' "@{script_name}"'.format(script_name=script)
+    # Same as '--scripts @"{run_script}" "@{script}"...': the content of each script file
+    scripts = []
+    for script_path in [run_script] + list(additional_custom_scripts or []):
+        with open(script_path, 'r') as script_file:
+            scripts.append(script_file.read())
 
-    run_command = 'az vm run-command invoke -g {rg} -n {vm} --command-id {command_id} ' \
-                  '--scripts @"{run_script}"{additional_scripts} -o json' \
-                  .format(rg=rg_name, vm=vm_name, command_id=command_id, run_script=run_script, additional_scripts=additional_scripts_string)
+    # Same as '--parameters {params}': parameters are shell tokens of name=value
+    RunCommandInput, RunCommandInputParameter = _compute_models(cmd, 'RunCommandInput', 'RunCommandInputParameter')
+    run_command_parameters = []
     if parameters:
-        run_command += " --parameters {params}".format(params=' '.join(parameters))
-    return_str = _call_az_command(run_command)
+        for param in shlex.split(' '.join(parameters)):
+            name, value = param.split('=', 1)
+            run_command_parameters.append(RunCommandInputParameter(name=name, value=value))
 
-    # Extract stdout and stderr, if stderr exists then possible error
-    run_command_return = loads(return_str)
+    logger.debug('Invoking run command %s on %s with %s', command_id, vm_name, script_name)
+    run_command_return = _compute_client(cmd).virtual_machines.begin_run_command(
+        rg_name, vm_name, RunCommandInput(command_id=command_id, script=scripts, parameters=run_command_parameters or None)).result()
 
+    # Extract stdout and stderr, if stderr exists then possible error
     if is_linux:
-        run_command_message = run_command_return['value'][0]['message'].split('[stdout]')[1].split('[stderr]')
+        run_command_message = run_command_return.value[0].message.split('[stdout]')[1].split('[stderr]')
         stdout = run_command_message[0].strip('\n')
         stderr = run_command_message[1].strip('\n')
     else:
-        stdout = run_command_return['value'][0]['message']
-        stderr = run_command_return['value'][1]['message']
+        stdout = run_command_return.value[0].message
+        stderr = run_command_return.value[1].message
 
     return stdout, stderr
 
@@ -171,57 +246,68 @@ def check_extension_version(extension_name):
     logger.debug('The extension with name %s does not exist within available extensions.', extension_name)
 
 
-def _clean_up_resources(resource_group_name, confirm):
+def _clean_up_resources(cmd, resource_group_name, confirm):
+    from azure.core.exceptions import ResourceNotFoundError, HttpResponseError
 
     try:
         if confirm:
             message = 'The clean-up will remove the resource group \'{rg}\' and all repair resources within:\n\n{r}' \
-                      .format(rg=resource_group_name, r='\n'.join(_list_resource_ids_in_rg(resource_group_name)))
+                      .format(rg=resource_group_name, r='\n'.join(_list_resource_ids_in_rg(cmd, resource_group_name)))
             logger.warning(message)
             if not prompt_y_n('Continue with clean-up and delete resources?'):
                 logger.warning('Skipping clean-up')
                 return
 
-        delete_resource_group_command = 'az group delete --name {name} --yes --no-wait'.format(name=resource_group_name)
         logger.info('Cleaning up resources by deleting repair resource group \'%s\'...', resource_group_name)
-        _call_az_command(delete_resource_group_command)
+        # Same as --no-wait: the deletion is not polled
+        _resource_client(cmd).resource_groups.begin_delete(resource_group_name)
     # NoTTYException exception only thrown from confirm block
     except NoTTYException:
         logger.warning('Cannot confirm clean-up resouce in non-interactive mode.')
         logger.warning('Skipping clean-up')
         return
-    except AzCommandError as azCommandError:
-        # Only way to distinguish errors
-        resource_not_found_error_string = 'could not be found'
-        if resource_not_found_error_string in str(azCommandError):
-            logger.info('Resource group not found. Skipping clean up.')
-            return
-        logger.error(azCommandError)
+    except ResourceNotFoundError:
+        logger.info('Resource group not found. Skipping clean up.')
+        return
+    except HttpResponseError as httpResponseError:
+        logger.error(httpResponseError)
         logger.error("Clean up failed.")
 
 
-def _check_existing_rg(rg_name):
+def _check_existing_rg(cmd, rg_name):
+    from azure.core.exceptions import HttpResponseError
+
     # Check for existing dup name
     try:
-        exists_rg_command = 'az group exists -n {resource_group_name} -o json'.format(resource_group_name=rg_name)
         logger.info('Checking for existing resource groups with identical name within subscription...')
-        group_exists = loads(_call_az_command(exists_rg_command))
-    except AzCommandError as azCommandError:
-        logger.error(azCommandError)
+        group_exists = _resource_client(cmd).resource_groups.check_existence(rg_name)
+    except HttpResponseError as httpResponseError:
+        logger.error(httpResponseError)
         raise Exception('Unexpected error occured while fetching existing resource groups.')
 
     logger.info('Resource group exists is \'%s\'', group_exists)
     return group_exists
 
 
-def _check_n_start_vm(vm_name, resource_group_name, confirm, vm_off_message, vm_instance_view):
+def _create_repair_rg(cmd, rg_name, location):
+    if _check_existing_rg(cmd, rg_name):
+        return
+    logger.info('Creating resource group for repair VM and its resources...')
+    from azure.cli.core.profiles import ResourceType, get_sdk
+    ResourceGroup = get_sdk(cmd.cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES, 'ResourceGroup', mod='models')
+    _resource_client(cmd).resource_groups.create_or_update(rg_name, ResourceGroup(location=location))
+
+
+def _check_n_start_vm(cmd, vm_name, resource_group_name, confirm, vm_off_message, vm_instance_view):
     """
     Checks if the VM is running and prompts to auto-start it.
     Returns: True if VM is already running or succeeded in running it.
              False if user selected not to run the VM or running in non-interactive mode.
-    Raises: AzCommandError if vm start command fails
+    Raises: HttpResponseError if vm start fails
             Exception if something went wrong while fetching VM power state
     """
+    from azure.core.exceptions import HttpResponseError
+
     VM_RUNNING = 'PowerState/running'
     try:
         logger.info('Checking VM power state...\n')
@@ -242,18 +328,17 @@ def _check_n_start_vm(vm_name, resource_group_name, confirm, vm_off_message, vm_
                 logger.warning('Skipping VM start')
                 return False
 
-        start_vm_command = 'az vm start --resource-group {rg} --name {n}'.format(rg=resource_group_name, n=vm_name)
         logger.info('Starting the VM. This might take a few minutes...\n')
-        _call_az_command(start_vm_command)
+        _compute_client(cmd).virtual_machines.begin_start(resource_group_name, vm_name).result()
         logger.info('VM started\n')
     # NoTTYException exception only thrown from confirm block
     except NoTTYException:
         logger.warning('Cannot confirm VM auto-start in non-interactive mode.')
         logger.warning('Skipping auto-start')
         return False
-    except AzCommandError as azCommandError:
+    except HttpResponseError as httpResponseError:
         logger.error("Failed to start VM.")
-        raise azCommandError
+        raise httpResponseError
     except Exception as exception:
         logger.error("Failed to check VM power status.")
         raise exception
@@ -261,19 +346,19 @@ def _check_n_start_vm(vm_name, resource_group_name, confirm, vm_off_message, vm_
         return True
 
 
-def _fetch_compatible_sku(source_vm, hyperv):
+def _fetch_compatible_sku(cmd, source_vm, hyperv):
 
     location = source_vm.location
     source_vm_sku = source_vm.hardware_profile.vm_size
 
+    # All the VM sizes of the region are fetched once, and filtered the way 'az vm list-skus -s' does
+    logger.info('Fetching available VM sizes for repair VM...')
+    vm_skus = _list_available_vm_skus(cmd, location)
+
     # First get the source_vm sku, if its available go with it
     if not (not source_vm_sku.endswith('v3') and hyperv):
-        check_sku_command = 'az vm list-skus -s {sku} -l {loc} --query [].name -o tsv'.format(sku=source_vm_sku, loc=location)
-
         logger.info('Checking if source VM size is available...')
-        sku_check = _call_az_command(check_sku_command).strip('\n')
-
-        if sku_check:
+        if any(source_vm_sku.lower() in vm_sku.name.lower() for vm_sku in vm_skus):
             logger.info('Source VM size \'%s\' is available. Using it to create repair VM.\n', source_vm_sku)
             return source_vm_sku
 
@@ -281,30 +366,8 @@ def _fetch_compatible_sku(source_vm, hyperv):
 
     # List available standard SKUs
     # TODO, premium IO only when needed
-    if not hyperv:
-        list_sku_command = 'az vm list-skus -s standard_d -l {loc} --query ' \
-            '"[?capabilities[?name==\'vCPUs\' && to_number(value)>= to_number(\'2\')] && ' \
-            'capabilities[?name==\'vCPUs\' && to_number(value)<= to_number(\'16\')] && ' \
-            'capabilities[?name==\'MemoryGB\' && to_number(value)>=to_number(\'8\')] && ' \
-            'capabilities[?name==\'MemoryGB\' && to_number(value)<=to_number(\'32\')] && ' \
-            'capabilities[?name==\'MaxDataDiskCount\' && to_number(value)>to_number(\'0\')] && ' \
-            'capabilities[?name==\'PremiumIO\' && value==\'True\'] && ' \
-            'capabilities[?name==\'HyperVGenerations\']].name" -o json ' \
-            .format(loc=location)
-
-    else:
-        list_sku_command = 'az vm list-skus -s _v3 -l {loc} --query ' \
-            '"[?capabilities[?name==\'vCPUs\' && to_number(value)>= to_number(\'2\')] && ' \
-            'capabilities[?name==\'vCPUs\' && to_number(value)<= to_number(\'16\')] && ' \
-            'capabilities[?name==\'MemoryGB\' && to_number(value)>=to_number(\'8\')] && ' \
-            'capabilities[?name==\'MemoryGB\' && to_number(value)<=to_number(\'32\')] && ' \
-            'capabilities[?name==\'MaxDataDiskCount\' && to_number(value)>to_number(\'0\')] && ' \
-            'capabilities[?name==\'PremiumIO\' && value==\'True\'] && ' \
-            'capabilities[?name==\'HyperVGenerations\']].name" -o json ' \
-            .format(loc=location)
-
-    logger.info('Fetching available VM sizes for repair VM...')
-    sku_list = loads(_call_az_command(list_sku_command).strip('\n'))
+    size_filter = '_v3' if hyperv else 'standard_d'
+    sku_list = [vm_sku.name for vm_sku in vm_skus if size_filter in vm_sku.name.lower() and _is_compatible_repair_sku(vm_sku)]
 
     if sku_list:
         logger.info('VM size \'%s\' is available. Using it to create repair VM.\n', sku_list[0])
@@ -313,25 +376,96 @@ def _fetch_compatible_sku(source_vm, hyperv):
     return None
 
 
-def _fetch_disk_info(resource_group_name, disk_name):
-    """ Returns sku, location, os_type, hyperVgeneration as tuples """
-    show_disk_command = 'az disk show -g {g} -n {name} --query [sku.name,location,osType,hyperVGeneration] -o json'.format(g=resource_group_name, name=disk_name)
-    disk_info = loads(_call_az_command(show_disk_command))
-    # Note that disk_info will always have 4 elements if the command succeeded, if it fails it will cause an exception
-    sku, location, os_type, hyper_v_version = disk_info[0], disk_info[1], disk_info[2], disk_info[3]
-    return (sku, location, os_type, hyper_v_version)
+def _list_available_vm_skus(cmd, location):
+    """ Returns the VM sizes of the location which are not restricted for the subscription """
+    vm_skus = []
+    for vm_sku in _compute_client(cmd).resource_skus.list(filter="location eq '{}'".format(location)):
+        if vm_sku.resource_type != 'virtualMachines':
+            continue
+        if any(restriction.type == 'Location' and restriction.reason_code == 'NotAvailableForSubscription'
+               for restriction in vm_sku.restrictions or []):
+            continue
+        vm_skus.append(vm_sku)
+    return vm_skus
+
+
+def _is_compatible_repair_sku(vm_sku):
+    """ 2 to 16 vCPUs, 8 to 32 GB of memory, data disks and premium IO, with a known hyper-V generation """
+    capabilities = {capability.name: capability.value for capability in vm_sku.capabilities or []}
+    try:
+        vcpus = float(capabilities['vCPUs'])
+        memory_gb = float(capabilities['MemoryGB'])
+        max_data_disk_count = float(capabilities['MaxDataDiskCount'])
+    except (KeyError, ValueError):
+        return False
+    return 2 <= vcpus <= 16 and 8 <= memory_gb <= 32 and max_data_disk_count > 0 and \
+        capabilities.get('PremiumIO') == 'True' and 'HyperVGenerations' in capabilities
+
+
+def _copy_managed_disk(cmd, resource_group_name, disk_name, copy_disk_name, zone=None, default_hyper_v_generation=None):
+    """ Copies the OS disk within its resource group, and returns the id of the copied disk """
+    compute_client = _compute_client(cmd)
+    source_disk = compute_client.disks.get(resource_group_name, disk_name)
+
+    # Only set hyperV generation when available
+    hyper_v_generation = source_disk.hyper_v_generation
+    if not hyper_v_generation and default_hyper_v_generation:
+        logger.info('The disk did not contain the information of gen2 , but the machine is created from gen2 image')
+        hyper_v_generation = default_hyper_v_generation
+
+    Disk, DiskSku, CreationData = _compute_models(cmd, 'Disk', 'DiskSku', 'CreationData')
+    copy_disk = Disk(location=source_disk.location, sku=DiskSku(name=source_disk.sku.name), os_type=source_disk.os_type,
+                     hyper_v_generation=hyper_v_generation, zones=[zone] if zone else None,
+                     creation_data=CreationData(create_option='Copy', source_resource_id=source_disk.id))
+    logger.info('Copying OS disk of source VM...')
+    return compute_client.disks.begin_create_or_update(resource_group_name, copy_disk_name, copy_disk).result().id
+
+
+def _delete_managed_disk(cmd, resource_group_name, disk_name):
+    logger.info('Deleting copied disk \'%s\'...', disk_name)
+    # The deletion is not polled
+    _compute_client(cmd).disks.begin_delete(resource_group_name, disk_name)
+
+
+def _attach_managed_data_disk(cmd, resource_group_name, vm_name, disk_id):
+    """ Attaches the managed disk to the VM on the first free LUN """
+    compute_client = _compute_client(cmd)
+    vm = compute_client.virtual_machines.get(resource_group_name, vm_name)
+    DataDisk, ManagedDiskParameters = _compute_models(cmd, 'DataDisk', 'ManagedDiskParameters')
+    used_luns = {data_disk.lun for data_disk in vm.storage_profile.data_disks}
+    lun = next(lun for lun in range(len(used_luns) + 1) if lun not in used_luns)
+    vm.storage_profile.data_disks.append(DataDisk(lun=lun, create_option='Attach', managed_disk=ManagedDiskParameters(id=disk_id)))
+    compute_client.virtual_machines.begin_create_or_update(resource_group_name, vm_name, vm).result()
+
+
+def _detach_managed_data_disk(cmd, resource_group_name, vm_name, disk_name):
+    compute_client = _compute_client(cmd)
+    vm = compute_client.virtual_machines.get(resource_group_name, vm_name)
+    data_disks = [data_disk for data_disk in vm.storage_profile.data_disks if data_disk.name.lower() != disk_name.lower()]
+    if len(data_disks) == len(vm.storage_profile.data_disks):
+        from azure.cli.core.azclierror import ResourceNotFoundError
+        raise ResourceNotFoundError('Data disk \'{}\' is not attached to VM \'{}\'.'.format(disk_name, vm_name))
+    vm.storage_profile.data_disks = data_disks
+    compute_client.virtual_machines.begin_create_or_update(resource_group_name, vm_name, vm).result()
+
+
+def _swap_managed_os_disk(cmd, resource_group_name, vm_name, disk_name):
+    """ Same as 'az vm update --os-disk', the disk is looked up within the resource group of the VM """
+    compute_client = _compute_client(cmd)
+    disk = compute_client.disks.get(resource_group_name, disk_name)
+    vm = compute_client.virtual_machines.get(resource_group_name, vm_name)
+    vm.storage_profile.os_disk.managed_disk.id = disk.id
+    vm.storage_profile.os_disk.name = disk.name
+    compute_client.virtual_machines.begin_create_or_update(resource_group_name, vm_name, vm).result()
 
 
 def _get_repair_resource_tag(resource_group_name, source_vm_name):
     return 'repair_source={rg}/{vm_name}'.format(rg=resource_group_name, vm_name=source_vm_name)
 
 
-def _list_resource_ids_in_rg(resource_group_name):
-    get_resources_command = 'az resource list --resource-group {rg} --query [].id -o json' \
-                            .format(rg=resource_group_name)
+def _list_resource_ids_in_rg(cmd, resource_group_name):
     logger.debug('Fetching resources in resource group...')
-    ids = loads(_call_az_command(get_resources_command))
-    return ids
+    return [resource.id for resource in _resource_client(cmd).resources.list_by_resource_group(resource_group_name)]
 
 
 def _fetch_encryption_settings(source_vm):
@@ -357,27 +491,25 @@ def _fetch_encryption_settings(source_vm):
     return Encryption.SINGLE_WITH_KEK, key_vault, kekurl, secreturl
 
 
-def _check_hyperV_gen(source_vm):
-    disk_id = source_vm.storage_profile.os_disk.managed_disk.id
-    show_disk_command = 'az disk show --id {i} --query [hyperVgeneration] -o json' \
-                        .format(i=disk_id)
-    hyperVGen = loads(_call_az_command(show_disk_command))
+def _get_os_disk(cmd, source_vm):
+    from msrestazure.tools import parse_resource_id
+    disk_id = parse_resource_id(source_vm.storage_profile.os_disk.managed_disk.id)
+    return _compute_client(cmd).disks.get(disk_id['resource_group'], disk_id['name'])
+
+
+def _check_hyperV_gen(cmd, source_vm):
+    hyperVGen = _get_os_disk(cmd, source_vm).hyper_v_generation
     if hyperVGen == 'V2':
         raise SkuDoesNotSupportHyperV('Cannot support V2 HyperV generation. Please run command without --enabled-nested')
 
 
-def _check_linux_hyperV_gen(source_vm):
-    disk_id = source_vm.storage_profile.os_disk.managed_disk.id
-    show_disk_command = 'az disk show --id {i} --query [hyperVgeneration] -o json' \
-                        .format(i=disk_id)
-    disk_hyperVGen = loads(_call_az_command(show_disk_command))
+def _check_linux_hyperV_gen(cmd, source_vm, source_vm_instance_view):
+    disk_hyperVGen = _get_os_disk(cmd, source_vm).hyper_v_generation
 
     if disk_hyperVGen != 'V2':
         logger.info('Checking if source VM is gen2')
         # if image is created from Marketplace gen2 image , the disk will not have the mark for gen2
-        fetch_hypervgen_command = 'az vm get-instance-view --ids {id} --query "[instanceView.hyperVGeneration]" -o json'.format(id=source_vm.id)
-        hyperVGen_list = loads(_call_az_command(fetch_hypervgen_command))
-        vm_hyperVGen = hyperVGen_list[0]
+        vm_hyperVGen = source_vm_instance_view.instance_view.hyper_v_generation
         if vm_hyperVGen != 'V2':
             vm_hyperVGen = 'V1'
 
@@ -403,14 +535,14 @@ def _secret_tag_check(resource_group_name, copy_disk_name, secreturl):
         _call_az_command(set_tag_command)
 
 
-def _unlock_singlepass_encrypted_disk(repair_vm_name, repair_group_name, is_linux):
+def _unlock_singlepass_encrypted_disk(cmd, repair_vm_name, repair_group_name, is_linux):
     logger.info('Unlocking attached copied disk...')
     if is_linux:
-        return _unlock_mount_linux_encrypted_disk(repair_vm_name, repair_group_name)
-    return _unlock_mount_windows_encrypted_disk(repair_vm_name, repair_group_name)
+        return _unlock_mount_linux_encrypted_disk(cmd, repair_vm_name, repair_group_name)
+    return _unlock_mount_windows_encrypted_disk(cmd, repair_vm_name, repair_group_name)
 
 
-def _unlock_singlepass_encrypted_disk_fallback(source_vm, resource_group_name, repair_vm_name, repair_group_name, copy_disk_name, is_linux):
+def _unlock_singlepass_encrypted_disk_fallback(cmd, source_vm, resource_group_name, repair_vm_name, repair_group_name, copy_disk_name, is_linux):
     """
     Fallback for unlocking disk when script fails. This will install the ADE extension to unlock the Data disk.
     """
@@ -439,7 +571,7 @@ def _unlock_singlepass_encrypted_disk_fallback(source_vm, resource_group_name, r
             # Validating secret tag and setting original tag if it got changed
             _secret_tag_check(resource_group_name, copy_disk_name, secreturl)
             logger.debug("Manually unlocking and mounting disk for Linux VMs.")
-            _unlock_mount_linux_encrypted_disk(repair_vm_name, repair_group_name)
+            _unlock_mount_linux_encrypted_disk(cmd, repair_vm_name, repair_group_name)
     except AzCommandError as azCommandError:
         error_message = str(azCommandError)
         # Linux VM encryption extension bug where it fails and then continue to mount disk manually
@@ -447,28 +579,46 @@ def _unlock_singlepass_encrypted_disk_fallback(source_vm, resource_group_name, r
             logger.debug("Expected bug for linux VMs. Ignoring error.")
             # Validating secret tag and setting original tag if it got changed
             _secret_tag_check(resource_group_name, copy_disk_name, secreturl)
-            _unlock_mount_linux_encrypted_disk(repair_vm_name, repair_group_name)
+            _unlock_mount_linux_encrypted_disk(cmd, repair_vm_name, repair_group_name)
         else:
             raise
 
 
-def _unlock_mount_linux_encrypted_disk(repair_vm_name, repair_group_name):
+def _unlock_mount_linux_encrypted_disk(cmd, repair_vm_name, repair_group_name):
     # Unlocks the disk using the phasephrase and mounts it on the repair VM.
     LINUX_RUN_SCRIPT_NAME = 'linux-mount-encrypted-disk.sh'
-    return _invoke_run_command(LINUX_RUN_SCRIPT_NAME, repair_vm_name, repair_group_name, True)
+    return _invoke_run_command(cmd, LINUX_RUN_SCRIPT_NAME, repair_vm_name, repair_group_name, True)
 
 
-def _unlock_mount_windows_encrypted_disk(repair_vm_name, repair_group_name):
+def _unlock_mount_windows_encrypted_disk(cmd, repair_vm_name, repair_group_name):
     # Unlocks the disk using the phasephrase and mounts it on the repair VM.
     WINDOWS_RUN_SCRIPT_NAME = 'win-mount-encrypted-disk.ps1'
-    return _invoke_run_command(WINDOWS_RUN_SCRIPT_NAME, repair_vm_name, repair_group_name, False)
+    return _invoke_run_command(cmd, WINDOWS_RUN_SCRIPT_NAME, repair_vm_name, repair_group_name, False)
+
+
+def _list_image_urns(cmd, location, publisher, offer, sku):
+    """ Returns the urns of all the versions of an image, like 'az vm image list --all' """
+    versions = _compute_client(cmd).virtual_machine_images.list(location, publisher, offer, sku)
+    return [':'.join([publisher, offer, sku, version.name]) for version in versions]
+
 
+def _search_image_urns(cmd, location, publisher, offer, sku):
+    """ Same as _list_image_urns, where offer and sku are matched as substrings like 'az vm image list --all' """
+    images_client = _compute_client(cmd).virtual_machine_images
+    urns = []
+    for image_offer in images_client.list_offers(location, publisher):
+        if offer.lower() not in image_offer.name.lower():
+            continue
+        for image_sku in images_client.list_skus(location, publisher, image_offer.name):
+            if sku.lower() in image_sku.name.lower():
+                urns.extend(_list_image_urns(cmd, location, publisher, image_offer.name, image_sku.name))
+    return urns
 
-def _fetch_compatible_windows_os_urn(source_vm):
+
+def _fetch_compatible_windows_os_urn(cmd, source_vm):
     location = source_vm.location
-    fetch_urn_command = 'az vm image list -s "2016-Datacenter" -f WindowsServer -p MicrosoftWindowsServer -l {loc} --verbose --all --query "[?sku==\'2016-Datacenter\'].urn | reverse(sort(@))" -o json'.format(loc=location)
     logger.info('Fetching compatible Windows OS images from gallery...')
-    urns = loads(_call_az_command(fetch_urn_command))
+    urns = sorted(_list_image_urns(cmd, location, 'MicrosoftWindowsServer', 'WindowsServer', '2016-Datacenter'), reverse=True)
 
     # No OS images available for Windows2016
     if not urns:
@@ -487,10 +637,9 @@ def _fetch_compatible_windows_os_urn(source_vm):
     return urns[0]
 
 
-def _suse_image_selector(distro):
-    fetch_urn_command = 'az vm image list --publisher SUSE --offer {offer} --sku gen1 --verbose --all --query "[].urn | reverse(sort(@))" -o json'.format(offer=distro)
+def _suse_image_selector(cmd, distro, location):
     logger.info('Fetching compatible SUSE OS images from gallery...')
-    urns = loads(_call_az_command(fetch_urn_command))
+    urns = sorted(_search_image_urns(cmd, location, 'SUSE', distro, 'gen1'), reverse=True)
 
     # Raise exception when not finding SUSE image
     if not urns:
@@ -502,10 +651,9 @@ def _suse_image_selector(distro):
     return urns[0]
 
 
-def _suse_image_selector_gen2(distro):
-    fetch_urn_command = 'az vm image list --publisher SUSE --offer {offer} --sku gen2 --verbose --all --query "[].urn | reverse(sort(@))" -o json'.format(offer=distro)
+def _suse_image_selector_gen2(cmd, distro, location):
     logger.info('Fetching compatible SUSE OS images from gallery...')
-    urns = loads(_call_az_command(fetch_urn_command))
+    urns = sorted(_search_image_urns(cmd, location, 'SUSE', distro, 'gen2'), reverse=True)
 
     # Raise exception when not finding SUSE image
     if not urns:
@@ -517,7 +665,7 @@ def _suse_image_selector_gen2(distro):
     return urns[0]
 
 
-def _select_distro_linux(distro):
+def _select_distro_linux(cmd, distro, location):
     image_lookup = {
         'rhel6': 'RedHat:RHEL:6.10:latest',
         'rhel7': 'RedHat:rhel-raw:7-raw:latest',
@@ -529,12 +677,17 @@ def _select_distro_linux(distro):
         'centos8': 'OpenLogic:CentOS:8_4:latest',
         'oracle6': 'Oracle:Oracle-Linux:6.10:latest',
         'oracle7': 'Oracle:Oracle-Linux:ol79:latest',
-        'oracle8': 'Oracle:Oracle-Linux:ol82:latest',
-        'sles12': _suse_image_selector('sles-12'),
-        'sles15': _suse_image_selector('sles-15')
+        'oracle8': 'Oracle:Oracle-Linux:ol82:latest'
+    }
+    # SUSE images are only looked up when selected
+    suse_lookup = {
+        'sles12': 'sles-12',
+        'sles15': 'sles-15'
     }
     if distro in image_lookup:
         os_image_urn = image_lookup[distro]
+    elif distro in suse_lookup:
+        os_image_urn = _suse_image_selector(cmd, suse_lookup[distro], location)
     else:
         if distro.count(":") == 3:
             logger.info('A custom URN was provided , will be used as distro for the recovery VM')
@@ -545,7 +698,7 @@ def _select_distro_linux(distro):
     return os_image_urn
 
 
-def _select_distro_linux_gen2(distro):
+def _select_distro_linux_gen2(cmd, distro, location):
     # base on the document : https://docs.microsoft.com/en-us/azure/virtual-machines/generation-2#generation-2-vm-images-in-azure-marketplace
     # RHEL/Centos/Oracle 6 are not supported for Gen 2
     image_lookup = {
@@ -559,12 +712,17 @@ def _select_distro_linux_gen2(distro):
         'centos8': 'OpenLogic:CentOS:8_4-gen2:latest',
         'oracle6': 'Oracle:Oracle-Linux:ol79-gen2:latest',
         'oracle7': 'Oracle:Oracle-Linux:ol79-gen2:latest',
-        'oracle8': 'Oracle:Oracle-Linux:ol82-gen2:latest',
-        'sles12': _suse_image_selector_gen2('sles-12'),
-        'sles15': _suse_image_selector_gen2('sles-15')
+        'oracle8': 'Oracle:Oracle-Linux:ol82-gen2:latest'
+    }
+    # SUSE images are only looked up when selected
+    suse_lookup = {
+        'sles12': 'sles-12',
+        'sles15': 'sles-15'
     }
     if distro in image_lookup:
         os_image_urn = image_lookup[distro]
+    elif distro in suse_lookup:
+        os_image_urn = _suse_image_selector_gen2(cmd, suse_lookup[distro], location)
     else:
         if distro.count(":") == 3:
             logger.info('A custom URN was provided , will be used as distro for the recovery VM')
@@ -596,14 +754,65 @@ def _resolve_api_version(rcf, resource_provider_namespace, parent_resource_path,
         .format(resource_type))
 
 
+def _get_run_script_map_cache_path():
+    from azure.cli.core._environment import get_config_dir
+    return os.path.join(get_config_dir(), RUN_SCRIPT_MAP_CACHE_FILE_NAME)
+
+
+def _load_run_script_map_cache(cache_path):
+    """ Returns the cached entries of the run script maps, keyed by map url """
+    try:
+        with open(cache_path, 'r') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_run_script_map_cache(cache_path, cache):
+    # Written to a temporary file first, so that concurrent commands never read a partial cache
+    temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    try:
+        with open(temp_path, 'w') as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(temp_path, cache_path)
+    except OSError as error:
+        logger.debug('Failed to cache the run script map: %s', error)
+
+
 def _fetch_run_script_map():
+    """
+    Fetches map.json from GitHub. The map is cached on disk for RUN_SCRIPT_MAP_CACHE_TTL seconds,
+    after which it is revalidated with its ETag and only downloaded again when it changed.
+    """
+    cache_path = _get_run_script_map_cache_path()
+    cache = _load_run_script_map_cache(cache_path)
+    entry = cache.get(REPAIR_MAP_URL)
+    if entry and time.time() - entry['fetched_at'] < RUN_SCRIPT_MAP_CACHE_TTL:
+        logger.debug('Using the cached run script map of %s', REPAIR_MAP_URL)
+        return entry['map']
+
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    try:
+        response = requests.get(url=REPAIR_MAP_URL, headers=headers)
+        # Raise exception when request fails
+        response.raise_for_status()
+    except requests.exceptions.RequestException as exception:
+        if not entry:
+            raise
+        logger.warning('Failed to refresh the run script map, using the cached one: %s', exception)
+        return entry['map']
 
-    # Fetch map.json from GitHub
-    response = requests.get(url=REPAIR_MAP_URL)
-    # Raise exception when request fails
-    response.raise_for_status()
+    if response.status_code == 304:
+        logger.debug('The cached run script map of %s is up to date', REPAIR_MAP_URL)
+        entry['fetched_at'] = time.time()
+    else:
+        entry = {'etag': response.headers.get('ETag'), 'fetched_at': time.time(), 'map': response.json()}
+        cache[REPAIR_MAP_URL] = entry
+    _save_run_script_map_cache(cache_path, cache)
 
-    return response.json()
+    return entry['map']
 
 
 def _fetch_run_script_path(run_id):
@@ -701,8 +910,8 @@ def _get_function_param_dict(frame):
     return values
 
 
-def _unlock_encrypted_vm_run(repair_vm_name, repair_group_name, is_linux):
-    stdout, stderr = _unlock_singlepass_encrypted_disk(repair_vm_name, repair_group_name, is_linux)
+def _unlock_encrypted_vm_run(cmd, repair_vm_name, repair_group_name, is_linux):
+    stdout, stderr = _unlock_singlepass_encrypted_disk(cmd, repair_vm_name, repair_group_name, is_linux)
     logger.debug('Unlock script STDOUT:\n%s', stdout)
     if stderr:
         logger.warning('Encryption unlock script error was generated:\n%s', stderr)
@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+from azure.cli.core.azclierror import ResourceNotFoundError
+
+from azext_vm_repair import repair_utils
+from azext_vm_repair.repair_utils import (StepTimer, _compute_client, _detach_managed_data_disk, _fetch_run_script_map,
+                                          _fetch_run_script_path)
+
+SCRIPT_MAP = [{'id': 'win-hello-world', 'path': 'src/windows/win-hello-world.ps1'}]
+
+
+def _response(status_code, json_data=None, etag=None):
+    response = mock.MagicMock(status_code=status_code, headers={'ETag': etag} if etag else {})
+    response.json.return_value = json_data
+    return response
+
+
+class RunScriptMapCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        patcher = mock.patch('azure.cli.core._environment.get_config_dir', return_value=self.config_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 1000.0
+        patcher = mock.patch.object(repair_utils.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch.object(repair_utils.requests, 'get')
+    def test_map_is_cached_then_revalidated_with_its_etag(self, get):
+        get.return_value = _response(200, SCRIPT_MAP, etag='"v1"')
+        self.assertEqual(_fetch_run_script_map(), SCRIPT_MAP)
+        self.assertTrue(os.path.isfile(os.path.join(self.config_dir, repair_utils.RUN_SCRIPT_MAP_CACHE_FILE_NAME)))
+
+        # within the TTL the map is not fetched again
+        self.now += repair_utils.RUN_SCRIPT_MAP_CACHE_TTL - 1
+        self.assertEqual(_fetch_run_script_path('win-hello-world'), 'src/windows/win-hello-world.ps1')
+        self.assertEqual(get.call_count, 1)
+
+        # once expired, an unchanged map is not downloaded again
+        self.now += 2
+        get.return_value = _response(304)
+        self.assertEqual(_fetch_run_script_map(), SCRIPT_MAP)
+        self.assertEqual(get.call_args[1]['headers'], {'If-None-Match': '"v1"'})
+
+        # and the revalidation restarts the TTL
+        self.now += repair_utils.RUN_SCRIPT_MAP_CACHE_TTL - 1
+        self.assertEqual(_fetch_run_script_map(), SCRIPT_MAP)
+        self.assertEqual(get.call_count, 2)
+
+    @mock.patch.object(repair_utils.requests, 'get')
+    def test_stale_map_is_used_when_github_is_unreachable(self, get):
+        get.return_value = _response(200, SCRIPT_MAP, etag='"v1"')
+        _fetch_run_script_map()
+
+        self.now += repair_utils.RUN_SCRIPT_MAP_CACHE_TTL + 1
+        get.side_effect = requests.exceptions.ConnectionError()
+        self.assertEqual(_fetch_run_script_map(), SCRIPT_MAP)
+
+        # without any cached map the error is raised
+        with mock.patch.object(repair_utils, 'REPAIR_MAP_URL', 'https://raw.githubusercontent.com/fork/map.json'):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                _fetch_run_script_map()
+
+
+class StepTimerTest(unittest.TestCase):
+    def test_report_sums_each_step(self):
+        timer = StepTimer()
+        self.assertEqual(timer.timed('Copy OS disk', lambda value: value, 42), 42)
+        with timer.step('Create repair VM'):
+            pass
+        with timer.step('Copy OS disk'):
+            pass
+
+        with mock.patch.object(repair_utils, 'logger') as logger:
+            timer.report()
+        self.assertEqual([c[0][1] for c in logger.warning.call_args_list[1:]], ['Copy OS disk', 'Create repair VM'])
+
+
+
+class ManagedDiskTest(unittest.TestCase):
+    @mock.patch('azure.cli.core.commands.client_factory.get_mgmt_service_client')
+    def test_clients_are_shared_within_a_command(self, get_client):
+        get_client.side_effect = lambda *_: mock.MagicMock()
+        first, second = mock.MagicMock(), mock.MagicMock()
+
+        self.assertIs(_compute_client(first), _compute_client(first))
+        self.assertIsNot(_compute_client(first), _compute_client(second))
+        self.assertEqual(get_client.call_count, 2)
+
+    @mock.patch.object(repair_utils, '_compute_client')
+    def test_detach_data_disk(self, compute_client):
+        vm = compute_client.return_value.virtual_machines.get.return_value
+        vm.storage_profile.data_disks = [mock.MagicMock(), mock.MagicMock()]
+        vm.storage_profile.data_disks[0].name = 'Repaired-Disk'
+        vm.storage_profile.data_disks[1].name = 'other-disk'
+
+        _detach_managed_data_disk(mock.MagicMock(), 'rg', 'repair-vm', 'repaired-disk')
+        self.assertEqual([data_disk.name for data_disk in vm.storage_profile.data_disks], ['other-disk'])
+        compute_client.return_value.virtual_machines.begin_create_or_update.assert_called_once_with('rg', 'repair-vm', vm)
+
+        with self.assertRaises(ResourceNotFoundError):
+            _detach_managed_data_disk(mock.MagicMock(), 'rg', 'repair-vm', 'repaired-disk')
+        compute_client.return_value.virtual_machines.begin_create_or_update.assert_called_once_with('rg', 'repair-vm', vm)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import queue
+import socket
+import threading
+import time
+import unittest
+
+from azext_webapp.tunnel import TunnelServer
+
+
+class EchoWebSocket(object):
+    """Stands in for the remote tunnel: everything sent to it is received back."""
+    def __init__(self):
+        self.frames = queue.Queue()
+        self.closed = False
+
+    def send_binary(self, data):
+        self.frames.put(data)
+
+    def recv(self):
+        return self.frames.get()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.frames.put(b'')
+
+
+class LoopbackTunnelServer(TunnelServer):
+    def __init__(self):
+        super(LoopbackTunnelServer, self).__init__('127.0.0.1', 0, 'app', 'user', 'password')
+        self.websockets = []
+
+    def _create_websocket(self):
+        ws = EchoWebSocket()
+        self.websockets.append(ws)
+        return ws
+
+    def _enable_trace(self):
+        pass
+
+
+def _recv_exactly(sock, size):
+    received = bytearray()
+    while len(received) < size:
+        chunk = sock.recv(min(1024 * 1024, size - len(received)))
+        if not chunk:
+            break
+        received += chunk
+    return bytes(received)
+
+
+class TunnelServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = LoopbackTunnelServer()
+        threading.Thread(target=self.server.start_server, daemon=True).start()
+        self.addCleanup(self.server.stop_server)
+
+    def _connect(self):
+        for attempt in range(100):
+            try:
+                client = socket.create_connection(('127.0.0.1', self.server.local_port))
+                break
+            except ConnectionRefusedError:  # the server thread is not listening yet
+                if attempt == 99:
+                    raise
+                time.sleep(0.01)
+        self.addCleanup(client.close)
+        return client
+
+    def test_serves_simultaneous_clients(self):
+        first = self._connect()
+        first.sendall(b'first')
+        self.assertEqual(_recv_exactly(first, 5), b'first')
+
+        # a second client is served while the first one is still connected
+        second = self._connect()
+        second.sendall(b'second')
+        self.assertEqual(_recv_exactly(second, 6), b'second')
+        first.sendall(b'again')
+        self.assertEqual(_recv_exactly(first, 5), b'again')
+        self.assertEqual(len(self.server.websockets), 2)
+
+        first.close()
+        for _ in range(100):
+            if self.server.websockets[0].closed:
+                break
+            time.sleep(0.01)
+        self.assertTrue(self.server.websockets[0].closed)
+        self.assertFalse(self.server.websockets[1].closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,34 +4,26 @@
 # --------------------------------------------------------------------------------------------
 
 # pylint: disable=import-error,unused-import,import-outside-toplevel,super-with-arguments
-import sys
+import selectors
 import ssl
 import socket
 import time
-import traceback
 import logging as logs
 from contextlib import closing
-from datetime import datetime
-from threading import Thread
+from threading import Event, Lock, Thread
 
 import websocket
-from websocket import create_connection, WebSocket
+from websocket import create_connection
 
 from knack.util import CLIError
 from knack.log import get_logger
 logger = get_logger(__name__)
 
 
-class TunnelWebSocket(WebSocket):
-    def recv_frame(self):
-        frame = super(TunnelWebSocket, self).recv_frame()
-        logger.info('Received frame: %s', frame)
-        return frame
-
-    def recv(self):
-        data = super(TunnelWebSocket, self).recv()
-        logger.info('Received websocket data: %s', data)
-        return data
+# size of the buffer each connection reads local data into; it is allocated once per connection and reused
+TUNNEL_BUFFER_SIZE = 64 * 1024
+# how often the accept loop wakes up to check whether the server was stopped
+ACCEPT_POLL_INTERVAL = 1
 
 
 # pylint: disable=no-member,too-many-instance-attributes,bare-except,no-self-use
@@ -44,8 +36,9 @@ class TunnelServer(object):
         self.remote_addr = remote_addr
         self.remote_user_name = remote_user_name
         self.remote_password = remote_password
-        self.client = None
-        self.ws = None
+        self._stopped = Event()
+        self._lock = Lock()
+        self._connections = {}
         logger.info('Creating a socket on port: %s', self.local_port)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         logger.info('Setting socket options')
@@ -102,88 +95,120 @@ class TunnelServer(object):
             return True
         return False
 
+    def _create_websocket(self):
+        host = 'wss://{}{}'.format(self.remote_addr, '.scm.azurewebsites.net/AppServiceTunnel/Tunnel.ashx')
+        basic_auth_header = 'Authorization: Basic {}'.format(self.create_basic_auth())
+        return create_connection(host,
+                                 sockopt=((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),),
+                                 header=[basic_auth_header],
+                                 sslopt={'cert_reqs': ssl.CERT_NONE},
+                                 enable_multithread=True)
+
+    def _enable_trace(self):
+        cli_logger = get_logger()  # get CLI logger which has the level set through command lines
+        is_verbose = any(handler.level <= logs.INFO for handler in cli_logger.handlers)
+        if is_verbose:
+            logger.info('Websocket tracing enabled')
+            websocket.enableTrace(True)
+        else:
+            logger.warning('Websocket tracing disabled, use --verbose flag to enable')
+            websocket.enableTrace(False)
+
     def _listen(self):
+        """
+        Accept local clients until the server is stopped. Every client gets its own websocket to the remote
+        tunnel and is served on its own threads, so any number of clients can be connected at the same time.
+        """
         self.sock.listen(100)
+        self._enable_trace()
         index = 0
-        basic_auth_string = self.create_basic_auth()
-        while True:
-            self.client, _address = self.sock.accept()
-            self.client.settimeout(1800)
-            host = 'wss://{}{}'.format(self.remote_addr, '.scm.azurewebsites.net/AppServiceTunnel/Tunnel.ashx')
-            basic_auth_header = 'Authorization: Basic {}'.format(basic_auth_string)
-            cli_logger = get_logger()  # get CLI logger which has the level set through command lines
-            is_verbose = any(handler.level <= logs.INFO for handler in cli_logger.handlers)
-            if is_verbose:
-                logger.info('Websocket tracing enabled')
-                websocket.enableTrace(True)
-            else:
-                logger.warning('Websocket tracing disabled, use --verbose flag to enable')
-                websocket.enableTrace(False)
-            self.ws = create_connection(host,
-                                        sockopt=((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),),
-                                        class_=TunnelWebSocket,
-                                        header=[basic_auth_header],
-                                        sslopt={'cert_reqs': ssl.CERT_NONE},
-                                        enable_multithread=True)
-            logger.info('Websocket, connected status: %s', self.ws.connected)
-            index = index + 1
-            logger.info('Got debugger connection... index: %s', index)
-            debugger_thread = Thread(target=self._listen_to_client, args=(self.client, self.ws, index))
-            web_socket_thread = Thread(target=self._listen_to_web_socket, args=(self.client, self.ws, index))
-            debugger_thread.start()
-            web_socket_thread.start()
-            logger.info('Both debugger and websocket threads started...')
-            logger.warning('Successfully connected to local server..')
-            debugger_thread.join()
-            web_socket_thread.join()
-            logger.info('Both debugger and websocket threads stopped...')
-            logger.warning('Stopped local server..')
+        with selectors.DefaultSelector() as selector, self.sock:
+            selector.register(self.sock, selectors.EVENT_READ)
+            while not self._stopped.is_set():
+                if not selector.select(timeout=ACCEPT_POLL_INTERVAL):
+                    continue
+                client, _address = self.sock.accept()
+                index = index + 1
+                logger.info('Got debugger connection... index: %s', index)
+                Thread(target=self._serve_client, args=(client, index), daemon=True).start()
+
+    def _serve_client(self, client, index):
+        start = time.time()
+        client.settimeout(1800)
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            ws = self._create_websocket()
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.warning('Failed to connect to the remote tunnel for connection %s: %s', index, ex)
+            client.close()
+            return
+        logger.info('Websocket connected in %.3fs, index: %s', time.time() - start, index)
+        with self._lock:
+            self._connections[index] = (client, ws)
+        logger.warning('Successfully connected to local server.. (connection %s, %s active)',
+                       index, len(self._connections))
+
+        web_socket_thread = Thread(target=self._listen_to_web_socket, args=(client, ws, index), daemon=True)
+        web_socket_thread.start()
+        self._listen_to_client(client, ws, index)
+        web_socket_thread.join()
+
+        with self._lock:
+            self._connections.pop(index, None)
+        logger.warning('Stopped connection %s..', index)
+
+    @staticmethod
+    def _close(client, ws_socket):
+        try:
+            client.close()
+        finally:
+            ws_socket.close()
 
     def _listen_to_web_socket(self, client, ws_socket, index):
-        while True:
-            try:
-                logger.info('Waiting for websocket data, connection status: %s, index: %s', ws_socket.connected, index)
+        received = 0
+        try:
+            while True:
                 data = ws_socket.recv()
-                logger.info('Received websocket data: %s, index: %s', data, index)
-                if data:
-                    # Set the response to echo back the recieved data
-                    response = data
-                    logger.info('Sending to debugger, response: %s, index: %s', response, index)
-                    client.sendall(response)
-                    logger.info('Done sending to debugger, index: %s', index)
-                else:
-                    logger.info('Client disconnected!, index: %s', index)
-                    client.close()
-                    ws_socket.close()
+                if not data:
+                    logger.info('Websocket closed, index: %s', index)
                     break
-            except:
-                traceback.print_exc(file=sys.stdout)
-                client.close()
-                ws_socket.close()
-                return False
+                if isinstance(data, str):
+                    data = data.encode('utf-8')
+                client.sendall(data)
+                received += len(data)
+        except Exception:  # pylint: disable=broad-except
+            if not self._stopped.is_set():
+                logger.info('Websocket connection %s ended', index, exc_info=True)
+        finally:
+            logger.info('Received %s bytes from websocket, index: %s', received, index)
+            self._close(client, ws_socket)
 
     def _listen_to_client(self, client, ws_socket, index):
-        while True:
-            try:
-                logger.info('Waiting for debugger data, index: %s', index)
-                buf = bytearray(4096)
-                nbytes = client.recv_into(buf, 4096)
-                logger.info('Received debugger data, nbytes: %s, index: %s', nbytes, index)
-                if nbytes > 0:
-                    responseData = buf[0:nbytes]
-                    logger.info('Sending to websocket, response data: %s, index: %s', responseData, index)
-                    ws_socket.send_binary(responseData)
-                    logger.info('Done sending to websocket, index: %s', index)
-                else:
+        buf = bytearray(TUNNEL_BUFFER_SIZE)
+        view = memoryview(buf)
+        sent = 0
+        try:
+            while True:
+                nbytes = client.recv_into(buf)
+                if nbytes <= 0:
                     logger.warning('Client disconnected %s', index)
-                    client.close()
-                    ws_socket.close()
                     break
-            except:
-                traceback.print_exc(file=sys.stdout)
-                client.close()
-                ws_socket.close()
-                return False
+                # the frame keeps its payload, so only the received bytes are copied out of the shared buffer
+                ws_socket.send_binary(bytes(view[:nbytes]))
+                sent += nbytes
+        except Exception:  # pylint: disable=broad-except
+            if not self._stopped.is_set():
+                logger.info('Debugger connection %s ended', index, exc_info=True)
+        finally:
+            logger.info('Sent %s bytes to websocket, index: %s', sent, index)
+            self._close(client, ws_socket)
+
+    def stop_server(self):
+        self._stopped.set()
+        with self._lock:
+            connections = list(self._connections.values())
+        for client, ws_socket in connections:
+            self._close(client, ws_socket)
 
     def start_server(self):
         logger.warning('Start your favorite client and connect to port %s', self.local_port)